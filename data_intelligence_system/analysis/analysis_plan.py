@@ -0,0 +1,192 @@
+"""
+analysis/analysis_plan.py
+
+تشغيل عدة تحليلات على نفس البيانات بخطة واحدة بدل تجهيز البيانات من جديد في كل تحليل:
+    - الوسائط المشتركة تُحسب مرة واحدة (وعند الحاجة فقط): تحويل أعمدة التواريخ، المصفوفة الرقمية،
+      نسخة ملء المفقود (القيم الشاذة)، الصفوف المكتملة ونسختها المُحجَّمة (التجميع)،
+      ورموز الأعمدة الفئوية (Chi-Square)، وتسجيل log_basic_info مرة واحدة
+    - التحليلات المستقلة تعمل بالتوازي في عمليات منفصلة (سياق بدء صريح، انظر utils.parallel)؛
+      الوسائط المحسوبة تُرسل لكل عامل مرة واحدة عند تهيئته وليس مع كل مهمة، والعزل بالعمليات يحمي
+      حالة matplotlib العامة وتعديل التحليلات لنسخها من البيانات
+    - كل عامل يأخذ حصة من الأنوية (الأنوية ÷ العمال) لتوازيه الداخلي (MI، مسح k، n_jobs، BLAS)
+
+الاستخدام:
+    from data_intelligence_system.analysis.analysis_plan import run_analysis_plan
+
+    results = run_analysis_plan(df, target_col="species")
+    results["correlation"]["correlation_matrix"]
+"""
+
+import logging
+import os
+from functools import cached_property
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from data_intelligence_system.analysis.analysis_utils import (
+    get_categorical_columns,
+    get_numerical_columns,
+    log_basic_info
+)
+from data_intelligence_system.analysis.clustering_analysis import run_clustering
+from data_intelligence_system.analysis.correlation_analysis import run_correlation_analysis
+from data_intelligence_system.analysis.descriptive_stats import generate_descriptive_stats
+from data_intelligence_system.analysis.outlier_detection import prepare_outlier_matrix, run_outlier_detection
+from data_intelligence_system.analysis.target_kernel import factorize_columns
+from data_intelligence_system.analysis.target_relation_analysis import run_target_relation_analysis
+from data_intelligence_system.config.performance_config import ANALYSIS_PLAN_WORKERS
+from data_intelligence_system.utils.parallel import limit_nested_parallelism, process_pool, resolve_workers
+from data_intelligence_system.utils.timer import Timer
+from data_intelligence_system.utils.type_sniffing import convert_datetime_columns, sniff_datetime_columns
+
+logger = logging.getLogger(__name__)
+
+ANALYSES = ("descriptive", "correlation", "outliers", "clustering", "target")
+
+# الوسائط التي يحتاجها كل تحليل (تُحسب قبل التوزيع على العمليات)
+REQUIREMENTS = {
+    "descriptive": (),
+    "correlation": ("numeric",),
+    "outliers": ("filled",),
+    "clustering": ("complete", "scaled"),
+    "target": ("category_codes",),
+}
+
+# الأثقل أولًا ليبدأ مبكرًا عند التوازي
+_COST_ORDER = ("clustering", "target", "outliers", "correlation", "descriptive")
+
+
+class PreparedData:
+    """
+    الوسائط المشتركة بين التحليلات، كل منها يُحسب عند أول طلب فقط.
+    frame نسخة سطحية من البيانات بعد تحويل أعمدة التواريخ (الأصل لا يتغير).
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.frame = df.copy(deep=False)
+        convert_datetime_columns(self.frame, sniff_datetime_columns(self.frame))
+        self.numeric_cols = get_numerical_columns(self.frame)
+        self.categorical_cols = get_categorical_columns(self.frame)
+
+    @cached_property
+    def numeric(self) -> pd.DataFrame:
+        return self.frame[self.numeric_cols]
+
+    @cached_property
+    def filled(self) -> pd.DataFrame:
+        """الأعمدة الرقمية بعد ملء المفقود بالمتوسط (كما في prepare_outlier_matrix)."""
+        return prepare_outlier_matrix(self.frame)
+
+    @cached_property
+    def complete(self) -> pd.DataFrame:
+        """الصفوف المكتملة من الأعمدة الرقمية (كما في run_clustering)."""
+        return self.numeric.dropna()
+
+    @cached_property
+    def scaled(self) -> np.ndarray:
+        return StandardScaler().fit_transform(self.complete)
+
+    @cached_property
+    def category_codes(self) -> Dict[str, tuple]:
+        return factorize_columns(self.frame, self.categorical_cols)
+
+    def warm(self, analyses: Sequence[str]) -> "PreparedData":
+        """حساب الوسائط المطلوبة للتحليلات مسبقًا (مرة واحدة قبل التوزيع)."""
+        for analysis in analyses:
+            for name in REQUIREMENTS[analysis]:
+                # run_clustering يتوقف قبل التحجيم في هذه الحالات
+                if name == "scaled" and (len(self.numeric_cols) < 2 or len(self.complete) < 10):
+                    continue
+                getattr(self, name)
+        return self
+
+
+def _run_one(prepared: PreparedData, analysis: str, options: Dict[str, Any]) -> Any:
+    # التحليلات التي تضيف أعمدة أو تعدلها (cluster، ترميز الهدف) تعمل على نسخة سطحية
+    frame = prepared.frame.copy(deep=False)
+    if analysis == "descriptive":
+        return generate_descriptive_stats(frame)
+    if analysis == "correlation":
+        return run_correlation_analysis(frame, method=options["correlation_method"], prepared=prepared)
+    if analysis == "outliers":
+        return run_outlier_detection(frame, method=options["outlier_method"], prepared=prepared)
+    if analysis == "clustering":
+        # عمود cluster موجود مسبقًا يُكتب في مكانه (في بيانات المستدعي)؛ يُحذف من النسخة فيُنشأ جديدًا
+        if "cluster" in frame.columns:
+            del frame["cluster"]
+        return run_clustering(frame, algorithm=options["algorithm"], n_clusters=options["n_clusters"],
+                              prepared=prepared)
+    if analysis == "target":
+        return run_target_relation_analysis(frame, target_col=options["target_col"], prepared=prepared)
+    raise ValueError(f"❌ تحليل غير مدعوم: {analysis}")
+
+
+def _safe_run(prepared: PreparedData, analysis: str, options: Dict[str, Any]) -> Any:
+    try:
+        return _run_one(prepared, analysis, options)
+    except Exception as e:
+        logger.error(f"❌ فشل التحليل {analysis}: {e}", exc_info=True)
+        return {}
+
+
+_worker_prepared: Optional[PreparedData] = None
+
+
+def _init_worker(prepared: PreparedData, nested_workers: int) -> None:
+    # الوسائط تصل مرة واحدة لكل عامل؛ والتوازي الداخلي للتحليلات محدود بحصة العامل من الأنوية
+    global _worker_prepared
+    _worker_prepared = prepared
+    limit_nested_parallelism(nested_workers)
+
+
+def _run_in_worker(analysis: str, options: Dict[str, Any]) -> Any:
+    return _safe_run(_worker_prepared, analysis, options)
+
+
+@Timer("خطة التحليل الكاملة")
+def run_analysis_plan(df: pd.DataFrame, analyses: Sequence[str] = ANALYSES,
+                      correlation_method: str = "pearson", outlier_method: str = "iqr",
+                      algorithm: str = "kmeans", n_clusters: Optional[int] = 3,
+                      target_col: Optional[str] = None, workers: int = ANALYSIS_PLAN_WORKERS) -> Dict[str, Any]:
+    """
+    تشغيل التحليلات المطلوبة على وسائط مشتركة. يعيد {اسم التحليل: نتيجته بنفس شكل الدالة المنفردة}؛
+    التحليل الذي يفشل نتيجته {}. workers=0 يعني عدد الأنوية، و1 تشغيل متتابع في نفس العملية.
+    """
+    unknown = set(analyses) - set(ANALYSES)
+    if unknown:
+        raise ValueError(f"❌ تحليلات غير مدعومة: {sorted(unknown)}")
+    if df is None or df.empty:
+        logger.warning("⚠️ لا توجد بيانات صالحة للتحليل.")
+        return {analysis: {} for analysis in analyses}
+
+    options = {
+        "correlation_method": correlation_method,
+        "outlier_method": outlier_method,
+        "algorithm": algorithm,
+        "n_clusters": n_clusters,
+        "target_col": target_col,
+    }
+    prepared = PreparedData(df)
+    log_basic_info(prepared.frame, "analysis_plan")
+    prepared.warm(analyses)
+
+    ordered = sorted(analyses, key=_COST_ORDER.index)
+    workers = min(resolve_workers(workers), len(ordered))
+    logger.info(f"🧭 خطة تحليل: {ordered} ({workers} عملية)")
+    if workers <= 1:
+        results = {analysis: _safe_run(prepared, analysis, options) for analysis in ordered}
+    else:
+        nested_workers = max(1, (os.cpu_count() or 1) // workers)
+        with process_pool(workers, initializer=_init_worker, initargs=(prepared, nested_workers)) as executor:
+            futures = {analysis: executor.submit(_run_in_worker, analysis, options) for analysis in ordered}
+            results = {}
+            for analysis, future in futures.items():
+                try:
+                    results[analysis] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ فشل التحليل {analysis}: {e}", exc_info=True)
+                    results[analysis] = {}
+    return {analysis: results[analysis] for analysis in analyses}
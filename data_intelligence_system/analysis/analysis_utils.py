@@ -8,6 +8,8 @@ import seaborn as sns
 from pathlib import Path
 from typing import Optional
 
+from data_intelligence_system.utils.sampling import sample_for
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s — %(levelname)s — %(message)s",
@@ -47,7 +49,9 @@ def plot_distribution(df: pd.DataFrame, column: str, output_name: str,
     fig, ax = plt.subplots(figsize=figsize)
 
     if pd.api.types.is_numeric_dtype(df[column]):
-        sns.histplot(df[column].dropna(), kde=True, ax=ax, color='steelblue')
+        # KDE على عينة بميزانية ثابتة بدل كل الصفوف
+        sns.histplot(sample_for(df[[column]], "distribution_plot")[column].dropna(), kde=True, ax=ax,
+                     color='steelblue')
     else:
         unique_vals = df[column].nunique()
         if unique_vals > 30:
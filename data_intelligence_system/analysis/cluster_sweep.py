@@ -0,0 +1,98 @@
+"""
+analysis/cluster_sweep.py
+
+اختيار عدد مجموعات KMeans بمسح متوازٍ على عدة قيم لـ k:
+    - كل k يُدرَّب على نفس العينة العشوائية المحدودة في مجموعة عمليات
+    - بدء دافئ: بذور k-means++ تُحسب مرة واحدة لأكبر k، وكل k يبدأ من أول k بذرة منها
+    - MiniBatchKMeans تلقائيًا للعينات الكبيرة
+    - Silhouette على عينة طبقية حسب المجموعة، والمرفق (elbow) من منحنى القصور الذاتي
+
+الاستخدام:
+    from data_intelligence_system.analysis.cluster_sweep import sweep_kmeans
+
+    sweep = sweep_kmeans(X_scaled, k_values=range(2, 11))
+    best_k = sweep["best_k"]
+"""
+
+import logging
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans, kmeans_plusplus
+
+from data_intelligence_system.config.performance_config import (
+    KMEANS_BATCH_SIZE,
+    KMEANS_MINIBATCH_THRESHOLD,
+    KMEANS_SWEEP_SAMPLE_ROWS,
+    KMEANS_SWEEP_WORKERS,
+    SILHOUETTE_SAMPLE_ROWS,
+)
+from data_intelligence_system.ml_models.utils.model_evaluation import ClusteringMetrics
+from data_intelligence_system.utils.parallel import process_pool, resolve_workers
+
+logger = logging.getLogger(__name__)
+
+MIN_PARALLEL_K = 3
+
+
+def _fit_k(X: np.ndarray, init: np.ndarray, random_state: int, silhouette_rows: int) -> dict:
+    """تدريب k واحد من بذور جاهزة (تعمل داخل العامل)."""
+    k = len(init)
+    if len(X) > KMEANS_MINIBATCH_THRESHOLD:
+        model = MiniBatchKMeans(n_clusters=k, init=init, n_init=1, batch_size=KMEANS_BATCH_SIZE,
+                                random_state=random_state)
+    else:
+        model = KMeans(n_clusters=k, init=init, n_init=1, random_state=random_state)
+    model.fit(X)
+    return {
+        "k": k,
+        "inertia": float(model.inertia_),
+        "silhouette": ClusteringMetrics.sampled_silhouette(X, model.labels_, silhouette_rows, random_state),
+    }
+
+
+def elbow_k(ks: np.ndarray, inertias: np.ndarray) -> int:
+    """نقطة المرفق: أبعد نقطة عن الخط الواصل بين طرفي منحنى القصور الذاتي (بعد التطبيع)."""
+    if len(ks) < 3:
+        return int(ks[0])
+    x = (ks - ks[0]) / (ks[-1] - ks[0])
+    span = inertias[0] - inertias[-1]
+    y = (inertias - inertias[-1]) / span if span > 0 else np.zeros_like(inertias)
+    # الخط من (0, 1) إلى (1, 0): المسافة تتناسب مع |x + y - 1|
+    return int(ks[np.argmax(np.abs(x + y - 1))])
+
+
+def sweep_kmeans(X: np.ndarray, k_values: Iterable[int] = range(2, 11),
+                 sample_rows: int = KMEANS_SWEEP_SAMPLE_ROWS, workers: int = KMEANS_SWEEP_WORKERS,
+                 silhouette_rows: int = SILHOUETTE_SAMPLE_ROWS, random_state: int = 42) -> Dict[str, object]:
+    """
+    مسح قيم k على عينة من X (مصفوفة محجّمة). يعيد:
+        scores: DataFrame بالأعمدة k و inertia و silhouette
+        best_k: أعلى Silhouette، و elbow_k: نقطة المرفق
+    """
+    X = np.asarray(X, dtype=np.float64)
+    k_values = sorted({int(k) for k in k_values if 2 <= int(k) < len(X)})
+    if not k_values:
+        raise ValueError("❌ لا توجد قيم k صالحة لعدد الصفوف المتاح.")
+
+    rng = np.random.default_rng(random_state)
+    if len(X) > sample_rows:
+        X = X[np.sort(rng.choice(len(X), size=sample_rows, replace=False))]
+    # بذور k-means++ متسلسلة: أول k منها بذور k-means++ صالحة لـ k
+    seeds, _ = kmeans_plusplus(X, n_clusters=max(k_values), random_state=random_state)
+    jobs = [(X, seeds[:k], random_state, silhouette_rows) for k in k_values]
+
+    workers = resolve_workers(workers)
+    if workers > 1 and len(jobs) >= MIN_PARALLEL_K:
+        with process_pool(min(workers, len(jobs))) as executor:
+            results = list(executor.map(_fit_k, *zip(*jobs)))
+    else:
+        results = [_fit_k(*job) for job in jobs]
+
+    scores = pd.DataFrame(results)
+    valid = scores.dropna(subset=["silhouette"])
+    best_k = int(valid.loc[valid["silhouette"].idxmax(), "k"]) if not valid.empty else int(scores["k"].iloc[0])
+    elbow = elbow_k(scores["k"].to_numpy(), scores["inertia"].to_numpy())
+    logger.info(f"🔎 مسح k على {len(X)} صف: أفضل Silhouette عند k={best_k}، والمرفق عند k={elbow}")
+    return {"scores": scores, "best_k": best_k, "elbow_k": elbow}
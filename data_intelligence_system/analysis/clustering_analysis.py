@@ -1,14 +1,14 @@
 from pathlib import Path
 import logging
+import os
+from functools import partial
+from typing import Optional
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
-from sklearn.cluster import DBSCAN  # استيراد DBSCAN من sklearn مباشرة
 
 from data_intelligence_system.analysis.analysis_utils import (
     ensure_output_dir,
@@ -17,10 +17,19 @@ from data_intelligence_system.analysis.analysis_utils import (
     save_plot,
     log_basic_info
 )
-from data_intelligence_system.utils.data_loader import load_data
+from data_intelligence_system.analysis.cluster_sweep import sweep_kmeans
+from data_intelligence_system.analysis.projection import fit_file_projection, project
+from data_intelligence_system.config.performance_config import (
+    BATCH_BLAS_THREADS,
+    CLUSTERING_BATCH_WORKERS,
+    KMEANS_SWEEP_MAX_K
+)
+from data_intelligence_system.utils.memory_planner import IN_MEMORY, SAMPLED, load_with_plan
+from data_intelligence_system.utils.parallel import limit_nested_parallelism, process_pool, resolve_workers
+from data_intelligence_system.utils.sampling import sample_budget, stratified_indices
 from data_intelligence_system.utils.timer import Timer
+from data_intelligence_system.ml_models.clustering.density import ScalableDensityClusterer
 from data_intelligence_system.ml_models.clustering.kmeans import KMeansClusteringModel
-# إزالة استيراد DBSCANClusteringModel لأنه لم نعد بحاجة له
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s — %(levelname)s — %(message)s")
 logger = logging.getLogger(__name__)
@@ -34,26 +43,34 @@ ensure_output_dir(CLUSTERING_RESULTS_DIR)
 
 
 def apply_kmeans(data: np.ndarray, n_clusters: int = 3) -> tuple[np.ndarray, float, float | None]:
+    # MiniBatchKMeans تلقائيًا للبيانات الكبيرة، و Silhouette على عينة طبقية
     model = KMeansClusteringModel(n_clusters=n_clusters, random_state=42)
     model.fit(pd.DataFrame(data))
-    labels = model.predict(pd.DataFrame(data))
+    labels = model.model.labels_
     inertia = model.model.inertia_
-    silhouette = model.evaluate(pd.DataFrame(data)) if n_clusters > 1 else None
+    silhouette = model.evaluate() if n_clusters > 1 else None
     return labels, inertia, silhouette
 
 
-def apply_dbscan(data: np.ndarray, eps: float = 0.5, min_samples: int = 5) -> np.ndarray:
-    model = DBSCAN(eps=eps, min_samples=min_samples)
+def apply_dbscan(data: np.ndarray, eps: float = 0.5, min_samples: int = 5,
+                 backend: str = "dbscan") -> np.ndarray:
+    # DBSCAN دقيق للبيانات الصغيرة، وشبكة + KD-tree للكبيرة؛ أو HDBSCAN على عينة
+    model = ScalableDensityClusterer(backend=backend, eps=eps, min_samples=min_samples)
     labels = model.fit_predict(data)
     return labels
 
 
-def reduce_dimensions(data: np.ndarray, n_components: int = 2) -> np.ndarray:
-    pca = PCA(n_components=n_components)
-    return pca.fit_transform(data)
+def reduce_dimensions(data: np.ndarray, n_components: int = 2, backend: str = "auto") -> np.ndarray:
+    # PCA دقيق / SVD عشوائي / IncrementalPCA حسب شكل المصفوفة (انظر analysis/projection.py)
+    return project(data, n_components=n_components, backend=backend)
 
 
 def plot_clusters(data_2d: np.ndarray, labels: np.ndarray, title: str, path: Path) -> None:
+    budget = sample_budget("cluster_plot")
+    if len(labels) > budget:
+        # الرسم من عينة طبقية حسب المجموعة: ملايين النقاط لا تضيف للرسم سوى وقت، والمجموعات الصغيرة تبقى ظاهرة
+        index = stratified_indices(labels, budget)
+        data_2d, labels = data_2d[index], np.asarray(labels)[index]
     plt.figure(figsize=(8, 6))
     unique_labels = np.unique(labels)
     palette = sns.color_palette('Set2', n_colors=len(unique_labels))
@@ -70,47 +87,69 @@ def plot_clusters(data_2d: np.ndarray, labels: np.ndarray, title: str, path: Pat
 @Timer("تشغيل تحليل التجميع")
 def run_clustering(df: pd.DataFrame,
                    algorithm: str = "kmeans",
-                   n_clusters: int = 3,
+                   n_clusters: Optional[int] = 3,
                    dbscan_eps: float = 0.5,
                    dbscan_min_samples: int = 5,
-                   output_filename: str = "clustered_data.csv") -> dict:
+                   output_filename: str = "clustered_data.csv",
+                   prepared=None,
+                   projection=None,
+                   output_dir: Optional[Path] = None) -> dict:
+    """
+    n_clusters=None مع kmeans: اختيار k تلقائيًا بمسح متوازٍ (2..KMEANS_SWEEP_MAX_K) بأعلى Silhouette.
+    prepared: وسائط مشتركة من analysis_plan (الصفوف المكتملة ونسختها المُحجَّمة جاهزة).
+    projection: إسقاط ملائم مسبقًا على الملف كاملًا (fit_file_projection) لرسم عينة منه بمحاور البيانات كلها.
+    output_dir: مجلد النتائج (None = CLUSTERING_RESULTS_DIR).
+    """
     try:
-        log_basic_info(df, output_filename)
+        if prepared is None:
+            log_basic_info(df, output_filename)
 
-        num_cols = get_numerical_columns(df)
+        num_cols = get_numerical_columns(df) if prepared is None else prepared.numeric_cols
         if len(num_cols) < 2:
             logger.warning("📉 لا يوجد أعمدة رقمية كافية للتجميع.")
             return {}
 
-        df_clean = df[num_cols].dropna()
+        df_clean = df[num_cols].dropna() if prepared is None else prepared.complete
         if df_clean.shape[0] < 10:
             logger.warning("📉 عدد الصفوف بعد تنظيف القيم المفقودة قليل جداً.")
             return {}
 
-        df_scaled = StandardScaler().fit_transform(df_clean)
-        df_2d = reduce_dimensions(df_scaled)
+        df_scaled = StandardScaler().fit_transform(df_clean) if prepared is None else prepared.scaled
+        if projection is not None:
+            df_2d = projection.transform(df_clean.to_numpy(dtype=float))
+        else:
+            df_2d = reduce_dimensions(df_scaled)
 
         algo_lower = algorithm.lower()
+        k_sweep = None
+        if algo_lower == "kmeans" and n_clusters is None:
+            k_sweep = sweep_kmeans(df_scaled, k_values=range(2, KMEANS_SWEEP_MAX_K + 1))
+            n_clusters = k_sweep["best_k"]
         if algo_lower == "kmeans":
             labels, inertia, silhouette = apply_kmeans(df_scaled, n_clusters=n_clusters)
             df.loc[df_clean.index, "cluster"] = labels
             algo_desc = f"kmeans_{n_clusters}"
             plot_title = f"KMeans Clustering (k={n_clusters})"
-        elif algo_lower == "dbscan":
-            labels = apply_dbscan(df_scaled, eps=dbscan_eps, min_samples=dbscan_min_samples)
+        elif algo_lower in ("dbscan", "hdbscan"):
+            labels = apply_dbscan(df_scaled, eps=dbscan_eps, min_samples=dbscan_min_samples, backend=algo_lower)
             df.loc[df_clean.index, "cluster"] = labels
             inertia = None
             silhouette = None
-            algo_desc = f"dbscan_eps{dbscan_eps}_min{dbscan_min_samples}"
-            plot_title = "DBSCAN Clustering"
+            if algo_lower == "dbscan":
+                algo_desc = f"dbscan_eps{dbscan_eps}_min{dbscan_min_samples}"
+                plot_title = "DBSCAN Clustering"
+            else:
+                algo_desc = f"hdbscan_min{dbscan_min_samples}"
+                plot_title = "HDBSCAN Clustering"
         else:
             raise ValueError(f"❌ الخوارزمية غير مدعومة: {algorithm}")
 
         plot_name = f"{output_filename.replace('.csv', '')}_{algo_desc}.png"
-        plot_path = CLUSTERING_RESULTS_DIR / plot_name
+        output_dir = Path(output_dir or CLUSTERING_RESULTS_DIR)
+        plot_path = output_dir / plot_name
         plot_clusters(df_2d, labels, plot_title, plot_path)
 
-        result_path = CLUSTERING_RESULTS_DIR / output_filename
+        result_path = output_dir / output_filename
         save_dataframe(df, result_path)
 
         logger.info(f"✅ تم حفظ نتائج التجميع: {result_path}")
@@ -121,7 +160,9 @@ def run_clustering(df: pd.DataFrame,
             "clustered_file": str(result_path),
             "plot_file": str(plot_path),
             "inertia": inertia,
-            "silhouette_score": silhouette
+            "silhouette_score": silhouette,
+            "k_sweep": k_sweep["scores"].to_dict(orient="records") if k_sweep else None,
+            "elbow_k": k_sweep["elbow_k"] if k_sweep else None
         }
 
     except Exception as e:
@@ -129,29 +170,60 @@ def run_clustering(df: pd.DataFrame,
         return {}
 
 
-def run_batch_clustering() -> None:
-    summary = []
-    if not DATA_DIR.exists():
-        logger.error(f"❌ مجلد البيانات غير موجود: {DATA_DIR}")
-        return
-
-    for file_path in DATA_DIR.glob("*.csv"):
-        try:
-            df = load_data(str(file_path))
-            result = run_clustering(df, algorithm="kmeans", n_clusters=3,
-                                    output_filename=f"{file_path.stem}_clustered.csv")
-            if result:
-                summary.append(result)
-        except Exception as e:
-            logger.error(f"❌ فشل تحميل الملف {file_path.name}: {e}", exc_info=True)
+def _cluster_file(file_path: Path, output_dir: Optional[Path] = None) -> Optional[dict]:
+    try:
+        df, plan = load_with_plan(file_path, supported_modes=(IN_MEMORY, SAMPLED))
+        projection = None
+        num_cols = get_numerical_columns(df)
+        if plan.mode == SAMPLED and len(num_cols) >= 2:
+            # التجميع على العينة، والإسقاط للرسم يُلاءم على الملف كله دفعة بدفعة (IncrementalPCA)
+            projection = fit_file_projection(file_path, columns=num_cols)
+        result = run_clustering(df, algorithm="kmeans", n_clusters=3,
+                                output_filename=f"{file_path.stem}_clustered.csv", projection=projection,
+                                output_dir=output_dir)
+        if result:
+            result["execution_mode"] = plan.mode
+            return result
+    except Exception as e:
+        logger.error(f"❌ فشل تحميل الملف {file_path.name}: {e}", exc_info=True)
+    return None
+
+
+@Timer("تحليل التجميع - دفعة كاملة")
+def run_batch_clustering(data_dir: Path = DATA_DIR, max_workers: int = CLUSTERING_BATCH_WORKERS,
+                         blas_threads: int = BATCH_BLAS_THREADS,
+                         output_dir: Optional[Path] = None) -> Optional[pd.DataFrame]:
+    """
+    تجميع كل ملفات CSV في المجلد: كل ملف في عملية مستقلة (حتى max_workers، 0 = عدد الأنوية)
+    بخيوط BLAS محدودة لكل عملية (blas_threads، 0 = الأنوية مقسومة على العمليات)،
+    والملخص يُدمج بترتيب أسماء الملفات مهما كان ترتيب انتهائها.
+    output_dir يُمرَّر صراحة للعمليات (None = CLUSTERING_RESULTS_DIR).
+    """
+    if not Path(data_dir).exists():
+        logger.error(f"❌ مجلد البيانات غير موجود: {data_dir}")
+        return None
+
+    output_dir = Path(output_dir or CLUSTERING_RESULTS_DIR)
+    cluster_file = partial(_cluster_file, output_dir=output_dir)
+    files = sorted(Path(data_dir).glob("*.csv"))
+    workers = min(resolve_workers(max_workers), len(files))
+    if workers > 1:
+        threads = blas_threads or max(1, (os.cpu_count() or 1) // workers)
+        logger.info(f"🧩 تجميع {len(files)} ملف في {workers} عملية ({threads} خيط BLAS لكل عملية)")
+        with process_pool(workers, initializer=limit_nested_parallelism, initargs=(threads,)) as executor:
+            results = list(executor.map(cluster_file, files))
+    else:
+        results = [cluster_file(file_path) for file_path in files]
+    summary = [result for result in results if result is not None]
 
     if summary:
         summary_df = pd.DataFrame(summary)
-        summary_path = CLUSTERING_RESULTS_DIR / "clustering_summary.csv"
+        summary_path = output_dir / "clustering_summary.csv"
         summary_df.to_csv(summary_path, index=False)
         logger.info(f"📄 تم حفظ ملخص جميع التجميعات في: {summary_path}")
-    else:
-        logger.warning("⚠️ لم يتم تنفيذ أي تحليل تجميع بسبب نقص البيانات.")
+        return summary_df
+    logger.warning("⚠️ لم يتم تنفيذ أي تحليل تجميع بسبب نقص البيانات.")
+    return None
 
 
 if __name__ == "__main__":
@@ -13,6 +13,19 @@ from data_intelligence_system.analysis.analysis_utils import (
     save_dataframe,
     log_basic_info
 )
+from data_intelligence_system.analysis.correlation_engine import (
+    SUPPORTED_METHODS,
+    correlation_matrix,
+    downsample_matrix,
+    heatmap_matrix,
+    top_correlations,
+)
+from data_intelligence_system.config.performance_config import (
+    CORRELATION_WIDE_THRESHOLD,
+    CORRELATION_TOP_K,
+    HEATMAP_MAX_COLUMNS,
+    HEATMAP_ANNOT_MAX_COLUMNS,
+)
 from data_intelligence_system.utils.data_loader import load_data
 from data_intelligence_system.utils.timer import Timer
 
@@ -31,6 +44,9 @@ def calculate_correlation(df: pd.DataFrame, method: str = "pearson") -> pd.DataF
     numeric_df = df.select_dtypes(include=[np.number])
     if numeric_df.empty:
         raise ValueError("❌ لا توجد أعمدة رقمية لحساب الارتباط.")
+    # محرك الكتل مطابق لـ pandas في Pearson دائمًا وفي Spearman عند غياب المفقود
+    if method == "pearson" or (method == "spearman" and not numeric_df.isnull().values.any()):
+        return correlation_matrix(numeric_df, method=method)
     return numeric_df.corr(method=method)
 
 
@@ -38,10 +54,14 @@ def plot_correlation_heatmap(corr_matrix: pd.DataFrame, method: str, filename: s
     if corr_matrix.empty:
         logger.warning("⚠️ مصفوفة الارتباط فارغة، تخطي الرسم.")
         return
+    if len(corr_matrix) > HEATMAP_MAX_COLUMNS:
+        # مصفوفة كبيرة: الأعمدة الأكثر ارتباطًا فقط، مرتبة بالتجميع الهرمي لتتجاور المترابطة
+        corr_matrix = downsample_matrix(corr_matrix, max_columns=HEATMAP_MAX_COLUMNS)
+    annotate = len(corr_matrix) <= HEATMAP_ANNOT_MAX_COLUMNS
     fig, ax = plt.subplots(figsize=(12, 10))
     sns.heatmap(
         corr_matrix,
-        annot=True,
+        annot=annotate,
         fmt=".2f",
         cmap="coolwarm",
         square=True,
@@ -54,11 +74,20 @@ def plot_correlation_heatmap(corr_matrix: pd.DataFrame, method: str, filename: s
 
 
 @Timer("تحليل الارتباط")
-def run_correlation_analysis(df: pd.DataFrame, method: str = "pearson", output_dir: Path = OUTPUT_DIR) -> dict:
+def run_correlation_analysis(df: pd.DataFrame, method: str = "pearson", output_dir: Path = OUTPUT_DIR,
+                             prepared=None) -> dict:
+    """prepared: وسائط مشتركة من analysis_plan (المصفوفة الرقمية جاهزة والمعلومات مسجلة مسبقًا)."""
     ensure_output_dir(output_dir)
-    log_basic_info(df, "correlation_analysis")
+    if prepared is None:
+        log_basic_info(df, "correlation_analysis")
+    else:
+        df = prepared.numeric
 
     try:
+        numeric_count = len(df.select_dtypes(include=[np.number]).columns)
+        if numeric_count > CORRELATION_WIDE_THRESHOLD and method in SUPPORTED_METHODS:
+            return _run_wide_correlation(df, method, output_dir)
+
         corr_matrix = calculate_correlation(df, method=method)
         if corr_matrix.empty:
             logger.warning("⚠️ مصفوفة الارتباط فارغة، لا يمكن المتابعة.")
@@ -81,6 +110,28 @@ def run_correlation_analysis(df: pd.DataFrame, method: str = "pearson", output_d
         return {}
 
 
+def _run_wide_correlation(df: pd.DataFrame, method: str, output_dir: Path) -> dict:
+    """
+    جدول عريض: أعلى الأزواج فقط بمحرك الكتل دون بناء المصفوفة الكاملة،
+    وخريطة مصغرة للأعمدة الأكثر ظهورًا فيها.
+    """
+    logger.info(f"🧱 جدول عريض: استخراج أعلى {CORRELATION_TOP_K} زوج ارتباط بمحرك الكتل")
+    top_pairs = top_correlations(df, method=method, k=CORRELATION_TOP_K)
+    corr_matrix = heatmap_matrix(df, method=method, max_columns=HEATMAP_MAX_COLUMNS, pairs=top_pairs)
+
+    pairs_filename = f"correlation_top_pairs_{method}"
+    heatmap_filename = f"correlation_heatmap_{method}.png"
+    save_dataframe(top_pairs, pairs_filename, output_dir)
+    plot_correlation_heatmap(corr_matrix, method, heatmap_filename, output_dir)
+
+    return {
+        "correlation_matrix": corr_matrix,
+        "top_pairs": top_pairs,
+        "pairs_file": f"{pairs_filename}.csv",
+        "heatmap_file": heatmap_filename
+    }
+
+
 # نسخة مبسطة فقط لحساب مصفوفة الارتباط (للاستخدام السريع)
 def generate_correlation_matrix(df: pd.DataFrame, method: str = "pearson") -> pd.DataFrame:
     return calculate_correlation(df, method)
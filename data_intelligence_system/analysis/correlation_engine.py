@@ -0,0 +1,182 @@
+"""
+analysis/correlation_engine.py
+
+محرك ارتباط بكتل أعمدة (NumPy/BLAS) للبيانات العريضة:
+    - Pearson بضرب مصفوفات لكل زوج كتل، مع معالجة المفقود زوجيًا عبر أقنعة (مثل pandas.corr)
+    - Spearman بترتيب الأعمدة مرة واحدة ثم Pearson على الرتب
+    - استخراج أعلى k ارتباط مطلق أو ما يتجاوز عتبة دون بناء المصفوفة الكاملة (ذاكرة كتلة واحدة + k)
+    - اختيار أعمدة ممثلة وترتيبها بالتجميع الهرمي لخرائط الارتباط الكبيرة
+
+الاستخدام:
+    from data_intelligence_system.analysis.correlation_engine import top_correlations
+
+    pairs = top_correlations(df, method="spearman", k=50)
+"""
+
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.config.performance_config import CORRELATION_BLOCK_SIZE
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_METHODS = ("pearson", "spearman")
+
+
+class PreparedMatrix:
+    """
+    الأعمدة الرقمية كمصفوفة float64 متمركزة (القيم المفقودة = 0) مع قناع القيم الموجودة.
+    Spearman: الترتيب (بمتوسط الرتب للتعادل) يتم هنا مرة واحدة لكل عمود.
+    """
+
+    def __init__(self, df: pd.DataFrame, method: str = "pearson"):
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"❌ طريقة ارتباط غير مدعومة في المحرك: {method}")
+        numeric_df = df.select_dtypes(include=[np.number])
+        if method == "spearman":
+            numeric_df = numeric_df.rank(method="average")
+        self.columns: List[str] = numeric_df.columns.tolist()
+        values = numeric_df.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        mask = ~np.isnan(values)
+        self.has_missing = not mask.all()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.nanmean(values, axis=0) if values.size else np.zeros(values.shape[1])
+        values -= means  # التمركز يقلل أخطاء الطرح في المجاميع
+        values[~mask] = 0.0
+        self.values = values
+        self.mask = mask.astype(np.float64)
+        if not self.has_missing:
+            # بدون مفقود: أعمدة بطول 1 فيصبح الارتباط حاصل ضرب نقطي
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self.values = values / np.sqrt((values ** 2).sum(axis=0))
+
+    @property
+    def n_columns(self) -> int:
+        return len(self.columns)
+
+    def block(self, rows: slice, cols: slice) -> np.ndarray:
+        """ارتباط أعمدة rows مع أعمدة cols (كتلة من المصفوفة)."""
+        a, b = self.values[:, rows], self.values[:, cols]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if not self.has_missing:
+                return np.clip(a.T @ b, -1.0, 1.0)
+            ma, mb = self.mask[:, rows], self.mask[:, cols]
+            # مجاميع على الصفوف المشتركة فقط لكل زوج أعمدة
+            n = ma.T @ mb
+            sum_a, sum_b = a.T @ mb, ma.T @ b
+            cov = a.T @ b - sum_a * sum_b / n
+            var_a = (a ** 2).T @ mb - sum_a ** 2 / n
+            var_b = ma.T @ (b ** 2) - sum_b ** 2 / n
+            corr = cov / np.sqrt(var_a * var_b)
+            corr[n < 2] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+
+def iter_correlation_blocks(prepared: PreparedMatrix, block_size: int = CORRELATION_BLOCK_SIZE
+                            ) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """كتل المثلث العلوي (i0 <= j0) من مصفوفة الارتباط."""
+    p = prepared.n_columns
+    for i0 in range(0, p, block_size):
+        for j0 in range(i0, p, block_size):
+            yield i0, j0, prepared.block(slice(i0, min(i0 + block_size, p)), slice(j0, min(j0 + block_size, p)))
+
+
+def correlation_matrix(df: pd.DataFrame, method: str = "pearson",
+                       block_size: int = CORRELATION_BLOCK_SIZE) -> pd.DataFrame:
+    """المصفوفة الكاملة مجمّعة من الكتل (للأحجام التي تتسعها الذاكرة)."""
+    prepared = PreparedMatrix(df, method)
+    p = prepared.n_columns
+    result = np.empty((p, p))
+    for i0, j0, block in iter_correlation_blocks(prepared, block_size):
+        i1, j1 = i0 + block.shape[0], j0 + block.shape[1]
+        result[i0:i1, j0:j1] = block
+        result[j0:j1, i0:i1] = block.T
+    # القطر 1 للأعمدة غير الثابتة كما في pandas
+    diagonal = np.diag(result).copy()
+    np.fill_diagonal(result, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return pd.DataFrame(result, index=prepared.columns, columns=prepared.columns)
+
+
+def top_correlations(df: pd.DataFrame, method: str = "pearson", k: Optional[int] = 100,
+                     threshold: Optional[float] = None,
+                     block_size: int = CORRELATION_BLOCK_SIZE) -> pd.DataFrame:
+    """
+    أزواج الأعمدة الأعلى ارتباطًا مطلقًا (بدون القطر والتكرار المتماثل).
+    k: عدد الأزواج (None = كل ما يتجاوز العتبة). threshold: أدنى ارتباط مطلق.
+    """
+    if k is None and threshold is None:
+        raise ValueError("❌ يجب تحديد k أو threshold.")
+    prepared = PreparedMatrix(df, method)
+    best_i, best_j, best_r = np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+
+    for i0, j0, block in iter_correlation_blocks(prepared, block_size):
+        local_rows, local_cols = np.nonzero(np.isfinite(block))
+        values = block[local_rows, local_cols]
+        rows, cols = local_rows + i0, local_cols + j0
+        keep = rows < cols
+        rows, cols, values = rows[keep], cols[keep], values[keep]
+        if threshold is not None:
+            keep = np.abs(values) >= threshold
+            rows, cols, values = rows[keep], cols[keep], values[keep]
+        best_i = np.concatenate([best_i, rows])
+        best_j = np.concatenate([best_j, cols])
+        best_r = np.concatenate([best_r, values])
+        if k is not None and len(best_r) > k:
+            top = np.argpartition(-np.abs(best_r), k - 1)[:k]
+            best_i, best_j, best_r = best_i[top], best_j[top], best_r[top]
+
+    order = np.lexsort((best_j, best_i, -np.abs(best_r)))
+    columns = np.asarray(prepared.columns, dtype=object)
+    return pd.DataFrame({
+        "feature_1": columns[best_i[order]],
+        "feature_2": columns[best_j[order]],
+        "correlation": best_r[order],
+        "abs_correlation": np.abs(best_r[order]),
+    })
+
+
+def heatmap_matrix(df: pd.DataFrame, method: str = "pearson", max_columns: int = 60,
+                   pairs: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    مصفوفة مصغرة لخريطة الارتباط: أكثر الأعمدة ظهورًا في أعلى الأزواج (حتى max_columns)،
+    مرتبة بالتجميع الهرمي على المسافة 1 - |r| لتتجاور الأعمدة المترابطة.
+    """
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    if len(numeric_cols) > max_columns:
+        if pairs is None:
+            pairs = top_correlations(df, method=method, k=max_columns * 4)
+        ranked = pd.concat([pairs["feature_1"], pairs["feature_2"]]).value_counts()
+        selected = ranked.index[:max_columns].tolist()
+        selected += [c for c in numeric_cols if c not in set(selected)][:max_columns - len(selected)]
+        numeric_cols = [c for c in numeric_cols if c in set(selected)]
+
+    return cluster_order(correlation_matrix(df[numeric_cols], method=method))
+
+
+def cluster_order(matrix: pd.DataFrame) -> pd.DataFrame:
+    """إعادة ترتيب مصفوفة ارتباط بالتجميع الهرمي (average) على المسافة 1 - |r|."""
+    if len(matrix) <= 2:
+        return matrix
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
+
+    distance = 1 - np.abs(matrix.fillna(0).to_numpy())
+    np.fill_diagonal(distance, 0)
+    distance = np.clip((distance + distance.T) / 2, 0, None)
+    order = leaves_list(linkage(squareform(distance, checks=False), method="average"))
+    return matrix.iloc[order, order]
+
+
+def downsample_matrix(matrix: pd.DataFrame, max_columns: int = 60) -> pd.DataFrame:
+    """من مصفوفة محسوبة: الأعمدة ذات أعلى ارتباط مطلق مع غيرها (حتى max_columns) مرتبة بالتجميع."""
+    if len(matrix) > max_columns:
+        off_diagonal = np.abs(matrix.to_numpy(copy=True))
+        np.fill_diagonal(off_diagonal, np.nan)
+        with np.errstate(invalid="ignore"):
+            strength = np.nan_to_num(np.nanmax(off_diagonal, axis=1), nan=-1.0)
+        keep = np.sort(np.argsort(-strength, kind="stable")[:max_columns])
+        matrix = matrix.iloc[keep, keep]
+    return cluster_order(matrix)
@@ -2,9 +2,8 @@ import pandas as pd
 import numpy as np
 from tabulate import tabulate
 import logging
-from typing import Dict, Any, Union
+from typing import Dict, Any, Optional, Union
 from pathlib import Path
-import warnings
 from pandas.errors import ParserWarning
 
 # === إعداد المسارات ===
@@ -13,9 +12,28 @@ DATA_DIR = BASE_DIR / "data_intelligence_system" / "data" / "processed"
 OUTPUT_DIR = BASE_DIR / "data_intelligence_system" / "analysis" / "analysis_output"
 
 # === استيراد الأدوات المساعدة من جذر المشروع ===
-from data_intelligence_system.analysis.analysis_utils import ensure_output_dir, plot_distribution
+from data_intelligence_system.analysis import duckdb_engine
+from data_intelligence_system.analysis.analysis_utils import ensure_output_dir
+from data_intelligence_system.analysis.histogram_renderer import render_numeric_histograms
+from data_intelligence_system.analysis.stats_kernel import (
+    compute_categorical_counts,
+    compute_datetime_counts,
+    compute_fused_stats,
+    compute_numeric_stats,
+    count_duplicated_rows,
+)
+from data_intelligence_system.analysis.streaming_stats import compute_streaming_stats
+from data_intelligence_system.config.performance_config import ANALYSIS_ENGINE, MAX_SAMPLE_ROWS
 from data_intelligence_system.utils.data_loader import load_data
+from data_intelligence_system.utils.memory_planner import (
+    CHUNKED,
+    IN_MEMORY,
+    SAMPLED,
+    load_sample,
+    plan_execution,
+)
 from data_intelligence_system.utils.timer import Timer  # ⏱️ التوقيت
+from data_intelligence_system.utils.type_sniffing import convert_datetime_columns, sniff_datetime_columns
 
 # === إعداد اللوجر ===
 logging.basicConfig(level=logging.INFO, format="%(asctime)s — %(levelname)s — %(message)s")
@@ -25,7 +43,7 @@ logger = logging.getLogger(__name__)
 def compute_general_stats(df: pd.DataFrame) -> Dict[str, Union[int, float]]:
     total_cells = df.size
     missing_values = df.isnull().sum().sum()
-    duplicated_rows = df.duplicated().sum()
+    duplicated_rows = count_duplicated_rows(df)
     return {
         "Number of Rows": df.shape[0],
         "Number of Columns": df.shape[1],
@@ -36,14 +54,11 @@ def compute_general_stats(df: pd.DataFrame) -> Dict[str, Union[int, float]]:
 
 
 def compute_numeric_summary(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
-    numeric_df = df.select_dtypes(include=[np.number])
-    if numeric_df.empty:
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    if not numeric_cols or df.empty:
         logger.warning("⚠️ لا توجد أعمدة رقمية لحساب الإحصائيات.")
         return {}
-    numeric_summary = numeric_df.describe().T
-    numeric_summary["missing_values"] = numeric_df.isnull().sum()
-    numeric_summary["missing_%"] = (numeric_df.isnull().mean() * 100).round(2)
-    return numeric_summary.to_dict(orient="index")
+    return compute_numeric_stats(df, numeric_cols).to_summary()
 
 
 def analyze_numerical_columns(df: pd.DataFrame):
@@ -56,36 +71,30 @@ def analyze_numerical_columns(df: pd.DataFrame):
 
 def analyze_categorical_columns(df: pd.DataFrame, top_n: int = 10) -> Dict[str, pd.Series]:
     categorical_cols = df.select_dtypes(include=["object", "category"]).columns
-    cat_summary = {}
-    for col in categorical_cols:
-        counts = df[col].value_counts(dropna=False).head(top_n)
-        cat_summary[col] = counts
+    cat_summary = compute_categorical_counts(df, categorical_cols, top_n=top_n)
+    for col, counts in cat_summary.items():
         logger.info(f"🔤 تحليل تكرار القيم للعمود '{col}':\n{counts.to_string()}")
     return cat_summary
 
 
 def analyze_datetime_columns(df: pd.DataFrame) -> Dict[str, pd.Series]:
     datetime_cols = df.select_dtypes(include=['datetime64[ns]', 'datetime64[ns, UTC]']).columns
-    datetime_summary = {}
-    for col in datetime_cols:
-        freq = df[col].dt.to_period("M").value_counts().sort_index()
-        datetime_summary[col] = freq
+    datetime_summary = compute_datetime_counts(df, datetime_cols)
+    for col, freq in datetime_summary.items():
         logger.info(f"⏱️ تحليل التوزيع الزمني للعمود '{col}':\n{freq.to_string()}")
     return datetime_summary
 
 
 def generate_numeric_histograms(df: pd.DataFrame, filename_prefix: str,
-                                output_dir: Path = OUTPUT_DIR):
+                                output_dir: Path = OUTPUT_DIR, draft: Optional[bool] = None):
+    """
+    المدرجات محسوبة بـ NumPy ومرسومة في مجموعة عمليات، ولا يُعاد رسم عمود لم تتغير بياناته.
+    draft=True: دقة أقل وبدون KDE (الافتراضي من الإعدادات).
+    """
     ensure_output_dir(output_dir)
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-
-    for col in numeric_cols:
-        try:
-            plot_distribution(df, column=col,
-                              output_name=f"{filename_prefix}_distribution_{col}.png",
-                              output_dir=output_dir)
-        except Exception as e:
-            logger.warning(f"⚠️ فشل رسم العمود '{col}': {e}")
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    kwargs = {} if draft is None else {"draft": draft}
+    render_numeric_histograms(df, filename_prefix, output_dir, columns=numeric_cols, **kwargs)
 
     logger.info(f"✅ حفظ الرسوم البيانية للأعمدة الرقمية في: {output_dir}")
 
@@ -102,56 +111,104 @@ def save_categorical_value_counts(df: pd.DataFrame, filename_prefix: str,
         logger.info(f"✅ تم حفظ القيم المتكررة للعمود: {col}")
 
 
+def save_summary_outputs(general_info: Dict[str, Any], numeric_summary: Dict[str, Dict[str, Any]],
+                         categorical_summary: Dict[str, pd.Series], datetime_summary: Dict[str, pd.Series],
+                         filename_prefix: str, output_dir: Path = OUTPUT_DIR):
+    ensure_output_dir(output_dir)
+
+    (output_dir / f"{filename_prefix}_general_info.txt").write_text(
+        tabulate(general_info.items(), tablefmt="grid", stralign="left"), encoding="utf-8"
+    )
+    logger.info(f"📄 تم حفظ المعلومات العامة.")
+
+    if numeric_summary:
+        pd.DataFrame(numeric_summary).T.to_csv(output_dir / f"{filename_prefix}_numeric_stats.csv")
+        logger.info(f"📄 تم حفظ الإحصائيات الرقمية.")
+
+    for col, counts in categorical_summary.items():
+        counts.to_csv(output_dir / f"{filename_prefix}_value_counts_{col}.csv")
+        logger.info(f"📄 تم حفظ القيم المتكررة للعمود: {col}")
+
+    for col, freq in datetime_summary.items():
+        freq.to_csv(output_dir / f"{filename_prefix}_datetime_freq_{col}.csv")
+        logger.info(f"📄 تم حفظ التحليل الزمني للعمود: {col}")
+
+
+def _generate_streaming_stats(path: Union[str, Path], output_dir: Path, save_outputs: bool,
+                              chunk_size: Optional[int]) -> Dict[str, Any]:
+    logger.info(f"🌊 بدء التحليل الوصفي المتدفق للملف: {path}")
+    kwargs = {"chunk_size": chunk_size} if chunk_size else {}
+    summary = compute_streaming_stats(path, **kwargs)
+    if save_outputs:
+        filename_prefix = Path(path).stem
+        save_summary_outputs(summary["general_info"], summary["numeric_summary"],
+                             summary["categorical_summary"], summary["datetime_summary"],
+                             filename_prefix, output_dir)
+        generate_numeric_histograms(load_sample(path, MAX_SAMPLE_ROWS), filename_prefix, output_dir)
+    logger.info("✅ التحليل الوصفي المتدفق اكتمل بنجاح.")
+    return summary
+
+
+def _generate_duckdb_stats(path: Union[str, Path], output_dir: Path, save_outputs: bool) -> Dict[str, Any]:
+    logger.info(f"🦆 بدء التحليل الوصفي بـ DuckDB على: {path}")
+    summary = duckdb_engine.describe_with_duckdb(path)
+    if save_outputs:
+        filename_prefix = Path(path).stem
+        save_summary_outputs(summary["general_info"], summary["numeric_summary"],
+                             summary["categorical_summary"], summary["datetime_summary"],
+                             filename_prefix, output_dir)
+        if Path(path).is_file():
+            generate_numeric_histograms(load_sample(path, MAX_SAMPLE_ROWS), filename_prefix, output_dir)
+    logger.info("✅ التحليل الوصفي بـ DuckDB اكتمل بنجاح.")
+    return summary
+
+
 @Timer("التحليل الوصفي الكامل")
 def generate_descriptive_stats(df_or_path: Union[pd.DataFrame, str, Path], filename_prefix: str = "output",
-                               output_dir: Path = OUTPUT_DIR, save_outputs: bool = True) -> Dict[str, Any]:
+                               output_dir: Path = OUTPUT_DIR, save_outputs: bool = True,
+                               budget_mb: Optional[float] = None, streaming: bool = False,
+                               chunk_size: Optional[int] = None, engine: str = ANALYSIS_ENGINE) -> Dict[str, Any]:
+    """
+    streaming=True (أو ملف أكبر من ميزانية الذاكرة بصيغة قابلة للبث) يقرأ الملف على دفعات
+    بمجمّعات قابلة للدمج بدل تحميله كاملًا؛ الرسوم تُرسم من عينة عشوائية.
+    engine="duckdb" يجمّع الملف (أو كل ملفات المجلد كجدول واحد) بـ SQL مباشرة دون تحميله في pandas.
+    """
+    execution_mode = IN_MEMORY
+    if isinstance(df_or_path, (str, Path)) and engine == "duckdb":
+        if duckdb_engine.is_available():
+            return _generate_duckdb_stats(df_or_path, output_dir, save_outputs)
+        logger.warning("⚠️ duckdb غير مثبتة، سيتم استخدام محرك pandas.")
     if isinstance(df_or_path, (str, Path)):
-        df = load_data(str(df_or_path))
+        plan = plan_execution(df_or_path, supported_modes=(IN_MEMORY, CHUNKED, SAMPLED), budget_mb=budget_mb)
+        if streaming or plan.mode == CHUNKED:
+            return _generate_streaming_stats(df_or_path, output_dir, save_outputs,
+                                             chunk_size or plan.chunk_size)
+        # الملفات التي تتجاوز ميزانية الذاكرة ولا تدعم القراءة على دفعات تُحلَّل على عينة عشوائية
+        if plan.mode == SAMPLED:
+            df = load_sample(df_or_path, plan.sample_rows, estimate=plan.estimate)
+        else:
+            df = load_data(str(df_or_path))
+        execution_mode = plan.mode
         filename_prefix = Path(df_or_path).stem
-        logger.info(f"✅ تم تحميل البيانات من: {df_or_path}")
+        logger.info(f"✅ تم تحميل البيانات من: {df_or_path} (نمط التنفيذ: {execution_mode})")
     else:
         df = df_or_path
 
     logger.info("🚀 بدء التحليل الوصفي الكامل...")
 
-    # محاولة تحويل الأعمدة النصية لتواريخ مع تجاهل تحذير تنسيق التاريخ
-    object_cols = df.select_dtypes(include=["object"]).columns
-    for col in object_cols:
-        try:
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore", UserWarning)
-                converted = pd.to_datetime(df[col], errors='coerce')
+    # اكتشاف أعمدة التواريخ من عينة (مع حفظ القرار لنفس المخطط) ثم تحويل المؤكد منها فقط بصيغته
+    convert_datetime_columns(df, sniff_datetime_columns(df))
 
-            if not converted.isnull().all():
-                df[col] = converted
-        except Exception:
-            pass
-
-    general_info = compute_general_stats(df)
-    numeric_summary = compute_numeric_summary(df)
-    categorical_summary = analyze_categorical_columns(df)
-    datetime_summary = analyze_datetime_columns(df)
+    # نواة مدمجة: مرور واحد للأعمدة الرقمية و bincount واحد للأعمدة الفئوية
+    fused = compute_fused_stats(df)
+    general_info = fused["general_info"]
+    numeric_summary = fused["numeric_summary"]
+    categorical_summary = fused["categorical_summary"]
+    datetime_summary = fused["datetime_summary"]
 
     if save_outputs:
-        ensure_output_dir(output_dir)
-
-        (output_dir / f"{filename_prefix}_general_info.txt").write_text(
-            tabulate(general_info.items(), tablefmt="grid", stralign="left"), encoding="utf-8"
-        )
-        logger.info(f"📄 تم حفظ المعلومات العامة.")
-
-        if numeric_summary:
-            pd.DataFrame(numeric_summary).T.to_csv(output_dir / f"{filename_prefix}_numeric_stats.csv")
-            logger.info(f"📄 تم حفظ الإحصائيات الرقمية.")
-
-        for col, counts in categorical_summary.items():
-            counts.to_csv(output_dir / f"{filename_prefix}_value_counts_{col}.csv")
-            logger.info(f"📄 تم حفظ القيم المتكررة للعمود: {col}")
-
-        for col, freq in datetime_summary.items():
-            freq.to_csv(output_dir / f"{filename_prefix}_datetime_freq_{col}.csv")
-            logger.info(f"📄 تم حفظ التحليل الزمني للعمود: {col}")
-
+        save_summary_outputs(general_info, numeric_summary, categorical_summary, datetime_summary,
+                             filename_prefix, output_dir)
         generate_numeric_histograms(df, filename_prefix, output_dir)
 
     logger.info("✅ التحليل الوصفي اكتمل بنجاح.")
@@ -159,7 +216,8 @@ def generate_descriptive_stats(df_or_path: Union[pd.DataFrame, str, Path], filen
         "general_info": general_info,
         "numeric_summary": numeric_summary,
         "categorical_summary": categorical_summary,
-        "datetime_summary": datetime_summary
+        "datetime_summary": datetime_summary,
+        "execution_mode": execution_mode
     }
 
 
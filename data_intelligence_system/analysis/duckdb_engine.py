@@ -0,0 +1,302 @@
+"""
+analysis/duckdb_engine.py
+
+مسار تنفيذ اختياري بـ DuckDB المضمّن (داخل العملية، بلا خادم) للتحليلات التجميعية:
+    - الملفات المعالجة (Parquet/CSV/JSON) تُقرأ مباشرة كجدول منطقي واحد؛ المجلد يعني كل ملفاته
+      (مع توحيد الأعمدة بالاسم)، وتُتجاهل المجلدات الوصفية التي تبدأ بـ _ (مثل _rollups)
+    - التجميع يُنفَّذ بـ SQL متجه متعدد الخيوط دون تحميل الملفات في pandas؛ الذاكرة محدودة بميزانية
+      الذاكرة، والتجاوز يُفرغ إلى مجلد مؤقت على القرص (out-of-core)
+    - الوصفي (نفس شكل generate_descriptive_stats)، تكرارات القيم الفئوية، التوزيع الشهري للتواريخ،
+      والإحصاءات وجداول التوافق حسب المجموعات (عزوم ANOVA و Chi-Square في تحليل العلاقة مع الهدف)
+
+الاستخدام:
+    from data_intelligence_system.analysis.duckdb_engine import DuckDBEngine
+
+    with DuckDBEngine() as engine:
+        summary = engine.describe("data/processed")
+        by_city = engine.group_stats("data/processed/sales.parquet", by=["city"], measures=["amount"])
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.analysis.stats_kernel import QUANTILES
+from data_intelligence_system.config.paths_config import DUCKDB_TEMP_DIR
+from data_intelligence_system.config.performance_config import (
+    DATETIME_SNIFF_MIN_RATIO,
+    DATETIME_SNIFF_SAMPLE_ROWS,
+    DUCKDB_MEMORY_MB,
+    DUCKDB_THREADS,
+)
+from data_intelligence_system.utils.memory_planner import get_memory_budget
+
+try:
+    import duckdb  # type: ignore
+except ImportError:
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODE = "duckdb"
+VIEW = "source_data"
+READERS = {".parquet": "read_parquet", ".csv": "read_csv_auto", ".json": "read_json_auto"}
+GROUP_AGGREGATES = {"count": "count", "sum": "sum", "mean": "avg", "min": "min", "max": "max",
+                    "std": "stddev_samp"}
+_NUMERIC_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+                  "UINTEGER", "UBIGINT", "UHUGEINT", "FLOAT", "DOUBLE", "REAL", "DECIMAL")
+_DATETIME_TYPES = ("DATE", "TIMESTAMP")
+
+Source = Union[str, Path, Sequence[Union[str, Path]]]
+
+
+def is_available() -> bool:
+    return duckdb is not None
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def resolve_files(source: Source) -> List[Path]:
+    """ملفات المصدر: ملف، قائمة ملفات، أو مجلد (كل ملفاته المدعومة خارج المجلدات الوصفية _*)."""
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        if path.is_dir():
+            files = [p for p in sorted(path.rglob("*"))
+                     if p.suffix.lower() in READERS
+                     and not any(part.startswith("_") for part in p.relative_to(path).parts)]
+        else:
+            files = [path]
+    else:
+        files = [Path(p) for p in source]
+    for file in files:
+        if file.suffix.lower() not in READERS:
+            raise ValueError(f"❌ صيغة غير مدعومة في DuckDB: {file.name}. المتاح: {list(READERS)}")
+        if not file.exists():
+            raise FileNotFoundError(f"File not found: {file}")
+    if not files:
+        raise FileNotFoundError(f"❌ لا توجد ملفات مدعومة في: {source}")
+    return files
+
+
+def source_sql(source: Source) -> str:
+    """تعبير FROM لكل الملفات كجدول واحد: قارئ لكل صيغة، ثم UNION ALL BY NAME بين الصيغ."""
+    by_reader: Dict[str, List[Path]] = {}
+    for file in resolve_files(source):
+        by_reader.setdefault(READERS[file.suffix.lower()], []).append(file)
+    selects = []
+    for reader, files in by_reader.items():
+        paths = ", ".join(_quote_literal(f.as_posix()) for f in files)
+        selects.append(f"SELECT * FROM {reader}([{paths}], union_by_name = true)")
+    return selects[0] if len(selects) == 1 else " UNION ALL BY NAME ".join(f"({s})" for s in selects)
+
+
+class DuckDBEngine:
+    """
+    اتصال DuckDB في الذاكرة. threads=0 يعني كل الأنوية، memory_mb=None يعني ميزانية الذاكرة العامة؛
+    temp_dir مجلد التفريغ عند تجاوز الذاكرة.
+    """
+
+    def __init__(self, threads: int = DUCKDB_THREADS, memory_mb: Optional[float] = DUCKDB_MEMORY_MB,
+                 temp_dir: Union[str, Path] = DUCKDB_TEMP_DIR):
+        if duckdb is None:
+            raise ImportError("duckdb غير مثبتة. ثبّتها عبر: pip install duckdb")
+        self.conn = duckdb.connect(database=":memory:")
+        if threads:
+            self.conn.execute(f"SET threads = {int(threads)}")
+        self.conn.execute(f"SET memory_limit = '{get_memory_budget(memory_mb) // 1024 ** 2}MB'")
+        Path(temp_dir).mkdir(parents=True, exist_ok=True)
+        self.conn.execute(f"SET temp_directory = {_quote_literal(Path(temp_dir).as_posix())}")
+
+    def __enter__(self) -> "DuckDBEngine":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ---------- المصدر ----------
+    def _bind(self, source: Source) -> List[Tuple[str, str]]:
+        """ربط المصدر بعرض VIEW وإرجاع (اسم العمود، نوعه) بترتيب الملف."""
+        self.conn.execute(f"CREATE OR REPLACE TEMP VIEW {VIEW} AS {source_sql(source)}")
+        return [(row[0], row[1]) for row in self.conn.execute(f"DESCRIBE {VIEW}").fetchall()]
+
+    @staticmethod
+    def _columns_of(schema: List[Tuple[str, str]], kinds: Tuple[str, ...]) -> List[str]:
+        return [name for name, dtype in schema if dtype.upper().startswith(kinds)]
+
+    def _sniff_text_dates(self, text_cols: Sequence[str]) -> List[str]:
+        """الأعمدة النصية التي تتحول غالبية عينتها إلى TIMESTAMP (كما في sniff_datetime_columns)."""
+        if not text_cols:
+            return []
+        exprs = [f"count({quote_identifier(c)}), count(TRY_CAST({quote_identifier(c)} AS TIMESTAMP))"
+                 for c in text_cols]
+        row = self.conn.execute(f"SELECT {', '.join(exprs)} FROM "
+                                f"(SELECT * FROM {VIEW} LIMIT {DATETIME_SNIFF_SAMPLE_ROWS})").fetchone()
+        return [col for i, col in enumerate(text_cols)
+                if row[2 * i] and row[2 * i + 1] / row[2 * i] >= DATETIME_SNIFF_MIN_RATIO]
+
+    def _classify(self, schema: List[Tuple[str, str]]) -> Tuple[List[str], List[str], List[str]]:
+        """(رقمية، فئوية، تواريخ)؛ التواريخ المحفوظة كنص (CSV مع Parquet مثلًا) تُعامل كتواريخ."""
+        text_cols = [name for name, dtype in schema if dtype.upper() == "VARCHAR"]
+        text_dates = self._sniff_text_dates(text_cols)
+        datetime_cols = [name for name, _ in schema
+                         if name in text_dates or name in self._columns_of(schema, _DATETIME_TYPES)]
+        return (self._columns_of(schema, _NUMERIC_TYPES),
+                [c for c in text_cols if c not in text_dates], datetime_cols)
+
+    def query(self, sql: str) -> pd.DataFrame:
+        return self.conn.execute(sql).df()
+
+    # ---------- الوصفي ----------
+    def describe(self, source: Source, top_n: int = 10) -> Dict[str, object]:
+        """الإحصاءات الوصفية بنفس شكل generate_descriptive_stats دون تحميل البيانات في pandas."""
+        schema = self._bind(source)
+        columns = [name for name, _ in schema]
+        numeric_cols, categorical_cols, datetime_cols = self._classify(schema)
+
+        # مسح واحد: عدد الصفوف، غير المفقود لكل عمود (التاريخ غير القابل للتحويل مفقود)،
+        # وعزوم الأعمدة الرقمية وربيعياتها
+        quantiles = ", ".join(str(q) for q in QUANTILES)
+        exprs = ["count(*)"] + [f"count({_as_timestamp(c) if c in datetime_cols else quote_identifier(c)})"
+                                for c in columns]
+        for col in numeric_cols:
+            q = f"CAST({quote_identifier(col)} AS DOUBLE)"
+            exprs += [f"avg({q})", f"stddev_samp({q})", f"min({q})", f"max({q})",
+                      f"quantile_cont({q}, [{quantiles}])"]
+        row = self.conn.execute(f"SELECT {', '.join(exprs)} FROM {VIEW}").fetchone()
+        n_rows, counts, moments = int(row[0]), row[1:len(columns) + 1], row[len(columns) + 1:]
+        non_missing = dict(zip(columns, counts))
+
+        total_cells = n_rows * len(columns)
+        missing_cells = total_cells - sum(counts)
+        distinct = self.conn.execute(f"SELECT count(*) FROM (SELECT DISTINCT * FROM {VIEW})").fetchone()[0]
+        general_info = {
+            "Number of Rows": n_rows,
+            "Number of Columns": len(columns),
+            "Missing Values": missing_cells,
+            "Missing %": round((missing_cells / total_cells) * 100, 2) if total_cells > 0 else 0.0,
+            "Duplicated Rows": n_rows - int(distinct),
+        }
+
+        numeric_summary = {}
+        for i, col in enumerate(numeric_cols):
+            mean, std, minimum, maximum, qs = moments[5 * i:5 * i + 5]
+            missing = n_rows - non_missing[col]
+            summary = {"count": float(non_missing[col]), "mean": _nan(mean), "std": _nan(std), "min": _nan(minimum)}
+            for q, value in zip(QUANTILES, qs or [None] * len(QUANTILES)):
+                summary[f"{q:.0%}"] = _nan(value)
+            summary["max"] = _nan(maximum)
+            summary["missing_values"] = missing
+            summary["missing_%"] = round(missing / n_rows * 100, 2) if n_rows else np.nan
+            numeric_summary[col] = summary
+
+        logger.info(f"🦆 تحليل وصفي بـ DuckDB: {n_rows} صف، {len(columns)} عمود")
+        return {
+            "general_info": general_info,
+            "numeric_summary": numeric_summary,
+            "categorical_summary": self._categorical_counts(categorical_cols, top_n),
+            "datetime_summary": self._datetime_counts(datetime_cols),
+            "execution_mode": EXECUTION_MODE,
+        }
+
+    def _categorical_counts(self, columns: Sequence[str], top_n: int) -> Dict[str, pd.Series]:
+        result = {}
+        for col in columns:
+            q = quote_identifier(col)
+            frame = self.query(f"SELECT {q} AS value, count(*) AS n FROM {VIEW} GROUP BY {q} "
+                               f"ORDER BY n DESC, value NULLS LAST LIMIT {int(top_n)}")
+            result[col] = pd.Series(frame["n"].to_numpy(), index=pd.Index(frame["value"], name=col), name="count")
+        return result
+
+    def _datetime_counts(self, columns: Sequence[str]) -> Dict[str, pd.Series]:
+        result = {}
+        for col in columns:
+            q = _as_timestamp(col)
+            frame = self.query(f"SELECT date_trunc('month', {q}) AS month, count(*) AS n FROM {VIEW} "
+                               f"WHERE {q} IS NOT NULL GROUP BY month ORDER BY month")
+            index = pd.PeriodIndex(pd.to_datetime(frame["month"]), freq="M").rename(col)
+            result[col] = pd.Series(frame["n"].to_numpy(), index=index, name="count")
+        return result
+
+    # ---------- حسب المجموعات ----------
+    def group_stats(self, source: Source, by: Sequence[str], measures: Optional[Sequence[str]] = None,
+                    aggregates: Sequence[str] = ("count", "mean", "min", "max")) -> pd.DataFrame:
+        """
+        إحصاءات measures لكل مجموعة من أعمدة by؛ الأعمدة <مقياس>_<إحصاء> والفهرس أعمدة by مرتبة.
+        measures=None يعني كل الأعمدة الرقمية خارج by.
+        """
+        unknown = set(aggregates) - set(GROUP_AGGREGATES)
+        if unknown:
+            raise ValueError(f"❌ إحصاءات غير مدعومة: {sorted(unknown)}. المتاح: {list(GROUP_AGGREGATES)}")
+        schema = self._bind(source)
+        if measures is None:
+            measures = [c for c in self._columns_of(schema, _NUMERIC_TYPES) if c not in by]
+        keys = ", ".join(quote_identifier(c) for c in by)
+        exprs = [keys, "count(*) AS rows"]
+        exprs += [f"{GROUP_AGGREGATES[agg]}({quote_identifier(col)}) AS {quote_identifier(f'{col}_{agg}')}"
+                  for col in measures for agg in aggregates]
+        frame = self.query(f"SELECT {', '.join(exprs)} FROM {VIEW} GROUP BY {keys} ORDER BY {keys}")
+        return frame.set_index(list(by))
+
+    def contingency_tables(self, source: Source, target: str,
+                           columns: Optional[Sequence[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        جداول التوافق (قيم العمود × فئات الهدف) من عدّ المجموعات، بنفس شكل target_kernel.contingency_tables:
+        الصفوف التي فيها قيمة مفقودة تُستبعد. columns=None يعني كل الأعمدة الفئوية خارج الهدف.
+        كل الجداول من مرور واحد على المصدر (GROUP BY GROUPING SETS بمجموعة (عمود، هدف) لكل عمود).
+        """
+        if columns is None:
+            columns = [c for c in self.column_types(source)[1] if c != target]
+        else:
+            self._bind(source)
+        columns = list(dict.fromkeys(c for c in columns if c != target))
+        if not columns:
+            return {}
+
+        keys = [quote_identifier(c) for c in columns]
+        quoted_target = quote_identifier(target)
+        # GROUPING(عمود) = 0 في صفوف مجموعته فقط؛ في صفوف المجموعات الأخرى يكون العمود NULL
+        flags = [f"__grouping_{i}" for i in range(len(columns))]
+        exprs = keys + [quoted_target, "count(*) AS rows"]
+        exprs += [f"GROUPING({key}) AS {quote_identifier(flag)}" for key, flag in zip(keys, flags)]
+        sets = ", ".join(f"({key}, {quoted_target})" for key in keys)
+        frame = self.query(f"SELECT {', '.join(exprs)} FROM {VIEW} WHERE {quoted_target} IS NOT NULL "
+                           f"GROUP BY GROUPING SETS ({sets})")
+        # أنواع الأعمدة الأصلية (الأعمدة الصحيحة تصبح float بسبب NULL المجموعات الأخرى)
+        dtypes = self.query(f"SELECT {', '.join(keys)} FROM {VIEW} LIMIT 0").dtypes
+
+        tables = {}
+        for col, flag in zip(columns, flags):
+            part = frame[(frame[flag] == 0) & frame[col].notna()]
+            counts = part.astype({col: dtypes[col]}).set_index([col, target])["rows"]
+            tables[col] = counts.unstack(fill_value=0).sort_index().sort_index(axis=1)
+        return tables
+
+    def column_types(self, source: Source) -> Tuple[List[str], List[str], List[str]]:
+        """(رقمية، فئوية، تواريخ) لأعمدة المصدر بنفس تصنيف describe."""
+        return self._classify(self._bind(source))
+
+
+def _as_timestamp(col: str) -> str:
+    return f"TRY_CAST({quote_identifier(col)} AS TIMESTAMP)"
+
+
+def _nan(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+def describe_with_duckdb(source: Source, top_n: int = 10) -> Dict[str, object]:
+    """اختصار: الإحصاءات الوصفية لمصدر واحد باتصال مؤقت."""
+    with DuckDBEngine() as engine:
+        return engine.describe(source, top_n=top_n)
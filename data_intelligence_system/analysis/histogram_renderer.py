@@ -0,0 +1,219 @@
+"""
+analysis/histogram_renderer.py
+
+رسم مدرجات الأعمدة الرقمية بتكلفة أقل من seaborn.histplot(kde=True) عمودًا بعمود:
+    - حدود الفئات والتكرارات ومنحنى KDE تُحسب بـ NumPy مرة واحدة لكل عمود (KDE مجمّع على شبكة ثابتة)
+    - الرسم والحفظ في مجموعة عمليات؛ يُرسل للعامل ملخص المدرج فقط وليس بيانات العمود
+    - وضع مسودة: دقة أقل وبدون KDE
+    - لا يُعاد رسم عمود لم تتغير بصمة بياناته وإعدادات رسمه (سجل في مجلد المخرجات يُدمج تحت قفل ملف
+      ويُكتب ذريًا، فلا تضيع مدخلات التشغيلات المتزامنة ولا يُقرأ سجل مبتور)
+
+الاستخدام:
+    from data_intelligence_system.analysis.histogram_renderer import render_numeric_histograms
+
+    render_numeric_histograms(df, filename_prefix="sales", output_dir=Path("analysis_output"), draft=True)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.config.performance_config import (
+    HISTOGRAM_WORKERS,
+    HISTOGRAM_DPI,
+    HISTOGRAM_DRAFT_DPI,
+    HISTOGRAM_DRAFT,
+)
+from data_intelligence_system.utils.parallel import process_pool, resolve_workers
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".histogram_manifest.json"
+KDE_GRID_SIZE = 200
+KDE_BINS = 1024
+MIN_PARALLEL_COLUMNS = 4
+
+
+@dataclass
+class HistogramData:
+    """ملخص مدرج جاهز للرسم (صغير الحجم وقابل للإرسال بين العمليات)."""
+    column: str
+    edges: np.ndarray
+    counts: np.ndarray
+    kde_x: Optional[np.ndarray] = None
+    kde_y: Optional[np.ndarray] = None
+
+
+def column_fingerprint(series: pd.Series) -> str:
+    """بصمة بيانات العمود (القيم والنوع دون الفهرس)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(series.dtype).encode())
+    digest.update(pd.util.hash_array(series.to_numpy()).tobytes())
+    return digest.hexdigest()
+
+
+def _binned_kde(values: np.ndarray, bin_width: float) -> Optional[tuple]:
+    """
+    KDE غاوسي بعرض Scott (مثل gaussian_kde) محسوب على تكرارات مجمّعة في KDE_BINS فئة،
+    ومقاس على التكرارات مثل منحنى histplot (الكثافة × العدد × عرض الفئة).
+    """
+    n = len(values)
+    std = values.std(ddof=1) if n > 1 else 0.0
+    if n < 2 or not np.isfinite(std) or std == 0:
+        return None
+    bandwidth = std * n ** (-1 / 5)
+    low, high = values.min(), values.max()
+    fine_counts, fine_edges = np.histogram(values, bins=KDE_BINS, range=(low, high))
+    centers = (fine_edges[:-1] + fine_edges[1:]) / 2
+    grid = np.linspace(low, high, KDE_GRID_SIZE)
+    kernel = np.exp(-0.5 * ((grid[:, None] - centers[None, :]) / bandwidth) ** 2)
+    density = kernel @ fine_counts / (n * bandwidth * np.sqrt(2 * np.pi))
+    return grid, density * n * bin_width
+
+
+def compute_histogram(series: pd.Series, kde: bool = True, bins="auto") -> Optional[HistogramData]:
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return None
+    edges = np.histogram_bin_edges(values, bins=bins)
+    counts, edges = np.histogram(values, bins=edges)
+    data = HistogramData(column=str(series.name), edges=edges, counts=counts)
+    if kde:
+        curve = _binned_kde(values, float(edges[1] - edges[0]))
+        if curve is not None:
+            data.kde_x, data.kde_y = curve
+    return data
+
+
+def render_histogram(data: HistogramData, filepath: Path, dpi: int, figsize: tuple = (8, 5)) -> str:
+    """رسم وحفظ مدرج واحد (تعمل داخل العامل؛ Figure مباشرة بدون حالة pyplot)."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    ax.stairs(data.counts, data.edges, fill=True, color="steelblue", alpha=0.6, edgecolor="white")
+    if data.kde_x is not None:
+        ax.plot(data.kde_x, data.kde_y, color="steelblue")
+    ax.set_xlabel(data.column)
+    ax.set_ylabel("Count")
+    ax.set_title(f"Distribution of {data.column}")
+    fig.savefig(filepath, bbox_inches="tight", dpi=dpi)
+    return str(filepath)
+
+
+_MANIFEST_LOCK = threading.Lock()
+
+
+def _load_manifest(output_dir: Path) -> Dict[str, dict]:
+    try:
+        return json.loads((output_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+@contextmanager
+def _manifest_lock(output_dir: Path):
+    """قفل السجل بين الخيوط وبين العمليات (fcntl.flock على ملف .lock حيث يتوفر)."""
+    with _MANIFEST_LOCK, open(output_dir / f"{MANIFEST_NAME}.lock", "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _update_manifest(output_dir: Path, entries: Dict[str, dict]):
+    """دمج المدخلات الجديدة مع السجل الحالي على القرص ثم كتابته ذريًا (ملف مؤقت ثم os.replace)."""
+    with _manifest_lock(output_dir):
+        manifest = _load_manifest(output_dir)
+        manifest.update(entries)
+        tmp = output_dir / f"{MANIFEST_NAME}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, output_dir / MANIFEST_NAME)
+
+
+def render_numeric_histograms(df: pd.DataFrame, filename_prefix: str, output_dir: Path,
+                              columns: Optional[Sequence[str]] = None, draft: bool = HISTOGRAM_DRAFT,
+                              workers: int = HISTOGRAM_WORKERS, force: bool = False) -> List[str]:
+    """
+    رسم مدرجات الأعمدة الرقمية إلى {prefix}_distribution_{col}.png.
+    يعيد قائمة الملفات التي رُسمت فعلًا (المتجاوزة لعدم تغيرها لا تُعاد).
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if columns is None:
+        columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    dpi = HISTOGRAM_DRAFT_DPI if draft else HISTOGRAM_DPI
+    settings = {"dpi": dpi, "kde": not draft}
+
+    manifest = _load_manifest(output_dir)
+    jobs, fingerprints = [], {}
+    for col in columns:
+        filename = f"{filename_prefix}_distribution_{col}.png"
+        fingerprint = column_fingerprint(df[col])
+        entry = manifest.get(filename)
+        if not force and entry == {"hash": fingerprint, **settings} and (output_dir / filename).exists():
+            continue
+        try:
+            data = compute_histogram(df[col], kde=not draft)
+        except Exception as e:
+            logger.warning(f"⚠️ فشل حساب مدرج العمود '{col}': {e}")
+            continue
+        if data is None:
+            logger.warning(f"⚠️ العمود '{col}' لا يحتوي على قيم صالحة للرسم.")
+            continue
+        jobs.append((data, output_dir / filename))
+        fingerprints[filename] = fingerprint
+
+    skipped = len(columns) - len(jobs)
+    workers = resolve_workers(workers)
+    rendered, pending = [], jobs
+    if workers > 1 and len(jobs) >= MIN_PARALLEL_COLUMNS:
+        finished = set()
+        try:
+            with process_pool(min(workers, len(jobs))) as executor:
+                futures = [(executor.submit(render_histogram, data, path, dpi), path) for data, path in jobs]
+                for future, path in futures:
+                    try:
+                        rendered.append(future.result())
+                    except BrokenProcessPool:
+                        continue
+                    except Exception as e:
+                        logger.warning(f"⚠️ فشل رسم {path.name}: {e}")
+                    finished.add(path)
+        except BrokenProcessPool:
+            pass
+        pending = [(data, path) for data, path in jobs if path not in finished]
+        if pending:
+            # عامل انتهى فجأة (نفاد الذاكرة مثلًا): المدرجات التي لم تُرسم تُرسم في هذه العملية
+            logger.warning(f"⚠️ توقفت عمليات الرسم، رسم {len(pending)} مدرج متبقٍ بالتتابع.")
+    for data, path in pending:
+        try:
+            rendered.append(render_histogram(data, path, dpi))
+        except Exception as e:
+            logger.warning(f"⚠️ فشل رسم {path.name}: {e}")
+
+    if rendered:
+        _update_manifest(output_dir, {Path(path).name: {"hash": fingerprints[Path(path).name], **settings}
+                                      for path in rendered})
+
+    logger.info(f"🖼️ تم رسم {len(rendered)} مدرج (تجاوز {skipped} دون تغيير) في: {output_dir}")
+    return rendered
@@ -1,9 +1,13 @@
 import pandas as pd
 import numpy as np
+import copy
 import logging
+import os
+from contextlib import ExitStack
 from sklearn.ensemble import IsolationForest
 from scipy import stats
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
 
 # استيرادات من جذر المشروع
 from data_intelligence_system.analysis.analysis_utils import (
@@ -12,76 +16,361 @@ from data_intelligence_system.analysis.analysis_utils import (
     save_dataframe,
     log_basic_info
 )
+from data_intelligence_system.analysis.streaming_stats import MomentsAccumulator, QuantileSketch
+from data_intelligence_system.config.performance_config import (
+    ISOLATION_MAX_TRAIN_ROWS,
+    ISOLATION_N_JOBS,
+    MIN_CHUNK_ROWS,
+    OUTLIER_BATCH_WORKERS,
+    STREAMING_SKETCH_K,
+)
+from data_intelligence_system.ml_models.anomaly.isolation_forest import IsolationForestAnomalyModel
 from data_intelligence_system.utils.data_loader import load_data
+from data_intelligence_system.utils.memory_planner import (
+    CHUNKED,
+    IN_MEMORY,
+    SAMPLED,
+    iter_chunks,
+    load_sample,
+    plan_execution,
+)
+from data_intelligence_system.utils.parallel import limit_nested_parallelism, process_pool, resolve_workers
 from data_intelligence_system.utils.preprocessing import fill_missing_values
+from data_intelligence_system.utils.sampling import StreamingSampler
 from data_intelligence_system.utils.timer import Timer
 
 # استيراد المسارات المحدثة من config
 from data_intelligence_system.config.paths_config import (
     PROCESSED_DATA_DIR as DATA_DIR,
     ANALYSIS_DIR,
+    ML_MODELS_DIR,
 )
 
 OUTPUT_DIR = ANALYSIS_DIR / "analysis_output"
 OUTLIER_REPORT_PATH = OUTPUT_DIR / "outliers_summary_report.csv"
+STREAMING_METHODS = ("iqr", "zscore")
 
 # ===================== إعداد التسجيل =====================
 logging.basicConfig(level=logging.INFO, format="%(asctime)s — %(levelname)s — %(message)s")
 logger = logging.getLogger(__name__)
 
 
-def detect_outliers_zscore(df: pd.DataFrame, threshold=3) -> pd.Series:
-    logger.info("🧮 اكتشاف القيم الشاذة باستخدام Z-Score")
-    df = fill_missing_values(df)
+def prepare_outlier_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    """الأعمدة الرقمية بعد ملء المفقود (نسخة واحدة تتشاركها كل طرق الاكتشاف)."""
     numeric_cols = get_numerical_columns(df)
-    if not numeric_cols:
-        logger.warning("⚠️ لا توجد أعمدة رقمية لاكتشاف القيم الشاذة باستخدام Z-Score.")
-        return pd.Series(False, index=df.index)
+    if not numeric_cols or df.empty:
+        return pd.DataFrame(index=df.index)
+    return fill_missing_values(df[numeric_cols])
 
-    z_scores = np.abs(stats.zscore(df[numeric_cols]))
+
+def _zscore_mask(numeric: pd.DataFrame, threshold=3) -> pd.Series:
+    z_scores = np.abs(stats.zscore(numeric))
     return (z_scores > threshold).any(axis=1)
 
 
-def detect_outliers_iqr(df: pd.DataFrame, factor=1.5) -> pd.Series:
+def _iqr_mask(numeric: pd.DataFrame, factor=1.5) -> pd.Series:
+    Q1 = numeric.quantile(0.25)
+    Q3 = numeric.quantile(0.75)
+    IQR = Q3 - Q1
+    return ((numeric < (Q1 - factor * IQR)) | (numeric > (Q3 + factor * IQR))).any(axis=1)
+
+
+def _isolation_forest_mask(numeric: pd.DataFrame, contamination=0.05) -> pd.Series:
+    if len(numeric) > ISOLATION_MAX_TRAIN_ROWS:
+        # بيانات كبيرة: تدريب على عينة محدودة وتقييم كل الصفوف على دفعات
+        model = IsolationForestAnomalyModel(contamination=contamination).fit(numeric)
+        return pd.Series(model.predict(numeric) == -1, index=numeric.index)
+    model = IsolationForest(contamination=contamination, random_state=42,
+                            n_jobs=resolve_workers(ISOLATION_N_JOBS))
+    preds = model.fit_predict(numeric)  # ndarray من -1 و 1
+    mask = preds == -1  # ndarray من قيم boolean
+    return pd.Series(mask, index=numeric.index)  # تحويل إلى Series مع نفس الفهرس
+
+
+def detect_outliers_zscore(df: pd.DataFrame, threshold=3, numeric: Optional[pd.DataFrame] = None) -> pd.Series:
+    logger.info("🧮 اكتشاف القيم الشاذة باستخدام Z-Score")
+    numeric = prepare_outlier_matrix(df) if numeric is None else numeric
+    if numeric.empty:
+        logger.warning("⚠️ لا توجد أعمدة رقمية لاكتشاف القيم الشاذة باستخدام Z-Score.")
+        return pd.Series(False, index=df.index)
+    return _zscore_mask(numeric, threshold)
+
+
+def detect_outliers_iqr(df: pd.DataFrame, factor=1.5, numeric: Optional[pd.DataFrame] = None) -> pd.Series:
     logger.info("🧮 اكتشاف القيم الشاذة باستخدام IQR")
-    df = fill_missing_values(df)
-    numeric_cols = get_numerical_columns(df)
-    if not numeric_cols:
+    numeric = prepare_outlier_matrix(df) if numeric is None else numeric
+    if numeric.empty:
         logger.warning("⚠️ لا توجد أعمدة رقمية لاكتشاف القيم الشاذة باستخدام IQR.")
         return pd.Series(False, index=df.index)
+    return _iqr_mask(numeric, factor)
 
-    Q1 = df[numeric_cols].quantile(0.25)
-    Q3 = df[numeric_cols].quantile(0.75)
-    IQR = Q3 - Q1
-    return ((df[numeric_cols] < (Q1 - factor * IQR)) | (df[numeric_cols] > (Q3 + factor * IQR))).any(axis=1)
 
-
-def detect_outliers_isolation_forest(df: pd.DataFrame, contamination=0.05) -> pd.Series:
+def detect_outliers_isolation_forest(df: pd.DataFrame, contamination=0.05,
+                                     numeric: Optional[pd.DataFrame] = None) -> pd.Series:
     logger.info("🌲 اكتشاف القيم الشاذة باستخدام Isolation Forest")
-    df = fill_missing_values(df)
-    numeric_cols = get_numerical_columns(df)
-    if not numeric_cols:
+    numeric = prepare_outlier_matrix(df) if numeric is None else numeric
+    if numeric.empty:
         logger.warning("⚠️ لا توجد أعمدة رقمية لاكتشاف القيم الشاذة باستخدام Isolation Forest.")
         return pd.Series(False, index=df.index)
+    return _isolation_forest_mask(numeric, contamination)
+
+
+def detect_all_outliers(df: pd.DataFrame, threshold=3, factor=1.5, contamination=0.05) -> Dict[str, pd.Series]:
+    """الطرق الثلاث على مصفوفة واحدة مُجهزة (ملء المفقود واختيار الأعمدة مرة واحدة فقط)."""
+    numeric = prepare_outlier_matrix(df)
+    if numeric.empty:
+        logger.warning("⚠️ لا توجد أعمدة رقمية لاكتشاف القيم الشاذة.")
+        empty = pd.Series(False, index=df.index)
+        return {"zscore": empty, "iqr": empty.copy(), "isolation_forest": empty.copy()}
+    return {
+        "zscore": _zscore_mask(numeric, threshold),
+        "iqr": _iqr_mask(numeric, factor),
+        "isolation_forest": _isolation_forest_mask(numeric, contamination),
+    }
+
+
+# ===================== الوضع المتدفق (ملفات أكبر من الذاكرة) =====================
+def _numeric_chunk(chunk: pd.DataFrame, numeric_cols: list) -> pd.DataFrame:
+    return chunk.reindex(columns=numeric_cols).apply(pd.to_numeric, errors="coerce")
+
+
+class _BoundsAccumulator:
+    """عزوم ومخطط ربيعيات لكل عمود رقمي (الأعمدة من الدفعة الأولى)، تكفي لحدود IQR و Z-Score معًا."""
+
+    def __init__(self, methods: Sequence[str], sketch_k: int = STREAMING_SKETCH_K):
+        unknown = set(methods) - set(STREAMING_METHODS)
+        if unknown:
+            raise ValueError(f"❌ الطريقة غير مدعومة في الوضع المتدفق: {sorted(unknown)}")
+        self.methods = tuple(methods)
+        self.sketch_k = sketch_k
+        self.numeric_cols: Optional[List[str]] = None
+        self.moments: Dict[str, MomentsAccumulator] = {}
+        self.sketches: Dict[str, QuantileSketch] = {}
+
+    def update(self, chunk: pd.DataFrame):
+        if self.numeric_cols is None:
+            self.numeric_cols = get_numerical_columns(chunk)
+            self.moments = {col: MomentsAccumulator() for col in self.numeric_cols}
+            if "iqr" in self.methods:
+                self.sketches = {col: QuantileSketch(k=self.sketch_k) for col in self.numeric_cols}
+        values = _numeric_chunk(chunk, self.numeric_cols)
+        for col in self.numeric_cols:
+            column = values[col].to_numpy(dtype=float, na_value=np.nan)
+            self.moments[col].update(column)
+            if col in self.sketches:
+                self.sketches[col].update(column)
+
+    def bounds(self, method: str, factor: float = 1.5, threshold: float = 3) -> Dict[str, tuple]:
+        """حدود القبول (low, high, قيمة الملء) لكل عمود؛ المفقود يُحتسب بالمتوسط كما في fill_missing_values."""
+        bounds = {}
+        for col in self.numeric_cols or []:
+            acc = self.moments[col]
+            if acc.count == 0:
+                continue  # عمود بلا قيم صالحة يبقى مفقودًا ولا يُعلَّم
+            if method == "iqr":
+                sketch = copy.deepcopy(self.sketches[col])
+                sketch.add_weighted(acc.mean, acc.missing)
+                q1, q3 = sketch.quantiles([0.25, 0.75])
+                iqr = q3 - q1
+                bounds[col] = (q1 - factor * iqr, q3 + factor * iqr, acc.mean)
+            else:
+                # scipy.stats.zscore: انحراف بدون تصحيح على البيانات بعد الملء
+                std = np.sqrt(acc.m2 / (acc.count + acc.missing))
+                if std > 0:
+                    bounds[col] = (acc.mean - threshold * std, acc.mean + threshold * std, acc.mean)
+        return bounds
+
+
+def fit_outlier_bounds(path: Union[str, Path], method: str = "iqr", factor: float = 1.5, threshold: float = 3,
+                       chunk_size: int = MIN_CHUNK_ROWS * 10,
+                       sketch_k: int = STREAMING_SKETCH_K) -> Dict[str, tuple]:
+    """
+    التمريرة الأولى: مخطط ربيعيات ومتوسط/تباين متدفق لكل عمود رقمي، ثم حدود القبول (low, high) لكل عمود.
+    القيم المفقودة تُحتسب بالمتوسط كما في fill_missing_values. خطأ الرتبة في IQR من رتبة 1/sketch_k
+    (دقيق تمامًا حتى sketch_k قيمة لكل عمود).
+    """
+    acc = _BoundsAccumulator((method,), sketch_k)
+    for chunk in iter_chunks(path, chunk_size):
+        acc.update(chunk)
+    return acc.bounds(method, factor, threshold)
+
+
+def _bounds_mask(chunk: pd.DataFrame, bounds: Dict[str, tuple]) -> np.ndarray:
+    """صفوف الدفعة الخارجة عن حدود أي عمود (حدود z-score هي mean ± threshold·std، فالمقارنة واحدة)."""
+    if not bounds:
+        return np.zeros(len(chunk), dtype=bool)
+    columns = list(bounds)
+    low, high, fill = (np.array([bounds[c][i] for c in columns]) for i in range(3))
+    values = _numeric_chunk(chunk, columns).to_numpy(dtype=float, na_value=np.nan)
+    values = np.where(np.isnan(values), fill, values)
+    return ((values < low) | (values > high)).any(axis=1)
 
-    model = IsolationForest(contamination=contamination, random_state=42)
-    preds = model.fit_predict(df[numeric_cols])  # ndarray من -1 و 1
-    mask = preds == -1  # ndarray من قيم boolean
-    return pd.Series(mask, index=df.index)  # تحويل إلى Series مع نفس الفهرس
 
+def _write_indices(f, mask: np.ndarray, offset: int) -> int:
+    rows = np.flatnonzero(mask) + offset
+    if len(rows):
+        np.savetxt(f, rows, fmt="%d")
+    return len(rows)
+
+
+def flag_outliers_streaming(path: Union[str, Path], bounds: Dict[str, tuple], indices_path: Path,
+                            chunk_size: int = MIN_CHUNK_ROWS * 10) -> tuple:
+    """
+    التمريرة الثانية: تعليم الصفوف دفعة بدفعة وكتابة أرقام الصفوف الشاذة فقط (row_index) إلى indices_path.
+    تعيد (عدد الشاذ، عدد الصفوف).
+    """
+    total, offset = 0, 0
+    with open(indices_path, "w", encoding="utf-8") as f:
+        f.write("row_index\n")
+        for chunk in iter_chunks(path, chunk_size):
+            total += _write_indices(f, _bounds_mask(chunk, bounds), offset)
+            offset += len(chunk)
+    return total, offset
+
+
+def run_streaming_outlier_methods(path: Union[str, Path], methods: Sequence[str] = STREAMING_METHODS,
+                                  factor: float = 1.5, threshold: float = 3, chunk_size: Optional[int] = None,
+                                  sketch_k: int = STREAMING_SKETCH_K, isolation_forest: bool = False,
+                                  contamination: float = 0.05, max_train_rows: int = ISOLATION_MAX_TRAIN_ROWS,
+                                  output_dir: Path = OUTPUT_DIR, model_dir: Path = ML_MODELS_DIR,
+                                  reuse: bool = True) -> Dict[str, dict]:
+    """
+    IQR و/أو Z-Score (و Isolation Forest اختياريًا) لملف بأي حجم في تمريرتين مشتركتين فقط:
+        1. العزوم ومخططات الربيعيات لكل الطرق، وعينة تدريب Isolation Forest (reservoir) عند الحاجة
+        2. تعليم الصفوف بكل الطرق وتقييم النموذج على نفس الدفعة
+    يعيد {الطريقة: النتيجة بنفس شكل run_streaming_outlier_detection / run_scalable_isolation_forest}؛
+    وكل نتيجة تحمل numeric_columns من التمريرة الأولى.
+    """
+    ensure_output_dir(output_dir)
+    path = Path(path)
+    chunk_size = chunk_size or MIN_CHUNK_ROWS * 10
+
+    model = _load_saved_isolation_forest(path, contamination, max_train_rows, model_dir) \
+        if isolation_forest and reuse else None
+    sampler = StreamingSampler(max_train_rows) if isolation_forest and model is None else None
+    acc = _BoundsAccumulator(methods, sketch_k)
+    for chunk in iter_chunks(path, chunk_size):
+        acc.update(chunk)
+        if sampler is not None:
+            sampler.update(chunk)
+    if sampler is not None:
+        model = _fit_isolation_forest(path, sampler.result(), contamination, max_train_rows, model_dir)
+
+    bounds = {method: acc.bounds(method, factor, threshold) for method in methods}
+    flagged = list(methods) + (["isolation_forest"] if model is not None else [])
+    paths = {method: output_dir / f"outliers_{method}_{path.stem}_indices.csv" for method in flagged}
+    detected = dict.fromkeys(flagged, 0)
+    offset = 0
+    with ExitStack() as stack:
+        files = {method: stack.enter_context(open(p, "w", encoding="utf-8")) for method, p in paths.items()}
+        for f in files.values():
+            f.write("row_index\n")
+        for chunk in iter_chunks(path, chunk_size):
+            for method in methods:
+                detected[method] += _write_indices(files[method], _bounds_mask(chunk, bounds[method]), offset)
+            if model is not None:
+                mask = model.score_samples(chunk, chunk_size=max(1, len(chunk))) < 0
+                detected["isolation_forest"] += _write_indices(files["isolation_forest"], mask, offset)
+            offset += len(chunk)
+
+    numeric_columns = len(acc.numeric_cols or [])
+    results = {}
+    for method in flagged:
+        logger.info(f"✅ {method}: {detected[method]} صف شاذ في {path.name} — الأرقام محفوظة في: {paths[method]}")
+        results[method] = {
+            "method": method,
+            "outliers_detected": detected[method],
+            "total_rows": offset,
+            "numeric_columns": numeric_columns,
+            "file_saved": str(paths[method]),
+            "execution_mode": CHUNKED,
+        }
+        if method == "isolation_forest":
+            results[method]["model_path"] = str(model.model_path)
+        else:
+            results[method]["bounds"] = {col: (low, high) for col, (low, high, _) in bounds[method].items()}
+    return results
+
+
+@Timer("تحليل القيم الشاذة المتدفق")
+def run_streaming_outlier_detection(path: Union[str, Path], method: str = "iqr", factor: float = 1.5,
+                                    threshold: float = 3, chunk_size: Optional[int] = None,
+                                    sketch_k: int = STREAMING_SKETCH_K, output_dir: Path = OUTPUT_DIR) -> dict:
+    """
+    IQR / Z-Score لملف بأي حجم بذاكرة محدودة: تمريرة للمخططات والعزوم، وتمريرة لتعليم الصفوف.
+    المخرجات ملف بأرقام الصفوف الشاذة (بترتيبها في الملف بدءًا من 0) بدل الصفوف نفسها.
+    """
+    if method not in STREAMING_METHODS:
+        raise ValueError(f"❌ الطريقة غير مدعومة في الوضع المتدفق: {method}")
+    return run_streaming_outlier_methods(path, (method,), factor=factor, threshold=threshold,
+                                         chunk_size=chunk_size, sketch_k=sketch_k, output_dir=output_dir)[method]
+
+
+def file_signature(path: Path) -> tuple:
+    """بصمة الملف المصدر (المسار والحجم ووقت التعديل) للتحقق من صلاحية النموذج المحفوظ."""
+    stat = path.stat()
+    return str(path.resolve()), stat.st_size, stat.st_mtime_ns
+
+
+def _load_saved_isolation_forest(path: Path, contamination: float, max_train_rows: int,
+                                 model_dir: Path) -> Optional[IsolationForestAnomalyModel]:
+    """النموذج المحفوظ للملف إذا كان مدربًا على نفس نسخته وبنفس contamination، وإلا None."""
+    model = IsolationForestAnomalyModel(model_name=f"isolation_forest_{path.stem}", contamination=contamination,
+                                        max_train_rows=max_train_rows, model_dir=model_dir)
+    if not model.model_path.exists():
+        return None
+    try:
+        saved = model.load()
+        if saved.source_signature == file_signature(path) and saved.contamination == contamination:
+            logger.info(f"♻️ إعادة استخدام نموذج Isolation Forest المحفوظ للملف: {path.name}")
+            return saved
+    except Exception as e:
+        logger.warning(f"⚠️ تعذر تحميل النموذج المحفوظ، سيُعاد التدريب: {e}")
+    return None
+
+
+def _fit_isolation_forest(path: Path, sample: pd.DataFrame, contamination: float, max_train_rows: int,
+                          model_dir: Path) -> IsolationForestAnomalyModel:
+    model = IsolationForestAnomalyModel(model_name=f"isolation_forest_{path.stem}", contamination=contamination,
+                                        max_train_rows=max_train_rows, model_dir=model_dir)
+    model.fit(sample)
+    model.source_signature = file_signature(path)
+    model.save()
+    return model
+
+
+@Timer("Isolation Forest قابل للتوسع")
+def run_scalable_isolation_forest(path: Union[str, Path], contamination: float = 0.05,
+                                  max_train_rows: int = ISOLATION_MAX_TRAIN_ROWS,
+                                  chunk_size: Optional[int] = None, output_dir: Path = OUTPUT_DIR,
+                                  model_dir: Path = ML_MODELS_DIR, reuse: bool = True) -> dict:
+    """
+    Isolation Forest لملف بأي حجم: تدريب على عينة عشوائية (حتى max_train_rows صف) بأشجار متوازية،
+    ثم تقييم الملف دفعة بدفعة. النموذج يُحفظ في مخزن النماذج ويُعاد استخدامه ما دام الملف لم يتغير.
+    """
+    return run_streaming_outlier_methods(path, (), chunk_size=chunk_size, isolation_forest=True,
+                                         contamination=contamination, max_train_rows=max_train_rows,
+                                         output_dir=output_dir, model_dir=model_dir,
+                                         reuse=reuse)["isolation_forest"]
 
 
 @Timer("تحليل القيم الشاذة الفردي")
-def run_outlier_detection(df: pd.DataFrame, method: str = "iqr", output_dir: Path = OUTPUT_DIR) -> dict:
+def run_outlier_detection(df: pd.DataFrame, method: str = "iqr", output_dir: Path = OUTPUT_DIR,
+                          prepared=None) -> dict:
+    """prepared: وسائط مشتركة من analysis_plan (المصفوفة الرقمية بعد ملء المفقود جاهزة)."""
     ensure_output_dir(output_dir)
-    log_basic_info(df, "outlier_detection")
+    numeric = None
+    if prepared is None:
+        log_basic_info(df, "outlier_detection")
+    else:
+        numeric = prepared.filled
 
     if method == "iqr":
-        mask = detect_outliers_iqr(df)
+        mask = detect_outliers_iqr(df, numeric=numeric)
     elif method == "zscore":
-        mask = detect_outliers_zscore(df)
+        mask = detect_outliers_zscore(df, numeric=numeric)
     elif method in ["isolation", "isolation_forest"]:
-        mask = detect_outliers_isolation_forest(df)
+        mask = detect_outliers_isolation_forest(df, numeric=numeric)
     else:
         raise ValueError(f"❌ الطريقة غير مدعومة: {method}")
 
@@ -99,44 +388,93 @@ def run_outlier_detection(df: pd.DataFrame, method: str = "iqr", output_dir: Pat
     }
 
 
-@Timer("تحليل القيم الشاذة - دفعة كاملة")
-def run_batch_detection():
-    ensure_output_dir(OUTPUT_DIR)
-    if not DATA_DIR.exists():
-        logger.error(f"❌ مجلد البيانات غير موجود: {DATA_DIR}")
-        return
-
-    report = []
-    for file_path in DATA_DIR.glob("*.csv"):
-        try:
-            df = load_data(str(file_path))
-        except Exception as e:
-            logger.error(f"⚠️ فشل في قراءة الملف {file_path.name}: {e}")
-            continue
-
-        if df.empty:
-            logger.warning(f"⚠️ الملف {file_path.name} فارغ.")
-            continue
-
-        log_basic_info(df, file_path.name)
-
-        summary = {
-            'filename': file_path.name,
-            'total_rows': len(df),
-            'numeric_columns': len(get_numerical_columns(df)),
-            'zscore_outliers': detect_outliers_zscore(df).sum(),
-            'iqr_outliers': detect_outliers_iqr(df).sum(),
-            'isolationforest_outliers': detect_outliers_isolation_forest(df).sum()
-        }
+def _summarize_file_streaming(file_path: Path, plan) -> dict:
+    """
+    ملخص ملف أكبر من الذاكرة: IQR و Z-Score و Isolation Forest (مدرب على عينة التمريرة الأولى)
+    في تمريرتين مشتركتين على الملف.
+    """
+    results = run_streaming_outlier_methods(file_path, ("zscore", "iqr"), chunk_size=plan.chunk_size,
+                                            isolation_forest=True)
+    iqr = results["iqr"]
+    return {
+        'filename': file_path.name,
+        'total_rows': iqr["total_rows"],
+        'numeric_columns': iqr["numeric_columns"],
+        'zscore_outliers': results["zscore"]["outliers_detected"],
+        'iqr_outliers': iqr["outliers_detected"],
+        'isolationforest_outliers': results["isolation_forest"]["outliers_detected"],
+        'execution_mode': plan.mode
+    }
+
+
+def summarize_file_outliers(file_path: Path) -> Optional[dict]:
+    """ملخص القيم الشاذة لملف واحد (وحدة العمل في الدفعة المتوازية)."""
+    try:
+        plan = plan_execution(file_path, supported_modes=(IN_MEMORY, CHUNKED, SAMPLED))
+        if plan.mode == CHUNKED:
+            return _summarize_file_streaming(file_path, plan)
+        df = load_sample(file_path, plan.sample_rows, estimate=plan.estimate) if plan.mode == SAMPLED \
+            else load_data(str(file_path))
+    except Exception as e:
+        logger.error(f"⚠️ فشل في قراءة الملف {file_path.name}: {e}")
+        return None
+
+    if df.empty:
+        logger.warning(f"⚠️ الملف {file_path.name} فارغ.")
+        return None
+
+    log_basic_info(df, file_path.name)
+    masks = detect_all_outliers(df)
+    return {
+        'filename': file_path.name,
+        'total_rows': len(df),
+        'numeric_columns': len(get_numerical_columns(df)),
+        'zscore_outliers': int(masks["zscore"].sum()),
+        'iqr_outliers': int(masks["iqr"].sum()),
+        'isolationforest_outliers': int(masks["isolation_forest"].sum()),
+        'execution_mode': plan.mode
+    }
+
 
-        report.append(pd.DataFrame([summary]))
+def _safe_summarize(file_path: Path) -> Optional[dict]:
+    try:
+        return summarize_file_outliers(file_path)
+    except Exception as e:
+        logger.error(f"❌ فشل تحليل القيم الشاذة للملف {file_path.name}: {e}")
+        return None
 
-    if report:
-        final_report = pd.concat(report, ignore_index=True)
-        save_dataframe(final_report, "outliers_summary_report.csv", OUTPUT_DIR)
-        logger.info(f"📊 تم حفظ التقرير الكامل: {OUTLIER_REPORT_PATH}")
+
+@Timer("تحليل القيم الشاذة - دفعة كاملة")
+def run_batch_detection(data_dir: Path = DATA_DIR, output_dir: Path = OUTPUT_DIR,
+                        max_workers: int = OUTLIER_BATCH_WORKERS) -> Optional[pd.DataFrame]:
+    """
+    تحليل كل ملفات CSV في المجلد: كل ملف يُعالج في عملية مستقلة (حتى max_workers، 0 = عدد الأنوية)
+    بحصتها من الأنوية لخيوط IsolationForest وBLAS، والتقرير يُدمج في النهاية بترتيب الملفات.
+    """
+    ensure_output_dir(output_dir)
+    if not Path(data_dir).exists():
+        logger.error(f"❌ مجلد البيانات غير موجود: {data_dir}")
+        return None
+
+    files = sorted(Path(data_dir).glob("*.csv"))
+    workers = min(resolve_workers(max_workers), len(files))
+    if workers > 1:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        logger.info(f"🧩 تحليل {len(files)} ملف في {workers} عملية ({threads} خيط لكل عملية)")
+        with process_pool(workers, initializer=limit_nested_parallelism, initargs=(threads,)) as executor:
+            summaries = list(executor.map(_safe_summarize, files))
     else:
+        summaries = [_safe_summarize(file_path) for file_path in files]
+
+    report = [summary for summary in summaries if summary is not None]
+    if not report:
         logger.warning("❗ لم يتم اكتشاف ملفات قابلة للمعالجة.")
+        return None
+
+    final_report = pd.DataFrame(report)
+    save_dataframe(final_report, "outliers_summary_report", output_dir)
+    logger.info(f"📊 تم حفظ التقرير الكامل: {output_dir / 'outliers_summary_report.csv'}")
+    return final_report
 
 
 if __name__ == "__main__":
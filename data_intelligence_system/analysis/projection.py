@@ -0,0 +1,137 @@
+"""
+analysis/projection.py
+
+إسقاط البيانات على مكونات رئيسية قليلة (للرسم) بتكلفة تتناسب مع عدد المكونات المطلوبة:
+    - full: PCA الدقيق للمصفوفات الصغيرة
+    - randomized: SVD عشوائي للمصفوفات العريضة/الكبيرة (تكلفة O(n·p·k) بدل التفكيك الكامل)
+    - incremental: IncrementalPCA على دفعات صفوف؛ للمصفوفات التي تتجاوز ميزانية الذاكرة
+      أو للملفات مباشرة من القرص (project_file) دون تحميلها كاملة؛ fit_file_projection يعيد الإسقاط
+      الملائم على الملف كله لتحويل عينة منه (مسار التجميع للملفات الأكبر من الذاكرة)
+    - الاختيار التلقائي حسب شكل المصفوفة وحجمها
+
+الاستخدام:
+    from data_intelligence_system.analysis.projection import fit_file_projection, project, project_file
+
+    coords = project(X_scaled, n_components=2)
+    coords_df = project_file("data/processed/big.csv", n_components=2)
+    coords = fit_file_projection("data/processed/big.csv").transform(sample[columns].to_numpy())
+"""
+
+import logging
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from data_intelligence_system.config.performance_config import (
+    PCA_BATCH_ROWS,
+    PCA_INCREMENTAL_MIN_MB,
+    PCA_RANDOMIZED_MIN_DIM,
+)
+from data_intelligence_system.utils.memory_planner import iter_chunks
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("full", "randomized", "incremental")
+
+
+def choose_pca_backend(n_rows: int, n_features: int, n_components: int = 2) -> str:
+    """اختيار طريقة الإسقاط من شكل المصفوفة."""
+    if n_rows * n_features * 8 / 1024 ** 2 > PCA_INCREMENTAL_MIN_MB and n_rows > PCA_BATCH_ROWS:
+        return "incremental"
+    smallest = min(n_rows, n_features)
+    if smallest > PCA_RANDOMIZED_MIN_DIM and n_components < 0.8 * smallest:
+        return "randomized"
+    return "full"
+
+
+def project(data: np.ndarray, n_components: int = 2, backend: str = "auto",
+            random_state: int = 42) -> np.ndarray:
+    """إسقاط مصفوفة في الذاكرة على n_components مكونًا."""
+    data = np.asarray(data)
+    if backend == "auto":
+        backend = choose_pca_backend(data.shape[0], data.shape[1], n_components)
+    if backend not in BACKENDS:
+        raise ValueError(f"❌ طريقة إسقاط غير مدعومة: {backend}")
+    logger.info(f"📐 إسقاط {data.shape[0]}×{data.shape[1]} على {n_components} مكون ({backend})")
+
+    if backend == "full":
+        return PCA(n_components=n_components).fit_transform(data)
+    if backend == "randomized":
+        return PCA(n_components=n_components, svd_solver="randomized",
+                   random_state=random_state).fit_transform(data)
+    model = IncrementalPCA(n_components=n_components, batch_size=max(PCA_BATCH_ROWS, n_components))
+    model.fit(data)
+    return np.vstack([model.transform(data[start:start + PCA_BATCH_ROWS])
+                      for start in range(0, len(data), PCA_BATCH_ROWS)])
+
+
+def _numeric_batches(path: Union[str, Path], columns: Sequence[str], chunk_size: int
+                     ) -> Iterator[tuple]:
+    """(أرقام الصفوف، القيم) لكل دفعة بعد استبعاد الصفوف التي فيها قيم مفقودة."""
+    offset = 0
+    for chunk in iter_chunks(path, chunk_size):
+        values = chunk.reindex(columns=list(columns)).apply(pd.to_numeric, errors="coerce").to_numpy(
+            dtype=np.float64, na_value=np.nan)
+        complete = ~np.isnan(values).any(axis=1)
+        yield np.flatnonzero(complete) + offset, values[complete]
+        offset += len(chunk)
+
+
+def _resolve_columns(path: Union[str, Path], columns: Optional[List[str]], n_components: int) -> List[str]:
+    if columns is None:
+        first = next(iter_chunks(path, 1000))
+        columns = first.select_dtypes(include=[np.number]).columns.tolist()
+    if len(columns) < n_components:
+        raise ValueError(f"❌ عدد الأعمدة الرقمية ({len(columns)}) أقل من عدد المكونات المطلوبة.")
+    return list(columns)
+
+
+def fit_file_projection(path: Union[str, Path], n_components: int = 2, columns: Optional[List[str]] = None,
+                        chunk_size: int = PCA_BATCH_ROWS, scale: bool = True) -> Pipeline:
+    """
+    ملاءمة الإسقاط على ملف خارج الذاكرة: تمريرة للتحجيم (StandardScaler.partial_fit)، وتمريرة لـ
+    IncrementalPCA.partial_fit. الصفوف ذات القيم المفقودة تُستبعد كما في run_clustering.
+    يعيد Pipeline (تحجيم ← إسقاط) يحوّل أي مصفوفة بنفس ترتيب columns، مثل عينة من الملف نفسه.
+    """
+    columns = _resolve_columns(path, columns, n_components)
+    scaler = StandardScaler()
+    if scale:
+        for _, values in _numeric_batches(path, columns, chunk_size):
+            if len(values):
+                scaler.partial_fit(values)
+
+    model = IncrementalPCA(n_components=n_components)
+    pending = np.empty((0, len(columns)))
+    for _, values in _numeric_batches(path, columns, chunk_size):
+        pending = np.vstack([pending, scaler.transform(values) if scale else values])
+        # partial_fit يحتاج دفعة لا تقل عن عدد المكونات؛ الدفعات الأصغر تُضم للتالية
+        if len(pending) >= n_components:
+            model.partial_fit(pending)
+            pending = pending[:0]
+    if not hasattr(model, "components_"):
+        raise ValueError(f"❌ عدد الصفوف المكتملة في {Path(path).name} أقل من عدد المكونات المطلوبة.")
+    return Pipeline([("scale", scaler if scale else "passthrough"), ("pca", model)])
+
+
+def project_file(path: Union[str, Path], n_components: int = 2, columns: Optional[List[str]] = None,
+                 chunk_size: int = PCA_BATCH_ROWS, scale: bool = True) -> pd.DataFrame:
+    """
+    إسقاط ملف خارج الذاكرة: ملاءمة fit_file_projection ثم تمريرة للتحويل.
+    يعيد DataFrame بالمكونات وفهرسه رقم الصف في الملف.
+    """
+    columns = _resolve_columns(path, columns, n_components)
+    projection = fit_file_projection(path, n_components, columns, chunk_size, scale)
+    rows, parts = [], []
+    for index, values in _numeric_batches(path, columns, chunk_size):
+        if len(values):
+            rows.append(index)
+            parts.append(projection.transform(values))
+    projected = np.vstack(parts) if parts else np.empty((0, n_components))
+    logger.info(f"📐 إسقاط {len(projected)} صف من {Path(path).name} خارج الذاكرة على {n_components} مكون")
+    return pd.DataFrame(projected, index=np.concatenate(rows) if rows else [],
+                        columns=[f"component_{i + 1}" for i in range(n_components)])
@@ -0,0 +1,230 @@
+"""
+analysis/rollups.py
+
+تجميعات زمنية مسبقة (rollups) لكل الأعمدة الرقمية على عدة مستويات (ساعة/يوم/أسبوع/شهر):
+    - ترتيب واحد حسب عمود الزمن، ثم تجميع المستوى الأدق (الساعة) بـ reduceat على المصفوفات المرتبة،
+      والمستويات الأخشن تُشتق من تجميعات مستوى أدق بدل الصفوف الخام (اليوم للأسبوع والشهر)
+    - لكل فترة: عدد الصفوف، ولكل عمود رقمي count/sum/min/max (قابلة للدمج؛ المتوسط = sum/count)
+    - الحفظ كملفات Parquet بجانب مجموعة البيانات، والتحديث التزايدي بدمج تجميعات الدفعة الجديدة فقط
+    - إعادة البناء الكاملة (rebuild_rollups) من خط الأنابيب الكامل، دفعة بدفعة للملفات الكبيرة
+    - بصمة الملف المصدر تُحفظ مع التجميعات المعاد بناؤها (_source.json)؛ load_rollup بالبصمة
+      يرفض تجميعات ملف تغير أو تجميعات أُلحقت بها دفعات أخرى
+
+الاستخدام:
+    from data_intelligence_system.analysis.rollups import compute_rollups, rollup_values
+
+    rollups = compute_rollups(df, "date")
+    daily_means = rollup_values(rollups["day"], stat="mean")
+"""
+
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.config.performance_config import ROLLUP_GRANULARITIES
+from data_intelligence_system.utils.type_sniffing import convert_datetime_columns, sniff_datetime_columns
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("hour", "day", "week", "month")
+ROLLUPS_DIR = "_rollups"
+SOURCE_FILE = "_source.json"
+BUCKET = "bucket"
+ROWS = "rows"
+SEP = "__"
+STATS = ("count", "sum", "min", "max")
+_REDUCERS = {"count": np.add, "sum": np.add, "min": np.fmin, "max": np.fmax}
+_MONDAY_OFFSET = 4  # 1970-01-01 يوم خميس؛ الأسابيع تبدأ يوم الاثنين كما في pandas
+
+
+def _check_granularities(granularities: Sequence[str]) -> List[str]:
+    unknown = set(granularities) - set(GRANULARITIES)
+    if unknown:
+        raise ValueError(f"❌ مستويات تجميع غير مدعومة: {sorted(unknown)}")
+    # من الأدق إلى الأخشن: كل مستوى يُشتق من مستوى أدق منه
+    return sorted(set(granularities), key=GRANULARITIES.index)
+
+
+def _bucket_starts(times: np.ndarray, granularity: str) -> np.ndarray:
+    """بداية فترة كل قيمة زمنية (datetime64[ns])."""
+    if granularity == "hour":
+        starts = times.astype("datetime64[h]")
+    elif granularity == "day":
+        starts = times.astype("datetime64[D]")
+    elif granularity == "week":
+        days = times.astype("datetime64[D]").astype(np.int64)
+        starts = (days - (days - _MONDAY_OFFSET) % 7).astype("datetime64[D]")
+    else:
+        starts = times.astype("datetime64[M]")
+    return starts.astype("datetime64[ns]")
+
+
+def _reduce(columns: Dict[str, np.ndarray], buckets: np.ndarray) -> pd.DataFrame:
+    """تجميع مصفوفات مرتبة حسب buckets: جمع العدد والمجموع، وfmin/fmax للحدود (تتجاهل NaN)."""
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    data = {BUCKET: buckets[starts], ROWS: np.add.reduceat(columns[ROWS], starts)}
+    for name, values in columns.items():
+        if name != ROWS:
+            data[name] = _REDUCERS[name.rsplit(SEP, 1)[1]].reduceat(values, starts)
+    return pd.DataFrame(data)
+
+
+def _stat_columns(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+    return {col: frame[col].to_numpy() for col in frame.columns if col != BUCKET}
+
+
+def _as_naive_times(series: pd.Series) -> np.ndarray:
+    if getattr(series.dt, "tz", None) is not None:
+        series = series.dt.tz_localize(None)
+    return series.to_numpy(dtype="datetime64[ns]")
+
+
+def compute_rollups(df: pd.DataFrame, time_col: str, measures: Optional[Sequence[str]] = None,
+                    granularities: Sequence[str] = ROLLUP_GRANULARITIES) -> Dict[str, pd.DataFrame]:
+    """
+    تجميعات time_col (عمود datetime) لكل مستوى مطلوب {المستوى: DataFrame}.
+    أعمدة كل DataFrame: bucket (بداية الفترة)، rows، و<عمود>__count/sum/min/max لكل عمود رقمي.
+    measures=None يعني كل الأعمدة الرقمية؛ الصفوف بلا زمن (NaT) لا تدخل في التجميع.
+    """
+    granularities = _check_granularities(granularities)
+    if measures is None:
+        measures = [col for col in df.select_dtypes(include=[np.number]).columns
+                    if col != time_col and not pd.api.types.is_bool_dtype(df[col])]
+
+    times = _as_naive_times(df[time_col])
+    valid = ~np.isnat(times)
+    order = np.flatnonzero(valid)[np.argsort(times[valid], kind="stable")]
+    if not len(order):
+        empty = {BUCKET: np.empty(0, dtype="datetime64[ns]"), ROWS: np.empty(0, dtype=np.int64)}
+        empty.update({f"{col}{SEP}{stat}": np.empty(0) for col in measures for stat in STATS})
+        return {granularity: pd.DataFrame(empty) for granularity in granularities}
+    times = times[order]
+
+    columns = {ROWS: np.ones(len(order), dtype=np.int64)}
+    for col in measures:
+        values = df[col].to_numpy(dtype=float)[order]
+        present = ~np.isnan(values)
+        columns[f"{col}{SEP}count"] = present.astype(np.int64)
+        columns[f"{col}{SEP}sum"] = np.where(present, values, 0.0)
+        columns[f"{col}{SEP}min"] = values
+        columns[f"{col}{SEP}max"] = values
+
+    rollups = {}
+    source = (times, columns)
+    for granularity in granularities:
+        # المستوى الأول من الصفوف المرتبة، والتالي من فترات أدق مستوى سابق محتوى فيه (الترتيب محفوظ)
+        times, columns = source
+        rollups[granularity] = _reduce(columns, _bucket_starts(times, granularity))
+        if granularity != "week":  # الأسابيع تعبر حدود الأشهر فلا يُشتق منها الشهر
+            source = (rollups[granularity][BUCKET].to_numpy(), _stat_columns(rollups[granularity]))
+    logger.info(f"🧮 تجميعات زمنية لـ '{time_col}': {len(order)} صف، {len(measures)} مقياس، "
+                f"{ {g: len(r) for g, r in rollups.items()} }")
+    return rollups
+
+
+def merge_rollups(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """دمج تجميعين لنفس المستوى (مقاييس غائبة في أحدهما تُعامل كفترات بلا قيم)."""
+    combined = pd.concat([old, new], ignore_index=True, sort=False)
+    combined = combined.sort_values(BUCKET, kind="stable", ignore_index=True)
+    for col in combined.columns:
+        if col.endswith((f"{SEP}count", f"{SEP}sum")) or col == ROWS:
+            combined[col] = combined[col].fillna(0)
+    combined[ROWS] = combined[ROWS].astype(np.int64)
+    return _reduce(_stat_columns(combined), combined[BUCKET].to_numpy())
+
+
+def rollup_values(rollup: pd.DataFrame, stat: str = "mean") -> pd.DataFrame:
+    """قيم إحصاء واحد لكل مقياس مفهرسة ببداية الفترة؛ mean = sum/count (NaN للفترات بلا قيم)."""
+    if stat not in STATS + ("mean",):
+        raise ValueError(f"❌ إحصاء غير مدعوم: {stat}")
+    measures = [col.rsplit(SEP, 1)[0] for col in rollup.columns if col.endswith(f"{SEP}count")]
+    index = pd.DatetimeIndex(rollup[BUCKET], name=BUCKET)
+    if stat == "mean":
+        data = {col: rollup[f"{col}{SEP}sum"].to_numpy()
+                / rollup[f"{col}{SEP}count"].replace(0, np.nan).to_numpy() for col in measures}
+    else:
+        data = {col: rollup[f"{col}{SEP}{stat}"].to_numpy() for col in measures}
+    return pd.DataFrame(data, index=index)
+
+
+# ===================== الحفظ والتحديث التزايدي =====================
+
+def rollup_path(dataset_dir: Union[str, Path], time_col: str, granularity: str) -> Path:
+    return Path(dataset_dir) / ROLLUPS_DIR / f"{time_col}_{granularity}.parquet"
+
+
+def rollup_source(dataset_dir: Union[str, Path]) -> Optional[str]:
+    """بصمة الملف المصدر الذي أُعيد بناء التجميعات منه، أو None (غير معروفة أو أُلحقت دفعات بعده)."""
+    try:
+        return json.loads((Path(dataset_dir) / ROLLUPS_DIR / SOURCE_FILE).read_text(encoding="utf-8"))["fingerprint"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def load_rollup(dataset_dir: Union[str, Path], time_col: str, granularity: str,
+                source_fingerprint: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    التجميع المحفوظ لعمود زمني ومستوى معين، أو None.
+    source_fingerprint: يُعاد التجميع فقط إذا بُني من نسخة الملف المصدر بهذه البصمة.
+    """
+    if source_fingerprint is not None and rollup_source(dataset_dir) != source_fingerprint:
+        return None
+    path = rollup_path(dataset_dir, time_col, granularity)
+    return pd.read_parquet(path) if path.exists() else None
+
+
+def update_rollups(df: pd.DataFrame, dataset_dir: Union[str, Path],
+                   time_cols: Optional[Sequence[str]] = None, measures: Optional[Sequence[str]] = None,
+                   granularities: Sequence[str] = ROLLUP_GRANULARITIES) -> List[Path]:
+    """
+    دمج تجميعات الصفوف الجديدة df مع التجميعات المحفوظة في dataset_dir/_rollups.
+    time_cols=None: أعمدة datetime وأعمدة التواريخ النصية المكتشفة. تعيد مسارات الملفات المحدثة.
+    """
+    if df is None or df.empty:
+        return []
+    frame = df.copy(deep=False)
+    convert_datetime_columns(frame, sniff_datetime_columns(frame))
+    if time_cols is None:
+        time_cols = [col for col in frame.columns if pd.api.types.is_datetime64_any_dtype(frame[col])]
+
+    written = []
+    for time_col in time_cols:
+        for granularity, rollup in compute_rollups(frame, time_col, measures, granularities).items():
+            existing = load_rollup(dataset_dir, time_col, granularity)
+            if existing is not None:
+                rollup = merge_rollups(existing, rollup)
+            path = rollup_path(dataset_dir, time_col, granularity)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            rollup.to_parquet(tmp, index=False)
+            tmp.replace(path)
+            written.append(path)
+    if written:
+        # التجميعات لم تعد تطابق ملفًا مصدرًا واحدًا (rebuild_rollups يكتب البصمة بعد آخر دفعة)
+        (Path(dataset_dir) / ROLLUPS_DIR / SOURCE_FILE).unlink(missing_ok=True)
+        logger.info(f"✅ تحديث التجميعات الزمنية في {Path(dataset_dir).name}: {list(time_cols)}")
+    return written
+
+
+def rebuild_rollups(chunks: Iterable[pd.DataFrame], dataset_dir: Union[str, Path],
+                    time_cols: Optional[Sequence[str]] = None,
+                    granularities: Sequence[str] = ROLLUP_GRANULARITIES,
+                    source_fingerprint: Optional[str] = None) -> List[Path]:
+    """
+    إعادة بناء تجميعات dataset_dir/_rollups من الصفر (تشغيل كامل بدل الإلحاق):
+    حذف التجميعات القديمة ثم دمج تجميعات كل دفعة. تعيد مسارات الملفات المكتوبة.
+    source_fingerprint: بصمة الملف المصدر تُحفظ في _rollups/_source.json (انظر load_rollup).
+    """
+    shutil.rmtree(Path(dataset_dir) / ROLLUPS_DIR, ignore_errors=True)
+    written = set()
+    for chunk in chunks:
+        written.update(update_rollups(chunk, dataset_dir, time_cols=time_cols, granularities=granularities))
+    if written and source_fingerprint is not None:
+        (Path(dataset_dir) / ROLLUPS_DIR / SOURCE_FILE).write_text(
+            json.dumps({"fingerprint": source_fingerprint}), encoding="utf-8")
+    return sorted(written)
@@ -0,0 +1,246 @@
+"""
+analysis/stats_kernel.py
+
+نواة إحصاءات وصفية مدمجة: بدل تمريرات متعددة (isnull / describe / value_counts لكل عمود)
+تُحسب كل الإحصاءات الرقمية لكل الأعمدة دفعة واحدة على مصفوفة float متجاورة في الذاكرة،
+والتكرارات الفئوية والزمنية عبر bincount واحد لكل الأعمدة.
+
+النتائج بنفس أشكال descriptive_stats:
+    - numeric_summary: {عمود: {count, mean, std, min, 25%, 50%, 75%, max, missing_values, missing_%}}
+    - categorical_summary: {عمود: Series مثل value_counts(dropna=False).head(top_n)}
+    - datetime_summary: {عمود: Series مثل to_period("M").value_counts().sort_index()}
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.25, 0.5, 0.75)
+BLOCK_BYTES = 64 * 1024 ** 2  # حجم كتلة الأعمدة المعالجة معًا
+_HASH_PRIME = np.uint64(1099511628211)
+
+
+@dataclass
+class NumericStats:
+    columns: List[str]
+    n_rows: int
+    count: np.ndarray
+    missing: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    quantiles: Dict[float, np.ndarray] = field(default_factory=dict)
+    zeros: Optional[np.ndarray] = None
+
+    def to_summary(self) -> Dict[str, Dict[str, float]]:
+        """نفس شكل compute_numeric_summary (describe().T + المفقود)."""
+        summary = {}
+        for i, col in enumerate(self.columns):
+            row = {"count": float(self.count[i]), "mean": self.mean[i], "std": self.std[i], "min": self.min[i]}
+            for q in QUANTILES:
+                row[f"{q:.0%}"] = self.quantiles[q][i]
+            row["max"] = self.max[i]
+            row["missing_values"] = int(self.missing[i])
+            row["missing_%"] = round(self.missing[i] / self.n_rows * 100, 2) if self.n_rows else np.nan
+            summary[col] = row
+        return summary
+
+
+def _block_stats(block: np.ndarray, with_quantiles: bool = True):
+    """إحصاءات كتلة أعمدة؛ الكتلة نسخة عمل تُفرز في مكانها."""
+    n_rows = block.shape[0]
+    mask = np.isnan(block)
+    missing = mask.sum(axis=0)
+    count = n_rows - missing
+    has_values = count > 0
+    last = np.maximum(count - 1, 0)
+    cols = np.arange(block.shape[1])
+    zeros = (block == 0).sum(axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if missing.any():
+            mean = np.where(mask, 0.0, block).sum(axis=0) / count
+            centered = np.where(mask, 0.0, block - mean)
+        else:
+            mean = block.sum(axis=0) / count
+            centered = block - mean
+        std = np.sqrt(np.einsum("ij,ij->j", centered, centered) / (count - 1))
+        std[count < 2] = np.nan
+        del centered, mask
+
+        if not with_quantiles:
+            minimum = np.where(has_values, np.fmin.reduce(block, axis=0), np.nan)
+            maximum = np.where(has_values, np.fmax.reduce(block, axis=0), np.nan)
+            return count, missing, np.where(has_values, mean, np.nan), std, minimum, maximum, {}, zeros
+
+        # الفرز يضع NaN في النهاية: منه الحد الأدنى والأعلى والربيعيات دون تمريرات إضافية
+        block.sort(axis=0)
+        quantiles = {}
+        for q in QUANTILES:
+            pos = q * last
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.ceil(pos).astype(np.int64)
+            low_vals, high_vals = block[lo, cols], block[hi, cols]
+            quantiles[q] = np.where(has_values, low_vals + (high_vals - low_vals) * (pos - lo), np.nan)
+
+    minimum = np.where(has_values, block[0, cols], np.nan)
+    maximum = np.where(has_values, block[last, cols], np.nan)
+    mean = np.where(has_values, mean, np.nan)
+    return count, missing, mean, std, minimum, maximum, quantiles, zeros
+
+
+def compute_numeric_stats(df: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                          with_quantiles: bool = True) -> NumericStats:
+    """
+    إحصاءات كل الأعمدة الرقمية في مرور واحد لكل كتلة أعمدة (مصفوفة float64 بترتيب Fortran).
+    with_quantiles=False يتجاوز الفرز (للمجمّعات المتدفقة التي تستخدم مخطط الربيعيات الخاص بها).
+    """
+    if columns is None:
+        columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    columns = list(columns)
+    n_rows = len(df)
+    if n_rows == 0:
+        # إطار بلا صفوف: لا قيم للفرز (block[lo, cols] يفشل على كتلة فارغة)
+        zeros, nans = np.zeros(len(columns)), np.full(len(columns), np.nan)
+        return NumericStats(columns=columns, n_rows=0, count=zeros, missing=zeros, mean=nans, std=nans,
+                            min=nans, max=nans, quantiles={q: nans for q in QUANTILES} if with_quantiles else {},
+                            zeros=zeros)
+    parts = []
+    block_cols = max(1, BLOCK_BYTES // max(1, n_rows * 8))
+    for start in range(0, len(columns), block_cols):
+        block_names = columns[start:start + block_cols]
+        block = np.empty((n_rows, len(block_names)), dtype=np.float64, order="F")
+        for j, col in enumerate(block_names):
+            block[:, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        parts.append(_block_stats(block, with_quantiles=with_quantiles))
+
+    def join(i):
+        return np.concatenate([p[i] for p in parts]) if parts else np.empty(0)
+
+    return NumericStats(
+        columns=columns,
+        n_rows=n_rows,
+        count=join(0),
+        missing=join(1),
+        mean=join(2),
+        std=join(3),
+        min=join(4),
+        max=join(5),
+        quantiles={q: np.concatenate([p[6][q] for p in parts]) for q in QUANTILES} if parts and with_quantiles else {},
+        zeros=join(7),
+    )
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """بصمة uint64 لكل صف مدمجة من بصمات الأعمدة (الصفوف المتساوية لها البصمة نفسها)."""
+    combined = np.zeros(len(df), dtype=np.uint64)
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype.kind == "f":
+            values = values + 0.0  # -0.0 و 0.0 متساويان في duplicated
+        combined = (combined ^ pd.util.hash_array(values)) * _HASH_PRIME
+    return combined
+
+
+def count_duplicated_rows(df: pd.DataFrame) -> int:
+    """
+    مثل df.duplicated().sum(): بصمة مدمجة لكل صف، ثم تحقق دقيق
+    بـ duplicated() على الصفوف المرشحة فقط (التي تتكرر بصمتها).
+    """
+    if df.empty:
+        return 0
+    combined = row_hashes(df)
+    candidates = pd.Series(combined).duplicated(keep=False).to_numpy()
+    if not candidates.any():
+        return 0
+    return int(df[candidates].duplicated().sum())
+
+
+def compute_categorical_counts(df: pd.DataFrame, columns: Sequence[str], top_n: int = 10) -> Dict[str, pd.Series]:
+    """
+    تكرارات القيم لكل الأعمدة الفئوية عبر bincount واحد على رموز factorize المزاحة لكل عمود.
+    مطابق لـ value_counts(dropna=False).head(top_n): ترتيب تنازلي، والتعادل بترتيب أول ظهور.
+    """
+    result: Dict[str, pd.Series] = {}
+    codes_list, uniques_list, offsets, batched = [], [], [0], []
+    for col in columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # الفئات غير المستخدمة تظهر في value_counts بعدد صفر
+            result[col] = series.value_counts(dropna=False).head(top_n)
+            continue
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+        na_position = pd.isna(uniques)
+        if na_position.any():
+            # الإبقاء على كائن القيمة المفقودة الأصلي (None/NaN) كما في value_counts
+            uniques = np.asarray(uniques, dtype=object)
+            uniques[na_position] = series[series.isna()].iloc[0]
+        codes_list.append(codes + offsets[-1])
+        uniques_list.append(uniques)
+        offsets.append(offsets[-1] + len(uniques))
+        batched.append(col)
+
+    if batched:
+        counts = np.bincount(np.concatenate(codes_list), minlength=offsets[-1])
+        for i, col in enumerate(batched):
+            col_counts = counts[offsets[i]:offsets[i + 1]]
+            order = np.argsort(-col_counts, kind="stable")[:top_n]
+            index = pd.Index(uniques_list[i], name=col)[order]
+            result[col] = pd.Series(col_counts[order], index=index, name="count")
+    return {col: result[col] for col in columns}
+
+
+def compute_datetime_counts(df: pd.DataFrame, columns: Sequence[str]) -> Dict[str, pd.Series]:
+    """
+    التوزيع الشهري لكل عمود زمني عبر أرقام الأشهر (datetime64[M]) مباشرة بدل to_period.
+    """
+    result = {}
+    for col in columns:
+        series = df[col]
+        if getattr(series.dt, "tz", None) is not None:
+            series = series.dt.tz_localize(None)
+        months = series.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+        months = months[~np.isnat(months)].astype(np.int64)
+        ordinals, counts = np.unique(months, return_counts=True)
+        index = pd.PeriodIndex.from_ordinals(ordinals, freq="M").rename(col)
+        result[col] = pd.Series(counts, index=index, name="count")
+    return result
+
+
+def compute_fused_stats(df: pd.DataFrame, top_n: int = 10) -> Dict[str, object]:
+    """
+    كل مخرجات التحليل الوصفي (general_info / numeric_summary / categorical_summary / datetime_summary)
+    مع إعادة استخدام أعداد المفقود المحسوبة في النواة الرقمية للمعلومات العامة.
+    """
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    categorical_cols = df.select_dtypes(include=["object", "category"]).columns.tolist()
+    datetime_cols = df.select_dtypes(include=['datetime64[ns]', 'datetime64[ns, UTC]']).columns.tolist()
+
+    numeric = compute_numeric_stats(df, numeric_cols)
+    other_cols = [c for c in df.columns if c not in set(numeric_cols)]
+    missing_values = int(numeric.missing.sum()) + int(df[other_cols].isnull().sum().sum()) if other_cols \
+        else int(numeric.missing.sum())
+    total_cells = df.size
+
+    general_info = {
+        "Number of Rows": df.shape[0],
+        "Number of Columns": df.shape[1],
+        "Missing Values": missing_values,
+        "Missing %": round((missing_values / total_cells) * 100, 2) if total_cells > 0 else 0.0,
+        "Duplicated Rows": count_duplicated_rows(df),
+    }
+
+    return {
+        "general_info": general_info,
+        # كما في compute_numeric_summary: لا ملخص رقمي لإطار بلا صفوف
+        "numeric_summary": numeric.to_summary() if len(df) else {},
+        "categorical_summary": compute_categorical_counts(df, categorical_cols, top_n=top_n),
+        "datetime_summary": compute_datetime_counts(df, datetime_cols),
+        "zero_counts": dict(zip(numeric.columns, numeric.zeros.astype(int).tolist())),
+    }
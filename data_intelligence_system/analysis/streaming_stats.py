@@ -0,0 +1,458 @@
+"""
+analysis/streaming_stats.py
+
+إحصاءات وصفية متدفقة (out-of-core) بمجمّعات قابلة للدمج: تُغذّى دفعة بدفعة من القارئ،
+ويمكن دمج النتائج الجزئية من عمليات متوازية بـ merge().
+
+المجمّعات:
+    - MomentsAccumulator: العدد، المتوسط و M2 (Welford/Chan)، الحد الأدنى/الأعلى، المفقود، الأصفار
+    - QuantileSketch: مخطط KLL للربيعيات (دقيق تمامًا ما دام عدد القيم ≤ k)
+    - TopKAccumulator: القيم الأكثر تكرارًا (Misra-Gries؛ دقيق ما دام عدد القيم المختلفة ≤ السعة)
+    - DistinctCounter: عدد الصفوف المختلفة (دقيق حتى السعة، ثم تقدير HyperLogLog بذاكرة ثابتة)
+    - StreamingStats: يجمع ما سبق لكل الأعمدة مع التوزيع الشهري وعدّ الصفوف المكررة
+
+الاستخدام:
+    from data_intelligence_system.analysis.streaming_stats import compute_streaming_stats
+
+    summary = compute_streaming_stats("data/processed/big.csv", chunk_size=100_000)
+"""
+
+import logging
+import warnings
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.analysis.stats_kernel import QUANTILES, compute_numeric_stats, row_hashes
+from data_intelligence_system.config.performance_config import (
+    STREAMING_DISTINCT_CAPACITY,
+    STREAMING_SKETCH_K,
+    STREAMING_TOPK_CAPACITY,
+    STREAMING_WORKERS,
+    MIN_CHUNK_ROWS,
+)
+from data_intelligence_system.utils.memory_planner import CHUNKED, iter_chunks
+from data_intelligence_system.utils.parallel import process_pool
+from data_intelligence_system.utils.type_sniffing import sniff_datetime_columns
+
+logger = logging.getLogger(__name__)
+
+_NA_KEY = ("<NA>",)
+
+
+class MomentsAccumulator:
+    """عدد/متوسط/M2/حدود/مفقود/أصفار لعمود رقمي واحد؛ الدمج بصيغة Chan المتوازية."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.missing = 0
+        self.zeros = 0
+
+    def add_partial(self, count: int, mean: float, m2: float, minimum: float, maximum: float,
+                    missing: int = 0, zeros: int = 0):
+        self.missing += int(missing)
+        self.zeros += int(zeros)
+        if count == 0:
+            return
+        n = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / n
+        self.m2 += m2 + delta ** 2 * self.count * count / n
+        self.count = n
+        self.min = np.fmin(self.min, minimum)
+        self.max = np.fmax(self.max, maximum)
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        valid = values[~np.isnan(values)]
+        if len(valid):
+            mean = float(valid.mean())
+            self.add_partial(len(valid), mean, float(((valid - mean) ** 2).sum()),
+                             float(valid.min()), float(valid.max()),
+                             len(values) - len(valid), int((valid == 0).sum()))
+        else:
+            self.missing += len(values)
+
+    def merge(self, other: "MomentsAccumulator") -> "MomentsAccumulator":
+        self.add_partial(other.count, other.mean, other.m2, other.min, other.max, other.missing, other.zeros)
+        return self
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+
+class QuantileSketch:
+    """
+    مخطط KLL مبسط: مستويات من القيم بوزن 2^h، وعند امتلاء مستوى يُفرز ويُرفع نصفه للمستوى التالي.
+    الدمج = ضم المستويات ثم الضغط. خطأ الرتبة من رتبة 1/k، والنتيجة دقيقة ما لم يحدث ضغط.
+    """
+
+    def __init__(self, k: int = STREAMING_SKETCH_K, seed: int = 42):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.compacted = False
+        self.weighted_values = np.empty(0)
+        self.weighted_counts = np.empty(0, dtype=np.int64)
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(items)
+            leftover = items[-1:] if len(items) % 2 else items[:0]
+            items = items[:len(items) - len(leftover)]
+            promoted = items[self._rng.integers(0, 2)::2]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            self.levels[level] = leftover
+            self.compacted = True
+            level = 0  # إضافة مستوى تغيّر السعات الأدنى
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def add_weighted(self, value: float, weight: int):
+        """إضافة قيمة واحدة مكررة weight مرة (مثل قيمة ملء المفقود) كعنصر موزون خارج المستويات."""
+        if weight <= 0 or np.isnan(value):
+            return
+        self.n += int(weight)
+        self.weighted_values = np.append(self.weighted_values, float(value))
+        self.weighted_counts = np.append(self.weighted_counts, int(weight))
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.compacted = self.compacted or other.compacted
+        self.weighted_values = np.concatenate([self.weighted_values, other.weighted_values])
+        self.weighted_counts = np.concatenate([self.weighted_counts, other.weighted_counts])
+        self._compress()
+        return self
+
+    @property
+    def is_exact(self) -> bool:
+        return not self.compacted
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """ربيعيات بنفس الاستيفاء الخطي في describe()/quantile() على الرتب الموزونة."""
+        if self.n == 0:
+            return [np.nan] * len(qs)
+        values = np.concatenate(self.levels + [self.weighted_values])
+        weights = np.concatenate([np.full(len(items), 2 ** h, dtype=np.int64)
+                                  for h, items in enumerate(self.levels)] + [self.weighted_counts])
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+        result = []
+        for q in qs:
+            pos = q * (cumulative[-1] - 1)
+            lo, hi = np.floor(pos), np.ceil(pos)
+            low_val = values[np.searchsorted(cumulative, lo, side="right")]
+            high_val = values[np.searchsorted(cumulative, hi, side="right")]
+            result.append(float(low_val + (high_val - low_val) * (pos - lo)))
+        return result
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
+
+
+class TopKAccumulator:
+    """
+    القيم الأكثر تكرارًا بعدادات Misra-Gries بسعة محدودة. الترتيب عند التعادل بترتيب أول ظهور
+    (كما في value_counts)، لذلك تُدمج النتائج الجزئية بترتيب الدفعات في الملف.
+    """
+
+    def __init__(self, capacity: int = STREAMING_TOPK_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[object, int] = {}
+        self.first_seen: Dict[object, int] = {}
+        self.na_value = None
+        self.rows = 0
+        self.exact = True
+
+    def update(self, series: pd.Series):
+        counts = series.value_counts(dropna=False, sort=False)
+        for position, (value, count) in enumerate(counts.items()):
+            key = value
+            if pd.isna(value):
+                key, self.na_value = _NA_KEY, value
+            self.counts[key] = self.counts.get(key, 0) + int(count)
+            self.first_seen.setdefault(key, self.rows + position)
+        self.rows += len(series)
+        self._prune()
+
+    def merge(self, other: "TopKAccumulator") -> "TopKAccumulator":
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+            self.first_seen.setdefault(key, self.rows + other.first_seen[key])
+        if other.na_value is not None or _NA_KEY in other.counts:
+            self.na_value = other.na_value
+        self.rows += other.rows
+        self.exact = self.exact and other.exact
+        self._prune()
+        return self
+
+    def _prune(self):
+        if len(self.counts) <= self.capacity:
+            return
+        threshold = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = {k: c - threshold for k, c in self.counts.items() if c > threshold}
+        self.first_seen = {k: self.first_seen[k] for k in self.counts}
+        self.exact = False
+
+    def top(self, top_n: int = 10, name: Optional[str] = None) -> pd.Series:
+        keys = sorted(self.counts, key=lambda k: (-self.counts[k], self.first_seen[k]))[:top_n]
+        index = [self.na_value if k == _NA_KEY else k for k in keys]
+        return pd.Series([self.counts[k] for k in keys], index=pd.Index(index, name=name),
+                         name="count", dtype="int64")
+
+
+class DistinctCounter:
+    """
+    عدد البصمات المختلفة (uint64) بذاكرة محدودة: البصمات تُحفظ بدقة ما دام عددها ≤ capacity
+    (تُضغط بـ np.unique عند تجاوز ضعف السعة فقط بدل إعادة فرز الكل مع كل دفعة)، وبعدها يُستخدم
+    تقدير HyperLogLog من سجلات 2^precision (خطأ نسبي ≈ 1.04/√2^precision) المحدَّثة دائمًا.
+    """
+
+    def __init__(self, capacity: int = STREAMING_DISTINCT_CAPACITY, precision: int = 14):
+        self.capacity = capacity
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+        self.pending: List[np.ndarray] = []
+        self.pending_size = 0
+        self.exact = True
+
+    def _compact(self):
+        if not self.exact:
+            return
+        unique = np.unique(np.concatenate(self.pending)) if self.pending else np.empty(0, dtype=np.uint64)
+        if len(unique) > self.capacity:
+            self.pending, self.pending_size, self.exact = [], 0, False
+        else:
+            self.pending, self.pending_size = [unique], len(unique)
+
+    def update(self, hashes: np.ndarray) -> "DistinctCounter":
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if not len(hashes):
+            return self
+        rest_bits = 64 - self.precision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        # رتبة أول بت 1 في بقية البصمة (bit_length عبر log2؛ الصفر يأخذ أعلى رتبة)
+        with np.errstate(divide="ignore"):
+            bit_length = np.where(rest > 0, np.floor(np.log2(rest.astype(float))) + 1, 0)
+        ranks = (rest_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, ranks)
+        if self.exact:
+            self.pending.append(hashes)
+            self.pending_size += len(hashes)
+            if self.pending_size > 2 * self.capacity:
+                self._compact()
+        return self
+
+    def merge(self, other: "DistinctCounter") -> "DistinctCounter":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self.exact and other.exact:
+            self.pending.extend(other.pending)
+            self.pending_size += other.pending_size
+            if self.pending_size > 2 * self.capacity:
+                self._compact()
+        else:
+            self.pending, self.pending_size, self.exact = [], 0, False
+        return self
+
+    def _estimate(self) -> float:
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)  # تصحيح المدى الصغير (linear counting)
+        return float(raw)
+
+    def count(self) -> int:
+        self._compact()
+        return self.pending_size if self.exact else int(round(self._estimate()))
+
+
+class StreamingStats:
+    """
+    مجمّع كامل للتحليل الوصفي: يُحدَّث بدفعات DataFrame ويُدمج مع مجمّعات أخرى.
+    datetime_formats: أعمدة نصية تُحوَّل إلى تواريخ بصيغها في كل دفعة (يُحدَّد القرار من الدفعة الأولى).
+    """
+
+    def __init__(self, datetime_formats: Optional[Dict[str, str]] = None, sketch_k: int = STREAMING_SKETCH_K,
+                 topk_capacity: int = STREAMING_TOPK_CAPACITY,
+                 distinct_capacity: int = STREAMING_DISTINCT_CAPACITY):
+        self.datetime_formats = dict(datetime_formats or {})
+        self.sketch_k = sketch_k
+        self.topk_capacity = topk_capacity
+        self.rows = 0
+        self.columns: List[str] = []
+        self.missing_cells = 0
+        self.moments: Dict[str, MomentsAccumulator] = {}
+        self.sketches: Dict[str, QuantileSketch] = {}
+        self.topk: Dict[str, TopKAccumulator] = {}
+        self.months: Dict[str, pd.Series] = {}
+        self.distinct = DistinctCounter(distinct_capacity)
+
+    def update(self, chunk: pd.DataFrame) -> "StreamingStats":
+        chunk = chunk.copy(deep=False)
+        for col, fmt in self.datetime_formats.items():
+            if col in chunk.columns and chunk[col].dtype == object:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    chunk[col] = pd.to_datetime(chunk[col], format=fmt, errors="coerce")
+
+        if not self.columns:
+            self.columns = chunk.columns.tolist()
+        self.rows += len(chunk)
+        self.missing_cells += int(chunk.isnull().sum().sum())
+        self.distinct.update(row_hashes(chunk))
+
+        numeric_cols = chunk.select_dtypes(include=[np.number]).columns.tolist()
+        if numeric_cols:
+            stats = compute_numeric_stats(chunk, numeric_cols, with_quantiles=False)
+            for i, col in enumerate(numeric_cols):
+                count = int(stats.count[i])
+                m2 = float(stats.std[i] ** 2 * (count - 1)) if count > 1 else 0.0
+                self.moments.setdefault(col, MomentsAccumulator()).add_partial(
+                    count, float(stats.mean[i]) if count else 0.0, m2,
+                    stats.min[i], stats.max[i], stats.missing[i], stats.zeros[i])
+                self.sketches.setdefault(col, QuantileSketch(self.sketch_k)).update(
+                    chunk[col].to_numpy(dtype=float, na_value=np.nan))
+
+        for col in chunk.select_dtypes(include=["object", "category"]).columns:
+            self.topk.setdefault(col, TopKAccumulator(self.topk_capacity)).update(chunk[col])
+
+        for col in chunk.select_dtypes(include=['datetime64[ns]', 'datetime64[ns, UTC]']).columns:
+            series = chunk[col].dt.tz_localize(None) if chunk[col].dt.tz is not None else chunk[col]
+            counts = series.dt.to_period("M").value_counts()
+            self.months[col] = counts if col not in self.months else self.months[col].add(counts, fill_value=0)
+        return self
+
+    def merge(self, other: "StreamingStats") -> "StreamingStats":
+        """دمج نتيجة جزئية لاحقة (بترتيب الدفعات في الملف)."""
+        self.columns = self.columns or other.columns
+        self.rows += other.rows
+        self.missing_cells += other.missing_cells
+        self.distinct.merge(other.distinct)
+        for name, target, factory in (
+            ("moments", self.moments, MomentsAccumulator),
+            ("sketches", self.sketches, lambda: QuantileSketch(self.sketch_k)),
+            ("topk", self.topk, lambda: TopKAccumulator(self.topk_capacity)),
+        ):
+            for col, acc in getattr(other, name).items():
+                if col not in target:
+                    target[col] = factory()
+                    if name == "topk":
+                        target[col].rows = self.rows - other.rows
+                target[col].merge(acc)
+        for col, counts in other.months.items():
+            self.months[col] = counts if col not in self.months else self.months[col].add(counts, fill_value=0)
+        return self
+
+    # ---- بنفس أشكال generate_descriptive_stats ----
+    def to_summary(self, top_n: int = 10) -> Dict[str, object]:
+        total_cells = self.rows * len(self.columns)
+        general_info = {
+            "Number of Rows": self.rows,
+            "Number of Columns": len(self.columns),
+            "Missing Values": self.missing_cells,
+            "Missing %": round((self.missing_cells / total_cells) * 100, 2) if total_cells > 0 else 0.0,
+            "Duplicated Rows": max(self.rows - self.distinct.count(), 0),
+        }
+        if not self.distinct.exact:
+            logger.info("ℹ️ عدد الصفوف المكررة تقديري (HyperLogLog) لتجاوز الصفوف المختلفة سعة العدّ الدقيق.")
+
+        numeric_summary = {}
+        for col, acc in self.moments.items():
+            sketch = self.sketches[col]
+            row = {"count": float(acc.count), "mean": acc.mean if acc.count else np.nan,
+                   "std": acc.std, "min": acc.min}
+            for q, value in zip(QUANTILES, sketch.quantiles(QUANTILES)):
+                row[f"{q:.0%}"] = value
+            row["max"] = acc.max
+            row["missing_values"] = acc.missing
+            row["missing_%"] = round(acc.missing / self.rows * 100, 2) if self.rows else np.nan
+            numeric_summary[col] = row
+
+        categorical_summary = {col: acc.top(top_n, name=col) for col, acc in self.topk.items()}
+        datetime_summary = {}
+        for col, counts in self.months.items():
+            counts = counts.astype("int64").sort_index()
+            counts.index.name, counts.name = col, "count"
+            datetime_summary[col] = counts
+
+        return {
+            "general_info": general_info,
+            "numeric_summary": numeric_summary,
+            "categorical_summary": categorical_summary,
+            "datetime_summary": datetime_summary,
+            "execution_mode": CHUNKED,
+        }
+
+
+def _chunk_stats(chunk: pd.DataFrame, datetime_formats: Dict[str, str]) -> StreamingStats:
+    return StreamingStats(datetime_formats).update(chunk)
+
+
+def accumulate_chunks(chunks: Iterable[pd.DataFrame], n_workers: int = STREAMING_WORKERS) -> StreamingStats:
+    """
+    تغذية المجمّع بالدفعات. مع n_workers > 1 تُعالج الدفعات في عمليات متوازية
+    (بحد أقصى 2×n_workers دفعة معلقة في الذاكرة) وتُدمج النتائج الجزئية بالترتيب.
+    """
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        return StreamingStats()
+    datetime_formats = sniff_datetime_columns(first)
+    stats = StreamingStats(datetime_formats).update(first)
+
+    if n_workers <= 1:
+        for chunk in chunks:
+            stats.update(chunk)
+        return stats
+
+    with process_pool(n_workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_chunk_stats, chunk, datetime_formats))
+            if len(pending) >= 2 * n_workers:
+                stats.merge(pending.popleft().result())
+        while pending:
+            stats.merge(pending.popleft().result())
+    return stats
+
+
+def compute_streaming_stats(path: Union[str, Path], chunk_size: int = MIN_CHUNK_ROWS * 10,
+                            n_workers: int = STREAMING_WORKERS, top_n: int = 10) -> Dict[str, object]:
+    """الإحصاءات الوصفية لملف أكبر من الذاكرة بقراءته على دفعات."""
+    stats = accumulate_chunks(iter_chunks(path, chunk_size), n_workers=n_workers)
+    logger.info(f"🌊 تحليل متدفق لـ {Path(path).name}: {stats.rows} صف")
+    return stats.to_summary(top_n=top_n)
@@ -0,0 +1,259 @@
+"""
+analysis/target_kernel.py
+
+نواة اختبارات العلاقة مع الهدف لكل الأعمدة دفعة واحدة بدل قناع منطقي لكل (عمود × فئة):
+    - ANOVA: عدد ومجموع ومجموع مربعات كل عمود رقمي لكل فئة في مرور groupby واحد،
+      ومنها كل إحصاءات F وقيم p
+    - Chi-Square: جداول التوافق لكل الأعمدة الفئوية من bincount واحد على رموز factorize المزاحة
+    - المعلومات المتبادلة: تقسيم كمّي للأعمدة الرقمية ثم جدول مشترك من bincount ثنائي الأبعاد،
+      على عينة وبالتوازي على مجموعات أعمدة (بديل سريع لـ MI المعتمد على k-NN في sklearn)
+
+النتائج مطابقة لـ scipy.stats.f_oneway و chi2_contingency(pd.crosstab(...)).
+الاختباران يقبلان أيضًا إحصاءات مجمّعة مسبقًا (anova_from_group_stats، chi_square_from_tables)
+كالتي يحسبها DuckDB على الملف دون تحميله.
+"""
+
+import logging
+import warnings
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from data_intelligence_system.config.performance_config import MI_BINS, MI_SAMPLE_ROWS, MI_WORKERS
+from data_intelligence_system.utils.parallel import process_pool, resolve_workers
+
+logger = logging.getLogger(__name__)
+
+MIN_PARALLEL_COLUMNS = 8
+
+
+def grouped_moments(values: np.ndarray, codes: np.ndarray, n_groups: int):
+    """
+    (count, sum, sumsq) بشكل (فئات × أعمدة) للقيم غير المفقودة في مرور groupby واحد. القيم تُمركز
+    بالمتوسط العام أولًا (F لا يتأثر بالإزاحة) لتفادي فقدان الدقة في مجموع المربعات.
+    """
+    n_columns = values.shape[1]
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        centered = values - np.nan_to_num(np.nanmean(values, axis=0))
+    grouped = pd.DataFrame(np.hstack([centered, centered ** 2])).groupby(codes, sort=True)
+    sums = grouped.sum().reindex(range(n_groups), fill_value=0).to_numpy()
+    count = grouped.count().reindex(range(n_groups), fill_value=0).to_numpy()[:, :n_columns]
+    return count, sums[:, :n_columns], sums[:, n_columns:]
+
+
+def grouped_anova(df: pd.DataFrame, target: str, columns: Sequence[str]) -> pd.DataFrame:
+    """
+    ANOVA أحادي لكل عمود رقمي مقابل فئات الهدف. الأعمدة التي فيها فئة بأقل من قيمتين تُتجاهل
+    (كما في anova_test). الأعمدة: feature, f_statistic, p_value.
+    """
+    codes, uniques = pd.factorize(df[target])
+    keep = codes >= 0
+    columns = list(columns)
+    n_groups = len(uniques)
+    if not columns or n_groups == 0:
+        return pd.DataFrame(columns=["feature", "f_statistic", "p_value"])
+
+    frame = df[columns]
+    non_numeric = [col for col, dtype in frame.dtypes.items() if not pd.api.types.is_numeric_dtype(dtype)]
+    if non_numeric:
+        frame = frame.assign(**{col: pd.to_numeric(frame[col], errors="coerce") for col in non_numeric})
+    values = frame.to_numpy(dtype=np.float64, na_value=np.nan)
+    if not keep.all():
+        values, codes = values[keep], codes[keep]
+    count, total, sumsq = grouped_moments(values, codes, n_groups)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = count.sum(axis=0)
+        grand = total.sum(axis=0) / n
+        ss_between = (total ** 2 / np.where(count > 0, count, 1)).sum(axis=0) - n * grand ** 2
+        ss_within = sumsq.sum(axis=0) - (total ** 2 / np.where(count > 0, count, 1)).sum(axis=0)
+    return _anova_results(columns, count, ss_between, ss_within, n_groups)
+
+
+def anova_from_group_stats(group_stats: pd.DataFrame, columns: Sequence[str]) -> pd.DataFrame:
+    """
+    ANOVA من إحصاءات مجمّعة مسبقًا لكل فئة هدف (<عمود>_count/_mean/_std كما في DuckDBEngine.group_stats)
+    دون الرجوع للصفوف: SS بين المجموعات من المتوسطات، وداخلها من (count-1)·std². نفس أعمدة grouped_anova.
+    """
+    columns = list(columns)
+    if not columns or group_stats.empty:
+        return pd.DataFrame(columns=["feature", "f_statistic", "p_value"])
+
+    def stat(name: str) -> np.ndarray:
+        # std لفئة بقيمة واحدة NULL في SQL، ومساهمتها في SS داخل المجموعات صفر
+        values = group_stats[[f"{col}_{name}" for col in columns]]
+        return np.nan_to_num(values.to_numpy(dtype=np.float64, na_value=np.nan))
+
+    count, mean, std = stat("count"), stat("mean"), stat("std")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        grand = (count * mean).sum(axis=0) / count.sum(axis=0)
+        ss_between = (count * (mean - grand) ** 2).sum(axis=0)
+        ss_within = (np.maximum(count - 1, 0) * std ** 2).sum(axis=0)
+    return _anova_results(columns, count, ss_between, ss_within, len(group_stats))
+
+
+def _anova_results(columns: Sequence[str], count: np.ndarray, ss_between: np.ndarray, ss_within: np.ndarray,
+                   n_groups: int) -> pd.DataFrame:
+    """F وقيم p من مجاميع المربعات (فئات × أعمدة للعدد)."""
+    results = []
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = count.sum(axis=0)
+        ss_between = np.maximum(ss_between, 0.0)
+        ss_within = np.maximum(ss_within, 0.0)
+        df_between, df_within = n_groups - 1, n - n_groups
+        f_stat = (ss_between / df_between) / (ss_within / df_within)
+        f_stat = np.where(ss_within == 0, np.where(ss_between > 0, np.inf, np.nan), f_stat)
+        p_value = stats.f.sf(f_stat, df_between, df_within)
+
+    for i, col in enumerate(columns):
+        if (count[:, i] < 2).any():
+            logger.warning(f"⚠️ تجاهل ANOVA للعمود {col} بسبب قلة العينات")
+            continue
+        results.append((col, float(f_stat[i]), float(p_value[i])))
+    return pd.DataFrame(results, columns=["feature", "f_statistic", "p_value"])
+
+
+def _factorize(series: pd.Series):
+    """رموز مرتبة كترتيب crosstab، وبترتيب الظهور إذا تعذر ترتيب القيم المختلطة."""
+    try:
+        return pd.factorize(series, sort=True)
+    except TypeError:
+        return pd.factorize(series)
+
+
+def factorize_columns(df: pd.DataFrame, columns: Sequence[str]) -> Dict[str, tuple]:
+    """(رموز، قيم) لكل عمود بترتيب crosstab؛ تُحسب مرة وتُمرر لـ contingency_tables."""
+    return {col: _factorize(df[col]) for col in columns}
+
+
+def contingency_tables(df: pd.DataFrame, target: str, columns: Sequence[str],
+                       factorized: Optional[Dict[str, tuple]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    جداول التوافق (قيم العمود × فئات الهدف) لكل الأعمدة من bincount واحد، مثل pd.crosstab:
+    الصفوف التي فيها قيمة مفقودة تُستبعد، والصفوف/الأعمدة الصفرية تُحذف.
+    factorized: رموز محسوبة مسبقًا (من factorize_columns) لبعض الأعمدة أو كلها.
+    """
+    factorized = factorized or {}
+    target_codes, target_values = _factorize(df[target])
+    n_targets = len(target_values)
+    layouts, combined, offset = [], [], 0
+    for col in columns:
+        codes, uniques = factorized[col] if col in factorized else _factorize(df[col])
+        valid = (codes >= 0) & (target_codes >= 0)
+        combined.append(offset + codes[valid].astype(np.int64) * n_targets + target_codes[valid])
+        layouts.append((col, uniques, offset))
+        offset += len(uniques) * n_targets
+
+    counts = np.bincount(np.concatenate(combined), minlength=offset) if combined else np.empty(0, np.int64)
+    tables = {}
+    for col, uniques, start in layouts:
+        table = counts[start:start + len(uniques) * n_targets].reshape(len(uniques), n_targets)
+        rows, cols = table.any(axis=1), table.any(axis=0)
+        tables[col] = pd.DataFrame(table[rows][:, cols], index=pd.Index(uniques[rows], name=col),
+                                   columns=pd.Index(target_values[cols], name=target))
+    return tables
+
+
+def grouped_chi_square(df: pd.DataFrame, target: str, columns: Sequence[str],
+                       factorized: Optional[Dict[str, tuple]] = None) -> pd.DataFrame:
+    """Chi-Square لكل عمود فئوي مقابل الهدف من جداول contingency_tables. الأعمدة: feature, chi2_statistic, p_value."""
+    return chi_square_from_tables(contingency_tables(df, target, columns, factorized))
+
+
+def chi_square_from_tables(tables: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Chi-Square من جداول توافق جاهزة {عمود: جدول} (من pandas أو DuckDBEngine.contingency_tables)."""
+    results = []
+    for col, table in tables.items():
+        try:
+            chi2, p, dof, expected = stats.chi2_contingency(table.to_numpy())
+            if (expected < 5).any():
+                logger.warning(f"⚠️ نتائج Chi-Square للعمود {col} قد تكون غير دقيقة (قيم متوقعة منخفضة)")
+            results.append((col, chi2, p))
+        except Exception as e:
+            logger.warning(f"⚠️ فشل Chi-Square للعمود {col}: {e}")
+    return pd.DataFrame(results, columns=["feature", "chi2_statistic", "p_value"])
+
+
+def bin_codes(series: pd.Series, n_bins: int = MI_BINS) -> Tuple[np.ndarray, int]:
+    """
+    رموز فئات صحيحة (0..n-1) وعددها: الأعمدة الرقمية بحدود كمّية (فئات متساوية التكرار تقريبًا)،
+    والفئوية بـ factorize مع دمج ما بعد أكثر n_bins*4 قيمة تكرارًا. المفقود فئة مستقلة.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        present = ~np.isnan(values)
+        if not present.any():
+            return np.zeros(len(values), dtype=np.int64), 1
+        edges = np.unique(np.quantile(values[present], np.linspace(0, 1, n_bins + 1)[1:-1]))
+        codes = np.searchsorted(edges, values, side="right")
+        n_codes = len(edges) + 1
+    else:
+        codes, uniques = pd.factorize(series)
+        n_codes = len(uniques)
+        max_categories = n_bins * 4
+        if n_codes > max_categories:
+            counts = np.bincount(codes[codes >= 0], minlength=n_codes)
+            rank = np.empty(n_codes, dtype=np.int64)
+            rank[np.argsort(-counts, kind="stable")] = np.arange(n_codes)
+            codes = np.where(codes >= 0, np.minimum(rank[np.maximum(codes, 0)], max_categories), codes)
+            n_codes = max_categories + 1
+        present = codes >= 0
+    codes = np.where(present, codes, n_codes).astype(np.int64)
+    return codes, n_codes + int((~present).any())
+
+
+def mutual_information(x_codes: np.ndarray, n_x: int, y_codes: np.ndarray, n_y: int) -> Tuple[float, float]:
+    """(MI بوحدة nats، MI مطبّع بالجذر الهندسي للإنتروبيا) من جدول مشترك بـ bincount ثنائي الأبعاد."""
+    joint = np.bincount(x_codes * n_y + y_codes, minlength=n_x * n_y).reshape(n_x, n_y) / len(x_codes)
+    p_x, p_y = joint.sum(axis=1), joint.sum(axis=0)
+    nz = joint > 0
+    mi = float((joint[nz] * np.log(joint[nz] / np.outer(p_x, p_y)[nz])).sum())
+    h_x = -float((p_x[p_x > 0] * np.log(p_x[p_x > 0])).sum())
+    h_y = -float((p_y[p_y > 0] * np.log(p_y[p_y > 0])).sum())
+    normalized = mi / np.sqrt(h_x * h_y) if h_x > 0 and h_y > 0 else 0.0
+    return max(mi, 0.0), float(np.clip(normalized, 0.0, 1.0))
+
+
+def _mi_for_columns(frame: pd.DataFrame, y_codes: np.ndarray, n_y: int, n_bins: int) -> list:
+    """المعلومات المتبادلة لمجموعة أعمدة (تعمل داخل العامل)."""
+    results = []
+    for col in frame.columns:
+        x_codes, n_x = bin_codes(frame[col], n_bins)
+        results.append((col, *mutual_information(x_codes, n_x, y_codes, n_y)))
+    return results
+
+
+def mutual_information_scores(df: pd.DataFrame, target: str, columns: Sequence[str],
+                              n_bins: int = MI_BINS, sample_rows: int = MI_SAMPLE_ROWS,
+                              workers: int = MI_WORKERS, random_state: int = 42) -> pd.DataFrame:
+    """
+    المعلومات المتبادلة بين كل عمود والهدف على عينة بحد أقصى sample_rows صف (صفوف الهدف المفقود مستبعدة).
+    الهدف الرقمي كثير القيم يُقسَّم كمّيًا مثل الأعمدة. الأعمدة: feature, mutual_info, normalized_mi.
+    """
+    columns = [col for col in columns if col != target]
+    data = df.loc[df[target].notna(), columns + [target]]
+    if len(data) > sample_rows:
+        data = data.sample(n=sample_rows, random_state=random_state)
+    if not columns or data.empty:
+        return pd.DataFrame(columns=["feature", "mutual_info", "normalized_mi"])
+
+    y = data[target]
+    if pd.api.types.is_numeric_dtype(y) and y.nunique() > n_bins:
+        y_codes, n_y = bin_codes(y, n_bins)
+    else:
+        y_codes, uniques = pd.factorize(y)
+        n_y = len(uniques)
+
+    workers = resolve_workers(workers)
+    if workers > 1 and len(columns) >= MIN_PARALLEL_COLUMNS:
+        # تقسيم مواضع الأعمدة لا أسمائها: np.array_split على أسماء مختلطة (أرقام ونصوص) يحولها كلها إلى نصوص
+        groups = [group for group in np.array_split(np.arange(len(columns)), min(workers, len(columns))) if len(group)]
+        with process_pool(len(groups)) as executor:
+            futures = [executor.submit(_mi_for_columns, data.iloc[:, group], y_codes, n_y, n_bins) for group in groups]
+            results = [row for future in futures for row in future.result()]
+    else:
+        results = _mi_for_columns(data[columns], y_codes, n_y, n_bins)
+    return pd.DataFrame(results, columns=["feature", "mutual_info", "normalized_mi"])
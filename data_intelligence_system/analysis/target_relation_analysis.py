@@ -5,7 +5,6 @@ import logging
 import seaborn as sns
 import matplotlib.pyplot as plt
 
-from scipy.stats import chi2_contingency, f_oneway
 from sklearn.preprocessing import LabelEncoder
 
 # ✅ استيرادات من جذر المشروع
@@ -17,12 +16,23 @@ from data_intelligence_system.analysis.analysis_utils import (
     save_plot,
     log_basic_info
 )
+from data_intelligence_system.analysis import duckdb_engine
+from data_intelligence_system.analysis.target_kernel import (
+    anova_from_group_stats,
+    chi_square_from_tables,
+    grouped_anova,
+    grouped_chi_square,
+    mutual_information_scores
+)
+from data_intelligence_system.config.performance_config import ANALYSIS_ENGINE, MI_SAMPLE_ROWS
 from data_intelligence_system.utils.data_loader import load_data
+from data_intelligence_system.utils.memory_planner import load_sample
 from data_intelligence_system.utils.timer import Timer
 from data_intelligence_system.config.paths_config import (
     PROCESSED_DATA_DIR as DATA_DIR,
     ANALYSIS_DIR
 )
+from data_intelligence_system.utils.sampling import sample_for
 
 # إعداد المسارات
 FILE_PATH = DATA_DIR / "clean_data.csv"
@@ -36,37 +46,36 @@ logger = logging.getLogger(__name__)
 
 def anova_test(df, target, numerical_cols):
     logger.info("🔍 تحليل ANOVA بين الأعمدة الرقمية والمتغير الهدف")
-    results = []
-    groups = df[target].dropna().unique()
+    # مجاميع كل الأعمدة لكل فئة في مرور واحد بدل قناع لكل (عمود × فئة)
+    return grouped_anova(df, target, numerical_cols)
 
-    for col in numerical_cols:
-        try:
-            group_samples = [df[df[target] == g][col].dropna() for g in groups]
-            if any(len(s) < 2 for s in group_samples):
-                logger.warning(f"⚠️ تجاهل ANOVA للعمود {col} بسبب قلة العينات")
-                continue
-            f_val, p_val = f_oneway(*group_samples)
-            results.append((col, f_val, p_val))
-        except Exception as e:
-            logger.warning(f"⚠️ فشل ANOVA للعمود {col}: {e}")
 
-    return pd.DataFrame(results, columns=['feature', 'f_statistic', 'p_value'])
+def chi_square_test(df, target, categorical_cols, factorized=None):
+    logger.info("🔍 تحليل Chi-Square بين الأعمدة الفئوية والمتغير الهدف")
+    # جداول التوافق لكل الأعمدة من bincount واحد بدل crosstab لكل عمود
+    return grouped_chi_square(df, target, categorical_cols, factorized)
+
 
+def mutual_info_test(df, target, feature_cols):
+    logger.info("🔍 حساب المعلومات المتبادلة بين الأعمدة والمتغير الهدف")
+    # تقسيم كمّي + bincount ثنائي الأبعاد على عينة؛ يلتقط العلاقات غير الخطية أيضًا
+    return mutual_information_scores(df, target, feature_cols)
 
-def chi_square_test(df, target, categorical_cols):
-    logger.info("🔍 تحليل Chi-Square بين الأعمدة الفئوية والمتغير الهدف")
-    results = []
-    for col in categorical_cols:
-        try:
-            contingency_table = pd.crosstab(df[col], df[target])
-            chi2, p, dof, expected = chi2_contingency(contingency_table)
-            if (expected < 5).any():
-                logger.warning(f"⚠️ نتائج Chi-Square للعمود {col} قد تكون غير دقيقة (قيم متوقعة منخفضة)")
-            results.append((col, chi2, p))
-        except Exception as e:
-            logger.warning(f"⚠️ فشل Chi-Square للعمود {col}: {e}")
 
-    return pd.DataFrame(results, columns=['feature', 'chi2_statistic', 'p_value'])
+def duckdb_relation_tests(path, target):
+    """
+    ANOVA و Chi-Square على الملف كاملًا من إحصاءات المجموعات في DuckDB (عزوم كل فئة هدف وجداول التوافق)
+    دون تحميله في pandas. تعيد (نتائج ANOVA، نتائج Chi-Square، الأعمدة الرقمية، الأعمدة الفئوية).
+    """
+    logger.info(f"🦆 اختبارات العلاقة مع الهدف بـ DuckDB على: {path}")
+    with duckdb_engine.DuckDBEngine() as engine:
+        numeric, categorical, _ = engine.column_types(path)
+        num_cols = [col for col in numeric if col != target]
+        cat_cols = [col for col in categorical if col != target]
+        group_stats = engine.group_stats(path, by=[target], measures=num_cols, aggregates=("count", "mean", "std"))
+        anova_results = anova_from_group_stats(group_stats[group_stats.index.notna()], num_cols)
+        chi2_results = chi_square_from_tables(engine.contingency_tables(path, target, cat_cols))
+    return anova_results, chi2_results, num_cols, cat_cols
 
 
 def encode_target(df, target):
@@ -77,15 +86,25 @@ def encode_target(df, target):
 
 
 @Timer("تحليل العلاقة مع الهدف")
-def run_target_relation_analysis(df=None, target_col=None):
+def run_target_relation_analysis(df=None, target_col=None, prepared=None, engine=ANALYSIS_ENGINE):
+    """
+    prepared: وسائط مشتركة من analysis_plan (رموز الأعمدة الفئوية جاهزة والمعلومات مسجلة مسبقًا).
+    df: DataFrame أو مسار ملف (None = FILE_PATH). مع engine="duckdb" ومسار ملف تُحسب ANOVA و Chi-Square
+    على الملف كاملًا بـ DuckDB، والمعلومات المتبادلة والرسوم من عينة.
+    """
     ensure_output_dir(OUTPUT_DIR)
 
-    if df is None:
-        if not FILE_PATH.exists():
-            logger.error(f"❌ لم يتم العثور على الملف: {FILE_PATH}")
+    path, use_duckdb = None, False
+    if df is None or isinstance(df, (str, Path)):
+        path = FILE_PATH if df is None else Path(df)
+        if not path.exists():
+            logger.error(f"❌ لم يتم العثور على الملف: {path}")
             return
+        use_duckdb = engine == "duckdb" and duckdb_engine.is_available()
+        if engine == "duckdb" and not use_duckdb:
+            logger.warning("⚠️ duckdb غير مثبتة، سيتم استخدام محرك pandas.")
         try:
-            df = load_data(FILE_PATH)
+            df = load_sample(path, MI_SAMPLE_ROWS) if use_duckdb else load_data(path)
         except Exception as e:
             logger.error(f"⚠️ خطأ في تحميل الملف: {e}")
             return
@@ -94,8 +113,9 @@ def run_target_relation_analysis(df=None, target_col=None):
         logger.warning("⚠️ لا توجد بيانات صالحة للتحليل.")
         return
 
-    fname = FILE_PATH.name
-    log_basic_info(df, fname)
+    fname = path.name if path is not None else FILE_PATH.name
+    if prepared is None:
+        log_basic_info(df, fname)
 
     target = target_col if target_col else df.columns[-1]
     if target not in df.columns:
@@ -104,27 +124,35 @@ def run_target_relation_analysis(df=None, target_col=None):
 
     df = encode_target(df, target)
 
-    num_cols = [col for col in get_numerical_columns(df) if col != target]
-    cat_cols = [col for col in get_categorical_columns(df) if col != target]
+    if use_duckdb:
+        anova_results, chi2_results, num_cols, cat_cols = duckdb_relation_tests(path, target)
+    else:
+        num_cols = [col for col in get_numerical_columns(df) if col != target]
+        cat_cols = [col for col in get_categorical_columns(df) if col != target]
 
-    anova_results = anova_test(df, target, num_cols)
-    chi2_results = chi_square_test(df, target, cat_cols)
+        anova_results = anova_test(df, target, num_cols)
+        chi2_results = chi_square_test(df, target, cat_cols,
+                                       prepared.category_codes if prepared is not None else None)
 
     anova_results['test_type'] = 'ANOVA'
     chi2_results['test_type'] = 'Chi-Square'
 
     summary = pd.concat([anova_results, chi2_results], ignore_index=True)
+    mi_results = mutual_info_test(df, target, num_cols + cat_cols)
+    summary = summary.merge(mi_results, on='feature', how='left')
     summary['file'] = fname
 
-    top_features = summary.sort_values(by='p_value').head(3)['feature']
+    top_features = summary.sort_values(by=['mutual_info', 'p_value'], ascending=[False, True]).head(3)['feature']
 
+    # الرسوم من عينة طبقية حسب الهدف بحجم ثابت بدل كل الصفوف
+    plot_df = sample_for(df, "target_plot", by=target)
     for feature in top_features:
         plt.figure(figsize=(6, 4))
         try:
             if df[target].nunique() < 10:
-                sns.boxplot(data=df, x=target, y=feature)
+                sns.boxplot(data=plot_df, x=target, y=feature)
             else:
-                sns.scatterplot(data=df, x=target, y=feature)
+                sns.scatterplot(data=plot_df, x=target, y=feature)
             plt.title(f"{feature} vs {target}")
             plot_path = OUTPUT_DIR / f"{fname}_{feature}_relation.png"
             save_plot(plt.gcf(), plot_path)
@@ -23,9 +23,9 @@ class ClusteringRequest(BaseAnalysisRequest):
     """
     طلب تنفيذ التجميع باستخدام خوارزمية محددة
     """
-    algorithm: Literal["kmeans", "dbscan"] = Field(
+    algorithm: Literal["kmeans", "dbscan", "hdbscan"] = Field(
         default="kmeans",
-        description="خوارزمية التجميع (kmeans, dbscan, ...)"
+        description="خوارزمية التجميع (kmeans, dbscan, hdbscan)"
     )
     n_clusters: Optional[int] = Field(
         default=None,
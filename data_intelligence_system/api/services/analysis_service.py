@@ -1,11 +1,19 @@
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 
 import pandas as pd
 
 from data_intelligence_system.utils.logger import get_logger
 from data_intelligence_system.utils.data_loader import load_data
+from data_intelligence_system.api.services.dataset_registry import DatasetRegistry, get_dataset_registry
+from data_intelligence_system.utils.result_cache import (
+    ResultCache,
+    file_fingerprint,
+    frame_fingerprint,
+    get_result_cache
+)
+from data_intelligence_system.analysis.analysis_plan import run_analysis_plan
 from data_intelligence_system.analysis.descriptive_stats import generate_descriptive_stats
 from data_intelligence_system.analysis.correlation_analysis import run_correlation_analysis
 from data_intelligence_system.analysis.outlier_detection import run_outlier_detection
@@ -17,28 +25,58 @@ from data_intelligence_system.config.paths_config import CLEAN_DATA_FILE
 logger = get_logger("analysis.service")
 
 
+def _without_cluster(data: pd.DataFrame) -> pd.DataFrame:
+    # عمود cluster موجود مسبقًا يُكتب في مكانه (في البيانات المشتركة)؛ يُحذف من نسخة سطحية فيُنشأ جديدًا
+    frame = data.copy(deep=False)
+    if "cluster" in frame.columns:
+        del frame["cluster"]
+    return frame
+
+
 @dataclass
 class AnalysisService:
-    data_path: Path
+    """
+    خدمة التحليل لملف واحد (data_path)، أو لمجموعة بيانات بالاسم (dataset) من السجل المشترك:
+    في الحالة الثانية لا تحتفظ الخدمة بنسخة خاصة، والتحميل عند أول تحليل فقط.
+    """
+
+    data_path: Optional[Path] = None
     data: Optional[pd.DataFrame] = field(default=None, init=False)
+    cache: Optional[ResultCache] = field(default_factory=get_result_cache, repr=False)
+    dataset: Optional[str] = None
+    registry: Optional[DatasetRegistry] = field(default=None, repr=False)
+    _fingerprint: Optional[str] = field(default=None, init=False, repr=False)
+    _loaded_data: Optional[pd.DataFrame] = field(default=None, init=False, repr=False)
 
     def __post_init__(self) -> None:
-        self.load_data()
+        if self.dataset is None:
+            self.load_data()
+            return
+        if self.registry is None:
+            self.registry = get_dataset_registry()
+        if self.data_path is not None:
+            self.registry.register(self.dataset, self.data_path)
+        self.data_path = self.registry.path(self.dataset)
 
     def load_data(self, force_reload: bool = False) -> pd.DataFrame:
         """
-        تحميل أو إعادة تحميل البيانات المنظفة من المسار.
+        تحميل أو إعادة تحميل البيانات المنظفة من المسار (أو من سجل مجموعات البيانات).
         Raises FileNotFoundError إذا لم يكن الملف موجودًا.
         Raises Exception لأي خطأ آخر أثناء التحميل.
         """
+        if self.dataset is not None:
+            return self.registry.get(self.dataset, reload=force_reload)
+
         if self.data is None or force_reload:
-            if not self.data_path.exists():
+            if self.data_path is None or not self.data_path.exists():
                 logger.error(f"❌ المسار غير موجود: {self.data_path}")
                 raise FileNotFoundError(f"File not found: {self.data_path}")
 
             try:
                 logger.info(f"📁 بدء تحميل الملف: {self.data_path}")
                 self.data = load_data(str(self.data_path))
+                self._loaded_data = self.data
+                self._fingerprint = file_fingerprint(self.data_path)
                 if self.data.empty:
                     logger.warning(f"⚠️ الملف {self.data_path} تم تحميله لكنه فارغ.")
                 else:
@@ -48,6 +86,33 @@ class AnalysisService:
                 raise
         return self.data
 
+    def _cached(self, name: str, params: Dict[str, Any], compute: Callable[[pd.DataFrame], Any]) -> Any:
+        """
+        نتيجة التحليل من الذاكرة المؤقتة بمفتاح (بصمة البيانات، اسم التحليل، المعلمات).
+        إذا تغير الملف المصدر منذ التحميل تُعاد قراءته وتُحذف نتائج نسخته القديمة.
+        البيانات المعيّنة يدويًا (ليست من الملف) تُحفظ نتائجها في الذاكرة فقط.
+        """
+        if self.cache is None:
+            return compute(self.load_data())
+
+        if self.dataset is not None:
+            # السجل يعيد التحميل بنفسه إذا تغيرت البصمة
+            current, from_file = self.registry.fingerprint(self.dataset), True
+            if self._fingerprint not in (None, current):
+                self.cache.invalidate(self._fingerprint)
+            self._fingerprint = current
+        else:
+            from_file = self._fingerprint is not None and self.data is self._loaded_data
+            if from_file and self.data_path.exists():
+                current = file_fingerprint(self.data_path)
+                if current != self._fingerprint:
+                    logger.info(f"🔄 تغير الملف المصدر، إعادة التحميل: {self.data_path}")
+                    self.cache.invalidate(self._fingerprint)
+                    self.load_data(force_reload=True)
+        fingerprint = self._fingerprint if from_file else frame_fingerprint(self.data)
+        return self.cache.get_or_compute(fingerprint, name, params, lambda: compute(self.load_data()),
+                                         persist=from_file)
+
     def run_descriptive_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
         """تنفيذ التحليل الوصفي على DataFrame."""
         return generate_descriptive_stats(df)
@@ -59,7 +124,7 @@ class AnalysisService:
         if df.empty:
             logger.warning("⚠️ البيانات فارغة، لا يمكن إجراء التحليل الوصفي.")
             return {}
-        return self.run_descriptive_stats(df)
+        return self._cached("descriptive_statistics", {}, self.run_descriptive_stats)
 
     def correlation_analysis(self, method: str = "pearson") -> Dict[str, Any]:
         """تشغيل تحليل الارتباط على البيانات المحملة."""
@@ -68,7 +133,8 @@ class AnalysisService:
         if df.empty:
             logger.warning("⚠️ البيانات فارغة، لا يمكن إجراء تحليل الارتباط.")
             return {}
-        return run_correlation_analysis(df, method=method)
+        return self._cached("correlation_analysis", {"method": method},
+                            lambda data: run_correlation_analysis(data, method=method))
 
     def outlier_detection(self, method: str = "iqr") -> Dict[str, Any]:
         """تشغيل كشف القيم الشاذة على البيانات المحملة."""
@@ -77,7 +143,8 @@ class AnalysisService:
         if df.empty:
             logger.warning("⚠️ البيانات فارغة، لا يمكن إجراء كشف القيم الشاذة.")
             return {}
-        return run_outlier_detection(df, method=method)
+        return self._cached("outlier_detection", {"method": method},
+                            lambda data: run_outlier_detection(data, method=method))
 
     def clustering_insights(self, algorithm: str = "kmeans", n_clusters: int = 3) -> Dict[str, Any]:
         """تشغيل تحليل التجميع على البيانات المحملة."""
@@ -86,7 +153,9 @@ class AnalysisService:
         if df.empty:
             logger.warning("⚠️ البيانات فارغة، لا يمكن إجراء تحليل التجميع.")
             return {}
-        return run_clustering(df, algorithm=algorithm, n_clusters=n_clusters)
+        return self._cached("clustering_insights", {"algorithm": algorithm, "n_clusters": n_clusters},
+                            lambda data: run_clustering(_without_cluster(data), algorithm=algorithm,
+                                                        n_clusters=n_clusters))
 
     def target_relationship(self, target_column: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -104,7 +173,27 @@ class AnalysisService:
             return {"warning": f"Target column '{target}' not found in data."}
 
         logger.info(f"🎯 تحليل العلاقة مع الهدف: {target}")
-        return run_target_relation_analysis(df, target_col=target)
+        return self._cached("target_relationship", {"target": target},
+                            lambda data: run_target_relation_analysis(data, target_col=target))
+
+    def full_analysis(self, target_column: Optional[str] = None, correlation_method: str = "pearson",
+                      outlier_method: str = "iqr", algorithm: str = "kmeans",
+                      n_clusters: Optional[int] = 3) -> Dict[str, Any]:
+        """
+        كل التحليلات بخطة واحدة: التجهيز المشترك مرة واحدة والتحليلات المستقلة بالتوازي.
+        النتيجة {descriptive, correlation, outliers, clustering, target}.
+        """
+        logger.info("🧭 بدء التحليل الكامل...")
+        df = self.load_data()
+        if df.empty:
+            logger.warning("⚠️ البيانات فارغة، لا يمكن إجراء التحليل الكامل.")
+            return {}
+
+        params = {"target": target_column, "correlation_method": correlation_method,
+                  "outlier_method": outlier_method, "algorithm": algorithm, "n_clusters": n_clusters}
+        return self._cached("full_analysis", params, lambda data: run_analysis_plan(
+            data, correlation_method=correlation_method, outlier_method=outlier_method,
+            algorithm=algorithm, n_clusters=n_clusters, target_col=target_column))
 
 
 if __name__ == "__main__":
@@ -120,17 +209,14 @@ if __name__ == "__main__":
 
     service = AnalysisService(data_path=data_file_path)
 
-    print("\n[1] Descriptive Statistics:")
-    print(service.descriptive_statistics())
-
-    print("\n[2] Correlation Analysis:")
-    print(service.correlation_analysis())
-
-    print("\n[3] Outlier Detection:")
-    print(service.outlier_detection())
-
-    print("\n[4] Clustering Insights:")
-    print(service.clustering_insights())
-
-    print("\n[5] Target Relationship Analysis:")
-    print(service.target_relationship(target_column="species"))
+    results = service.full_analysis(target_column="species")
+    titles = {
+        "descriptive": "Descriptive Statistics",
+        "correlation": "Correlation Analysis",
+        "outliers": "Outlier Detection",
+        "clustering": "Clustering Insights",
+        "target": "Target Relationship Analysis",
+    }
+    for i, (name, title) in enumerate(titles.items(), start=1):
+        print(f"\n[{i}] {title}:")
+        print(results.get(name))
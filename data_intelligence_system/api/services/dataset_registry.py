@@ -0,0 +1,216 @@
+"""
+api/services/dataset_registry.py
+
+سجل مجموعات البيانات المشترك بين خدمات التحليل بدل نسخة كاملة لكل خدمة:
+    - التسجيل بالاسم والمسار، والتحميل عند أول طلب فقط
+    - تتبع حجم كل DataFrame في الذاكرة (memory_usage deep) وإخلاء الأقدم استخدامًا
+      عند تجاوز ميزانية الذاكرة
+    - المُخلى يُحفظ (اختياريًا) كملف Arrow IPC بمفتاح بصمة محتواه، وإعادة تحميله
+      قراءة memory-mapped بدل تحليل CSV/Excel من جديد
+    - تغير الملف المصدر (بصمته) يُسقط النسخة المحملة والنسخة المحفوظة القديمة
+    - get يعيد نسخة سطحية: الخدمات التي تضيف أعمدة أو تستبدلها لا تغير النسخة المشتركة
+    - تحليل الملف يتم خارج القفل العام (قفل لكل مجموعة يمنع تحميلها مرتين)
+
+الاستخدام:
+    from data_intelligence_system.api.services.dataset_registry import get_dataset_registry
+
+    registry = get_dataset_registry()
+    registry.register("sales", "data/processed/sales.csv")
+    df = registry.get("sales")
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from data_intelligence_system.config.paths_config import DATASET_SPILL_DIR
+from data_intelligence_system.config.performance_config import DATASET_REGISTRY_MEMORY_MB, DATASET_SPILL
+from data_intelligence_system.utils.data_loader import load_data
+from data_intelligence_system.utils.logger import get_logger
+from data_intelligence_system.utils.memory_planner import get_memory_budget
+from data_intelligence_system.utils.result_cache import file_fingerprint
+
+try:
+    import pyarrow as pa  # type: ignore
+except ImportError:
+    pa = None
+
+logger = get_logger("dataset.registry")
+
+
+@dataclass
+class _Entry:
+    path: Path
+    data: Optional[pd.DataFrame] = None
+    nbytes: int = 0
+    fingerprint: Optional[str] = None
+    loading: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class DatasetRegistry:
+    """
+    مجموعات بيانات بالاسم بذاكرة محدودة (LRU). memory_budget_mb=None يعني ميزانية الذاكرة العامة.
+    spill=True يحفظ المُخلى كملفات Arrow في spill_dir (يتطلب pyarrow).
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = DATASET_REGISTRY_MEMORY_MB,
+                 spill: bool = DATASET_SPILL, spill_dir: Union[str, Path] = DATASET_SPILL_DIR):
+        self.budget_bytes = get_memory_budget(memory_budget_mb)
+        self.spill = spill and pa is not None
+        self.spill_dir = Path(spill_dir)
+        if spill and pa is None:
+            logger.warning("⚠️ pyarrow غير مثبت، سيتم الإخلاء بدون حفظ نسخ Arrow.")
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    # ---------- التسجيل ----------
+    def register(self, name: str, path: Union[str, Path]) -> None:
+        """تسجيل (أو تغيير مسار) مجموعة بيانات دون تحميلها."""
+        path = Path(path)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.path != path:
+                self._entries[name] = _Entry(path=path)
+                logger.info(f"🗂️ تسجيل مجموعة البيانات {name}: {path}")
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def _entry(self, name: str) -> _Entry:
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"❌ مجموعة البيانات غير مسجلة: {name}")
+        return entry
+
+    def path(self, name: str) -> Path:
+        with self._lock:
+            return self._entry(name).path
+
+    def fingerprint(self, name: str) -> str:
+        """بصمة محتوى الملف المصدر الحالية (تُحسب من جديد فقط إذا تغير الملف)."""
+        path = self.path(name)
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+        return file_fingerprint(path)
+
+    # ---------- التحميل ----------
+    def get(self, name: str, reload: bool = False) -> pd.DataFrame:
+        """
+        DataFrame المجموعة: من الذاكرة، أو من نسخة Arrow المحفوظة، أو من الملف المصدر.
+        النتيجة نسخة سطحية (copy(deep=False)) من النسخة المشتركة.
+        """
+        with self._lock:
+            entry = self._entry(name)
+        with entry.loading:
+            fingerprint = self.fingerprint(name)
+            with self._lock:
+                if entry.data is not None and entry.fingerprint == fingerprint and not reload:
+                    self._entries.move_to_end(name)
+                    return entry.data.copy(deep=False)
+
+            # القراءة خارج القفل العام: باقي المجموعات متاحة أثناء تحليل الملف
+            data = None if reload else self._read_spill(fingerprint)
+            if data is None:
+                logger.info(f"📁 تحميل مجموعة البيانات {name} من: {entry.path}")
+                data = load_data(str(entry.path))
+
+            with self._lock:
+                if entry.fingerprint not in (None, fingerprint):
+                    logger.info(f"🔄 تغير الملف المصدر لمجموعة البيانات {name}")
+                    self._drop_spill(entry.fingerprint, owner=name)
+                entry.data, entry.fingerprint = data, fingerprint
+                entry.nbytes = int(data.memory_usage(deep=True).sum())
+                if self._entries.get(name) is entry:
+                    self._entries.move_to_end(name)
+                    self._evict_to_budget(keep=name)
+                return data.copy(deep=False)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """حجم كل مجموعة محملة بالبايت."""
+        with self._lock:
+            return {name: entry.nbytes for name, entry in self._entries.items() if entry.data is not None}
+
+    # ---------- الإخلاء ----------
+    def evict(self, name: str) -> None:
+        """إخراج المجموعة من الذاكرة (مع حفظ نسخة Arrow إذا كان مفعلًا)."""
+        with self._lock:
+            entry = self._entry(name)
+            if entry.data is None:
+                return
+            if self.spill:
+                self._write_spill(entry)
+            logger.info(f"♻️ إخلاء مجموعة البيانات {name} ({entry.nbytes / 1024 ** 2:.1f}MB)")
+            entry.data, entry.nbytes = None, 0
+
+    def _evict_to_budget(self, keep: str) -> None:
+        total = sum(entry.nbytes for entry in self._entries.values())
+        for name, entry in list(self._entries.items()):
+            if total <= self.budget_bytes:
+                break
+            if name == keep or entry.data is None:
+                continue
+            total -= entry.nbytes
+            self.evict(name)
+        if total > self.budget_bytes:
+            logger.warning(f"⚠️ مجموعة البيانات {keep} وحدها تتجاوز ميزانية الذاكرة "
+                           f"({total / 1024 ** 2:.1f}MB > {self.budget_bytes / 1024 ** 2:.1f}MB)")
+
+    # ---------- نسخ Arrow ----------
+    def _spill_path(self, fingerprint: str) -> Path:
+        return self.spill_dir / f"{fingerprint}.arrow"
+
+    def _write_spill(self, entry: _Entry) -> None:
+        path = self._spill_path(entry.fingerprint)
+        if path.exists():
+            return
+        try:
+            table = pa.Table.from_pandas(entry.data, preserve_index=True)
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            tmp.replace(path)
+        except Exception as e:
+            # أعمدة بأنواع مختلطة لا يمكن تمثيلها في Arrow: تُعاد قراءتها من المصدر
+            logger.warning(f"⚠️ تعذر حفظ نسخة Arrow لـ {entry.path.name}: {e}")
+
+    def _read_spill(self, fingerprint: str) -> Optional[pd.DataFrame]:
+        if not self.spill:
+            return None
+        path = self._spill_path(fingerprint)
+        if not path.exists():
+            return None
+        try:
+            with pa.memory_map(str(path), "r") as source:
+                return pa.ipc.open_file(source).read_all().to_pandas()
+        except Exception as e:
+            logger.warning(f"⚠️ نسخة Arrow تالفة وسيتم تجاهلها ({path.name}): {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def _drop_spill(self, fingerprint: str, owner: str) -> None:
+        """حذف نسخة Arrow قديمة ما لم تكن مجموعة أخرى بنفس المحتوى تعتمد عليها."""
+        if self.spill and not any(e.fingerprint == fingerprint for n, e in self._entries.items() if n != owner):
+            self._spill_path(fingerprint).unlink(missing_ok=True)
+
+
+_default_registry: Optional[DatasetRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_dataset_registry() -> DatasetRegistry:
+    """السجل المشترك لكل خدمات التحليل في العملية."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = DatasetRegistry()
+        return _default_registry
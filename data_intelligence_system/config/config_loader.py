@@ -20,6 +20,7 @@ if not logger.hasHandlers():
 CONFIG_MODULE_PATHS = {
     "paths": "data_intelligence_system.config.paths_config",
     "models": "data_intelligence_system.config.model_config",
+    "performance": "data_intelligence_system.config.performance_config",
     "reports": "data_intelligence_system.config.report_config",
     "dashboard": "data_intelligence_system.config.dashboard_config",
     "env": "data_intelligence_system.config.env_config"
@@ -43,6 +43,8 @@ DATA_DIR = SYSTEM_ROOT / "data"
 RAW_DATA_DIR = get_path_from_config("paths.raw_data", DATA_DIR / "raw")
 PROCESSED_DATA_DIR = get_path_from_config("paths.processed_data", DATA_DIR / "processed")
 EXTERNAL_DATA_DIR = DATA_DIR / "external"
+DATASET_SPILL_DIR = DATA_DIR / "arrow_cache"
+DUCKDB_TEMP_DIR = DATA_DIR / "duckdb_tmp"
 EXTERNAL_DOWNLOADED_DIR = EXTERNAL_DATA_DIR / "downloaded"
 RAW_DATA_PATHS = [RAW_DATA_DIR, EXTERNAL_DOWNLOADED_DIR]
 SUPPORTED_EXTENSIONS = {'.csv', '.json', '.xlsx'}
@@ -54,6 +56,7 @@ EDA_OUTPUT_DIR = DATA_PROFILES_DIR / "eda_output"
 # ===================== ETL / Analysis / Models =====================
 ETL_DIR = SYSTEM_ROOT / "etl"
 ANALYSIS_DIR = SYSTEM_ROOT / "analysis"
+ANALYSIS_CACHE_DIR = ANALYSIS_DIR / "analysis_output" / "cache"
 ML_MODELS_DIR = get_path_from_config("paths.models", SYSTEM_ROOT / "ml_models")
 
 # ===================== Dashboard & Reports =====================
@@ -0,0 +1,151 @@
+"""
+performance_config.py
+إعدادات الأداء: ميزانية الذاكرة، أحجام الدفعات والعينات.
+"""
+
+import os
+from pathlib import Path
+
+# ✅ استيرادات مطلقة من جذر المشروع
+from data_intelligence_system.config.yaml_config_handler import YAMLConfigHandler
+from data_intelligence_system.utils.logger import get_logger
+
+logger = get_logger("performance_config")
+
+CONFIG_PATH = Path(__file__).resolve().parent / "config.yaml"
+config = YAMLConfigHandler(str(CONFIG_PATH)) if CONFIG_PATH.exists() else None
+
+
+def get_config_value(key: str, default):
+    """Helper to get config value or default."""
+    value = config.get(key, default) if config else default
+    return default if value is None else value
+
+
+def _get_budget_mb():
+    """ميزانية الذاكرة بالميغابايت (متغير البيئة MEMORY_BUDGET_MB له الأولوية)."""
+    raw = os.getenv("MEMORY_BUDGET_MB")
+    if raw is None:
+        return get_config_value("performance.memory_budget_mb", None)
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning(f"⚠️ قيمة MEMORY_BUDGET_MB غير صالحة '{raw}'، سيتم تجاهلها.")
+        return None
+
+
+# 🧠 ميزانية الذاكرة
+MEMORY_BUDGET_MB = _get_budget_mb()
+MEMORY_BUDGET_FRACTION = float(get_config_value("performance.memory_budget_fraction", 0.6))
+MEMORY_SAFETY_FACTOR = float(get_config_value("performance.memory_safety_factor", 3.0))
+
+# 📏 أحجام التقدير والدفعات والعينات
+ESTIMATE_SAMPLE_ROWS = int(get_config_value("performance.estimate_sample_rows", 1000))
+MIN_CHUNK_ROWS = int(get_config_value("performance.min_chunk_rows", 10000))
+MAX_SAMPLE_ROWS = int(get_config_value("performance.max_sample_rows", 200000))
+
+# ⚙️ محرك التحويل في ETL
+TRANSFORM_ENGINE = str(get_config_value("performance.transform_engine", "pandas")).lower()
+
+# 👀 وضع مراقبة الملفات الخام
+WATCH_DEBOUNCE_SECONDS = float(get_config_value("performance.watch_debounce_seconds", 2.0))
+WATCH_POLL_INTERVAL = float(get_config_value("performance.watch_poll_interval", 1.0))
+WATCH_MAX_WORKERS = int(get_config_value("performance.watch_max_workers", 2))
+
+# 📈 الإحصاءات التراكمية لوضع الإلحاق
+STATS_RESERVOIR_SIZE = int(get_config_value("performance.stats_reservoir_size", 10000))
+STATS_MAX_CATEGORIES = int(get_config_value("performance.stats_max_categories", 10000))
+
+# 🌊 التحليل الوصفي المتدفق
+STREAMING_SKETCH_K = int(get_config_value("performance.streaming_sketch_k", 2000))
+STREAMING_TOPK_CAPACITY = int(get_config_value("performance.streaming_topk_capacity", 1000))
+STREAMING_DISTINCT_CAPACITY = int(get_config_value("performance.streaming_distinct_capacity", 1000000))
+STREAMING_WORKERS = int(get_config_value("performance.streaming_workers", 1))
+
+# 🗓️ اكتشاف أعمدة التواريخ من عينة
+DATETIME_SNIFF_SAMPLE_ROWS = int(get_config_value("performance.datetime_sniff_sample_rows", 500))
+DATETIME_SNIFF_MIN_RATIO = float(get_config_value("performance.datetime_sniff_min_ratio", 0.9))
+DATETIME_SNIFF_CACHE_SIZE = int(get_config_value("performance.datetime_sniff_cache_size", 256))
+
+# 🧵 طريقة بدء العمليات المتوازية (fork غير آمن من عملية متعددة الخيوط مثل وضع المراقبة)
+MP_START_METHOD = str(get_config_value("performance.mp_start_method", "forkserver"))
+
+# 🖼️ رسم المدرجات
+HISTOGRAM_WORKERS = int(get_config_value("performance.histogram_workers", 0))
+HISTOGRAM_DPI = int(get_config_value("performance.histogram_dpi", 300))
+HISTOGRAM_DRAFT_DPI = int(get_config_value("performance.histogram_draft_dpi", 100))
+HISTOGRAM_DRAFT = bool(get_config_value("performance.histogram_draft", False))
+
+# 🔗 الارتباط للجداول العريضة
+CORRELATION_BLOCK_SIZE = int(get_config_value("performance.correlation_block_size", 512))
+CORRELATION_WIDE_THRESHOLD = int(get_config_value("performance.correlation_wide_threshold", 300))
+CORRELATION_TOP_K = int(get_config_value("performance.correlation_top_k", 100))
+HEATMAP_MAX_COLUMNS = int(get_config_value("performance.heatmap_max_columns", 60))
+HEATMAP_ANNOT_MAX_COLUMNS = int(get_config_value("performance.heatmap_annot_max_columns", 25))
+
+# 🚨 دفعات القيم الشاذة
+OUTLIER_BATCH_WORKERS = int(get_config_value("performance.outlier_batch_workers", 0))
+ISOLATION_MAX_TRAIN_ROWS = int(get_config_value("performance.isolation_max_train_rows", 100000))
+ISOLATION_N_JOBS = int(get_config_value("performance.isolation_n_jobs", -1))
+ISOLATION_SCORE_CHUNK_ROWS = int(get_config_value("performance.isolation_score_chunk_rows", 100000))
+
+# 🧩 التجميع
+KMEANS_MINIBATCH_THRESHOLD = int(get_config_value("performance.kmeans_minibatch_threshold", 100000))
+KMEANS_BATCH_SIZE = int(get_config_value("performance.kmeans_batch_size", 4096))
+SILHOUETTE_SAMPLE_ROWS = int(get_config_value("performance.silhouette_sample_rows", 5000))
+KMEANS_SWEEP_MAX_K = int(get_config_value("performance.kmeans_sweep_max_k", 10))
+KMEANS_SWEEP_SAMPLE_ROWS = int(get_config_value("performance.kmeans_sweep_sample_rows", 200000))
+KMEANS_SWEEP_WORKERS = int(get_config_value("performance.kmeans_sweep_workers", 0))
+DENSITY_MAX_FIT_ROWS = int(get_config_value("performance.density_max_fit_rows", 50000))
+DENSITY_N_JOBS = int(get_config_value("performance.density_n_jobs", -1))
+PCA_RANDOMIZED_MIN_DIM = int(get_config_value("performance.pca_randomized_min_dim", 500))
+PCA_INCREMENTAL_MIN_MB = float(get_config_value("performance.pca_incremental_min_mb", 1024))
+PCA_BATCH_ROWS = int(get_config_value("performance.pca_batch_rows", 50000))
+CLUSTERING_BATCH_WORKERS = int(get_config_value("performance.clustering_batch_workers", 0))
+BATCH_BLAS_THREADS = int(get_config_value("performance.batch_blas_threads", 0))
+
+# 🎯 العلاقة مع الهدف
+MI_SAMPLE_ROWS = int(get_config_value("performance.mi_sample_rows", 100000))
+MI_BINS = int(get_config_value("performance.mi_bins", 16))
+MI_WORKERS = int(get_config_value("performance.mi_workers", 0))
+TARGET_PLOT_SAMPLE_ROWS = int(get_config_value("performance.target_plot_sample_rows", 5000))
+
+# 🧭 خطة التحليل الكاملة
+ANALYSIS_PLAN_WORKERS = int(get_config_value("performance.analysis_plan_workers", 0))
+
+# ⚡ الذاكرة المؤقتة لنتائج التحليل
+ANALYSIS_CACHE_ENABLED = bool(get_config_value("performance.analysis_cache_enabled", True))
+ANALYSIS_CACHE_MEMORY_MB = float(get_config_value("performance.analysis_cache_memory_mb", 256))
+ANALYSIS_CACHE_DISK_MB = float(get_config_value("performance.analysis_cache_disk_mb", 1024))
+
+# 🗂️ سجل مجموعات البيانات
+DATASET_REGISTRY_MEMORY_MB = get_config_value("performance.dataset_registry_memory_mb", None)
+DATASET_SPILL = bool(get_config_value("performance.dataset_spill", True))
+
+# 🧮 التجميعات الزمنية
+ROLLUP_GRANULARITIES = tuple(get_config_value("performance.rollup_granularities",
+                                              ("hour", "day", "week", "month")))
+
+# 🦆 محرك التحليل (DuckDB اختياري)
+ANALYSIS_ENGINE = str(get_config_value("performance.analysis_engine", "pandas")).lower()
+DUCKDB_THREADS = int(get_config_value("performance.duckdb_threads", 0))
+DUCKDB_MEMORY_MB = get_config_value("performance.duckdb_memory_mb", None)
+
+# 🎯 العينات الممثِّلة
+SAMPLING_MAX_STRATA = int(get_config_value("performance.sampling_max_strata", 50))
+SAMPLE_BUDGETS = {
+    "preview": 20,
+    "report_preview": 10,
+    "distribution_plot": 5000,
+    "cluster_plot": 20000,
+    "target_plot": TARGET_PLOT_SAMPLE_ROWS,
+    "silhouette": SILHOUETTE_SAMPLE_ROWS,
+    **(get_config_value("performance.sample_budgets", None) or {}),
+}
+
+if __name__ == "__main__":
+    print(f"MEMORY_BUDGET_MB: {MEMORY_BUDGET_MB}")
+    print(f"MEMORY_BUDGET_FRACTION: {MEMORY_BUDGET_FRACTION}")
+    print(f"MEMORY_SAFETY_FACTOR: {MEMORY_SAFETY_FACTOR}")
+    print(f"ESTIMATE_SAMPLE_ROWS: {ESTIMATE_SAMPLE_ROWS}")
+    print(f"TRANSFORM_ENGINE: {TRANSFORM_ENGINE}")
@@ -5,6 +5,7 @@ import pandas as pd
 from io import StringIO  # استيراد StringIO لتحويل النص إلى كائن يشبه الملف
 from data_intelligence_system.utils.preprocessing import fill_missing_values
 from data_intelligence_system.utils.logger import get_logger  # ✅ توحيد نظام اللوجر
+from data_intelligence_system.utils.type_sniffing import convert_datetime_columns, sniff_datetime_columns
 
 logger = get_logger(__name__)
 
@@ -50,12 +51,8 @@ def json_to_df(data_json: Optional[str], parse_dates: bool = True, date_format:
             return None
 
         if parse_dates:
-            obj_cols = df.select_dtypes(include=['object']).columns
-            for col in obj_cols:
-                # تحديد تنسيق التاريخ بشكل يدوي
-                converted = pd.to_datetime(df[col], format=date_format, errors='coerce')
-                if not converted.isnull().all():
-                    df[col] = converted
+            # فحص الصيغة على عينة (مع حفظ القرار لنفس المخطط) ثم تحويل الأعمدة المؤكدة فقط
+            convert_datetime_columns(df, sniff_datetime_columns(df, formats=(date_format,)))
 
         df = fill_missing_values(df)
         logger.info("✅ تم تحويل JSON إلى DataFrame (split) بنجاح.")
@@ -77,8 +74,9 @@ def filter_data_by_date(
         return df
 
     df_filtered = df.copy()
-    # تحديد تنسيق التاريخ بشكل يدوي أثناء تحويل العمود
-    df_filtered[date_column] = pd.to_datetime(df_filtered[date_column], format=date_format, errors='coerce')
+    # تحديد تنسيق التاريخ بشكل يدوي أثناء تحويل العمود (العمود المحوَّل مسبقًا لا يُعاد تحليله)
+    if not pd.api.types.is_datetime64_any_dtype(df_filtered[date_column]):
+        df_filtered[date_column] = pd.to_datetime(df_filtered[date_column], format=date_format, errors='coerce')
 
     if start_date:
         try:
@@ -1,5 +1,8 @@
+from pathlib import Path
+from typing import Optional
+
 import pandas as pd
-from dash import Input, Output, html
+from dash import Input, Output, State, html
 from dash.exceptions import PreventUpdate
 
 from data_intelligence_system.dashboard.components import charts, indicators
@@ -13,8 +16,11 @@ from data_intelligence_system.data.external.external_data_utils import (
 from data_intelligence_system.utils.preprocessing import fill_missing_values
 from data_intelligence_system.analysis.correlation_analysis import generate_correlation_matrix
 from data_intelligence_system.analysis.outlier_detection import detect_outliers_iqr
+from data_intelligence_system.analysis.rollups import SEP, compute_rollups, rollup_values
 from data_intelligence_system.analysis.target_relation_analysis import analyze_target_relation
+from data_intelligence_system.etl.incremental import load_cached_rollup
 from data_intelligence_system.utils.logger import get_logger
+from data_intelligence_system.utils.result_cache import file_fingerprint
 
 logger = get_logger("ChartsCallback")
 
@@ -37,13 +43,33 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def prepare_x_axis(df: pd.DataFrame):
+def load_source_rollup(raw_data_path: Optional[str], time_col: str, granularity: str = "day"):
+    """
+    التجميع المحفوظ لمجموعة بيانات الملف الخام (processed/cleaned_<اسم الملف>)،
+    فقط إذا بناه run_full_pipeline من نسخة الملف الحالية (نفس البصمة)، وإلا None.
+    """
+    if not raw_data_path or not Path(raw_data_path).exists():
+        return None
+    return load_cached_rollup(Path(raw_data_path).stem, time_col, granularity,
+                              source_fingerprint=file_fingerprint(raw_data_path))
+
+
+def prepare_line_data(df: pd.DataFrame, y_col: str, raw_data_path: Optional[str] = None):
+    """
+    محورا الرسم الخطي: متوسط يومي من التجميعات الزمنية إن وُجد عمود date، وإلا الصفوف كما هي.
+    التجميع اليومي المحفوظ للملف الخام raw_data_path يُقرأ مباشرة إذا طابقت بصمته الملف،
+    ويُحسب من df إذا لم يوجد أو لم يتضمن y_col.
+    """
     date_col = next((col for col in df.columns if str(col).lower() == "date"), None)
     if date_col:
         df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
         df = df.dropna(subset=[date_col])
-        return df, df[date_col].dt.strftime('%Y-%m-%d').tolist()
-    return df, list(range(len(df)))
+        daily = load_source_rollup(raw_data_path, date_col)
+        if daily is None or f"{y_col}{SEP}count" not in daily.columns:
+            daily = compute_rollups(df, date_col, measures=[y_col], granularities=("day",))["day"]
+        means = rollup_values(daily, stat="mean")[y_col]
+        return df, means.index.strftime('%Y-%m-%d').tolist(), means.fillna(0).tolist()
+    return df, list(range(len(df))), df[y_col].fillna(0).tolist()
 
 
 def create_kpi_cards(numeric_df: pd.DataFrame):
@@ -81,9 +107,10 @@ def register_charts_callbacks(app):
         Output("stats-summary-pre", "children"),
         Output("kpi-container", "children"),
         Input("store_raw_data", "data"),
+        State("store_raw_data_path", "data"),
         prevent_initial_call=True,
     )
-    def update_charts(stored_json):
+    def update_charts(stored_json, raw_data_path=None):
         if not stored_json:
             raise PreventUpdate
 
@@ -119,12 +146,12 @@ def register_charts_callbacks(app):
             except Exception as e:
                 logger.warning(f"⚠️ فشل في حساب مصفوفة الارتباط: {e}")
 
-            df, x_axis = prepare_x_axis(df)
             y_axis = numeric_df.columns[0]
+            df, x_axis, y_data = prepare_line_data(df, y_axis, raw_data_path)
 
             line_graph_figure = charts.create_line_chart(
                 x_data=x_axis,
-                y_data=df[y_axis].fillna(0).tolist(),
+                y_data=y_data,
                 title=f"الرسم الخطي - {y_axis}",
                 colors={"line": "#1E90FF"},
                 height=400,
@@ -3,6 +3,8 @@ import pandas as pd
 import logging
 import sys
 
+from data_intelligence_system.utils.sampling import get_sample
+
 # إعداد المسارات
 BASE_DIR = Path(__file__).resolve().parents[2]
 PROCESSED_DIR = BASE_DIR / 'data' / 'processed'
@@ -18,10 +20,10 @@ logger = logging.getLogger("CleanPreview")
 
 def preview(df: pd.DataFrame, rows: int = 10) -> None:
     """
-    عرض أول N صفوف وبعض الإحصاءات من DataFrame.
+    عرض عينة عشوائية من N صفوف (بترتيبها في الملف) وبعض الإحصاءات من DataFrame.
     """
-    logger.info(f"📋 معاينة أول {rows} صفوف:")
-    logger.info("\n" + df.head(rows).to_string())
+    logger.info(f"📋 معاينة عينة من {rows} صفوف:")
+    logger.info("\n" + get_sample(df, rows).to_string())
     logger.info("📊 إحصاءات موجزة:")
     logger.info("\n" + df.describe(include='all').transpose().to_string())
 
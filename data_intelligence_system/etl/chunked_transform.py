@@ -0,0 +1,288 @@
+"""
+etl/chunked_transform.py
+
+تحويل الملفات الكبيرة على دفعات بنفس خطوات transform_datasets
+(توحيد الأسماء ← ملء المفقود ← الترميز ← الموازنة ← حذف التكرار) دون تحميل الملف كاملًا.
+
+التنفيذ على مرحلتين:
+    1. fit_transform_params: مرور أول يجمع الإحصاءات اللازمة (قيم الملء، الفئات، المتوسط والانحراف).
+    2. apply_transform_params: تطبيق المعاملات نفسها على كل دفعة، مع حذف التكرار عبر بصمات الصفوف.
+       البصمات تُحفظ في الذاكرة حتى DEDUP_BUFFER_SIZE ثم تُنقل إلى ملفات مرتبة على القرص (بحث ثنائي عبر mmap).
+
+أعمدة الدفعة الأولى هي المعتمدة: الأعمدة التي تظهر في دفعات لاحقة فقط تُحذف مع تحذير.
+
+ملاحظة: الوسيط المستخدم لملء الأعمدة الرقمية يُحسب من عينة محدودة من القيم، لذلك قد يختلف
+قليلًا عن الوسيط الدقيق للمسار الكامل في الذاكرة.
+"""
+
+import json
+import logging
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Union
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.etl.etl_utils import log_step
+from data_intelligence_system.etl.transform import normalize_column_names, unify_column_names
+
+logger = logging.getLogger(__name__)
+
+MEDIAN_SAMPLE_SIZE = 100_000
+ONEHOT_MAX_UNIQUE = 1000
+DEDUP_BUFFER_SIZE = 1_000_000
+
+
+@dataclass
+class TransformParams:
+    encode_type: str = "label"
+    columns: List[str] = field(default_factory=list)
+    numeric_cols: List[str] = field(default_factory=list)
+    categorical_cols: List[str] = field(default_factory=list)
+    fill_values: Dict[str, object] = field(default_factory=dict)
+    categories: Dict[str, List[str]] = field(default_factory=dict)
+    scale_mean: Dict[str, float] = field(default_factory=dict)
+    scale_std: Dict[str, float] = field(default_factory=dict)
+
+
+def _to_builtin(value):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def save_transform_params(params: TransformParams, path: Union[str, Path]) -> Path:
+    """حفظ معاملات التحويل في ملف JSON لإعادة استخدامها مع الدفعات الجديدة."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = asdict(params)
+    data["fill_values"] = {k: _to_builtin(v) for k, v in params.fill_values.items()}
+    data["categories"] = {k: [_to_builtin(c) for c in v] for k, v in params.categories.items()}
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def load_transform_params(path: Union[str, Path]) -> Optional[TransformParams]:
+    """تحميل معاملات التحويل المحفوظة، أو None إذا لم يوجد الملف."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return TransformParams(**json.loads(path.read_text(encoding="utf-8")))
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _mode_from_counts(counts: pd.Series):
+    """نفس سلوك Series.mode()[0]: أعلى تكرار، ومع التعادل أصغر قيمة."""
+    top = counts[counts == counts.max()]
+    return sorted(top.index, key=str)[0]
+
+
+def _moments_from_counts(values: np.ndarray, counts: np.ndarray):
+    n = counts.sum()
+    mean = float((values * counts).sum() / n)
+    var = float((counts * (values - mean) ** 2).sum() / n)
+    return mean, var
+
+
+def fit_transform_params(chunks: Iterable[pd.DataFrame], encode_type: str = "label",
+                         random_state: int = 42) -> TransformParams:
+    """
+    المرور الأول على الدفعات لجمع معاملات التحويل.
+    """
+    rng = np.random.default_rng(random_state)
+    params = TransformParams(encode_type=encode_type)
+    n_rows = 0
+    sums: Dict[str, float] = {}
+    sumsq: Dict[str, float] = {}
+    missing: Dict[str, int] = {}
+    samples: Dict[str, np.ndarray] = {}
+    value_counts: Dict[str, pd.Series] = {}
+    other_counts: Dict[str, pd.Series] = {}
+
+    for chunk in chunks:
+        chunk = unify_column_names(chunk)
+        if not params.columns:
+            params.columns = chunk.columns.tolist()
+            params.numeric_cols = [c for c in chunk.columns if _is_numeric(chunk[c])]
+            params.categorical_cols = chunk.select_dtypes(include=["object", "category"]).columns.tolist()
+        # كما في apply_transform_params: أعمدة الدفعة الأولى فقط، والغائب منها في الدفعة مفقود
+        chunk = chunk.reindex(columns=params.columns)
+        n_rows += len(chunk)
+
+        for col in params.numeric_cols:
+            values = pd.to_numeric(chunk[col], errors="coerce")
+            valid = values.dropna().to_numpy(dtype=float)
+            sums[col] = sums.get(col, 0.0) + valid.sum()
+            sumsq[col] = sumsq.get(col, 0.0) + (valid ** 2).sum()
+            missing[col] = missing.get(col, 0) + int(values.isnull().sum())
+            merged = np.concatenate([samples.get(col, np.empty(0)), valid])
+            if len(merged) > MEDIAN_SAMPLE_SIZE:
+                merged = rng.choice(merged, size=MEDIAN_SAMPLE_SIZE, replace=False)
+            samples[col] = merged
+
+        for col in chunk.columns:
+            if col in params.numeric_cols:
+                continue
+            target = value_counts if col in params.categorical_cols else other_counts
+            counts = chunk[col].value_counts(dropna=True)
+            target[col] = counts if col not in target else target[col].add(counts, fill_value=0)
+            missing[col] = missing.get(col, 0) + int(chunk[col].isnull().sum())
+
+    if n_rows == 0:
+        return params
+
+    # قيم الملء تُحفظ لكل عمود وليس للأعمدة المفقودة في الدفعات الأولى فقط:
+    # الدفعات اللاحقة (append_batch) قد تحمل مفقودًا في أعمدة كانت مكتملة
+    for col in params.numeric_cols:
+        total, total_sq, n_valid = sums[col], sumsq[col], n_rows - missing[col]
+        if len(samples[col]):
+            params.fill_values[col] = float(np.median(samples[col]))
+        if missing[col] and len(samples[col]):
+            # القيم المملوءة بالوسيط تدخل في إحصاءات الموازنة كما في المسار الكامل
+            median = params.fill_values[col]
+            total += missing[col] * median
+            total_sq += missing[col] * median ** 2
+            n_valid = n_rows
+        if n_valid == 0:
+            continue
+        mean = total / n_valid
+        params.scale_mean[col] = mean
+        params.scale_std[col] = float(np.sqrt(max(total_sq / n_valid - mean ** 2, 0.0)))
+
+    for col, counts in {**value_counts, **other_counts}.items():
+        params.fill_values[col] = _mode_from_counts(counts) if not counts.empty else "missing"
+        if missing.get(col):
+            counts = counts.add(pd.Series({params.fill_values[col]: missing[col]}), fill_value=0)
+        if col not in params.categorical_cols:
+            continue
+        str_counts = counts.groupby(counts.index.map(str)).sum().sort_index()
+        params.categories[col] = str_counts.index.tolist()
+        if encode_type == "label":
+            codes = np.arange(len(str_counts), dtype=float)
+            mean, var = _moments_from_counts(codes, str_counts.to_numpy(dtype=float))
+            params.scale_mean[col] = mean
+            params.scale_std[col] = float(np.sqrt(var))
+
+    logger.info(f"✅ تم حساب معاملات التحويل من {n_rows} صف و {len(params.columns)} عمود")
+    return params
+
+
+def apply_transform_params(df: pd.DataFrame, params: TransformParams) -> pd.DataFrame:
+    """
+    تطبيق معاملات التحويل المحسوبة مسبقًا على دفعة واحدة (دون حذف التكرار).
+    """
+    df = unify_column_names(df)
+    df = df.reindex(columns=params.columns)
+
+    for col in params.numeric_cols:
+        if not _is_numeric(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col, value in params.fill_values.items():
+        if df[col].isnull().any():
+            if col in params.categorical_cols:
+                df[col] = df[col].astype(object)
+            elif pd.api.types.is_datetime64_any_dtype(df[col]):
+                value = pd.Timestamp(value)
+            df[col] = df[col].fillna(value)
+
+    if params.encode_type == "label":
+        for col in params.categorical_cols:
+            values = df[col].apply(lambda x: str(x) if isinstance(x, (list, dict)) else x).astype(str)
+            df[col] = pd.Categorical(values, categories=params.categories[col]).codes
+    elif params.encode_type == "onehot":
+        one_hot_cols = [c for c in params.categorical_cols if len(params.categories[c]) <= ONEHOT_MAX_UNIQUE]
+        for col in one_hot_cols:
+            df[col] = pd.Categorical(df[col].astype(str), categories=params.categories[col])
+        if one_hot_cols:
+            df = pd.get_dummies(df, columns=one_hot_cols, drop_first=True)
+
+    for col, mean in params.scale_mean.items():
+        if col not in df.columns:
+            continue
+        std = params.scale_std.get(col) or 1.0
+        df[col] = (df[col].astype(float) - mean) / std
+
+    return df
+
+
+def _in_sorted(history: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+    if not len(history):
+        return np.zeros(len(hashes), dtype=bool)
+    pos = np.searchsorted(history, hashes)
+    pos[pos == len(history)] = 0
+    return np.asarray(history[pos]) == hashes
+
+
+class _HashRuns:
+    """
+    بصمات الصفوف المكتوبة بذاكرة محدودة: مصفوفة مرتبة حتى buffer_size بصمة،
+    ثم تُحفظ كملف .npy مرتب في spill_dir (كأجزاء _hashes في incremental).
+    """
+
+    def __init__(self, spill_dir: Path, buffer_size: int):
+        self.spill_dir = spill_dir
+        self.buffer_size = buffer_size
+        self.buffer = np.empty(0, dtype=np.uint64)
+        self.runs: List[Path] = []
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        seen = _in_sorted(self.buffer, hashes)
+        for run in self.runs:
+            seen |= _in_sorted(np.load(run, mmap_mode="r"), hashes)
+        return seen
+
+    def add(self, hashes: np.ndarray) -> None:
+        self.buffer = np.union1d(self.buffer, hashes)
+        if len(self.buffer) >= self.buffer_size:
+            run = self.spill_dir / f"run-{len(self.runs):05d}.npy"
+            np.save(run, self.buffer)
+            self.runs.append(run)
+            self.buffer = np.empty(0, dtype=np.uint64)
+
+
+@log_step
+def stream_transform_file(
+    filepath: Union[str, Path],
+    output_path: Union[str, Path],
+    chunk_reader: Callable[[], Iterable[pd.DataFrame]],
+    encode_type: str = "label",
+    params: Optional[TransformParams] = None,
+) -> Optional[Path]:
+    """
+    تحويل ملف كبير على دفعات وكتابة الناتج إلى CSV دفعة بدفعة.
+
+    chunk_reader: دالة تعيد مولّدًا جديدًا للدفعات في كل استدعاء (يُستدعى مرتين).
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    params = params or fit_transform_params(chunk_reader(), encode_type=encode_type)
+    if not params.columns:
+        logger.warning(f"⚠️ الملف {Path(filepath).name} لا يحتوي على بيانات للتحويل.")
+        return None
+
+    written = 0
+    header = True
+    dropped: Set[str] = set()
+    with tempfile.TemporaryDirectory(prefix=".dedup-", dir=output_path.parent) as spill_dir:
+        seen = _HashRuns(Path(spill_dir), DEDUP_BUFFER_SIZE)
+        for chunk in chunk_reader():
+            extra = set(normalize_column_names(chunk.columns).difference(params.columns)) - dropped
+            if extra:
+                logger.warning(f"⚠️ أعمدة غير موجودة في الدفعة الأولى وسيتم حذفها من الناتج: {sorted(extra)}")
+                dropped |= extra
+            out = apply_transform_params(chunk, params)
+            hashes = pd.util.hash_pandas_object(out, index=False).to_numpy()
+            keep = ~pd.Series(hashes).duplicated().to_numpy() & ~seen.contains(hashes)
+            seen.add(hashes[keep])
+            out = out[keep]
+            out.to_csv(output_path, mode="w" if header else "a", header=header, index=False, encoding="utf-8")
+            header = False
+            written += len(out)
+
+    logger.info(f"✅ تم تحويل {Path(filepath).name} على دفعات: {written} صف → {output_path}")
+    return output_path
@@ -0,0 +1,190 @@
+"""
+etl/engines.py
+
+محركات تنفيذ مرحلة التحويل (توحيد الأسماء ← ملء المفقود ← الترميز ← الموازنة ← حذف التكرار):
+    - pandas: المسار الأصلي في etl.transform (الافتراضي)
+    - polars: نفس الخطوات بتعبيرات Polars متعددة الخيوط، مع التحويل إلى pandas عند الحدود فقط
+
+الاستخدام:
+    from data_intelligence_system.etl.engines import get_transform_engine
+
+    engine = get_transform_engine("polars")   # يعود إلى pandas إذا لم تكن polars مثبتة
+    df_out = engine.transform(df, encode_type="label")
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Type
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.etl import transform as transform_ops
+
+try:
+    import polars as pl  # type: ignore
+except ImportError:
+    pl = None
+
+logger = logging.getLogger(__name__)
+
+ROW_INDEX_COL = "__row_index__"
+ONEHOT_MAX_UNIQUE = 1000
+
+
+class TransformEngine(ABC):
+    """الواجهة المشتركة لمحركات التحويل: DataFrame من pandas للدخول والخروج."""
+
+    name = "base"
+
+    @abstractmethod
+    def transform(self, df: pd.DataFrame, encode_type: str = "label", lazy: bool = False) -> pd.DataFrame:
+        raise NotImplementedError
+
+
+class PandasTransformEngine(TransformEngine):
+    name = "pandas"
+
+    def transform(self, df: pd.DataFrame, encode_type: str = "label", lazy: bool = False) -> pd.DataFrame:
+        return transform_ops.transform_frame(df, encode_type=encode_type, lazy=lazy)
+
+
+class PolarsTransformEngine(TransformEngine):
+    """
+    تنفيذ Polars مطابق لمخرجات pandas: نفس قيم الملء (الوسيط/المنوال مع أصغر قيمة عند التعادل)،
+    نفس رموز LabelEncoder (ترتيب النصوص)، نفس أعمدة get_dummies(drop_first=True)،
+    وموازنة StandardScaler (انحراف ddof=0) مع الحفاظ على فهرس الصفوف الأصلي.
+    """
+
+    name = "polars"
+
+    def transform(self, df: pd.DataFrame, encode_type: str = "label", lazy: bool = False) -> pd.DataFrame:
+        if pl is None:
+            raise ImportError("polars غير مثبتة. ثبّتها عبر: pip install polars")
+        if df is None or df.empty:
+            return df
+
+        try:
+            return self._transform(df, encode_type)
+        except Exception as e:
+            logger.warning(f"⚠️ فشل محرك Polars ({e})، سيتم استخدام pandas لهذا الملف.")
+            return PandasTransformEngine().transform(df, encode_type=encode_type, lazy=lazy)
+
+    def _transform(self, df: pd.DataFrame, encode_type: str) -> pd.DataFrame:
+        source = df.copy(deep=False)
+        source.columns = (
+            source.columns.str.strip()
+                          .str.lower()
+                          .str.replace(r'[^\w]+', '_', regex=True)
+                          .str.strip('_')
+        )
+        original_index = source.index
+        median_cols = [c for c in source.columns if source[c].dtype in ['float64', 'int64']]
+        cat_cols = source.select_dtypes(include=['object', 'category']).columns.tolist()
+        categorical_order = {c: list(source[c].cat.categories) for c in cat_cols
+                             if isinstance(source[c].dtype, pd.CategoricalDtype)}
+
+        frame = pl.from_pandas(source.reset_index(drop=True), nan_to_null=True)
+
+        # 1. ملء المفقود: كل الأعمدة في تمريرة واحدة
+        null_counts = frame.null_count().row(0, named=True)
+        fill_exprs = []
+        for col in frame.columns:
+            if not null_counts[col]:
+                continue
+            if col in median_cols:
+                fill_exprs.append(pl.col(col).fill_null(pl.col(col).median()))
+            else:
+                fill_exprs.append(pl.col(col).fill_null(pl.lit(self._mode(frame[col]))))
+        if fill_exprs:
+            frame = frame.with_columns(fill_exprs)
+
+        # 2. الترميز
+        frame = self._encode(frame, cat_cols, categorical_order, encode_type)
+
+        # 3. الموازنة (StandardScaler: الانحراف بدون تصحيح، والصفر يُستبدل بـ 1)
+        num_cols = [c for c, dtype in frame.schema.items() if dtype.is_numeric()]
+        if num_cols:
+            stats = frame.select(
+                [pl.col(c).cast(pl.Float64).mean().alias(f"{c}__mean") for c in num_cols]
+                + [pl.col(c).cast(pl.Float64).std(ddof=0).alias(f"{c}__std") for c in num_cols]
+            ).row(0, named=True)
+            scale_exprs = []
+            for col in num_cols:
+                std = stats[f"{col}__std"]
+                std = 1.0 if std is None or std < 10 * np.finfo(float).eps else std
+                mean = stats[f"{col}__mean"]
+                scale_exprs.append(((pl.col(col).cast(pl.Float64) - mean) / std).alias(col))
+            frame = frame.with_columns(scale_exprs)
+
+        # 4. حذف التكرار مع الاحتفاظ بموقع الصف الأصلي
+        value_cols = frame.columns
+        frame = (frame.with_row_index(ROW_INDEX_COL)
+                      .unique(subset=value_cols, keep="first", maintain_order=True))
+
+        positions = frame[ROW_INDEX_COL].to_numpy()
+        result = frame.drop(ROW_INDEX_COL).to_pandas()
+        result.index = original_index[positions]
+        logger.info(f"✅ تحويل Polars: {df.shape} → {result.shape}")
+        return result
+
+    @staticmethod
+    def _mode(series: "pl.Series"):
+        """نفس سلوك Series.mode()[0] في pandas: أعلى تكرار ومع التعادل أصغر قيمة."""
+        counts = series.drop_nulls().value_counts()
+        if counts.is_empty():
+            return "missing"
+        value_col, count_col = counts.columns
+        top = counts.filter(pl.col(count_col) == pl.col(count_col).max())
+        return top[value_col].sort()[0]
+
+    @staticmethod
+    def _encode(frame: "pl.DataFrame", cat_cols: List[str], categorical_order: Dict[str, list],
+                encode_type: str) -> "pl.DataFrame":
+        if not cat_cols:
+            return frame
+
+        if encode_type == "label":
+            return frame.with_columns([
+                (pl.col(c).cast(pl.Utf8).rank("dense").cast(pl.Int64) - 1).alias(c) for c in cat_cols
+            ])
+
+        if encode_type != "onehot":
+            logger.warning(f"⚠️ نوع الترميز غير معروف: {encode_type}")
+            return frame
+
+        dummy_exprs, one_hot_cols = [], []
+        for col in cat_cols:
+            values = frame[col].drop_nulls().unique()
+            if len(values) > ONEHOT_MAX_UNIQUE:
+                logger.warning(f"⛔ تجاهل العمود '{col}' لاحتوائه على {len(values)} قيمة فريدة (تجاوز الحد 1000)")
+                continue
+            categories = categorical_order.get(col) or sorted(values.to_list())
+            one_hot_cols.append(col)
+            dummy_exprs.extend(
+                (pl.col(col).cast(pl.Utf8) == str(cat)).fill_null(False).alias(f"{col}_{cat}")
+                for cat in categories[1:]
+            )
+        if not one_hot_cols:
+            return frame
+        kept = [c for c in frame.columns if c not in one_hot_cols]
+        return frame.select([pl.col(c) for c in kept] + dummy_exprs)
+
+
+TRANSFORM_ENGINES: Dict[str, Type[TransformEngine]] = {
+    "pandas": PandasTransformEngine,
+    "polars": PolarsTransformEngine,
+}
+
+
+def get_transform_engine(name: str = "pandas") -> TransformEngine:
+    """
+    إرجاع محرك التحويل بالاسم. إذا طُلب polars وهي غير مثبتة يُستخدم pandas مع تحذير.
+    """
+    name = (name or "pandas").lower()
+    if name not in TRANSFORM_ENGINES:
+        raise ValueError(f"❌ محرك تحويل غير مدعوم: {name}. المتاح: {list(TRANSFORM_ENGINES)}")
+    if name == "polars" and pl is None:
+        logger.warning("⚠️ polars غير مثبتة، سيتم استخدام محرك pandas.")
+        name = "pandas"
+    return TRANSFORM_ENGINES[name]()
@@ -1,7 +1,7 @@
 from pathlib import Path
 import pandas as pd
 import logging
-from typing import List, Tuple, Union, Dict, Optional
+from typing import List, Tuple, Union, Dict, Optional, Set
 
 # ✅ استيراد مطلق من جذر المشروع
 from data_intelligence_system.etl.etl_utils import log_step, get_all_files, detect_file_type
@@ -29,10 +29,11 @@ def try_validate(filepath: Path, validator: Optional[callable]):
             logger.warning(f"⚠️ فشل التحقق من بنية الملف {filepath.name}: {e}")
 
 
-@log_step
-def extract_all_data(validate: bool = True) -> List[Tuple[str, pd.DataFrame]]:
-    datasets = []
-
+def list_raw_files() -> List[Path]:
+    """
+    قائمة الملفات المدعومة في مجلدات البيانات الخام (RAW_DATA_PATHS).
+    """
+    files = []
     for data_path in RAW_DATA_PATHS:
         if not data_path.exists():
             logger.warning(f"⚠️ مجلد البيانات غير موجود: {data_path}")
@@ -47,22 +48,35 @@ def extract_all_data(validate: bool = True) -> List[Tuple[str, pd.DataFrame]]:
             if not is_valid_file(file_path):
                 logger.info(f"⏩ تم تجاهل ملف غير مدعوم أو غير موجود: {file_path.name}")
                 continue
+            files.append(file_path)
+    return files
+
+
+@log_step
+def extract_all_data(validate: bool = True, exclude: Optional[Set[Path]] = None) -> List[Tuple[str, pd.DataFrame]]:
+    datasets = []
+    exclude = {Path(p).resolve() for p in exclude} if exclude else set()
+
+    for file_path in list_raw_files():
+        if file_path.resolve() in exclude:
+            logger.info(f"⏩ تم استثناء الملف من التحميل الكامل: {file_path.name}")
+            continue
 
-            try:
-                if validate:
-                    try_validate(file_path, validate_file_structure)
+        try:
+            if validate:
+                try_validate(file_path, validate_file_structure)
 
-                df = read_file(str(file_path))
-                if not isinstance(df, pd.DataFrame):
-                    logger.warning(f"⚠️ لم يتم استخراج DataFrame صالح من: {file_path.name}")
-                    continue
+            df = read_file(str(file_path))
+            if not isinstance(df, pd.DataFrame):
+                logger.warning(f"⚠️ لم يتم استخراج DataFrame صالح من: {file_path.name}")
+                continue
 
-                missing = int(df.isnull().sum().sum())
-                logger.info(f"✅ {file_path.name} → شكل: {df.shape}, أعمدة: {len(df.columns)}, مفقودات: {missing}")
-                datasets.append((file_path.name, df))
+            missing = int(df.isnull().sum().sum())
+            logger.info(f"✅ {file_path.name} → شكل: {df.shape}, أعمدة: {len(df.columns)}, مفقودات: {missing}")
+            datasets.append((file_path.name, df))
 
-            except Exception as e:
-                logger.exception(f"❌ خطأ أثناء استخراج {file_path.name}: {e}")
+        except Exception as e:
+            logger.exception(f"❌ خطأ أثناء استخراج {file_path.name}: {e}")
 
     return datasets
 
@@ -0,0 +1,326 @@
+"""
+etl/incremental.py
+
+وضع الإلحاق (append) للبيانات المتنامية: تحويل الصفوف الجديدة فقط بمعاملات التحويل المحفوظة
+(قيم الملء، الفئات، المتوسط والانحراف) وإلحاقها كأجزاء Parquet جديدة، دون إعادة معالجة التاريخ كاملًا.
+
+بنية المجلد processed/cleaned_<name>/:
+    part-00000.parquet, part-00001.parquet, ...   أجزاء البيانات المعالجة
+    _hashes/part-00000.npy, ...                   بصمات صفوف كل جزء (لحذف التكرار عبر الدفعات)
+    _transform_params.json                         معاملات التحويل المثبتة من الدفعة الأولى
+    _stats.json / _stats_reservoir.npz             الإحصاءات الوصفية التراكمية
+    _rollups/<عمود زمني>_<مستوى>.parquet           التجميعات الزمنية التراكمية (ساعة/يوم/أسبوع/شهر)
+    .append.lock                                   قفل الإلحاق (دفعات متزامنة تُلحق بالتتابع)
+
+الاستخدام:
+    from data_intelligence_system.etl.incremental import append_batch, load_cached_stats
+
+    append_batch(new_rows_df, name="sales")
+    stats = load_cached_stats("sales")
+    daily = load_cached_rollup("sales", "order_date", "day")
+"""
+
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.analysis.rollups import load_rollup, update_rollups
+from data_intelligence_system.config.env_config import env_namespace
+from data_intelligence_system.config.performance_config import (
+    STATS_RESERVOIR_SIZE,
+    STATS_MAX_CATEGORIES,
+)
+from data_intelligence_system.etl.chunked_transform import (
+    apply_transform_params,
+    fit_transform_params,
+    load_transform_params,
+    save_transform_params,
+)
+from data_intelligence_system.etl.transform import unify_column_names
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PROCESSED_DIR = env_namespace.PROCESSED_DATA_PATH
+PARAMS_FILE = "_transform_params.json"
+STATS_FILE = "_stats.json"
+RESERVOIR_FILE = "_stats_reservoir.npz"
+HASHES_DIR = "_hashes"
+PART_PATTERN = "part-*.parquet"
+QUANTILES = {"25%": 0.25, "50%": 0.5, "75%": 0.75}
+LOCK_FILE = ".append.lock"
+
+
+def get_dataset_dir(name: str, output_dir: Union[str, Path] = PROCESSED_DIR) -> Path:
+    return Path(output_dir) / f"cleaned_{name}"
+
+
+def list_parts(dataset_dir: Path) -> List[Path]:
+    return sorted(dataset_dir.glob(PART_PATTERN))
+
+
+_APPEND_LOCKS: Dict[Path, threading.Lock] = {}
+_APPEND_LOCKS_GUARD = threading.Lock()
+
+
+@contextmanager
+def _append_lock(dataset_dir: Path):
+    """
+    قفل الإلحاق لمجموعة بيانات بين الخيوط (خيوط المراقب) وبين العمليات (fcntl.flock حيث يتوفر):
+    رقم الجزء التالي وبصمات التاريخ والإحصاءات التراكمية تُقرأ وتُكتب كعملية واحدة.
+    """
+    with _APPEND_LOCKS_GUARD:
+        lock = _APPEND_LOCKS.setdefault(dataset_dir.resolve(), threading.Lock())
+    with lock, open(dataset_dir / LOCK_FILE, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+# ===================== الإحصاءات التراكمية =====================
+
+@dataclass
+class IncrementalStats:
+    """
+    إحصاءات وصفية قابلة للتحديث من الدفعات الجديدة فقط:
+    العدد والمتوسط و M2 (دمج Chan/Welford)، الحد الأدنى/الأعلى، المفقود،
+    تكرارات القيم الفئوية، وعينة خزان (reservoir) لتقدير الربيعيات.
+    """
+    rows: int = 0
+    columns: List[str] = field(default_factory=list)
+    missing_cells: int = 0
+    dropped_duplicates: int = 0
+    numeric: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    categorical: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    reservoirs: Dict[str, np.ndarray] = field(default_factory=dict)
+    seen: Dict[str, int] = field(default_factory=dict)
+
+    def update(self, df: pd.DataFrame, dropped_duplicates: int = 0, random_state: int = 42):
+        rng = np.random.default_rng(random_state + self.rows)
+        self.rows += len(df)
+        self.columns = self.columns or df.columns.tolist()
+        self.missing_cells += int(df.isnull().sum().sum())
+        self.dropped_duplicates += dropped_duplicates
+
+        for col in df.select_dtypes(include=[np.number]).columns:
+            values = df[col].to_numpy(dtype=float)
+            valid = values[~np.isnan(values)]
+            state = self.numeric.setdefault(col, {"count": 0, "mean": 0.0, "m2": 0.0,
+                                                  "min": None, "max": None, "missing": 0})
+            state["missing"] += int(len(values) - len(valid))
+            if len(valid):
+                self._merge_moments(state, valid)
+                self._update_reservoir(col, valid, rng)
+
+        for col in df.select_dtypes(include=["object", "category"]).columns:
+            counts = df[col].astype(str).value_counts(dropna=False)
+            merged = pd.Series(self.categorical.get(col, {}), dtype="int64").add(counts, fill_value=0)
+            merged = merged.sort_values(ascending=False).head(STATS_MAX_CATEGORIES)
+            self.categorical[col] = {str(k): int(v) for k, v in merged.items()}
+
+    @staticmethod
+    def _merge_moments(state: Dict[str, float], valid: np.ndarray):
+        n_a, n_b = state["count"], len(valid)
+        mean_b = float(valid.mean())
+        m2_b = float(((valid - mean_b) ** 2).sum())
+        n = n_a + n_b
+        delta = mean_b - state["mean"]
+        state["mean"] += delta * n_b / n
+        state["m2"] += m2_b + delta ** 2 * n_a * n_b / n
+        state["count"] = n
+        state["min"] = float(valid.min()) if state["min"] is None else min(state["min"], float(valid.min()))
+        state["max"] = float(valid.max()) if state["max"] is None else max(state["max"], float(valid.max()))
+
+    def _update_reservoir(self, col: str, valid: np.ndarray, rng: np.random.Generator):
+        """Algorithm R موجّه: كل قيمة جديدة تحل محل عنصر عشوائي باحتمال k/n."""
+        reservoir = self.reservoirs.get(col, np.empty(0))
+        seen = self.seen.get(col, 0)
+        room = max(0, STATS_RESERVOIR_SIZE - len(reservoir))
+        reservoir = np.concatenate([reservoir, valid[:room]])
+        rest = valid[room:]
+        if len(rest):
+            positions = rng.integers(0, seen + room + np.arange(1, len(rest) + 1))
+            keep = positions < STATS_RESERVOIR_SIZE
+            reservoir[positions[keep]] = rest[keep]
+        self.reservoirs[col] = reservoir
+        self.seen[col] = seen + len(valid)
+
+    # ---- بنفس أشكال generate_descriptive_stats ----
+    def general_info(self) -> Dict[str, Union[int, float]]:
+        total_cells = self.rows * len(self.columns)
+        return {
+            "Number of Rows": self.rows,
+            "Number of Columns": len(self.columns),
+            "Missing Values": self.missing_cells,
+            "Missing %": round((self.missing_cells / total_cells) * 100, 2) if total_cells > 0 else 0.0,
+            "Duplicated Rows": 0,
+        }
+
+    def numeric_summary(self) -> Dict[str, Dict[str, Any]]:
+        summary = {}
+        for col, state in self.numeric.items():
+            n = state["count"]
+            reservoir = self.reservoirs.get(col, np.empty(0))
+            row = {
+                "count": float(n),
+                "mean": state["mean"] if n else np.nan,
+                "std": float(np.sqrt(state["m2"] / (n - 1))) if n > 1 else np.nan,
+                "min": state["min"] if n else np.nan,
+            }
+            for label, q in QUANTILES.items():
+                row[label] = float(np.quantile(reservoir, q)) if len(reservoir) else np.nan
+            row["max"] = state["max"] if n else np.nan
+            row["missing_values"] = state["missing"]
+            row["missing_%"] = round(state["missing"] / self.rows * 100, 2) if self.rows else 0.0
+            summary[col] = row
+        return summary
+
+    def categorical_summary(self, top_n: int = 10) -> Dict[str, pd.Series]:
+        return {col: pd.Series(counts, name="count").sort_values(ascending=False).head(top_n)
+                for col, counts in self.categorical.items()}
+
+    def to_summary(self) -> Dict[str, Any]:
+        return {
+            "general_info": self.general_info(),
+            "numeric_summary": self.numeric_summary(),
+            "categorical_summary": self.categorical_summary(),
+            "datetime_summary": {},
+            "execution_mode": "incremental",
+        }
+
+    # ---- الحفظ والتحميل ----
+    def save(self, dataset_dir: Path):
+        state = {k: getattr(self, k) for k in ("rows", "columns", "missing_cells", "dropped_duplicates",
+                                               "numeric", "categorical", "seen")}
+        (dataset_dir / STATS_FILE).write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+        np.savez(dataset_dir / RESERVOIR_FILE, **self.reservoirs)
+
+    @classmethod
+    def load(cls, dataset_dir: Path) -> Optional["IncrementalStats"]:
+        stats_path = dataset_dir / STATS_FILE
+        if not stats_path.exists():
+            return None
+        stats = cls(**json.loads(stats_path.read_text(encoding="utf-8")))
+        reservoir_path = dataset_dir / RESERVOIR_FILE
+        if reservoir_path.exists():
+            with np.load(reservoir_path) as data:
+                stats.reservoirs = {k: data[k] for k in data.files}
+        return stats
+
+
+# ===================== الإلحاق =====================
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _seen_in_history(hashes: np.ndarray, dataset_dir: Path) -> np.ndarray:
+    """هل ظهرت البصمة في أي جزء سابق؟ (بحث ثنائي على ملفات بصمات مرتبة ومحمّلة بـ mmap)."""
+    seen = np.zeros(len(hashes), dtype=bool)
+    for hash_file in sorted((dataset_dir / HASHES_DIR).glob("part-*.npy")):
+        history = np.load(hash_file, mmap_mode="r")
+        if not len(history):
+            continue
+        pos = np.searchsorted(history, hashes)
+        pos[pos == len(history)] = 0
+        seen |= np.asarray(history[pos]) == hashes
+    return seen
+
+
+def append_batch(
+    df: pd.DataFrame,
+    name: str,
+    output_dir: Union[str, Path] = PROCESSED_DIR,
+    encode_type: str = 'label',
+    dedup_history: bool = True,
+) -> Optional[Path]:
+    """
+    تحويل دفعة جديدة وإلحاقها بمجموعة البيانات المعالجة.
+
+    - المعاملات من _transform_params.json (يحفظها run_full_pipeline)، وإلا تثبتها الدفعة الأولى (fit).
+    - الدفعات التالية تُحوَّل بالمعاملات المحفوظة نفسها؛ الفئات غير المعروفة تُرمَّز -1 (label).
+    - dedup_history: حذف الصفوف المكررة مع الأجزاء السابقة وليس داخل الدفعة فقط.
+    - الإلحاقات المتزامنة لنفس مجموعة البيانات تتم بالتتابع (_append_lock).
+    تعيد مسار الجزء الجديد أو None إذا لم يبق صفوف للإلحاق.
+    """
+    if df is None or df.empty:
+        logger.warning(f"⚠️ دفعة فارغة للإلحاق بـ {name}.")
+        return None
+
+    dataset_dir = get_dataset_dir(name, output_dir)
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    with _append_lock(dataset_dir):
+        params_path = dataset_dir / PARAMS_FILE
+
+        params = load_transform_params(params_path)
+        if params is None:
+            params = fit_transform_params(iter([df]), encode_type=encode_type)
+            save_transform_params(params, params_path)
+            logger.info(f"🧷 تم تثبيت معاملات التحويل لمجموعة البيانات {name}")
+
+        out = apply_transform_params(df, params)
+        hashes = _row_hashes(out)
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        if dedup_history:
+            keep &= ~_seen_in_history(hashes, dataset_dir)
+        dropped = int((~keep).sum())
+        out, hashes = out[keep].reset_index(drop=True), hashes[keep]
+
+        stats = IncrementalStats.load(dataset_dir) or IncrementalStats()
+        if out.empty:
+            stats.dropped_duplicates += dropped
+            stats.save(dataset_dir)
+            logger.info(f"ℹ️ لا صفوف جديدة للإلحاق بـ {name} (كل الصفوف مكررة).")
+            return None
+
+        part_path = dataset_dir / f"part-{len(list_parts(dataset_dir)):05d}.parquet"
+        out.to_parquet(part_path, index=False)
+        hashes_dir = dataset_dir / HASHES_DIR
+        hashes_dir.mkdir(exist_ok=True)
+        np.save(hashes_dir / f"{part_path.stem}.npy", np.unique(hashes))
+
+        stats.update(out, dropped_duplicates=dropped)
+        stats.save(dataset_dir)
+        # التجميعات الزمنية من القيم الخام (أعمدة التواريخ النصية مُرمَّزة والأرقام مُحجَّمة في الأجزاء)
+        update_rollups(unify_column_names(df[keep]), dataset_dir)
+        logger.info(f"✅ تم إلحاق {len(out)} صف بـ {name} ({part_path.name})، حُذف {dropped} صف مكرر")
+        return part_path
+
+
+def load_appended_dataset(name: str, output_dir: Union[str, Path] = PROCESSED_DIR) -> pd.DataFrame:
+    """قراءة كل أجزاء مجموعة البيانات الملحقة كـ DataFrame واحد (المجلد قابل للقراءة أيضًا بـ pd.read_parquet)."""
+    parts = list_parts(get_dataset_dir(name, output_dir))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+
+
+def load_cached_stats(name: str, output_dir: Union[str, Path] = PROCESSED_DIR) -> Optional[Dict[str, Any]]:
+    """الإحصاءات الوصفية التراكمية بنفس شكل generate_descriptive_stats، أو None."""
+    stats = IncrementalStats.load(get_dataset_dir(name, output_dir))
+    return stats.to_summary() if stats else None
+
+
+def load_cached_rollup(name: str, time_col: str, granularity: str = "day",
+                       output_dir: Union[str, Path] = PROCESSED_DIR,
+                       source_fingerprint: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    التجميع الزمني التراكمي لعمود ومستوى معين (انظر analysis.rollups)، أو None.
+    source_fingerprint: فقط إذا بُني التجميع من نسخة الملف المصدر بهذه البصمة.
+    """
+    return load_rollup(get_dataset_dir(name, output_dir), time_col, granularity, source_fingerprint)
@@ -1,18 +1,28 @@
 import logging
 from pathlib import Path
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 from datetime import datetime
 import pandas as pd
 
+from data_intelligence_system.analysis.rollups import rebuild_rollups
 from data_intelligence_system.config.env_config import env_namespace
-from data_intelligence_system.etl.transform import transform_datasets
+from data_intelligence_system.etl.transform import transform_datasets, unify_column_names
 from data_intelligence_system.analysis.descriptive_stats import (
     analyze_numerical_columns,
     analyze_categorical_columns,
     analyze_datetime_columns
 )
-from data_intelligence_system.etl.extract import extract_file, extract_all_data
+from data_intelligence_system.etl.extract import extract_file, extract_all_data, list_raw_files
+from data_intelligence_system.etl.chunked_transform import (
+    TransformParams,
+    fit_transform_params,
+    save_transform_params,
+    stream_transform_file,
+)
+from data_intelligence_system.etl.incremental import PARAMS_FILE, append_batch, get_dataset_dir
 from data_intelligence_system.utils.file_manager import save_file, extract_file_name
+from data_intelligence_system.utils.memory_planner import CHUNKED, IN_MEMORY, iter_chunks, plan_execution
+from data_intelligence_system.utils.result_cache import file_fingerprint
 
 # 🛠️ إعداد نظام التسجيل
 LOG_FORMAT = "%(asctime)s — %(levelname)s — %(name)s — %(message)s"
@@ -51,11 +61,43 @@ def analyze_columns(df: pd.DataFrame, name: str):
         logger.info("   ✅ تحليل الأعمدة الزمنية مكتمل.")
 
 
+def save_dataset_params(params: TransformParams, dataset_dir: Path) -> None:
+    """
+    حفظ معاملات تحويل البيانات كاملة في مجلد مجموعة البيانات: الإلحاق اللاحق (append_batch)
+    يستخدمها بدل تثبيت معاملات جديدة من أول دفعة ملحقة.
+    """
+    if params.columns:
+        save_transform_params(params, dataset_dir / PARAMS_FILE)
+
+
+def run_chunked_file(filepath: Path, output_dir: Path, chunk_size: int, encode_type: str = 'label') -> Optional[Path]:
+    """
+    تحويل ملف يتجاوز ميزانية الذاكرة على دفعات وحفظه مباشرة في processed/.
+    """
+    clean_name = extract_file_name(str(filepath))
+    save_path = output_dir / f"cleaned_{clean_name}.csv"
+    dataset_dir = get_dataset_dir(clean_name, output_dir)
+    logger.info(f"🧩 تحويل {filepath.name} على دفعات بحجم {chunk_size} صف")
+    # التجميعات الزمنية من القيم الخام في تمريرة مستقلة (الأرقام مُحجَّمة والتواريخ مُرمَّزة بعد التحويل)
+    rebuild_rollups((unify_column_names(chunk) for chunk in iter_chunks(filepath, chunk_size)), dataset_dir,
+                    source_fingerprint=file_fingerprint(filepath))
+    params = fit_transform_params(iter_chunks(filepath, chunk_size), encode_type=encode_type)
+    save_dataset_params(params, dataset_dir)
+    return stream_transform_file(
+        filepath,
+        save_path,
+        chunk_reader=lambda: iter_chunks(filepath, chunk_size),
+        encode_type=encode_type,
+        params=params,
+    )
+
+
 def run_full_pipeline(
     filepath: Optional[Union[str, Path]] = None,
     output_dir: Union[str, Path] = PROCESSED_DIR,
     encode_type: str = 'label',
     scale_type: str = 'standard',
+    budget_mb: Optional[float] = None,
 ) -> bool:
     """
     🚀 تنفيذ شامل لخط أنابيب ETL:
@@ -63,25 +105,53 @@ def run_full_pipeline(
     - تحويل وتنظيف وترميز وموازنة البيانات
     - تحليل الأعمدة الرقمية، النصية والزمنية
     - حفظ البيانات النهائية في مجلد processed/
+    - إعادة بناء التجميعات الزمنية في processed/cleaned_<name>/_rollups (تقرؤها لوحة التحكم)
+    - حفظ معاملات التحويل في processed/cleaned_<name>/_transform_params.json (يستخدمها وضع الإلحاق)
+
+    الملفات التي يتجاوز حجمها المتوقع ميزانية الذاكرة (budget_mb أو الإعدادات)
+    تُحوَّل على دفعات بدل تحميلها كاملة.
     """
     output_dir = Path(output_dir)
     start_time = datetime.now()
     logger.info("🚀 بدء تنفيذ خط أنابيب ETL ...")
 
     try:
+        chunked_files = {}
+        sources: Dict[str, Path] = {}  # اسم مجموعة البيانات ← الملف الخام (بصمته تُحفظ مع التجميعات)
         if filepath:
             filepath = Path(filepath)
-            logger.info(f"📥 استخراج ملف واحد: {filepath.name}")
-            df_dict = extract_file(filepath)
-            datasets = list(df_dict.items())
+            plan = plan_execution(filepath, supported_modes=(IN_MEMORY, CHUNKED), budget_mb=budget_mb)
+            if plan.mode == CHUNKED:
+                chunked_files[filepath] = plan.chunk_size
+                datasets = []
+            else:
+                logger.info(f"📥 استخراج ملف واحد: {filepath.name}")
+                df_dict = extract_file(filepath)
+                datasets = list(df_dict.items())
+                sources = {name: filepath for name in df_dict}
         else:
             logger.info(f"📥 استخراج جميع الملفات من مجلد: {RAW_DIR}")
-            datasets = extract_all_data()
+            for raw_file in list_raw_files():
+                sources[raw_file.name] = raw_file
+                plan = plan_execution(raw_file, supported_modes=(IN_MEMORY, CHUNKED), budget_mb=budget_mb)
+                if plan.mode == CHUNKED:
+                    chunked_files[raw_file] = plan.chunk_size
+            datasets = extract_all_data(exclude=set(chunked_files))
+
+        for big_file, chunk_size in chunked_files.items():
+            run_chunked_file(big_file, output_dir, chunk_size, encode_type=encode_type)
 
-        if not datasets:
+        if not datasets and not chunked_files:
             logger.warning("⚠️ لم يتم العثور على بيانات للمعالجة.")
             return False
 
+        for name, df in datasets:
+            dataset_dir = get_dataset_dir(extract_file_name(name), output_dir)
+            source = sources.get(name)
+            rebuild_rollups([unify_column_names(df)], dataset_dir,
+                            source_fingerprint=file_fingerprint(source) if source and source.exists() else None)
+            save_dataset_params(fit_transform_params(iter([df]), encode_type=encode_type), dataset_dir)
+
         logger.info("🧹 بدء تحويل البيانات (تنظيف + ترميز + موازنة)")
         cleaned_datasets = transform_datasets(
             datasets,
@@ -110,6 +180,28 @@ def run_full_pipeline(
         return False
 
 
+def run_append_pipeline(
+    filepath: Union[str, Path],
+    dataset_name: Optional[str] = None,
+    output_dir: Union[str, Path] = PROCESSED_DIR,
+    encode_type: str = 'label',
+) -> bool:
+    """
+    وضع الإلحاق: تحويل صفوف الملف الجديد فقط بمعاملات مجموعة البيانات المحفوظة
+    وإلحاقها كجزء Parquet جديد في processed/cleaned_<dataset_name>/.
+    """
+    filepath = Path(filepath)
+    dataset_name = dataset_name or extract_file_name(filepath.name)
+    try:
+        df_dict = extract_file(filepath)
+        for name, df in df_dict.items():
+            append_batch(df, dataset_name, output_dir=output_dir, encode_type=encode_type)
+        return bool(df_dict)
+    except Exception as e:
+        logger.exception(f"❌ فشل إلحاق الملف {filepath.name}: {e}")
+        return False
+
+
 if __name__ == "__main__":
     success = run_full_pipeline(
         output_dir=PROCESSED_DIR,
@@ -1,5 +1,5 @@
 import logging
-from typing import List, Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -7,23 +7,29 @@ from sklearn.preprocessing import LabelEncoder
 
 from data_intelligence_system.data.processed.fill_missing import fill_missing
 from data_intelligence_system.data.processed.scale_numericals import scale_numericals
+from data_intelligence_system.config.performance_config import TRANSFORM_ENGINE
 from data_intelligence_system.etl.etl_utils import log_step  # استيراد مطلق من جذر المشروع
 
 logger = logging.getLogger(__name__)
 
 
+def normalize_column_names(columns: pd.Index) -> pd.Index:
+    """أسماء الأعمدة بعد التوحيد (دون نسخ البيانات)."""
+    return (
+        columns.str.strip()
+               .str.lower()
+               .str.replace(r'[^\w]+', '_', regex=True)
+               .str.strip('_')
+    )
+
+
 def unify_column_names(df: pd.DataFrame) -> pd.DataFrame:
     if df is None or df.empty:
         logger.warning("⚠️ DataFrame فارغ أو None في unify_column_names.")
         return df
 
     df = df.copy()
-    df.columns = (
-        df.columns.str.strip()
-                  .str.lower()
-                  .str.replace(r'[^\w]+', '_', regex=True)
-                  .str.strip('_')
-    )
+    df.columns = normalize_column_names(df.columns)
     logger.info(f"✅ توحيد أسماء الأعمدة: {df.columns.tolist()}")
     return df
 
@@ -89,31 +95,54 @@ def remove_duplicates(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def transform_frame(df: pd.DataFrame, encode_type: str = 'label', lazy: bool = False) -> pd.DataFrame:
+    """
+    خطوات التحويل بمحرك pandas على DataFrame واحد.
+    lazy: تنفيذ الخطوات عبر TransformPlan المحسّنة (نفس الناتج، مع حذف التكرار قبل الترميز والموازنة).
+    """
+    if lazy:
+        from data_intelligence_system.etl.transform_plan import TransformPlan
+        return (TransformPlan(df).unify_names().fill_missing()
+                .encode(encode_type).scale().dedup().collect())
+
+    df = unify_column_names(df)
+    df = fill_missing(df)
+    df = encode_categorical_columns(df, encode_type=encode_type)
+    df = scale_numericals(df)
+    df = remove_duplicates(df)
+    return df
+
+
 @log_step
 def transform_datasets(
     datasets: List[Tuple[str, pd.DataFrame]],
     encode_type: str = 'label',
     scale_type: str = 'standard',
+    lazy: bool = False,
+    engine: Optional[str] = None,
 ) -> List[Tuple[str, pd.DataFrame]]:
+    """
+    engine: محرك التحويل (pandas أو polars). الافتراضي من performance.transform_engine.
+    """
+    from data_intelligence_system.etl.engines import get_transform_engine
+
     transformed = []
 
     if not datasets:
         logger.warning("⚠️ قائمة datasets فارغة أو None في transform_datasets.")
         return transformed
 
+    transform_engine = get_transform_engine(engine or TRANSFORM_ENGINE)
+
     for name, df in datasets:
         if df is None or df.empty:
             logger.warning(f"⚠️ DataFrame فارغ أو None في transform_datasets للملف {name}.")
             continue
 
-        logger.info(f"🚧 بدء التحويل: {name}")
+        logger.info(f"🚧 بدء التحويل: {name} (المحرك: {transform_engine.name})")
         logger.info(f"📊 حجم البيانات الأصلية: {df.shape}")
 
-        df = unify_column_names(df)
-        df = fill_missing(df)
-        df = encode_categorical_columns(df, encode_type=encode_type)
-        df = scale_numericals(df)
-        df = remove_duplicates(df)
+        df = transform_engine.transform(df, encode_type=encode_type, lazy=lazy)
 
         logger.info(f"✅ تم الانتهاء من تحويل: {name} | الحجم النهائي: {df.shape}")
         transformed.append((name, df))
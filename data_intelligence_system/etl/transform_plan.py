@@ -0,0 +1,332 @@
+"""
+etl/transform_plan.py
+
+خطة تحويل كسولة (Lazy) فوق عمليات etl.transform: تُسجَّل الخطوات أولًا ثم تُحسَّن قبل التنفيذ.
+
+الاستخدام:
+    from data_intelligence_system.etl.transform_plan import TransformPlan
+
+    plan = (TransformPlan(df)
+            .unify_names()
+            .fill_missing()
+            .encode("onehot")
+            .scale()
+            .dedup()
+            .filter("age > 30")
+            .select(["age", "city_NY"]))
+    print(plan.explain())
+    result = plan.collect()
+
+الناتج مطابق للتنفيذ المباشر بنفس ترتيب الخطوات (collect(optimize=False))، لكن المحسّن:
+    - يحسب معاملات الملء/الترميز/الموازنة عمودًا بعمود على الصفوف نفسها التي يراها المسار المباشر؛
+    - يقيّم الفلاتر وحذف التكرار مبكرًا على الأعمدة المطلوبة فقط (دون نسخ الإطار كاملًا)؛
+    - يقلّص الأعمدة إلى ما يحتاجه الناتج النهائي؛
+    - يدمج الملء والترميز في مرور واحد لكل عمود، ولا يطبق الترميز والموازنة إلا على الصفوف الباقية.
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from data_intelligence_system.data.processed.fill_missing import fill_missing
+from data_intelligence_system.data.processed.scale_numericals import scale_numericals
+from data_intelligence_system.etl.transform import (
+    unify_column_names,
+    encode_categorical_columns,
+    remove_duplicates,
+)
+
+logger = logging.getLogger(__name__)
+
+TRANSFORM_ORDER = ("unify_names", "fill_missing", "encode", "scale")
+ONEHOT_MAX_UNIQUE = 1000
+_HASH_PRIME = np.uint64(1099511628211)
+
+Predicate = Union[str, Callable[[pd.DataFrame], pd.Series]]
+
+
+@dataclass
+class PlanStep:
+    op: str
+    params: Dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _StateColumn:
+    name: str
+    source: int
+    category: object = None
+    is_dummy: bool = False
+
+
+def _unify_names(names: Sequence[str]) -> List[str]:
+    return (
+        pd.Index(names).str.strip()
+                       .str.lower()
+                       .str.replace(r'[^\w]+', '_', regex=True)
+                       .str.strip('_')
+                       .tolist()
+    )
+
+
+def _stringify_nested(values: pd.Series) -> pd.Series:
+    return values.apply(lambda x: str(x) if isinstance(x, (list, dict)) else x)
+
+
+class TransformPlan:
+    """
+    مُنشئ خطة تحويل كسولة. كل دالة تضيف خطوة وتعيد الخطة نفسها، والتنفيذ يتم عند collect().
+    """
+
+    def __init__(self, df: pd.DataFrame, name: str = "dataset"):
+        self.df = df
+        self.name = name
+        self.steps: List[PlanStep] = []
+
+    # ------------------------------------------------------------------ builder
+    def _add_transform(self, op: str, **params) -> "TransformPlan":
+        done = [s.op for s in self.steps if s.op in TRANSFORM_ORDER]
+        if op in done:
+            raise ValueError(f"❌ الخطوة '{op}' مضافة مسبقًا إلى الخطة.")
+        if done and TRANSFORM_ORDER.index(op) < TRANSFORM_ORDER.index(done[-1]):
+            raise ValueError(f"❌ ترتيب غير مدعوم: '{op}' بعد '{done[-1]}'. الترتيب: {TRANSFORM_ORDER}")
+        self.steps.append(PlanStep(op, params))
+        return self
+
+    def unify_names(self) -> "TransformPlan":
+        return self._add_transform("unify_names")
+
+    def fill_missing(self) -> "TransformPlan":
+        return self._add_transform("fill_missing")
+
+    def encode(self, encode_type: str = "label") -> "TransformPlan":
+        if encode_type not in ("label", "onehot"):
+            raise ValueError(f"❌ نوع الترميز غير مدعوم: {encode_type}")
+        return self._add_transform("encode", encode_type=encode_type)
+
+    def scale(self) -> "TransformPlan":
+        return self._add_transform("scale")
+
+    def dedup(self) -> "TransformPlan":
+        self.steps.append(PlanStep("dedup"))
+        return self
+
+    def filter(self, predicate: Predicate, columns: Optional[Sequence[str]] = None) -> "TransformPlan":
+        """
+        إضافة فلتر صفوف. predicate إما نص pandas query أو دالة تستقبل DataFrame وتعيد قناعًا منطقيًا.
+        columns: الأعمدة التي يقرؤها الفلتر (تُستنتج تلقائيًا لنصوص query).
+        """
+        self.steps.append(PlanStep("filter", {"predicate": predicate,
+                                              "columns": list(columns) if columns else None}))
+        return self
+
+    def select(self, columns: Sequence[str]) -> "TransformPlan":
+        self.steps.append(PlanStep("select", {"columns": list(columns)}))
+        return self
+
+    # ---------------------------------------------------------------- execution
+    def collect(self, optimize: bool = True) -> pd.DataFrame:
+        if self.df is None or self.df.empty or not optimize:
+            return self._collect_eager()
+        return _PlanExecutor(self.df, self.steps).run()
+
+    def explain(self) -> str:
+        if self.df is None or self.df.empty:
+            return "eager (DataFrame فارغ)"
+        executor = _PlanExecutor(self.df, self.steps)
+        executor.run(materialize=False)
+        return "\n".join(f"{i}. {line}" for i, line in enumerate(executor.physical_plan, 1))
+
+    def _collect_eager(self) -> pd.DataFrame:
+        df = self.df.copy() if self.df is not None else self.df
+        for step in self.steps:
+            if step.op == "unify_names":
+                df = unify_column_names(df)
+            elif step.op == "fill_missing":
+                df = fill_missing(df)
+            elif step.op == "encode":
+                df = encode_categorical_columns(df, encode_type=step.params["encode_type"])
+            elif step.op == "scale":
+                df = scale_numericals(df)
+            elif step.op == "dedup":
+                df = remove_duplicates(df)
+            elif step.op == "filter":
+                df = df[_evaluate_predicate(df, step.params["predicate"])]
+            elif step.op == "select":
+                df = df[step.params["columns"]]
+        return df
+
+
+def _evaluate_predicate(df: pd.DataFrame, predicate: Predicate) -> pd.Series:
+    if isinstance(predicate, str):
+        return df.eval(predicate).astype(bool)
+    return pd.Series(predicate(df), index=df.index).astype(bool)
+
+
+class _PlanExecutor:
+    """
+    ينفذ الخطة عمودًا بعمود: قناع صفوف منطقي يمر عبر الخطوات بترتيبها المنطقي،
+    ومعاملات كل خطوة تُحسب عند الحاجة على الصفوف الحية عند موقعها في الخطة.
+    """
+
+    def __init__(self, df: pd.DataFrame, steps: List[PlanStep]):
+        self.df = df
+        self.steps = steps
+        self.masks: Dict[int, np.ndarray] = {}
+        self.fits: Dict[Tuple[int, int], object] = {}
+        self.physical_plan: List[str] = []
+
+    # ----------------------------------------------------------- column values
+    def _raw(self, source: int, rows: np.ndarray) -> pd.Series:
+        return self.df.iloc[rows, source] if rows is not None else self.df.iloc[:, source]
+
+    def _values(self, source: int, upto: int, rows: Optional[np.ndarray], for_key: bool = False) -> pd.Series:
+        """
+        قيم العمود المصدر بعد تطبيق خطوات التحويل التي تسبق الموقع upto على الصفوف rows.
+        for_key: قيم مكافئة لحذف التكرار (دون الموازنة، والترميز يُستبدل بتمثيله النصي).
+        """
+        values = self._raw(source, rows)
+        for i, step in enumerate(self.steps[:upto]):
+            if step.op == "fill_missing":
+                fill_value = self._fit(i, source)
+                if fill_value is not None and values.isnull().any():
+                    values = values.fillna(fill_value)
+            elif step.op == "encode":
+                fit = self._fit(i, source)
+                if fit is None:
+                    continue
+                values = _stringify_nested(values)
+                if fit[0] == "label":
+                    str_values = values.astype(str)
+                    if for_key:
+                        values = str_values
+                    else:
+                        values = pd.Series(np.searchsorted(fit[1], str_values.to_numpy()).astype(np.int64),
+                                           index=values.index)
+            elif step.op == "scale" and not for_key:
+                scaler = self._fit(i, source)
+                if scaler is not None:
+                    values = pd.Series(scaler.transform(values.to_numpy(dtype=float).reshape(-1, 1))[:, 0],
+                                       index=values.index)
+        return values
+
+    def _fit(self, step_index: int, source: int):
+        key = (step_index, source)
+        if key in self.fits:
+            return self.fits[key]
+
+        step = self.steps[step_index]
+        values = self._values(source, step_index, self.masks[step_index])
+        fit = None
+        if step.op == "fill_missing" and values.isnull().any():
+            if values.dtype in ['float64', 'int64']:
+                fit = values.median()
+            else:
+                mode = values.mode()
+                fit = mode[0] if not mode.empty else "missing"
+        elif step.op == "encode" and (pd.api.types.is_object_dtype(values)
+                                      or isinstance(values.dtype, pd.CategoricalDtype)):
+            values = _stringify_nested(values)
+            if step.params["encode_type"] == "label":
+                fit = ("label", np.unique(values.astype(str).to_numpy()))
+            elif values.nunique() <= ONEHOT_MAX_UNIQUE:
+                fit = ("onehot", pd.Index(values.dropna().unique()).sort_values().tolist())
+        elif step.op == "scale" and pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            fit = StandardScaler().fit(values.to_numpy(dtype=float).reshape(-1, 1))
+
+        self.fits[key] = fit
+        return fit
+
+    # ------------------------------------------------------------------ run
+    def run(self, materialize: bool = True) -> Optional[pd.DataFrame]:
+        n_rows = len(self.df)
+        mask = np.ones(n_rows, dtype=bool)
+        columns = [_StateColumn(str(name), pos) for pos, name in enumerate(self.df.columns)]
+        pushed = []
+
+        for i, step in enumerate(self.steps):
+            self.masks[i] = np.flatnonzero(mask)
+            if step.op == "unify_names":
+                names = _unify_names([c.name for c in columns])
+                columns = [_StateColumn(n, c.source, c.category, c.is_dummy) for n, c in zip(names, columns)]
+            elif step.op == "encode" and step.params["encode_type"] == "onehot":
+                columns = self._expand_onehot(i, columns)
+            elif step.op == "filter":
+                mask = self._apply_filter(i, step, columns, mask)
+                pushed.append(f"filter → {int(mask.sum())} صف")
+            elif step.op == "dedup":
+                mask = self._apply_dedup(i, columns, mask)
+                pushed.append(f"dedup (بصمات عمودية على {len({c.source for c in columns})} عمود) → {int(mask.sum())} صف")
+            elif step.op == "select":
+                by_name = {c.name: c for c in columns}
+                missing = [name for name in step.params["columns"] if name not in by_name]
+                if missing:
+                    raise KeyError(f"❌ أعمدة غير موجودة في الخطة: {missing}")
+                columns = [by_name[name] for name in step.params["columns"]]
+
+        sources = sorted({c.source for c in columns})
+        self.physical_plan = pushed + [
+            f"project {len(sources)}/{self.df.shape[1]} أعمدة مصدر على {int(mask.sum())}/{n_rows} صف",
+        ]
+        transforms = [s.op for s in self.steps if s.op in TRANSFORM_ORDER]
+        if transforms:
+            self.physical_plan.append(f"{' + '.join(transforms)} (مدمجة عمودًا بعمود على الصفوف الباقية)")
+
+        if not materialize:
+            return None
+        return self._materialize(columns, np.flatnonzero(mask))
+
+    def _expand_onehot(self, step_index: int, columns: List[_StateColumn]) -> List[_StateColumn]:
+        kept, dummies = [], []
+        for col in columns:
+            fit = None if col.is_dummy else self._fit(step_index, col.source)
+            if fit is None or fit[0] != "onehot":
+                kept.append(col)
+                continue
+            dummies.extend(_StateColumn(f"{col.name}_{cat}", col.source, cat, True) for cat in fit[1][1:])
+        return kept + dummies
+
+    def _state_frame(self, step_index: int, columns: List[_StateColumn], rows: np.ndarray) -> pd.DataFrame:
+        data, cache = {}, {}
+        for col in columns:
+            if col.source not in cache:
+                cache[col.source] = self._values(col.source, step_index, rows)
+            values = cache[col.source]
+            data[col.name] = (values == col.category) if col.is_dummy else values
+        return pd.DataFrame(data, index=self.df.index[rows])
+
+    def _apply_filter(self, step_index: int, step: PlanStep, columns: List[_StateColumn],
+                      mask: np.ndarray) -> np.ndarray:
+        predicate, wanted = step.params["predicate"], step.params["columns"]
+        if wanted is None and isinstance(predicate, str):
+            tokens = set(re.findall(r"[A-Za-z_]\w*", predicate))
+            wanted = [c.name for c in columns if c.name in tokens]
+        needed = [c for c in columns if wanted is None or c.name in wanted]
+        rows = np.flatnonzero(mask)
+        keep = _evaluate_predicate(self._state_frame(step_index, needed, rows), predicate).to_numpy()
+        mask = mask.copy()
+        mask[rows[~keep]] = False
+        return mask
+
+    def _apply_dedup(self, step_index: int, columns: List[_StateColumn], mask: np.ndarray) -> np.ndarray:
+        rows = np.flatnonzero(mask)
+        combined = np.zeros(len(rows), dtype=np.uint64)
+        for source in dict.fromkeys(c.source for c in columns):
+            values = self._values(source, step_index, rows, for_key=True).to_numpy()
+            if values.dtype.kind == "f":
+                values = values + 0.0  # -0.0 و 0.0 متساويان في drop_duplicates
+            combined = (combined ^ pd.util.hash_array(values)) * _HASH_PRIME
+        duplicated = pd.Series(combined).duplicated().to_numpy()
+        mask = mask.copy()
+        mask[rows[duplicated]] = False
+        return mask
+
+    def _materialize(self, columns: List[_StateColumn], rows: np.ndarray) -> pd.DataFrame:
+        result = self._state_frame(len(self.steps), columns, rows)
+        logger.info(f"✅ تنفيذ الخطة المحسّنة: {result.shape} من {self.df.shape}")
+        return result
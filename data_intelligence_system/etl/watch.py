@@ -0,0 +1,297 @@
+"""
+etl/watch.py
+
+وضع المراقبة: متابعة مجلدات البيانات الخام (RAW_DATA_PATHS) وتشغيل ETL تلقائيًا للملف الجديد أو المعدَّل فقط.
+
+- يستخدم watchdog (inotify على Linux) إذا كانت مثبتة، وإلا يعود إلى الفحص الدوري (polling).
+- الملف لا يُعالج إلا بعد ثبات حجمه وتاريخ تعديله لمدة debounce_seconds (تجنب الملفات قيد الكتابة).
+- المعالجة تتم على مجموعة عمال محدودة العدد، ولا يُعالج الملف نفسه مرتين في الوقت ذاته.
+- بصمات الملفات المعالجة تُحفظ في output_dir/.watch_state.json، فالملفات التي وصلت أثناء توقف
+  المراقب تُعالج عند إعادة تشغيله.
+
+الاستخدام:
+    python -m data_intelligence_system.etl.watch
+
+    from data_intelligence_system.etl.watch import RawFileWatcher
+    watcher = RawFileWatcher()
+    watcher.start()
+    ...
+    watcher.stop()
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from data_intelligence_system.config.paths_config import RAW_DATA_PATHS, SUPPORTED_EXTENSIONS
+from data_intelligence_system.config.performance_config import (
+    WATCH_DEBOUNCE_SECONDS,
+    WATCH_POLL_INTERVAL,
+    WATCH_MAX_WORKERS,
+)
+from data_intelligence_system.etl.pipeline import PROCESSED_DIR, run_full_pipeline
+
+try:
+    from watchdog.events import FileSystemEventHandler  # type: ignore
+    from watchdog.observers import Observer  # type: ignore
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger("etl.watch")
+
+STATE_FILE = ".watch_state.json"
+
+FileSignature = Tuple[int, int]
+
+
+@dataclass
+class _PendingFile:
+    signature: FileSignature
+    stable_since: float
+
+
+def _signature(path: Path) -> Optional[FileSignature]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _is_supported(path: Path) -> bool:
+    return path.suffix.lower() in SUPPORTED_EXTENSIONS and not path.name.startswith(("~$", "."))
+
+
+class _WatchdogHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "RawFileWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for attr in ("src_path", "dest_path"):
+            path = getattr(event, attr, None)
+            if path:
+                self.watcher.mark_dirty(Path(path))
+
+
+class RawFileWatcher:
+    """
+    مراقب ملفات البيانات الخام مع تأخير (debounce) ومعالجة تزايدية لكل ملف.
+
+    processor: دالة تستقبل مسار الملف وتعيد True عند النجاح (الافتراضي run_full_pipeline لملف واحد).
+    process_existing: إعادة معالجة كل الملفات الموجودة عند البدء متجاهلًا الحالة المحفوظة. بدونها
+    يُعالج فقط ما تغير منذ آخر تشغيل؛ وفي أول تشغيل (لا حالة محفوظة) تُعتبر الملفات الموجودة معالجة.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Union[str, Path]] = RAW_DATA_PATHS,
+        output_dir: Union[str, Path] = PROCESSED_DIR,
+        debounce_seconds: float = WATCH_DEBOUNCE_SECONDS,
+        poll_interval: float = WATCH_POLL_INTERVAL,
+        max_workers: int = WATCH_MAX_WORKERS,
+        encode_type: str = 'label',
+        processor: Optional[Callable[[Path], bool]] = None,
+        process_existing: bool = False,
+        use_watchdog: bool = True,
+    ):
+        self.paths = [Path(p) for p in paths]
+        self.output_dir = Path(output_dir)
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.encode_type = encode_type
+        self.processor = processor or self._run_pipeline
+        self.use_watchdog = use_watchdog and Observer is not None
+
+        self._lock = threading.Lock()
+        self._pending: Dict[Path, _PendingFile] = {}
+        self._processed: Dict[Path, FileSignature] = {}
+        self._failed: Dict[Path, FileSignature] = {}
+        self._running: Dict[Path, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="etl-watch")
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+        self.state_path = self.output_dir / STATE_FILE
+        if not process_existing:
+            state = self._load_state()
+            if state is not None:
+                self._processed = state
+            else:
+                for path in self._scan():
+                    signature = _signature(path)
+                    if signature is not None:
+                        self._processed[path] = signature
+                self._save_state()
+
+    # ------------------------------------------------------------------- state
+    def _load_state(self) -> Optional[Dict[Path, FileSignature]]:
+        try:
+            data = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ تعذر قراءة حالة المراقبة {self.state_path}: {e}")
+            return None
+        return {Path(path): tuple(signature) for path, signature in data.items()}
+
+    def _save_state(self):
+        """حفظ بصمات الملفات المعالجة بكتابة ذرية (ملف مؤقت ثم os.replace)."""
+        data = {str(path): list(signature) for path, signature in self._processed.items()}
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(f"{self.state_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    # ------------------------------------------------------------------ events
+    def _run_pipeline(self, path: Path) -> bool:
+        return run_full_pipeline(filepath=path, output_dir=self.output_dir, encode_type=self.encode_type)
+
+    def _scan(self) -> List[Path]:
+        files = []
+        for data_path in self.paths:
+            if data_path.exists():
+                files.extend(p.resolve() for p in data_path.rglob("*") if p.is_file() and _is_supported(p))
+        return files
+
+    def mark_dirty(self, path: Path):
+        """تسجيل ملف جديد أو معدَّل؛ تبدأ مهلة الثبات من آخر تغيير."""
+        path = Path(path).resolve()
+        if not _is_supported(path):
+            return
+        signature = _signature(path)
+        if signature is None:
+            return
+        with self._lock:
+            pending = self._pending.get(path)
+            if pending is None or pending.signature != signature:
+                self._pending[path] = _PendingFile(signature, time.monotonic())
+
+    def poll_once(self) -> List[Path]:
+        """
+        دورة واحدة: فحص المجلدات (في وضع polling)، ثم إرسال الملفات المستقرة إلى العمال.
+        تعيد قائمة الملفات التي أُرسلت للمعالجة.
+        """
+        if not self.use_watchdog:
+            for path in self._scan():
+                signature = _signature(path)
+                if signature not in (self._processed.get(path), self._failed.get(path)):
+                    self.mark_dirty(path)
+
+        now = time.monotonic()
+        submitted = []
+        with self._lock:
+            for path, pending in list(self._pending.items()):
+                signature = _signature(path)
+                if signature is None:
+                    del self._pending[path]
+                    continue
+                if signature != pending.signature:
+                    self._pending[path] = _PendingFile(signature, now)
+                    continue
+                if now - pending.stable_since < self.debounce_seconds or path in self._running:
+                    continue
+                del self._pending[path]
+                if signature in (self._processed.get(path), self._failed.get(path)):
+                    continue
+                self._running[path] = self._executor.submit(self._process, path, signature)
+                submitted.append(path)
+        return submitted
+
+    def _process(self, path: Path, signature: FileSignature) -> bool:
+        logger.info(f"📥 ملف جديد/معدَّل: {path.name} — بدء ETL")
+        started = time.monotonic()
+        try:
+            success = bool(self.processor(path))
+        except Exception as e:
+            logger.exception(f"❌ فشل ETL للملف {path.name}: {e}")
+            success = False
+
+        with self._lock:
+            self._running.pop(path, None)
+            if success:
+                self._processed[path] = signature
+                self._failed.pop(path, None)
+                self._save_state()
+            else:
+                # لا إعادة محاولة حتى يتغير الملف
+                self._failed[path] = signature
+        if success:
+            logger.info(f"✅ تمت معالجة {path.name} خلال {time.monotonic() - started:.2f} ثانية")
+        return success
+
+    # --------------------------------------------------------------- lifecycle
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"❌ خطأ في دورة المراقبة: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def start(self) -> "RawFileWatcher":
+        if self._thread is not None:
+            return self
+        if self.use_watchdog:
+            self._observer = Observer()
+            handler = _WatchdogHandler(self)
+            for data_path in self.paths:
+                if data_path.exists():
+                    self._observer.schedule(handler, str(data_path), recursive=True)
+            self._observer.start()
+        backend = "watchdog" if self.use_watchdog else "polling"
+        logger.info(f"👀 بدء مراقبة {[str(p) for p in self.paths]} ({backend})")
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="etl-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """انتظار انتهاء الملفات المعلقة وقيد المعالجة (مفيد للاختبارات والسكربتات)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                busy = bool(self._pending or self._running)
+            if not busy:
+                return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(min(0.05, self.poll_interval))
+
+    def stop(self, wait: bool = True):
+        self._stop_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=wait)
+        logger.info("🛑 تم إيقاف مراقبة الملفات الخام")
+
+
+def watch_raw_data(**kwargs):
+    """تشغيل وضع المراقبة حتى المقاطعة (Ctrl+C)."""
+    watcher = RawFileWatcher(**kwargs).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("⏹️ تم طلب الإيقاف")
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    watch_raw_data()
@@ -94,4 +94,9 @@ if __name__ == "__main__":
     reload_flag = os.getenv("DASHBOARD_RELOAD", "false").lower() == "true"
     open_browser = os.getenv("DASHBOARD_OPEN_BROWSER", "true").lower() == "true"
 
+    # وضع المراقبة: معالجة الملفات الخام الجديدة تلقائيًا أثناء تشغيل لوحة التحكم
+    if os.getenv("ETL_WATCH", "false").lower() == "true":
+        from data_intelligence_system.etl.watch import RawFileWatcher
+        RawFileWatcher(output_dir=processed_dir).start()
+
     run_dashboard(debug, port, reload_flag, open_browser)
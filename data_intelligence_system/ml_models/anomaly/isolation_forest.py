@@ -0,0 +1,130 @@
+import logging
+from typing import Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+from data_intelligence_system.config.paths_config import ML_MODELS_DIR
+from data_intelligence_system.config.performance_config import (
+    ISOLATION_MAX_TRAIN_ROWS,
+    ISOLATION_N_JOBS,
+    ISOLATION_SCORE_CHUNK_ROWS,
+)
+from data_intelligence_system.ml_models.base_model import BaseModel
+from data_intelligence_system.utils.parallel import resolve_workers
+from data_intelligence_system.utils.timer import Timer
+
+logger = logging.getLogger(__name__)
+
+
+class IsolationForestAnomalyModel(BaseModel):
+    """
+    Isolation Forest قابل للتوسع: تدريب على عينة عشوائية محدودة بأشجار متوازية،
+    وتقييم على دفعات، وحفظ الغابة المدربة مع أعمدتها وقيم الملء لإعادة استخدامها.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "isolation_forest",
+        contamination: float = 0.05,
+        n_estimators: int = 100,
+        max_train_rows: int = ISOLATION_MAX_TRAIN_ROWS,
+        n_jobs: int = ISOLATION_N_JOBS,
+        random_state: int = 42,
+        model_dir=ML_MODELS_DIR,
+    ):
+        """
+        Parameters
+        ----------
+        contamination : float
+            النسبة المتوقعة للقيم الشاذة (تحدد عتبة القرار من عينة التدريب).
+        max_train_rows : int
+            أقصى عدد صفوف للتدريب؛ الأكبر منه يُدرَّب على عينة عشوائية.
+        n_jobs : int
+            عدد الخيوط لبناء الأشجار والتقييم (-1 = كل الأنوية).
+        """
+        super().__init__(model_name=model_name, model_dir=model_dir)
+        self.contamination = contamination
+        self.max_train_rows = max_train_rows
+        self.random_state = random_state
+        self.model = IsolationForest(
+            n_estimators=n_estimators,
+            contamination=contamination,
+            n_jobs=resolve_workers(n_jobs),
+            random_state=random_state,
+        )
+        self.columns_ = None
+        self.fill_values_ = None
+        self.source_signature = None
+        self.is_fitted = False
+
+    def _prepare(self, X: pd.DataFrame) -> np.ndarray:
+        X = X.reindex(columns=self.columns_).apply(pd.to_numeric, errors="coerce")
+        return X.fillna(self.fill_values_).to_numpy(dtype=np.float64)
+
+    @Timer("تدريب نموذج Isolation Forest")
+    def fit(self, X: pd.DataFrame, y=None):
+        if X is None or X.empty:
+            raise ValueError("❌ بيانات الإدخال فارغة أو None.")
+        numeric = X.select_dtypes(include=[np.number])
+        if numeric.empty:
+            raise ValueError("❌ لا توجد أعمدة رقمية لتدريب Isolation Forest.")
+        if len(numeric) > self.max_train_rows:
+            numeric = numeric.sample(n=self.max_train_rows, random_state=self.random_state)
+            logger.info(f"🎯 تدريب Isolation Forest على عينة من {self.max_train_rows} صف")
+
+        self.columns_ = numeric.columns.tolist()
+        self.fill_values_ = numeric.mean()
+        self.model.fit(self._prepare(numeric))
+        self.is_fitted = True
+        logger.info(f"✅ تم تدريب Isolation Forest على {len(numeric)} صف و {len(self.columns_)} عمود.")
+        return self
+
+    def score_samples(self, X: pd.DataFrame, chunk_size: int = ISOLATION_SCORE_CHUNK_ROWS) -> np.ndarray:
+        """دالة القرار (السالب = شاذ) على دفعات لتحديد الذاكرة المؤقتة للأشجار."""
+        self._check_is_fitted()
+        scores = [self.model.decision_function(self._prepare(X.iloc[start:start + chunk_size]))
+                  for start in range(0, len(X), chunk_size)]
+        return np.concatenate(scores) if scores else np.empty(0)
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """-1 للشاذ و 1 للطبيعي (مثل IsolationForest.predict)."""
+        return np.where(self.score_samples(X) < 0, -1, 1)
+
+    def evaluate(self, X: pd.DataFrame, y: Optional[Sequence] = None) -> dict:
+        preds = self.predict(X)
+        result = {"outlier_ratio": float((preds == -1).mean()) if len(preds) else 0.0}
+        if y is not None:
+            truth = np.asarray(y) == -1
+            flagged = preds == -1
+            result["precision"] = float((truth & flagged).sum() / max(1, flagged.sum()))
+            result["recall"] = float((truth & flagged).sum() / max(1, truth.sum()))
+        return result
+
+    def save(self):
+        if not self.is_fitted:
+            raise ValueError("❌ لا يوجد نموذج مدرب لحفظه.")
+        self.model_path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({
+            "model": self.model,
+            "columns": self.columns_,
+            "fill_values": self.fill_values_,
+            "contamination": self.contamination,
+            "source_signature": self.source_signature,
+        }, self.model_path)
+        logger.info(f"💾 تم حفظ نموذج Isolation Forest في: {self.model_path}")
+
+    def load(self):
+        if not self.model_path.exists():
+            raise FileNotFoundError(f"❌ لم يتم العثور على ملف النموذج: {self.model_path}")
+        data = joblib.load(self.model_path)
+        self.model = data["model"]
+        self.columns_ = data["columns"]
+        self.fill_values_ = data["fill_values"]
+        self.contamination = data.get("contamination", self.contamination)
+        self.source_signature = data.get("source_signature")
+        self.is_fitted = True
+        logger.info(f"📥 تم تحميل نموذج Isolation Forest من: {self.model_path}")
+        return self
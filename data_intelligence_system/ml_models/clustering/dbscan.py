@@ -1,12 +1,15 @@
 import logging
 import joblib
 from pathlib import Path
+import numpy as np
 import pandas as pd
-from sklearn.cluster import DBSCAN
 
 # ✅ استيراد من جذر المشروع
 from data_intelligence_system.config.paths_config import ML_MODELS_DIR
+from data_intelligence_system.config.performance_config import SILHOUETTE_SAMPLE_ROWS
 from data_intelligence_system.ml_models.base_model import BaseModel
+from data_intelligence_system.ml_models.clustering.density import PARAMS, ScalableDensityClusterer
+from data_intelligence_system.ml_models.utils.model_evaluation import ClusteringMetrics
 from data_intelligence_system.utils.preprocessing import fill_missing_values
 from data_intelligence_system.utils.feature_utils import generate_derived_features
 from data_intelligence_system.utils.timer import Timer
@@ -16,65 +19,97 @@ logger = logging.getLogger(__name__)
 
 class DBSCANClusteringModel(BaseModel):
     """
-    نموذج تجميع باستخدام DBSCAN.
+    نموذج تجميع باستخدام DBSCAN (أو HDBSCAN) بمحرك كثافة قابل للتوسع:
+    KD-tree و n_jobs، والتنبؤ للمشاهد الجديدة بأقرب نقطة مركزية دون إعادة التدريب.
     """
 
+    backend = "dbscan"
+
     def __init__(self, model_params=None, scaler_type="standard"):
         """
         Parameters
         ----------
         model_params : dict, optional
-            معلمات نموذج DBSCAN.
+            معلمات النموذج (eps, min_samples, min_cluster_size, max_fit_rows, n_jobs)؛
+            غيرها (مثل metric غير euclidean) يرفع ValueError.
         scaler_type : str, optional
             نوع المقياس المستخدم قبل التدريب.
         """
         super().__init__(
-            model_name="dbscan_clustering",
+            model_name=f"{self.backend}_clustering",
             model_dir=ML_MODELS_DIR
         )
         self.model_params = model_params or {}
-        self.model = DBSCAN(**self.model_params)
+        # المحرك يعمل بالمسافة الإقليدية (KD-tree): metric آخر أو معلمات أخرى تغير النتيجة فلا تُتجاهل
+        unsupported = {k for k, v in self.model_params.items()
+                       if k not in PARAMS and (k, v) != ("metric", "euclidean")}
+        if unsupported:
+            raise ValueError(f"❌ معلمات غير مدعومة في محرك الكثافة: {sorted(unsupported)}")
+        self.model = ScalableDensityClusterer(
+            backend=self.backend, **{k: v for k, v in self.model_params.items() if k in PARAMS}
+        )
         self.scaler_type = scaler_type
+        self.feature_columns_ = None
         self.is_fitted = False
 
+    def _prepare(self, X: pd.DataFrame) -> np.ndarray:
+        try:
+            X = fill_missing_values(X)
+            X = generate_derived_features(X)
+        except Exception as e:
+            logger.error(f"⚠️ خطأ أثناء معالجة البيانات: {e}")
+            raise
+        if self.feature_columns_ is None:
+            self.feature_columns_ = X.select_dtypes(include=[np.number]).columns.tolist()
+        return X.reindex(columns=self.feature_columns_).to_numpy(dtype=np.float64)
+
     @Timer("تدريب نموذج DBSCAN")
     def fit(self, X: pd.DataFrame):
         """
-        تدريب نموذج DBSCAN.
+        تدريب النموذج على الأعمدة الرقمية.
         """
         if X is None or X.empty:
             raise ValueError("❌ بيانات الإدخال فارغة أو None.")
 
-        try:
-            X = fill_missing_values(X)
-            X = generate_derived_features(X)
-        except Exception as e:
-            logger.error(f"⚠️ خطأ أثناء معالجة البيانات قبل التدريب: {e}")
-            raise
-
-        self.model.fit(X)
+        self.feature_columns_ = None
+        self.model.fit(self._prepare(X))
         self.is_fitted = True
         logger.info("✅ تم تدريب نموذج DBSCAN بنجاح.")
+        return self
 
     def predict(self, X: pd.DataFrame):
         """
-        توقعات التجميع للمشاهد الجديدة.
+        توقعات التجميع للمشاهد الجديدة: أقرب نقطة مركزية ضمن نصف قطرها، وإلا ضوضاء (-1).
         """
         self._check_is_fitted()
 
         if X is None or X.empty:
             raise ValueError("❌ بيانات الإدخال فارغة أو None.")
 
-        try:
-            X = fill_missing_values(X)
-            X = generate_derived_features(X)
-        except Exception as e:
-            logger.error(f"⚠️ خطأ أثناء معالجة البيانات قبل التنبؤ: {e}")
-            raise
+        return self.model.predict(self._prepare(X))
 
-        # DBSCAN لا يدعم predict للمشاهد الجديدة مباشرةً،
-        # لذا نعيد fit_predict (مع العلم أن هذا يعيد تدريب النموذج)
-        return self.model.fit_predict(X)
+    def evaluate(self, X: pd.DataFrame = None, y=None) -> dict:
+        """
+        عدد المجموعات ونسبة الضوضاء و Silhouette (عينة طبقية، بدون الضوضاء).
+        """
+        self._check_is_fitted()
+        if X is None:
+            labels = self.model.labels_
+            values = None
+        else:
+            values = self._prepare(X)
+            labels = self.model.predict(values)
+        clustered = labels != -1
+        result = {
+            "n_clusters": len(set(labels[clustered].tolist())),
+            "noise_ratio": float((~clustered).mean()) if len(labels) else 0.0,
+            "silhouette": float("nan"),
+        }
+        if values is not None and clustered.sum() > 1:
+            result["silhouette"] = ClusteringMetrics.sampled_silhouette(
+                values[clustered], labels[clustered], sample_size=SILHOUETTE_SAMPLE_ROWS)
+        logger.info(f"📈 تقييم التجميع الكثافي: {result}")
+        return result
 
     def save(self):
         """
@@ -87,6 +122,7 @@ class DBSCANClusteringModel(BaseModel):
         joblib.dump({
             "model": self.model,
             "scaler_type": self.scaler_type,
+            "feature_columns": self.feature_columns_,
             "is_fitted": self.is_fitted
         }, self.model_path)
         logger.info(f"💾 تم حفظ نموذج DBSCAN في: {self.model_path}")
@@ -101,5 +137,14 @@ class DBSCANClusteringModel(BaseModel):
         data = joblib.load(self.model_path)
         self.model = data["model"]
         self.scaler_type = data.get("scaler_type", "standard")
+        self.feature_columns_ = data.get("feature_columns")
         self.is_fitted = data["is_fitted"]
         logger.info(f"📥 تم تحميل نموذج DBSCAN من: {self.model_path}")
+
+
+class HDBSCANClusteringModel(DBSCANClusteringModel):
+    """
+    نموذج HDBSCAN: لا يحتاج eps، يُدرَّب على عينة محدودة ويُسند باقي الصفوف بأقرب نقطة.
+    """
+
+    backend = "hdbscan"
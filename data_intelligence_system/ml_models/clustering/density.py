@@ -0,0 +1,181 @@
+"""
+ml_models/clustering/density.py
+
+تجميع كثافي قابل للتوسع بديلًا عن DBSCAN الكامل (ذاكرة جوار كل نقطة O(n²) في البيانات الكثيفة):
+    - dbscan: البيانات الصغيرة تُجمَّع بـ DBSCAN الدقيق (KD-tree و n_jobs). الأكبر منها:
+        1) استعلام k الأقرب لكل الصفوف على دفعات متوازية (بدلًا من تخزين كل جوار eps)
+        2) النقاط المركزية تُحدد بدقة من مسافة الجار رقم min_samples
+        3) المجموعات = المكونات المتصلة لروابط k الأقرب بين النقاط المركزية ضمن eps
+    - hdbscan: HDBSCAN من sklearn على عينة محدودة
+    - التنبؤ للنقاط الجديدة (وتسمية باقي الصفوف) بأقرب مرساة عبر KD-tree ضمن نصف قطرها،
+      وإلا فهي ضوضاء (-1)؛ بدون إعادة تدريب.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+from sklearn.cluster import DBSCAN, HDBSCAN
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import KDTree
+
+from data_intelligence_system.config.performance_config import DENSITY_MAX_FIT_ROWS, DENSITY_N_JOBS
+from data_intelligence_system.utils.parallel import resolve_workers
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("dbscan", "hdbscan")
+PARAMS = ("eps", "min_samples", "min_cluster_size", "max_fit_rows", "n_jobs", "random_state")
+QUERY_CHUNK_ROWS = 20000
+KNN_LINKS = 10
+
+
+def _chunked_query(func, X: np.ndarray, n_jobs: Optional[int]) -> list:
+    """تطبيق استعلام KD-tree على دفعات من الصفوف (بخيوط متوازية عند n_jobs > 1)."""
+    chunks = [X[start:start + QUERY_CHUNK_ROWS] for start in range(0, len(X), QUERY_CHUNK_ROWS)]
+    threads = resolve_workers(n_jobs)
+    if threads > 1 and len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(func, chunks))
+    return [func(chunk) for chunk in chunks]
+
+
+class ScalableDensityClusterer:
+    """
+    مُجمِّع كثافي بواجهة fit / predict / fit_predict. بعد التدريب:
+        labels_          تسميات صفوف التدريب
+        anchors_         نقاط المراسي (المركزية أو ممثلوها) وتسمياتها anchor_labels_
+        anchor_radius_   نصف قطر الإسناد لكل مرساة (eps في dbscan، المسافة المركزية في hdbscan)
+    """
+
+    def __init__(self, backend: str = "dbscan", eps: float = 0.5, min_samples: int = 5,
+                 min_cluster_size: Optional[int] = None, max_fit_rows: int = DENSITY_MAX_FIT_ROWS,
+                 n_jobs: Optional[int] = DENSITY_N_JOBS, random_state: int = 42):
+        if backend not in BACKENDS:
+            raise ValueError(f"❌ خوارزمية كثافة غير مدعومة: {backend}")
+        self.backend = backend
+        self.eps = eps
+        self.min_samples = min_samples
+        self.min_cluster_size = min_cluster_size
+        self.max_fit_rows = max_fit_rows
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.labels_ = None
+        self.anchors_ = None
+        self.anchor_labels_ = None
+        self.anchor_radius_ = None
+        self._tree = None
+
+    # ---------- التدريب ----------
+    def fit(self, X, y=None):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if len(X) == 0:
+            raise ValueError("❌ بيانات الإدخال فارغة.")
+        if self.backend == "hdbscan":
+            self._fit_hdbscan(X)
+        elif len(X) <= self.max_fit_rows:
+            self._fit_exact_dbscan(X)
+        else:
+            self._fit_knn_dbscan(X)
+        n_clusters = len(set(self.labels_.tolist()) - {-1})
+        logger.info(f"✅ تجميع كثافي ({self.backend}) لـ {len(X)} صف: {n_clusters} مجموعة، "
+                    f"{int((self.labels_ == -1).sum())} ضوضاء، {len(self.anchors_)} مرساة.")
+        return self
+
+    def fit_predict(self, X, y=None) -> np.ndarray:
+        return self.fit(X).labels_
+
+    def _set_anchors(self, anchors: np.ndarray, labels: np.ndarray, radius: np.ndarray):
+        self.anchors_ = anchors
+        self.anchor_labels_ = labels
+        self.anchor_radius_ = radius
+        self._tree = KDTree(anchors) if len(anchors) else None
+
+    def _fit_exact_dbscan(self, X: np.ndarray):
+        model = DBSCAN(eps=self.eps, min_samples=self.min_samples, algorithm="kd_tree",
+                       n_jobs=resolve_workers(self.n_jobs))
+        self.labels_ = model.fit_predict(X)
+        core = model.core_sample_indices_
+        self._set_anchors(X[core], self.labels_[core], np.full(len(core), self.eps))
+
+    def _fit_knn_dbscan(self, X: np.ndarray):
+        """
+        DBSCAN بجوار k الأقرب بدل كل الجيران ضمن eps (ذاكرة O(n·k)):
+        النقطة مركزية إذا كان جارها رقم min_samples (مع نفسها) ضمن eps، والمركزية تُربط بجيرانها
+        المركزيين ضمن eps في قوائم k الأقرب، والطرفية تأخذ تسمية أقرب نقطة مركزية ضمن eps.
+        """
+        tree = KDTree(X)
+        k = min(len(X), max(self.min_samples, KNN_LINKS))
+
+        def query(chunk):
+            distance, index = tree.query(chunk, k=k)
+            return index, distance <= self.eps
+
+        parts = _chunked_query(query, X, self.n_jobs)
+        index = np.vstack([i for i, _ in parts])
+        within = np.vstack([w for _, w in parts])
+        del tree, parts
+        core = within[:, self.min_samples - 1]
+
+        # حواف بين نقاط مركزية متجاورة ثم المكونات المتصلة
+        linked = within & core[index] & core[:, None]
+        rows = np.repeat(np.arange(len(X)), k)[linked.ravel()]
+        graph = coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, index[linked])), shape=(len(X), len(X)))
+        _, components = connected_components(graph, directed=False)
+        labels = np.full(len(X), -1, dtype=np.int64)
+        _, labels[core] = np.unique(components[core], return_inverse=True)
+
+        # الطرفية: كل جيرانها ضمن eps في قائمتها (أقل من min_samples)، والقائمة مرتبة بالمسافة
+        border_links = within & core[index] & ~core[:, None]
+        has_core = border_links.any(axis=1)
+        first = border_links.argmax(axis=1)
+        labels[has_core] = labels[index[has_core, first[has_core]]]
+
+        self.labels_ = labels
+        self._set_anchors(X[core], labels[core], np.full(int(core.sum()), self.eps))
+
+    def _fit_hdbscan(self, X: np.ndarray):
+        sample = X
+        if len(X) > self.max_fit_rows:
+            rng = np.random.default_rng(self.random_state)
+            sample = X[np.sort(rng.choice(len(X), self.max_fit_rows, replace=False))]
+        min_cluster_size = self.min_cluster_size or max(5, self.min_samples)
+        labels = HDBSCAN(min_cluster_size=min_cluster_size, min_samples=self.min_samples,
+                         n_jobs=resolve_workers(self.n_jobs)).fit_predict(sample)
+
+        clustered = labels >= 0
+        anchors = sample[clustered]
+        # نصف قطر كل مرساة = المسافة إلى جارها رقم min_samples (المسافة المركزية)
+        k = min(self.min_samples, len(sample))
+        core_distance = KDTree(sample).query(anchors, k=k)[0][:, -1] if len(anchors) else np.empty(0)
+        self._set_anchors(anchors, labels[clustered], core_distance)
+        self.labels_ = labels if sample is X else self.predict(X)
+
+    # ---------- الإسناد ----------
+    def predict(self, X) -> np.ndarray:
+        """تسمية النقاط بأقرب مرساة ضمن نصف قطرها، وإلا -1 (بدون إعادة تدريب)."""
+        if self.anchors_ is None:
+            raise ValueError("❌ النموذج غير مدرب بعد.")
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        labels = np.full(len(X), -1, dtype=np.int64)
+        if self._tree is None or len(X) == 0:
+            return labels
+        parts = _chunked_query(lambda chunk: self._tree.query(chunk, k=1), X, self.n_jobs)
+        distance = np.concatenate([d[:, 0] for d, _ in parts])
+        nearest = np.concatenate([i[:, 0] for _, i in parts])
+        within = distance <= self.anchor_radius_[nearest]
+        labels[within] = self.anchor_labels_[nearest[within]]
+        return labels
+
+    def __getstate__(self):
+        # الشجرة تُعاد بناؤها عند التحميل (أصغر في ملف النموذج)
+        state = self.__dict__.copy()
+        state["_tree"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.anchors_ is not None and len(self.anchors_):
+            self._tree = KDTree(self.anchors_)
@@ -1,10 +1,16 @@
 import logging
 import joblib
 from pathlib import Path
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
+from typing import Optional
+from sklearn.cluster import KMeans, MiniBatchKMeans
 
 from data_intelligence_system.config.paths_config import ML_MODELS_DIR
+from data_intelligence_system.config.performance_config import (
+    KMEANS_BATCH_SIZE,
+    KMEANS_MINIBATCH_THRESHOLD,
+    SILHOUETTE_SAMPLE_ROWS,
+)
+from data_intelligence_system.ml_models.utils.model_evaluation import ClusteringMetrics
 from data_intelligence_system.utils.preprocessing import fill_missing_values, scale_numericals
 from data_intelligence_system.ml_models.base_model import BaseModel
 from data_intelligence_system.utils.timer import Timer
@@ -21,6 +27,8 @@ class KMeansClusteringModel(BaseModel):
         max_iter: int = 300,
         random_state: int = 42,
         scaler_type: str = "standard",
+        minibatch: Optional[bool] = None,
+        batch_size: int = KMEANS_BATCH_SIZE,
         **kwargs
     ):
         """
@@ -38,6 +46,10 @@ class KMeansClusteringModel(BaseModel):
             البذرة العشوائية لضمان التكرار.
         scaler_type : str
             نوع التحجيم المستخدم (مثلاً "standard").
+        minibatch : bool, optional
+            استخدام MiniBatchKMeans؛ None = تلقائيًا عندما تتجاوز الصفوف KMEANS_MINIBATCH_THRESHOLD.
+        batch_size : int
+            حجم الدفعة في MiniBatchKMeans.
         kwargs : dict
             معلمات إضافية لنموذج KMeans.
         """
@@ -50,9 +62,26 @@ class KMeansClusteringModel(BaseModel):
             **kwargs
         )
         self.scaler_type = scaler_type
+        self.minibatch = minibatch
+        self.batch_size = batch_size
         self.is_fitted = False
         self.X_train_ = None
 
+    def _use_minibatch(self, n_rows: int) -> bool:
+        return self.minibatch if self.minibatch is not None else n_rows > KMEANS_MINIBATCH_THRESHOLD
+
+    def _as_minibatch(self) -> MiniBatchKMeans:
+        """نفس إعدادات KMeans الحالية على الخوارزمية ذات الدفعات الصغيرة."""
+        params = self.model.get_params()
+        return MiniBatchKMeans(
+            n_clusters=params["n_clusters"],
+            init=params["init"],
+            max_iter=params["max_iter"],
+            n_init=params["n_init"],
+            random_state=params["random_state"],
+            batch_size=self.batch_size,
+        )
+
     @Timer("تدريب نموذج KMeans")
     def fit(self, X):
         """
@@ -71,6 +100,9 @@ class KMeansClusteringModel(BaseModel):
             raise ValueError("❌ بيانات الإدخال فارغة أو None.")
         X = fill_missing_values(X)
         X_scaled = scale_numericals(X, scaler=self.scaler_type)
+        if isinstance(self.model, KMeans) and self._use_minibatch(len(X_scaled)):
+            logger.info(f"⚡ استخدام MiniBatchKMeans لـ {len(X_scaled)} صف (دفعة {self.batch_size}).")
+            self.model = self._as_minibatch()
         self.model.fit(X_scaled)
         self.X_train_ = X_scaled
         self.is_fitted = True
@@ -112,7 +144,7 @@ class KMeansClusteringModel(BaseModel):
 
     def evaluate(self, X=None):
         """
-        تقييم جودة التجميع باستخدام مؤشر Silhouette Score.
+        تقييم جودة التجميع باستخدام مؤشر Silhouette Score (على عينة طبقية للبيانات الكبيرة).
 
         Parameters
         ----------
@@ -135,7 +167,7 @@ class KMeansClusteringModel(BaseModel):
             X_eval = fill_missing_values(X)
             X_eval = scale_numericals(X_eval, scaler=self.scaler_type)
         labels = self.model.predict(X_eval)
-        score = silhouette_score(X_eval, labels)
+        score = ClusteringMetrics.sampled_silhouette(X_eval, labels, sample_size=SILHOUETTE_SAMPLE_ROWS)
         logger.info(f"📈 Silhouette Score: {score:.4f}")
         return score
 
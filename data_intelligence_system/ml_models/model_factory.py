@@ -15,11 +15,15 @@ MODEL_REGISTRY = {
     },
     "clustering": {
         "kmeans": "data_intelligence_system.ml_models.clustering.kmeans.KMeansClusteringModel",
-        "dbscan": "data_intelligence_system.ml_models.clustering.dbscan.DBSCANClusteringModel"
+        "dbscan": "data_intelligence_system.ml_models.clustering.dbscan.DBSCANClusteringModel",
+        "hdbscan": "data_intelligence_system.ml_models.clustering.dbscan.HDBSCANClusteringModel"
     },
     "forecasting": {
         "arima": "data_intelligence_system.ml_models.forecasting.arima_model.ARIMAForecastingModel",
         "prophet": "data_intelligence_system.ml_models.forecasting.prophet_model.ProphetForecastingModel"
+    },
+    "anomaly": {
+        "isolation_forest": "data_intelligence_system.ml_models.anomaly.isolation_forest.IsolationForestAnomalyModel"
     }
 }
 
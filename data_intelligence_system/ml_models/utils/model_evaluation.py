@@ -16,6 +16,7 @@ from sklearn.metrics import (
 
 from data_intelligence_system.ml_models.utils.preprocessing import DataPreprocessor
 from data_intelligence_system.utils.preprocessing import fill_missing_values
+from data_intelligence_system.utils.sampling import stratified_indices
 from data_intelligence_system.utils.timer import Timer  # ✅ مضاف لتوقيت الدوال
 
 
@@ -133,6 +134,25 @@ class ClusteringMetrics:
             score = float('nan')
         return score
 
+    @staticmethod
+    def sampled_silhouette(X: np.ndarray, labels: np.ndarray, sample_size: int = 5000,
+                           random_state: int = 42) -> float:
+        """
+        Silhouette على عينة طبقية حسب المجموعة (نفس نسب المجموعات، وصفّان على الأقل لكل مجموعة)
+        بدل O(n²) على كل الصفوف. البيانات الأصغر من العينة تُقيَّم كاملة.
+        """
+        X = np.asarray(X)
+        labels = np.asarray(labels)
+        if len(np.unique(labels)) < 2:
+            return float('nan')
+        if len(labels) > sample_size:
+            index = stratified_indices(labels, sample_size, min_per_stratum=2, random_state=random_state)
+            X, labels = X[index], labels[index]
+        try:
+            return float(silhouette_score(X, labels))
+        except ValueError:
+            return float('nan')
+
     @staticmethod
     def adjusted_rand(y_true: np.ndarray, y_pred: np.ndarray) -> float:
         if isinstance(y_true, np.ndarray):
@@ -9,6 +9,7 @@ from data_intelligence_system.reports.export_utils import (
     save_dataframe_to_csv,
     df_to_html_table
 )
+from data_intelligence_system.utils.sampling import get_sample, sample_budget
 from data_intelligence_system.config.report_config import OUTPUT_PATH  # ✅ تعديل الاستيراد ليتوافق مع التحديث الجديد
 
 logging.basicConfig(level=logging.INFO)
@@ -66,7 +67,7 @@ class ReportDispatcher:
 
     def _build_pdf_sections(self, df: pd.DataFrame, pdf_gen: PDFReportGenerator) -> list:
         sections = []
-        preview_data = [list(df.columns)] + df.head(10).values.tolist()
+        preview_data = [list(df.columns)] + get_sample(df, sample_budget("report_preview")).values.tolist()
         preview_table = pdf_gen.create_table(preview_data)
         sections.append({"title": "📋 معاينة أولية للبيانات", "content": preview_table})
 
@@ -2,6 +2,7 @@
 
 import pytest
 import pandas as pd
+import json
 import numpy as np
 from pathlib import Path
 
@@ -11,7 +12,9 @@ from data_intelligence_system.analysis import (
     correlation_analysis,
     outlier_detection,
     clustering_analysis,
-    target_relation_analysis
+    target_relation_analysis,
+    stats_kernel,
+    streaming_stats,
 )
 
 # إعداد بيانات تجريبية بسيطة
@@ -36,6 +39,219 @@ def test_descriptive_stats(sample_df):
     assert len(result["numeric_summary"]) > 0
 
 
+def test_stats_kernel_matches_pandas():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "x": rng.normal(size=200),
+        "n": rng.integers(0, 5, size=200),
+        "empty": np.nan,
+        "city": rng.choice(["NY", "LA", None], size=200),
+        "when": pd.date_range("2024-01-01", periods=200, freq="D"),
+    })
+    df.loc[::9, "x"] = np.nan
+    df = pd.concat([df, df.head(5)], ignore_index=True)
+
+    numeric = df.select_dtypes(include=[np.number])
+    expected = numeric.describe().T
+    expected["missing_values"] = numeric.isnull().sum()
+    expected["missing_%"] = (numeric.isnull().mean() * 100).round(2)
+
+    fused = stats_kernel.compute_fused_stats(df)
+    pd.testing.assert_frame_equal(pd.DataFrame(fused["numeric_summary"]).T.astype(float),
+                                  expected.astype(float), check_names=False)
+    assert fused["general_info"]["Duplicated Rows"] == df.duplicated().sum()
+    assert fused["general_info"]["Missing Values"] == df.isnull().sum().sum()
+    pd.testing.assert_series_equal(fused["categorical_summary"]["city"],
+                                   df["city"].value_counts(dropna=False).head(10))
+    pd.testing.assert_series_equal(fused["datetime_summary"]["when"],
+                                   df["when"].dt.to_period("M").value_counts().sort_index())
+
+
+def test_descriptive_stats_on_zero_row_frame():
+    df = pd.DataFrame({"a": pd.Series(dtype=float), "city": pd.Series(dtype=object)})
+    result = descriptive_stats.generate_descriptive_stats(df, save_outputs=False)
+    assert result["numeric_summary"] == {}
+    assert result["general_info"]["Number of Rows"] == 0
+    stats = stats_kernel.compute_numeric_stats(df, ["a"], with_quantiles=False)
+    assert stats.count.tolist() == [0] and np.isnan(stats.mean).all()
+
+
+def test_datetime_sniffing_converts_confirmed_columns_only():
+    from data_intelligence_system.utils import type_sniffing
+
+    type_sniffing.clear_sniff_cache()
+    df = pd.DataFrame({
+        "order_date": pd.date_range("2024-01-01", periods=40, freq="D").strftime("%d/%m/%Y"),
+        "code": [str(2000 + i) for i in range(40)],
+        "city": ["Cairo", "Giza"] * 20,
+    })
+    assert type_sniffing.sniff_datetime_columns(df) == {"order_date": "%d/%m/%Y"}
+
+    result = descriptive_stats.generate_descriptive_stats(df.copy(), save_outputs=False)
+    assert list(result["datetime_summary"]) == ["order_date"]
+    assert result["datetime_summary"]["order_date"].sum() == 40
+    assert set(result["categorical_summary"]) == {"code", "city"}
+
+    # نفس المخطط: القرار من الذاكرة المؤقتة دون فحص العينة
+    other = df.assign(order_date="not a date")
+    assert type_sniffing.sniff_datetime_columns(other) == {"order_date": "%d/%m/%Y"}
+
+
+def test_streaming_stats_match_in_memory(tmp_path):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "x": rng.normal(size=1500),
+        "k": rng.integers(0, 4, size=1500),
+        "city": rng.choice(["a", "b", None], size=1500),
+        "day": pd.date_range("2024-01-01", periods=1500, freq="h").astype(str),
+    })
+    df.loc[::11, "x"] = np.nan
+    df = pd.concat([df, df.head(20)], ignore_index=True)
+    path = tmp_path / "big.csv"
+    df.to_csv(path, index=False)
+
+    result = descriptive_stats.generate_descriptive_stats(path, save_outputs=False, streaming=True, chunk_size=400)
+    expected = descriptive_stats.generate_descriptive_stats(path, save_outputs=False)
+
+    assert result["execution_mode"] == "chunked"
+    assert result["general_info"] == expected["general_info"]
+    for col, row in expected["numeric_summary"].items():
+        # الربيعيات دقيقة لأن عدد القيم أقل من دقة المخطط
+        assert result["numeric_summary"][col] == pytest.approx(row)
+    pd.testing.assert_series_equal(result["categorical_summary"]["city"], expected["categorical_summary"]["city"])
+    pd.testing.assert_series_equal(result["datetime_summary"]["day"], expected["datetime_summary"]["day"])
+
+
+
+def test_duckdb_descriptive_stats_over_folder_match_pandas(tmp_path):
+    pytest.importorskip("duckdb")
+    from data_intelligence_system.analysis.duckdb_engine import DuckDBEngine
+
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "x": rng.normal(size=1200),
+        "k": rng.integers(0, 4, size=1200),
+        "city": rng.choice(["a", "b", "c", None], p=[0.5, 0.3, 0.15, 0.05], size=1200),
+        "day": pd.date_range("2024-01-01", periods=1200, freq="h").astype(str),
+    })
+    df.loc[::11, "x"] = np.nan
+    df = pd.concat([df, df.head(20)], ignore_index=True)
+    df.to_csv(tmp_path / "full.csv", index=False)
+    folder = tmp_path / "processed"
+    (folder / "_rollups").mkdir(parents=True)
+    df.iloc[:600].to_csv(folder / "part1.csv", index=False)
+    df.iloc[600:].to_parquet(folder / "part2.parquet", index=False)
+    df.head(5).to_csv(folder / "_rollups" / "ignored.csv", index=False)
+
+    result = descriptive_stats.generate_descriptive_stats(folder, save_outputs=False, engine="duckdb")
+    expected = descriptive_stats.generate_descriptive_stats(tmp_path / "full.csv", save_outputs=False,
+                                                            engine="pandas")
+
+    assert result["execution_mode"] == "duckdb"
+    assert result["general_info"] == expected["general_info"]
+    for col, row in expected["numeric_summary"].items():
+        assert result["numeric_summary"][col] == pytest.approx(row, nan_ok=True)
+    pd.testing.assert_series_equal(result["categorical_summary"]["city"].reset_index(drop=True),
+                                   expected["categorical_summary"]["city"].reset_index(drop=True))
+    pd.testing.assert_series_equal(result["datetime_summary"]["day"], expected["datetime_summary"]["day"],
+                                   check_dtype=False)
+
+    with DuckDBEngine(threads=2) as engine:
+        grouped = engine.group_stats(folder, by=["k"], measures=["x"], aggregates=("count", "mean", "max"))
+    pandas_grouped = df.groupby("k")["x"].agg(["count", "mean", "max"])
+    assert grouped["rows"].tolist() == df.groupby("k").size().tolist()
+    assert np.allclose(grouped[["x_count", "x_mean", "x_max"]].to_numpy(), pandas_grouped.to_numpy())
+
+def test_streaming_accumulators_merge():
+    rng = np.random.default_rng(2)
+    values = rng.exponential(size=20000)
+    left, right = streaming_stats.MomentsAccumulator(), streaming_stats.MomentsAccumulator()
+    left.update(values[:7000])
+    right.update(values[7000:])
+    merged = left.merge(right)
+    assert merged.mean == pytest.approx(values.mean())
+    assert merged.std == pytest.approx(values.std(ddof=1))
+
+    sketch = streaming_stats.QuantileSketch(k=200)
+    for part in np.array_split(values, 8):
+        other = streaming_stats.QuantileSketch(k=200)
+        other.update(part)
+        sketch.merge(other)
+    assert not sketch.is_exact
+    for q in (0.25, 0.5, 0.75):
+        assert abs((values <= sketch.quantile(q)).mean() - q) < 0.03
+
+    hashes = rng.integers(0, np.iinfo(np.uint64).max, size=60000, dtype=np.uint64, endpoint=True)
+    hashes = np.concatenate([hashes, hashes[:15000]])
+    exact, approx = streaming_stats.DistinctCounter(), streaming_stats.DistinctCounter(capacity=5000)
+    for part in np.array_split(hashes, 6):
+        exact.merge(streaming_stats.DistinctCounter().update(part))
+        approx.update(part)
+    assert exact.exact and exact.count() == 60000
+    assert not approx.exact and abs(approx.count() - 60000) / 60000 < 0.03
+
+
+def test_histogram_renderer_skips_unchanged_columns(tmp_path):
+    from data_intelligence_system.analysis import histogram_renderer
+
+    df = pd.DataFrame({"a": np.random.default_rng(0).normal(size=500), "b": np.arange(500.0)})
+    first = histogram_renderer.render_numeric_histograms(df, "h", tmp_path, draft=True, workers=1)
+    assert sorted(Path(p).name for p in first) == ["h_distribution_a.png", "h_distribution_b.png"]
+
+    # بيانات العمود a لم تتغير: يُعاد رسم b فقط
+    df["b"] = df["b"] * 2
+    second = histogram_renderer.render_numeric_histograms(df, "h", tmp_path, draft=True, workers=1)
+    assert [Path(p).name for p in second] == ["h_distribution_b.png"]
+
+    # تشغيلات متزامنة في نفس المجلد: السجل يُدمج تحت القفل فلا تضيع مدخلات أي منها
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda i: histogram_renderer.render_numeric_histograms(
+            df, f"p{i}", tmp_path, draft=True, workers=1), range(4)))
+    manifest = json.loads((tmp_path / histogram_renderer.MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert {f"p{i}_distribution_{c}.png" for i in range(4) for c in "ab"} <= set(manifest)
+
+    data = histogram_renderer.compute_histogram(df["a"], kde=True)
+    assert data.counts.sum() == 500
+    assert len(data.kde_x) == histogram_renderer.KDE_GRID_SIZE
+
+
+def test_histogram_renderer_falls_back_to_serial_when_pool_breaks(tmp_path, monkeypatch):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+    from contextlib import contextmanager
+
+    from data_intelligence_system.analysis import histogram_renderer
+
+    class BrokenExecutor:
+        def __init__(self):
+            self.submitted = 0
+
+        def submit(self, fn, *args):
+            # العامل الأول يرسم ثم ينهار المجمع: الباقي يجب أن يُرسم في العملية نفسها
+            self.submitted += 1
+            if self.submitted > 2:
+                raise BrokenProcessPool("worker died")
+            future = Future()
+            if self.submitted == 1:
+                future.set_result(fn(*args))
+            else:
+                future.set_exception(BrokenProcessPool("worker died"))
+            return future
+
+    @contextmanager
+    def broken_pool(workers, **kwargs):
+        yield BrokenExecutor()
+
+    monkeypatch.setattr(histogram_renderer, "process_pool", broken_pool)
+    columns = [f"c{i}" for i in range(histogram_renderer.MIN_PARALLEL_COLUMNS + 1)]
+    df = pd.DataFrame(np.random.default_rng(1).normal(size=(200, len(columns))), columns=columns)
+
+    rendered = histogram_renderer.render_numeric_histograms(df, "h", tmp_path, draft=True, workers=2)
+    assert sorted(Path(p).name for p in rendered) == sorted(f"h_distribution_{c}.png" for c in columns)
+    assert all((tmp_path / f"h_distribution_{c}.png").exists() for c in columns)
+
+
 def test_correlation_analysis(sample_df):
     corr_df = correlation_analysis.generate_correlation_matrix(sample_df, method="pearson")
     assert isinstance(corr_df, pd.DataFrame)
@@ -44,6 +260,34 @@ def test_correlation_analysis(sample_df):
     assert np.allclose(np.diag(corr_df), 1)
 
 
+def test_correlation_engine_matches_pandas():
+    from data_intelligence_system.analysis import correlation_engine
+
+    rng = np.random.default_rng(5)
+    base = rng.normal(size=(400, 3))
+    df = pd.DataFrame(base @ rng.normal(size=(3, 12)) + rng.normal(size=(400, 12)),
+                      columns=[f"f{i}" for i in range(12)])
+    df["const"] = 1.0
+    df = df.mask(rng.random(df.shape) < 0.1)
+
+    result = correlation_engine.correlation_matrix(df, block_size=5)
+    pd.testing.assert_frame_equal(result, df.corr())
+
+    expected = df.corr().where(np.triu(np.ones((13, 13), dtype=bool), 1)).stack().abs()
+    top = correlation_engine.top_correlations(df, k=5, block_size=4)
+    np.testing.assert_allclose(top["abs_correlation"], expected.sort_values(ascending=False).head(5))
+    above = correlation_engine.top_correlations(df, k=None, threshold=0.5, block_size=4)
+    assert len(above) == (expected >= 0.5).sum()
+
+
+def test_wide_correlation_returns_top_pairs(sample_df, tmp_path, monkeypatch):
+    monkeypatch.setattr(correlation_analysis, "CORRELATION_WIDE_THRESHOLD", 1)
+    result = correlation_analysis.run_correlation_analysis(sample_df, method="spearman", output_dir=tmp_path)
+    assert list(result["top_pairs"].columns) == ["feature_1", "feature_2", "correlation", "abs_correlation"]
+    assert (tmp_path / result["pairs_file"]).exists()
+    assert (tmp_path / result["heatmap_file"]).exists()
+
+
 def test_outlier_detection(sample_df):
     # تجربة IQR
     mask_iqr = outlier_detection.detect_outliers_iqr(sample_df)
@@ -63,9 +307,96 @@ def test_outlier_detection(sample_df):
 
 
 
-def test_clustering_kmeans(sample_df):
+def test_batch_outlier_detection_parallel(sample_df, tmp_path):
+    data_dir = tmp_path / "processed"
+    data_dir.mkdir()
+    sample_df.to_csv(data_dir / "a.csv", index=False)
+    sample_df.assign(income=sample_df["income"] * 3).to_csv(data_dir / "b.csv", index=False)
+
+    report = outlier_detection.run_batch_detection(data_dir, tmp_path / "out", max_workers=2)
+    assert report["filename"].tolist() == ["a.csv", "b.csv"]
+    assert (tmp_path / "out" / "outliers_summary_report.csv").exists()
+
+    df = pd.read_csv(data_dir / "a.csv")
+    first = report.iloc[0]
+    assert first["zscore_outliers"] == outlier_detection.detect_outliers_zscore(df).sum()
+    assert first["iqr_outliers"] == outlier_detection.detect_outliers_iqr(df).sum()
+    assert first["isolationforest_outliers"] == outlier_detection.detect_outliers_isolation_forest(df).sum()
+
+
+@pytest.mark.parametrize("method", ["iqr", "zscore"])
+def test_streaming_outlier_detection_matches_in_memory(tmp_path, method):
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "a": rng.standard_t(3, size=1200),
+        "b": rng.normal(size=1200),
+        "label": rng.choice(["x", "y"], size=1200),
+    })
+    df.loc[::13, "a"] = np.nan
+    path = tmp_path / "big.csv"
+    df.to_csv(path, index=False)
+
+    result = outlier_detection.run_streaming_outlier_detection(path, method=method, chunk_size=250,
+                                                               output_dir=tmp_path)
+    detector = outlier_detection.detect_outliers_iqr if method == "iqr" else outlier_detection.detect_outliers_zscore
+    expected = np.flatnonzero(np.asarray(detector(pd.read_csv(path))))
+
+    assert result["total_rows"] == 1200
+    assert result["outliers_detected"] == len(expected)
+    np.testing.assert_array_equal(pd.read_csv(result["file_saved"])["row_index"].to_numpy(), expected)
+
+
+def test_scalable_isolation_forest_reuses_saved_model(tmp_path):
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame({"a": rng.normal(size=900), "b": rng.normal(size=900), "label": "x"})
+    df.loc[::50, "a"] = 12.0
+    path = tmp_path / "iso.csv"
+    df.to_csv(path, index=False)
+
+    kwargs = dict(contamination=0.05, max_train_rows=400, chunk_size=200,
+                  output_dir=tmp_path / "out", model_dir=tmp_path / "models")
+    first = outlier_detection.run_scalable_isolation_forest(path, **kwargs)
+    indices = pd.read_csv(first["file_saved"])["row_index"].to_numpy()
+    assert first["total_rows"] == 900
+    assert first["outliers_detected"] == len(indices) > 0
+    assert set(range(0, 900, 50)) <= set(indices)
+
+    # نفس الملف: يُحمَّل النموذج المحفوظ ولا يُعاد التدريب
+    saved_mtime = Path(first["model_path"]).stat().st_mtime_ns
+    second = outlier_detection.run_scalable_isolation_forest(path, **kwargs)
+    assert Path(second["model_path"]).stat().st_mtime_ns == saved_mtime
+    np.testing.assert_array_equal(pd.read_csv(second["file_saved"])["row_index"].to_numpy(), indices)
+
+
+def test_streaming_outlier_summary_shares_two_passes(tmp_path, monkeypatch):
+    from data_intelligence_system.utils import memory_planner
+
+    rng = np.random.default_rng(6)
+    df = pd.DataFrame({"a": rng.standard_t(3, size=1000), "b": rng.normal(size=1000), "label": "x"})
+    df.loc[::17, "b"] = np.nan
+    path = tmp_path / "wide.csv"
+    df.to_csv(path, index=False)
+
+    reads = []
+    real_iter_chunks = outlier_detection.iter_chunks
+    monkeypatch.setattr(outlier_detection, "iter_chunks", lambda *a, **k: reads.append(a) or real_iter_chunks(*a, **k))
+    monkeypatch.setattr(outlier_detection, "load_sample", lambda *a, **k: pytest.fail("extra scan"))
+    real_run = outlier_detection.run_streaming_outlier_methods
+    monkeypatch.setattr(outlier_detection, "run_streaming_outlier_methods", lambda *a, **k: real_run(
+        *a, output_dir=tmp_path / "out", model_dir=tmp_path / "models", **k))
+    plan = memory_planner.ExecutionPlan(mode=memory_planner.CHUNKED, budget_bytes=0, chunk_size=300)
+
+    summary = outlier_detection._summarize_file_streaming(path, plan)
+    assert len(reads) == 2
+    assert summary["total_rows"] == 1000 and summary["numeric_columns"] == 2
+    assert summary["zscore_outliers"] == outlier_detection.detect_outliers_zscore(df).sum()
+    assert summary["iqr_outliers"] == outlier_detection.detect_outliers_iqr(df).sum()
+    assert summary["isolationforest_outliers"] > 0
+
+
+def test_clustering_kmeans(sample_df, tmp_path):
     result = clustering_analysis.run_clustering(sample_df, algorithm="kmeans", n_clusters=2,
-                                                output_filename="test_clustered.csv")
+                                                output_filename="test_clustered.csv", output_dir=tmp_path)
     assert isinstance(result, dict)
     assert result["algorithm"] == "kmeans"
     assert "cluster_counts" in result
@@ -73,15 +404,129 @@ def test_clustering_kmeans(sample_df):
     assert Path(result["clustered_file"]).suffix == ".csv"
 
 
-def test_clustering_dbscan(sample_df):
+def test_clustering_kmeans_auto_k_sweep(tmp_path):
+    from sklearn.datasets import make_blobs
+
+    X, _ = make_blobs(n_samples=600, centers=4, n_features=3, cluster_std=0.6, random_state=0)
+    df = pd.DataFrame(X, columns=["x", "y", "z"])
+    result = clustering_analysis.run_clustering(df, algorithm="kmeans", n_clusters=None,
+                                                output_filename="test_auto_k.csv", output_dir=tmp_path)
+    assert result["n_clusters"] == 4
+    assert [row["k"] for row in result["k_sweep"]][:3] == [2, 3, 4]
+    assert result["silhouette_score"] > 0.5
+
+
+def test_batch_clustering_parallel(tmp_path):
+    from sklearn.datasets import make_blobs
+
+    (tmp_path / "out").mkdir()
+    data_dir = tmp_path / "processed"
+    data_dir.mkdir()
+    for name, seed in [("c", 0), ("a", 1), ("b", 2)]:
+        X, _ = make_blobs(n_samples=300, centers=3, n_features=3, random_state=seed)
+        pd.DataFrame(X, columns=["x", "y", "z"]).to_csv(data_dir / f"{name}.csv", index=False)
+
+    parallel = clustering_analysis.run_batch_clustering(data_dir, max_workers=2, blas_threads=1,
+                                                        output_dir=tmp_path / "out")
+    serial = clustering_analysis.run_batch_clustering(data_dir, max_workers=1, output_dir=tmp_path / "out")
+    assert [Path(f).name for f in parallel["clustered_file"]] == ["a_clustered.csv", "b_clustered.csv",
+                                                                    "c_clustered.csv"]
+    assert parallel["cluster_counts"].tolist() == serial["cluster_counts"].tolist()
+    assert (tmp_path / "out" / "clustering_summary.csv").exists()
+
+
+def test_projection_backends_agree(tmp_path):
+    from data_intelligence_system.analysis.projection import (choose_pca_backend, fit_file_projection, project,
+                                                              project_file)
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(7)
+    latent = rng.normal(size=(3000, 2)) * [5, 2]
+    df = pd.DataFrame(latent @ rng.normal(size=(2, 6)) + rng.normal(scale=0.1, size=(3000, 6)),
+                      columns=[f"f{i}" for i in range(6)])
+    df.loc[::11, "f0"] = np.nan
+    path = tmp_path / "wide.csv"
+    df.to_csv(path, index=False)
+
+    clean = df.dropna()
+    exact = project(StandardScaler().fit_transform(clean), backend="full")
+    out_of_core = project_file(path, n_components=2, chunk_size=400)
+    np.testing.assert_array_equal(out_of_core.index, clean.index)
+    randomized = project(StandardScaler().fit_transform(clean), backend="randomized")
+    for component in range(2):
+        assert abs(np.corrcoef(out_of_core.iloc[:, component], exact[:, component])[0, 1]) > 0.99
+        assert abs(np.corrcoef(randomized[:, component], exact[:, component])[0, 1]) > 0.99
+
+    fitted = fit_file_projection(path, n_components=2, chunk_size=400)
+    np.testing.assert_allclose(fitted.transform(clean.to_numpy()), out_of_core.to_numpy())
+
+    assert choose_pca_backend(100, 6) == "full"
+    assert choose_pca_backend(5000, 2000) == "randomized"
+
+
+def test_sampled_clustering_projects_whole_file(tmp_path, monkeypatch):
+    from sklearn.datasets import make_blobs
+    from data_intelligence_system.utils import memory_planner
+
+    X, _ = make_blobs(n_samples=2000, centers=3, n_features=4, random_state=3)
+    path = tmp_path / "big.csv"
+    pd.DataFrame(X, columns=["a", "b", "c", "d"]).to_csv(path, index=False)
+    sample = pd.read_csv(path).sample(300, random_state=0).reset_index(drop=True)
+    plan = memory_planner.ExecutionPlan(mode=memory_planner.SAMPLED, budget_bytes=0, sample_rows=300)
+    monkeypatch.setattr(clustering_analysis, "load_with_plan", lambda *a, **k: (sample.copy(), plan))
+    monkeypatch.setattr(clustering_analysis, "CLUSTERING_RESULTS_DIR", tmp_path)
+    fitted = []
+    real_fit = clustering_analysis.fit_file_projection
+    monkeypatch.setattr(clustering_analysis, "fit_file_projection",
+                        lambda *a, **k: fitted.append(a[0]) or real_fit(*a, **k))
+
+    result = clustering_analysis._cluster_file(path)
+    assert result["execution_mode"] == memory_planner.SAMPLED
+    assert fitted == [path]
+    assert Path(result["plot_file"]).exists()
+
+
+def test_clustering_dbscan(sample_df, tmp_path):
     result = clustering_analysis.run_clustering(sample_df, algorithm="dbscan", dbscan_eps=0.3,
-                                                output_filename="test_dbscan.csv")
+                                                output_filename="test_dbscan.csv", output_dir=tmp_path)
     assert isinstance(result, dict)
     assert result["algorithm"] == "dbscan"
     assert "cluster_counts" in result
     assert "clustered_file" in result
 
 
+def test_scalable_density_clustering_matches_exact_dbscan(tmp_path):
+    from sklearn.datasets import make_blobs
+    from sklearn.metrics import adjusted_rand_score
+    from data_intelligence_system.ml_models.clustering.density import ScalableDensityClusterer
+
+    X, _ = make_blobs(n_samples=3000, centers=3, n_features=3, cluster_std=0.6, random_state=1)
+    exact = ScalableDensityClusterer(eps=0.3, min_samples=5, max_fit_rows=10 ** 6).fit_predict(X)
+    knn = ScalableDensityClusterer(eps=0.3, min_samples=5, max_fit_rows=500)
+    labels = knn.fit_predict(X)
+    assert adjusted_rand_score(exact, labels) > 0.99
+    assert (labels == -1).sum() == (exact == -1).sum()
+
+    # التنبؤ بأقرب نقطة مركزية دون إعادة التدريب
+    anchors = knn.anchors_.copy()
+    np.testing.assert_array_equal(knn.predict(X[:200])[labels[:200] != -1], labels[:200][labels[:200] != -1])
+    np.testing.assert_array_equal(knn.predict(np.full((1, 3), 1e6)), [-1])
+    np.testing.assert_array_equal(knn.anchors_, anchors)
+
+    result = clustering_analysis.run_clustering(pd.DataFrame(X, columns=["x", "y", "z"]), algorithm="hdbscan",
+                                                output_filename="test_hdbscan.csv", output_dir=tmp_path)
+    assert result["algorithm"] == "hdbscan"
+    assert len([k for k in result["cluster_counts"] if k != -1]) == 3
+
+
+def test_dbscan_model_rejects_unsupported_params():
+    from data_intelligence_system.ml_models.clustering.dbscan import DBSCANClusteringModel
+
+    DBSCANClusteringModel({"eps": 0.5, "min_samples": 5, "metric": "euclidean"})
+    with pytest.raises(ValueError, match="metric"):
+        DBSCANClusteringModel({"eps": 0.5, "metric": "cosine"})
+
+
 def test_target_relation_analysis(sample_df):
     # إضافة عمود هدف بسيط للاختبار
     df_copy = sample_df.copy()
@@ -91,6 +536,136 @@ def test_target_relation_analysis(sample_df):
     assert "p_value" in summary.columns
 
 
+
+def test_target_kernel_matches_scipy():
+    from scipy.stats import chi2_contingency, f_oneway
+    from data_intelligence_system.analysis import target_kernel
+
+    rng = np.random.default_rng(11)
+    df = pd.DataFrame({
+        "x": rng.normal(size=400) + 1e6,
+        "z": rng.normal(size=400) + rng.integers(0, 3, size=400),
+        "city": rng.choice(["a", "b", "c", None], size=400),
+        "y": rng.choice(["p", "q", "r"], size=400),
+    })
+    df.loc[::9, "x"] = np.nan
+    df.loc[::17, "y"] = None
+
+    anova = target_kernel.grouped_anova(df, "y", ["x", "z"]).set_index("feature")
+    groups = df["y"].dropna().unique()
+    for col in ["x", "z"]:
+        f_val, p_val = f_oneway(*[df[df["y"] == g][col].dropna() for g in groups])
+        assert anova.loc[col, "f_statistic"] == pytest.approx(f_val, rel=1e-9)
+        assert anova.loc[col, "p_value"] == pytest.approx(p_val, rel=1e-9)
+
+    table = target_kernel.contingency_tables(df, "y", ["city"])["city"]
+    pd.testing.assert_frame_equal(table, pd.crosstab(df["city"], df["y"]), check_names=False)
+    chi = target_kernel.grouped_chi_square(df, "y", ["city"]).iloc[0]
+    assert chi["chi2_statistic"] == pytest.approx(chi2_contingency(pd.crosstab(df["city"], df["y"]))[0])
+
+
+def test_duckdb_target_relation_matches_pandas(tmp_path, monkeypatch):
+    pytest.importorskip("duckdb")
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame({
+        "x": rng.normal(size=900) + 1e6,
+        "z": rng.normal(size=900) + rng.integers(0, 3, size=900),
+        "city": rng.choice(["a", "b", "c", None], size=900),
+        "target": rng.integers(0, 3, size=900),
+    })
+    df.loc[::9, "x"] = np.nan
+    path = tmp_path / "relation.csv"
+    df.to_csv(path, index=False)
+    monkeypatch.setattr(target_relation_analysis, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(target_relation_analysis, "SUMMARY_PATH", tmp_path / "summary.csv")
+
+    expected = target_relation_analysis.run_target_relation_analysis(path, target_col="target", engine="pandas")
+    result = target_relation_analysis.run_target_relation_analysis(path, target_col="target", engine="duckdb")
+    expected, result = expected.set_index("feature"), result.set_index("feature")
+    assert sorted(result.index) == sorted(expected.index) == ["city", "x", "z"]
+    for col in ["f_statistic", "chi2_statistic", "p_value"]:
+        np.testing.assert_allclose(result.loc[expected.index, col], expected[col], rtol=1e-7)
+
+
+def test_duckdb_contingency_tables_in_one_pass(tmp_path):
+    pytest.importorskip("duckdb")
+    from data_intelligence_system.analysis import target_kernel
+    from data_intelligence_system.analysis.duckdb_engine import DuckDBEngine
+
+    rng = np.random.default_rng(8)
+    df = pd.DataFrame({
+        "city": rng.choice(["a", "b", "c", None], size=600),
+        "tier": rng.integers(1, 4, size=600),
+        "channel": rng.choice(["web", "shop"], size=600),
+        "target": rng.choice(["yes", "no", None], size=600),
+    })
+    path = tmp_path / "contingency.parquet"
+    df.to_parquet(path)
+
+    with DuckDBEngine(threads=1) as engine:
+        scans = []
+        engine_query = engine.query
+        engine.query = lambda sql: scans.append(sql) or engine_query(sql)
+        tables = engine.contingency_tables(path, "target", ["city", "tier", "channel"])
+    assert sum("GROUP BY" in sql for sql in scans) == 1
+
+    expected = target_kernel.contingency_tables(df, "target", ["city", "tier", "channel"])
+    for col, table in expected.items():
+        pd.testing.assert_frame_equal(tables[col], table.sort_index().sort_index(axis=1), check_dtype=False)
+
+
+def test_binned_mutual_information_ranks_nonlinear_relation():
+    from data_intelligence_system.analysis.target_kernel import mutual_information_scores
+
+    rng = np.random.default_rng(5)
+    x = rng.uniform(-1, 1, size=5000)
+    df = pd.DataFrame({
+        "x": x,
+        "noise": rng.normal(size=5000),
+        "city": rng.choice(["a", "b", None], size=5000),
+        "y": x ** 2 + rng.normal(scale=0.01, size=5000),
+    })
+
+    scores = mutual_information_scores(df, "y", ["x", "noise", "city"], sample_rows=4000).set_index("feature")
+    assert scores.loc["x", "normalized_mi"] > 0.3
+    assert scores.loc["noise", "mutual_info"] < 0.05
+    assert scores.loc["city", "mutual_info"] < 0.05
+    assert scores["normalized_mi"].between(0, 1).all()
+
+
+def test_parallel_mutual_information_keeps_mixed_column_labels():
+    from data_intelligence_system.analysis.target_kernel import MIN_PARALLEL_COLUMNS, mutual_information_scores
+
+    rng = np.random.default_rng(9)
+    columns = [i if i % 2 else f"c{i}" for i in range(MIN_PARALLEL_COLUMNS)]
+    df = pd.DataFrame(rng.normal(size=(500, len(columns))), columns=columns).assign(y=rng.choice(["a", "b"], 500))
+
+    parallel = mutual_information_scores(df, "y", columns, workers=2)
+    serial = mutual_information_scores(df, "y", columns, workers=1)
+    assert parallel["feature"].tolist() == columns
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_analysis_plan_matches_individual_analyses(sample_df, workers):
+    from data_intelligence_system.analysis.analysis_plan import run_analysis_plan
+
+    df = sample_df.copy()
+    df.loc[::7, "income"] = np.nan
+    results = run_analysis_plan(df, target_col="target", workers=workers)
+    assert list(df.columns) == list(sample_df.columns)
+
+    corr = correlation_analysis.run_correlation_analysis(df.copy())
+    pd.testing.assert_frame_equal(results["correlation"]["correlation_matrix"], corr["correlation_matrix"])
+    outliers = outlier_detection.run_outlier_detection(df.copy())
+    assert results["outliers"]["outliers_detected"] == outliers["outliers_detected"]
+    clusters = clustering_analysis.run_clustering(df.copy(), n_clusters=3)
+    assert results["clustering"]["cluster_counts"] == clusters["cluster_counts"]
+    target = target_relation_analysis.run_target_relation_analysis(df.copy(), target_col="target")
+    pd.testing.assert_frame_equal(results["target"], target)
+    assert results["descriptive"]["general_info"]["Number of Rows"] == len(df)
+
+
 # ✅ يمكن إضافة اختبارات إضافية لدوال analysis_utils.py لاحقًا
 # مثل: ensure_output_dir, save_plot, save_dataframe
 
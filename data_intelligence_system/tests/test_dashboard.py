@@ -100,6 +100,40 @@ def test_register_charts_callbacks_no_error():
     assert True
 
 
+def test_prepare_line_data_reads_persisted_rollup_of_same_source(tmp_path, monkeypatch):
+    from functools import partial
+
+    from data_intelligence_system.analysis.rollups import rebuild_rollups
+    from data_intelligence_system.dashboard.callbacks import charts_callbacks
+    from data_intelligence_system.etl import incremental
+    from data_intelligence_system.utils.result_cache import file_fingerprint
+
+    df = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=48, freq="h"), "sales": range(48)})
+    raw_path = tmp_path / "sales.csv"
+    df.to_csv(raw_path, index=False)
+    rebuild_rollups([df], tmp_path / "cleaned_sales", source_fingerprint=file_fingerprint(raw_path))
+    monkeypatch.setattr(charts_callbacks, "load_cached_rollup", partial(incremental.load_cached_rollup,
+                                                                        output_dir=tmp_path))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("التجميع المحفوظ يجب أن يُستخدم")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(charts_callbacks, "compute_rollups", fail)
+        _, x_axis, y_data = charts_callbacks.prepare_line_data(df.copy(), "sales", str(raw_path))
+    assert x_axis == ["2024-01-01", "2024-01-02"]
+    assert y_data == [11.5, 35.5]
+
+    # ملف بنفس الاسم بمحتوى مختلف: التجميع المحفوظ لا يطابقه ويُحسب من البيانات المعروضة
+    changed = df.assign(sales=df["sales"] * 2)
+    changed.to_csv(raw_path, index=False)
+    _, x_changed, y_changed = charts_callbacks.prepare_line_data(changed, "sales", str(raw_path))
+    assert (x_changed, y_changed) == (x_axis, [23.0, 71.0])
+
+    _, x_missing, y_missing = charts_callbacks.prepare_line_data(df.copy(), "sales", str(tmp_path / "unknown.csv"))
+    assert (x_missing, y_missing) == (x_axis, y_data)
+
+
 def test_register_export_callbacks_no_error():
     app = Dash(__name__)
     register_export_callbacks(app)
@@ -123,6 +123,97 @@ def test_descriptive_statistics_empty(analysis_service):
     assert result == {}
 
 
+@patch("data_intelligence_system.api.services.analysis_service.run_correlation_analysis")
+def test_analysis_results_cached_until_source_changes(mock_corr, tmp_path, dummy_df):
+    from data_intelligence_system.utils.result_cache import ResultCache
+
+    mock_corr.side_effect = lambda df, method: {"rows": len(df), "method": method}
+    file_path = tmp_path / "clean_data.csv"
+    dummy_df.to_csv(file_path, index=False)
+    cache_dir = tmp_path / "cache"
+
+    service = AnalysisService(data_path=file_path, cache=ResultCache(cache_dir))
+    assert service.correlation_analysis() == {"rows": 3, "method": "pearson"}
+    assert service.correlation_analysis() == {"rows": 3, "method": "pearson"}
+    service.correlation_analysis(method="spearman")
+    assert mock_corr.call_count == 2
+
+    # خدمة جديدة بذاكرة فارغة: النتيجة من طبقة القرص
+    fresh = AnalysisService(data_path=file_path, cache=ResultCache(cache_dir))
+    fresh.correlation_analysis()
+    assert mock_corr.call_count == 2
+
+    pd.concat([dummy_df, dummy_df]).to_csv(file_path, index=False)
+    assert fresh.correlation_analysis() == {"rows": 6, "method": "pearson"}
+    assert mock_corr.call_count == 3
+    assert len(list(cache_dir.glob("*.pkl"))) == 1
+
+
+def test_result_cache_evicts_by_size(tmp_path):
+    from data_intelligence_system.utils.result_cache import MISSING, ResultCache
+
+    cache = ResultCache(tmp_path, max_memory_mb=0.05, max_disk_mb=0.05)
+    keys = [cache.make_key("fp", "analysis", {"i": i}) for i in range(3)]
+    for key in keys:
+        cache.set(key, b"x" * 20000)
+    assert cache.get(keys[-1]) == b"x" * 20000
+    assert len(cache._memory) == 2
+    assert len(list(tmp_path.glob("*.pkl"))) == 2
+
+    cache.invalidate("fp")
+    assert cache.get(keys[-1]) is MISSING
+
+
+@patch("data_intelligence_system.api.services.dataset_registry.load_data")
+def test_dataset_registry_lru_with_arrow_spill(mock_load, tmp_path):
+    pytest.importorskip("pyarrow")
+    from data_intelligence_system.api.services.dataset_registry import DatasetRegistry
+
+    frames = {}
+    for name in ["a", "b"]:
+        frames[name] = pd.DataFrame({"x": range(50000), "label": [name] * 50000})
+        frames[name].to_csv(tmp_path / f"{name}.csv", index=False)
+    mock_load.side_effect = lambda path: frames[Path(path).stem].copy()
+
+    registry = DatasetRegistry(memory_budget_mb=4, spill_dir=tmp_path / "spill")
+    registry.register("a", tmp_path / "a.csv")
+    registry.register("b", tmp_path / "b.csv")
+    assert registry.memory_usage() == {}
+
+    registry.get("a")
+    registry.get("b")
+    assert list(registry.memory_usage()) == ["b"]
+    assert len(list((tmp_path / "spill").glob("*.arrow"))) == 1
+
+    # إعادة التحميل من نسخة Arrow دون قراءة الملف المصدر
+    pd.testing.assert_frame_equal(registry.get("a"), frames["a"])
+    assert mock_load.call_count == 2
+
+    service = AnalysisService(dataset="a", registry=registry, cache=None)
+    assert service.data is None
+    pd.testing.assert_frame_equal(service.load_data(), frames["a"])
+
+
+
+@patch("data_intelligence_system.api.services.dataset_registry.load_data")
+def test_dataset_registry_services_do_not_mutate_shared_frame(mock_load, tmp_path):
+    from data_intelligence_system.api.services.dataset_registry import DatasetRegistry
+
+    shared = pd.DataFrame({"x": [1.0, 2.0, 10.0, 11.0, 20.0, 21.0] * 5, "species": ["a", "b", "c"] * 10})
+    (tmp_path / "d.csv").write_text("x,species\n")
+    mock_load.return_value = shared
+    registry = DatasetRegistry(memory_budget_mb=None, spill=False)
+    registry.register("d", tmp_path / "d.csv")
+
+    service = AnalysisService(dataset="d", registry=registry, cache=None)
+    service.target_relationship("species")
+    service.clustering_insights(n_clusters=2)
+
+    assert list(shared.columns) == ["x", "species"]
+    assert shared["species"].dtype == object
+    assert list(registry.get("d").columns) == ["x", "species"]
+    assert mock_load.call_count == 1
+
 # ================== اختبارات dashboard_service ==================
 
 @patch("pathlib.Path.exists", return_value=True)
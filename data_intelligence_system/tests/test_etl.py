@@ -1,10 +1,14 @@
+import time
+
 import pytest
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
 # استيراد مطلق من جذر المشروع
-from data_intelligence_system.etl import extract, transform, load, pipeline, etl_utils
+from data_intelligence_system.etl import extract, transform, load, pipeline, etl_utils, chunked_transform, transform_plan, engines, watch, incremental
+from data_intelligence_system.utils import memory_planner
 
 
 # ---- بيانات مساعدة للاختبارات ----
@@ -131,13 +135,331 @@ def test_create_output_dir(tmp_path):
 @patch("data_intelligence_system.etl.pipeline.extract_file")
 @patch("data_intelligence_system.etl.pipeline.transform_datasets")
 @patch("data_intelligence_system.etl.pipeline.save_file")
-def test_run_full_pipeline(mock_save_file, mock_transform, mock_extract_file, sample_dataframe):
+def test_run_full_pipeline(mock_save_file, mock_transform, mock_extract_file, sample_dataframe, tmp_path):
     mock_extract_file.return_value = {"file.csv": sample_dataframe}
     mock_transform.return_value = [("file.csv", sample_dataframe)]
     mock_save_file.return_value = True
 
-    result = pipeline.run_full_pipeline(filepath="fake/path/file.csv", encode_type="label", scale_type="standard")
+    result = pipeline.run_full_pipeline(filepath="fake/path/file.csv", output_dir=tmp_path,
+                                        encode_type="label", scale_type="standard")
+    assert result is True
+
+
+@patch("data_intelligence_system.etl.pipeline.extract_file")
+@patch("data_intelligence_system.etl.pipeline.transform_datasets")
+def test_run_full_pipeline_chunked_for_large_file(mock_transform, mock_extract_file, tmp_path):
+    raw_path = tmp_path / "big.csv"
+    pd.DataFrame({"A": range(500), "B": ["x", "y"] * 250}).to_csv(raw_path, index=False)
+    mock_transform.return_value = []
+
+    result = pipeline.run_full_pipeline(filepath=raw_path, output_dir=tmp_path, budget_mb=0.001)
     assert result is True
+    mock_extract_file.assert_not_called()
+    assert (tmp_path / "cleaned_big.csv").exists()
+
+
+def test_run_full_pipeline_rebuilds_time_rollups(tmp_path, monkeypatch):
+    from data_intelligence_system.analysis.rollups import compute_rollups, load_rollup, rollup_source
+    from data_intelligence_system.utils.result_cache import file_fingerprint
+
+    monkeypatch.setattr(pipeline, "analyze_columns", lambda df, name: None)
+    raw = pd.DataFrame({"Order Date": pd.date_range("2024-01-01", periods=300, freq="h").astype(str),
+                        "Amount": np.arange(300, dtype=float)})
+    raw_path = tmp_path / "orders.csv"
+    raw.to_csv(raw_path, index=False)
+    expected = compute_rollups(raw.assign(**{"Order Date": pd.to_datetime(raw["Order Date"])})
+                               .rename(columns={"Order Date": "order_date", "Amount": "amount"}), "order_date")
+
+    for budget_mb in (None, 0.001):  # في الذاكرة ثم على دفعات: كل تشغيل كامل يعيد البناء ولا يضاعف
+        assert pipeline.run_full_pipeline(filepath=raw_path, output_dir=tmp_path / "out", budget_mb=budget_mb)
+        daily = load_rollup(tmp_path / "out" / "cleaned_orders", "order_date", "day")
+        pd.testing.assert_frame_equal(daily, expected["day"])
+        assert rollup_source(tmp_path / "out" / "cleaned_orders") == file_fingerprint(raw_path)
+
+    # دفعة ملحقة: التجميعات لم تعد تطابق الملف المصدر وحده
+    incremental.append_batch(raw.iloc[:5].assign(Amount=-1.0), "orders", output_dir=tmp_path / "out")
+    assert rollup_source(tmp_path / "out" / "cleaned_orders") is None
+
+
+
+def test_run_full_pipeline_persists_params_for_append(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "analyze_columns", lambda df, name: None)
+    raw = pd.DataFrame({"Age": [20.0, 30.0, 40.0, 50.0] * 25, "City": ["NY", "LA", "SF", "NY"] * 25})
+    raw_path = tmp_path / "people.csv"
+    raw.to_csv(raw_path, index=False)
+    expected = chunked_transform.fit_transform_params(iter([raw]))
+
+    for budget_mb in (None, 0.001):
+        assert pipeline.run_full_pipeline(filepath=raw_path, output_dir=tmp_path / "out", budget_mb=budget_mb)
+        params_path = incremental.get_dataset_dir("people", tmp_path / "out") / incremental.PARAMS_FILE
+        params = chunked_transform.load_transform_params(params_path)
+        assert params.categories == expected.categories
+        assert params.scale_mean == pytest.approx(expected.scale_mean)
+
+    # الدفعة الملحقة الأولى تستخدم معاملات البيانات كاملة ولا تعيد التثبيت على نفسها
+    incremental.append_batch(pd.DataFrame({"Age": [99.0], "City": ["NY"]}), "people", output_dir=tmp_path / "out")
+    assert chunked_transform.load_transform_params(params_path).scale_mean == pytest.approx(expected.scale_mean)
+
+# ---- اختبارات chunked_transform.py ----
+
+def test_stream_transform_matches_in_memory(tmp_path):
+    raw = pd.DataFrame({
+        "Name": ["alice", "bob", "alice", "dan", None, "bob"] * 20,
+        "Age": [25.0, 30.0, 25.0, 41.0, 33.0, 30.0] * 20,
+        "City": ["NY", "LA", "NY", "SF", "LA", "LA"] * 20,
+    })
+    raw_path = tmp_path / "raw.csv"
+    raw.to_csv(raw_path, index=False)
+
+    expected = transform.transform_datasets([("raw", pd.read_csv(raw_path))])[0][1]
+    out_path = chunked_transform.stream_transform_file(
+        raw_path, tmp_path / "out.csv",
+        chunk_reader=lambda: pd.read_csv(raw_path, chunksize=7),
+    )
+    result = pd.read_csv(out_path)
+
+    assert list(result.columns) == list(expected.columns)
+    assert len(result) == len(expected)
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False, atol=1e-9)
+
+
+
+def test_stream_transform_dedups_across_spilled_runs_and_warns_on_new_columns(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(chunked_transform, "DEDUP_BUFFER_SIZE", 4)
+    chunks = [
+        pd.DataFrame({"id": [1, 2, 3], "v": ["a", "b", "c"]}),
+        pd.DataFrame({"id": [4, 5, 1], "v": ["d", "e", "a"]}),
+        pd.DataFrame({"id": [2, 6, 6], "v": ["b", "f", "f"], "Extra": [0, 0, 0]}),
+    ]
+
+    with caplog.at_level("WARNING", logger=chunked_transform.logger.name):
+        out_path = chunked_transform.stream_transform_file(
+            tmp_path / "raw.csv", tmp_path / "out.csv", chunk_reader=lambda: iter(chunks))
+    result = pd.read_csv(out_path)
+
+    assert len(result) == 6
+    assert list(result.columns) == ["id", "v"]
+    assert "extra" in caplog.text
+    assert not list(tmp_path.glob(".dedup-*"))
+
+# ---- اختبارات engines.py ----
+
+@pytest.mark.parametrize("encode_type", ["label", "onehot"])
+def test_polars_engine_matches_pandas(sample_dataframe, encode_type):
+    pytest.importorskip("polars")
+    expected = transform.transform_datasets([("test", sample_dataframe.copy())],
+                                            encode_type=encode_type, engine="pandas")[0][1]
+    result = transform.transform_datasets([("test", sample_dataframe.copy())],
+                                          encode_type=encode_type, engine="polars")[0][1]
+    pd.testing.assert_frame_equal(result, expected, atol=1e-9)
+
+
+def test_get_transform_engine_unknown():
+    with pytest.raises(ValueError):
+        engines.get_transform_engine("spark")
+
+
+# ---- اختبارات transform_plan.py ----
+
+@pytest.mark.parametrize("encode_type", ["label", "onehot"])
+def test_transform_plan_matches_eager(sample_dataframe, encode_type):
+    selected = ["age", "city_NY"] if encode_type == "onehot" else ["age", "city"]
+    plan = (transform_plan.TransformPlan(sample_dataframe)
+            .unify_names().fill_missing().encode(encode_type).scale().dedup()
+            .filter("age > -5").select(selected))
+    pd.testing.assert_frame_equal(plan.collect(), plan.collect(optimize=False), atol=1e-9)
+    assert "dedup" in plan.explain()
+
+
+def test_transform_datasets_lazy_matches_eager(sample_dataframe):
+    eager = transform.transform_datasets([("test", sample_dataframe.copy())])[0][1]
+    lazy = transform.transform_datasets([("test", sample_dataframe.copy())], lazy=True)[0][1]
+    pd.testing.assert_frame_equal(lazy, eager, atol=1e-9)
+
+
+def test_transform_plan_rejects_out_of_order_steps(sample_dataframe):
+    with pytest.raises(ValueError):
+        transform_plan.TransformPlan(sample_dataframe).scale().fill_missing()
+
+
+# ---- اختبارات memory_planner.py ----
+
+def test_plan_execution_modes(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"a": range(2000), "b": ["text"] * 2000}).to_csv(path, index=False)
+
+    assert memory_planner.plan_execution(path, budget_mb=1024).mode == memory_planner.IN_MEMORY
+    chunked = memory_planner.plan_execution(path, budget_mb=0.01)
+    assert chunked.mode == memory_planner.CHUNKED and chunked.chunk_size > 0
+    sampled = memory_planner.plan_execution(path, supported_modes=("in_memory", "sampled"), budget_mb=0.01)
+    assert sampled.mode == memory_planner.SAMPLED and sampled.sample_rows > 0
+
+
+def test_load_with_plan_samples_large_file(tmp_path):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"a": range(5000)}).to_csv(path, index=False)
+    df, plan = memory_planner.load_with_plan(path, budget_mb=0.01)
+    assert plan.mode == memory_planner.SAMPLED
+    assert 0 < len(df) < 5000
+
+
+
+def test_stratified_sampling_over_chunks_is_cached_per_version(tmp_path):
+    from data_intelligence_system.utils import sampling
+    from data_intelligence_system.utils.result_cache import ResultCache
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"label": rng.choice(["common", "mid", "rare"], p=[0.9, 0.095, 0.005], size=20000),
+                       "value": rng.normal(size=20000)})
+    df["row"] = np.arange(len(df))
+    path = tmp_path / "big.csv"
+    df.to_csv(path, index=False)
+    cache = ResultCache(tmp_path / "cache")
+
+    sample = sampling.get_sample(path, 500, by="label", chunk_size=3000, cache=cache)
+    assert abs(len(sample) - 500) <= 3
+    assert sample["row"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(sample, df.iloc[sample["row"]].reset_index(drop=True))
+    shares = sample["label"].value_counts(normalize=True)
+    expected = df["label"].value_counts(normalize=True)
+    assert (shares - expected).abs().max() < 0.01
+    assert sample["label"].value_counts()["rare"] >= 1
+
+    # نفس نسخة الملف: العينة من الذاكرة المؤقتة دون قراءة الملف
+    with patch.object(sampling, "iter_chunks", side_effect=AssertionError("re-read")):
+        pd.testing.assert_frame_equal(sampling.get_sample(path, 500, by="label", chunk_size=3000, cache=cache),
+                                      sample)
+    df.iloc[:10000].to_csv(path, index=False)
+    assert sampling.get_sample(path, 500, by="label", cache=cache)["row"].max() < 10000
+
+    reservoir = sampling.get_sample(df, 1000)
+    assert len(reservoir) == 1000 and reservoir.index.is_monotonic_increasing
+    assert abs(reservoir["value"].mean() - df["value"].mean()) < 0.1
+
+    stratified = sampling.get_sample(df, 500, by="label")
+    assert abs(len(stratified) - 500) <= 3 and stratified.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(stratified, df.loc[stratified.index])
+    assert stratified["label"].value_counts()["rare"] >= 1
+
+# ---- اختبارات incremental.py ----
+
+def test_append_batch_reuses_params_and_updates_stats(tmp_path):
+    first = pd.DataFrame({"Age": [20.0, None, 40.0], "City": ["NY", "LA", "NY"]})
+    second = pd.DataFrame({"Age": [40.0, 60.0, None], "City": ["NY", "SF", "LA"]})
+
+    incremental.append_batch(first, "people", output_dir=tmp_path)
+    params_before = (incremental.get_dataset_dir("people", tmp_path) / incremental.PARAMS_FILE).read_text()
+    part = incremental.append_batch(second, "people", output_dir=tmp_path)
+
+    assert part.name == "part-00001.parquet"
+    assert (incremental.get_dataset_dir("people", tmp_path) / incremental.PARAMS_FILE).read_text() == params_before
+
+    full = incremental.load_appended_dataset("people", output_dir=tmp_path)
+    # (40, NY) و (None→30, LA) مكرران من الدفعة الأولى بعد الملء بالوسيط المحفوظ
+    assert len(full) == 4
+    # SF فئة غير معروفة للمعاملات المثبتة → الرمز -1 (أصغر من كل رموز الدفعة الأولى بعد الموازنة)
+    assert full["city"].iloc[-1] < full["city"].iloc[:3].min()
+
+    stats = incremental.load_cached_stats("people", output_dir=tmp_path)
+    assert stats["general_info"]["Number of Rows"] == 4
+    age = stats["numeric_summary"]["age"]
+    assert age["mean"] == pytest.approx(full["age"].mean())
+    assert age["std"] == pytest.approx(full["age"].std())
+    assert age["50%"] == pytest.approx(full["age"].median())
+
+
+def test_concurrent_append_batches_get_distinct_parts(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    batches = [pd.DataFrame({"id": np.arange(i * 50, (i + 1) * 50), "v": ["a", "b"] * 25}) for i in range(8)]
+    incremental.append_batch(batches[0], "events", output_dir=tmp_path)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        parts = list(executor.map(lambda b: incremental.append_batch(b, "events", output_dir=tmp_path), batches[1:]))
+
+    assert len({p.name for p in parts}) == 7
+    assert len(incremental.load_appended_dataset("events", output_dir=tmp_path)) == 400
+    assert incremental.load_cached_stats("events", output_dir=tmp_path)["general_info"]["Number of Rows"] == 400
+
+
+def test_append_batch_fills_missing_in_columns_complete_in_first_batch(tmp_path):
+    first = pd.DataFrame({"Age": [20.0, 30.0, 40.0], "City": ["NY", "LA", "NY"]})
+    second = pd.DataFrame({"Age": [None, 50.0], "City": [None, "LA"]})
+
+    incremental.append_batch(first, "complete", output_dir=tmp_path)
+    incremental.append_batch(second, "complete", output_dir=tmp_path)
+
+    full = incremental.load_appended_dataset("complete", output_dir=tmp_path)
+    assert len(full) == 5 and not full.isnull().any().any()
+    # المفقود يُملأ بوسيط ومنوال الدفعة الأولى المحفوظين، وليس NaN أو الرمز -1
+    assert full["age"].iloc[3] == pytest.approx(full["age"].iloc[1])
+    assert full["city"].iloc[3] == full["city"].iloc[0]
+
+
+def test_append_batch_updates_time_rollups_incrementally(tmp_path):
+    from data_intelligence_system.analysis.rollups import compute_rollups, rollup_values
+
+    rng = np.random.default_rng(0)
+    times = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90 * 24 * 60, 600), unit="min")
+    df = pd.DataFrame({"Order Date": times.strftime("%Y-%m-%d %H:%M:%S"),
+                       "Amount": rng.normal(100, 10, 600), "Qty": rng.integers(1, 5, 600)})
+    # المفقود في الدفعة الأولى فقط: تواريخ الدفعة الثانية فئات غير معروفة (-1) فتتطابق صفوفها المملوءة
+    df.loc[df.index[:400:7], "Amount"] = np.nan
+
+    # الدفعة الثانية غير مرتبة زمنيًا وتتداخل فتراتها مع الأولى
+    incremental.append_batch(df.iloc[:400], "orders", output_dir=tmp_path)
+    incremental.append_batch(df.iloc[400:], "orders", output_dir=tmp_path)
+
+    expected = df.assign(order_date=pd.to_datetime(df["Order Date"]))
+    for granularity, key in [("day", expected["order_date"].dt.floor("D")),
+                             ("week", expected["order_date"].dt.to_period("W").dt.start_time),
+                             ("month", expected["order_date"].dt.to_period("M").dt.start_time)]:
+        rollup = incremental.load_cached_rollup("orders", "order_date", granularity, output_dir=tmp_path)
+        grouped = expected.groupby(key)
+        assert rollup["rows"].tolist() == grouped.size().tolist()
+        means = rollup_values(rollup, stat="mean")
+        assert np.allclose(means["amount"], grouped["Amount"].mean())
+        assert np.allclose(rollup_values(rollup, stat="max")["qty"], grouped["Qty"].max())
+
+    full = compute_rollups(expected.rename(columns={"Amount": "amount", "Qty": "qty"}), "order_date")
+    pd.testing.assert_frame_equal(
+        incremental.load_cached_rollup("orders", "order_date", "hour", output_dir=tmp_path), full["hour"])
+
+# ---- اختبارات watch.py ----
+
+def test_watcher_processes_only_new_stable_files(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    pd.DataFrame({"a": [1]}).to_csv(raw_dir / "old.csv", index=False)
+    processed = []
+    watcher = watch.RawFileWatcher(paths=[raw_dir], output_dir=tmp_path, debounce_seconds=0.2,
+                                   processor=lambda p: processed.append(p.name) or True,
+                                   use_watchdog=False)
+    try:
+        pd.DataFrame({"a": [1, 2]}).to_csv(raw_dir / "new.csv", index=False)
+        (raw_dir / "notes.txt").write_text("ignored")
+        assert watcher.poll_once() == []  # لم يستقر بعد
+
+        time.sleep(0.3)
+        assert [p.name for p in watcher.poll_once()] == ["new.csv"]
+        assert watcher.wait_idle(timeout=5)
+        assert processed == ["new.csv"]
+        assert watcher.poll_once() == []
+    finally:
+        watcher.stop()
+
+    # ملف وصل أثناء توقف المراقب يُعالج عند إعادة التشغيل، والملفات المعالجة سابقًا لا تُعاد
+    pd.DataFrame({"a": [3]}).to_csv(raw_dir / "while_down.csv", index=False)
+    restarted = watch.RawFileWatcher(paths=[raw_dir], output_dir=tmp_path, debounce_seconds=0.2,
+                                     processor=lambda p: processed.append(p.name) or True,
+                                     use_watchdog=False)
+    try:
+        restarted.poll_once()
+        time.sleep(0.3)
+        assert [p.name for p in restarted.poll_once()] == ["while_down.csv"]
+        assert restarted.wait_idle(timeout=5)
+    finally:
+        restarted.stop()
 
 
 # ---- اختبارات etl_utils.py ----
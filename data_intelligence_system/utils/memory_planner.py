@@ -0,0 +1,257 @@
+"""
+utils/memory_planner.py
+
+تقدير حجم البيانات في الذاكرة قبل تحميلها، واختيار نمط التنفيذ المناسب:
+    - in_memory: تحميل الملف كاملًا (السلوك الافتراضي)
+    - chunked: المعالجة على دفعات متتالية
+    - sampled: العمل على عينة عشوائية ممثلة
+
+الاستخدام:
+    from data_intelligence_system.utils.memory_planner import plan_execution, load_with_plan
+
+    plan = plan_execution("data/raw/big.csv", supported_modes=("in_memory", "sampled"))
+    df, plan = load_with_plan("data/raw/big.csv", supported_modes=("in_memory", "sampled"))
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.config.performance_config import (
+    MEMORY_BUDGET_MB,
+    MEMORY_BUDGET_FRACTION,
+    MEMORY_SAFETY_FACTOR,
+    ESTIMATE_SAMPLE_ROWS,
+    MIN_CHUNK_ROWS,
+    MAX_SAMPLE_ROWS,
+)
+from data_intelligence_system.utils.data_loader import load_data
+from data_intelligence_system.utils.logger import get_logger
+
+try:
+    import psutil  # type: ignore
+except ImportError:
+    psutil = None
+
+try:
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:
+    pq = None
+
+logger = get_logger(name="MemoryPlanner")
+
+IN_MEMORY = "in_memory"
+CHUNKED = "chunked"
+SAMPLED = "sampled"
+EXECUTION_MODES = (IN_MEMORY, CHUNKED, SAMPLED)
+
+# معامل تضخم تقريبي للصيغ التي لا يمكن أخذ عينة منها دون تحميلها كاملة
+FORMAT_EXPANSION = {
+    ".json": 2.0,
+    ".xlsx": 8.0,
+    ".xls": 3.0,
+    ".feather": 1.2,
+    ".parquet": 4.0,
+}
+TEXT_FORMATS = {".csv": ",", ".tsv": "\t"}
+
+
+@dataclass
+class MemoryEstimate:
+    path: Path
+    file_format: str
+    file_size: int
+    estimated_rows: Optional[int]
+    bytes_per_row: Optional[float]
+    estimated_bytes: int
+
+
+@dataclass
+class ExecutionPlan:
+    mode: str
+    budget_bytes: int
+    estimate: Optional[MemoryEstimate] = None
+    chunk_size: Optional[int] = None
+    sample_rows: Optional[int] = None
+
+    @property
+    def required_bytes(self) -> int:
+        if self.estimate is None:
+            return 0
+        return int(self.estimate.estimated_bytes * MEMORY_SAFETY_FACTOR)
+
+
+def get_available_memory() -> int:
+    """الذاكرة المتاحة حاليًا بالبايت (psutil إن وُجد، وإلا sysconf)."""
+    if psutil is not None:
+        return int(psutil.virtual_memory().available)
+    try:
+        return int(os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE"))
+    except (ValueError, OSError, AttributeError):
+        logger.warning("⚠️ تعذر قراءة الذاكرة المتاحة، سيتم افتراض 2GB.")
+        return 2 * 1024 ** 3
+
+
+def get_memory_budget(budget_mb: Optional[float] = None) -> int:
+    """
+    ميزانية الذاكرة بالبايت: القيمة الممررة، ثم الإعدادات، ثم نسبة من الذاكرة المتاحة.
+    """
+    budget_mb = budget_mb if budget_mb is not None else MEMORY_BUDGET_MB
+    if budget_mb:
+        return int(float(budget_mb) * 1024 ** 2)
+    return int(get_available_memory() * MEMORY_BUDGET_FRACTION)
+
+
+def _count_sample_bytes(path: Path, n_lines: int) -> Tuple[int, int]:
+    """عدد البايتات وعدد الأسطر لأول n_lines سطر بيانات (بعد الترويسة)."""
+    total, lines = 0, 0
+    with open(path, "rb") as f:
+        f.readline()  # الترويسة
+        for line in f:
+            total += len(line)
+            lines += 1
+            if lines >= n_lines:
+                break
+    return total, lines
+
+
+def estimate_memory_footprint(filepath: Union[str, Path],
+                              sample_rows: int = ESTIMATE_SAMPLE_ROWS) -> Optional[MemoryEstimate]:
+    """
+    تقدير حجم الملف في الذاكرة من حجمه على القرص وصيغته وعينة من أول الصفوف.
+    يعيد None إذا لم يكن الملف موجودًا.
+    """
+    path = Path(filepath)
+    if not path.exists() or not path.is_file():
+        return None
+
+    ext = path.suffix.lower()
+    file_size = path.stat().st_size
+
+    try:
+        if ext in TEXT_FORMATS:
+            sample = pd.read_csv(path, sep=TEXT_FORMATS[ext], nrows=sample_rows)
+            sample_bytes, sample_lines = _count_sample_bytes(path, sample_rows)
+            if sample.empty or sample_lines == 0:
+                return MemoryEstimate(path, ext, file_size, 0, None, 0)
+            bytes_per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample)
+            estimated_rows = int(file_size / (sample_bytes / sample_lines))
+            return MemoryEstimate(path, ext, file_size, estimated_rows, bytes_per_row,
+                                  int(estimated_rows * bytes_per_row))
+
+        if ext == ".parquet" and pq is not None:
+            parquet_file = pq.ParquetFile(path)
+            estimated_rows = parquet_file.metadata.num_rows
+            batch = next(parquet_file.iter_batches(batch_size=sample_rows), None)
+            if batch is None or batch.num_rows == 0:
+                return MemoryEstimate(path, ext, file_size, 0, None, 0)
+            sample = batch.to_pandas()
+            bytes_per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample)
+            return MemoryEstimate(path, ext, file_size, estimated_rows, bytes_per_row,
+                                  int(estimated_rows * bytes_per_row))
+    except Exception as e:
+        logger.warning(f"⚠️ فشل تقدير الحجم من العينة للملف {path.name}: {e}")
+
+    expansion = FORMAT_EXPANSION.get(ext, 2.0)
+    return MemoryEstimate(path, ext, file_size, None, None, int(file_size * expansion))
+
+
+def plan_execution(filepath: Union[str, Path],
+                   supported_modes: Sequence[str] = EXECUTION_MODES,
+                   budget_mb: Optional[float] = None) -> ExecutionPlan:
+    """
+    اختيار نمط التنفيذ للملف حسب الحجم المتوقع وميزانية الذاكرة.
+
+    - إذا كان الحجم المتوقع (× معامل الأمان) ضمن الميزانية: in_memory.
+    - وإلا chunked إذا كانت العملية تدعمه، ثم sampled.
+    - إذا لم يتوفر أي بديل مدعوم يبقى in_memory مع تحذير.
+    """
+    budget = get_memory_budget(budget_mb)
+    estimate = estimate_memory_footprint(filepath)
+    plan = ExecutionPlan(mode=IN_MEMORY, budget_bytes=budget, estimate=estimate)
+
+    if estimate is None or plan.required_bytes <= budget:
+        return plan
+
+    rows_in_budget = None
+    if estimate.bytes_per_row:
+        rows_in_budget = int(budget / (estimate.bytes_per_row * MEMORY_SAFETY_FACTOR))
+
+    streamable = estimate.file_format in TEXT_FORMATS or (estimate.file_format == ".parquet" and pq is not None)
+    if CHUNKED in supported_modes and streamable:
+        plan.mode = CHUNKED
+        plan.chunk_size = max(MIN_CHUNK_ROWS, rows_in_budget or MIN_CHUNK_ROWS)
+    elif SAMPLED in supported_modes:
+        plan.mode = SAMPLED
+        plan.sample_rows = max(1, min(MAX_SAMPLE_ROWS, rows_in_budget or MAX_SAMPLE_ROWS))
+    else:
+        logger.warning(f"⚠️ الملف {Path(filepath).name} يتجاوز ميزانية الذاكرة ولا يوجد نمط بديل مدعوم.")
+        return plan
+
+    logger.info(
+        f"🧠 خطة التنفيذ للملف {Path(filepath).name}: {plan.mode} "
+        f"(متوقع {plan.required_bytes / 1024 ** 2:.1f}MB، الميزانية {budget / 1024 ** 2:.1f}MB)"
+    )
+    return plan
+
+
+def iter_chunks(filepath: Union[str, Path], chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    قراءة الملف على دفعات. الصيغ غير القابلة للبث تُحمَّل كاملة كدفعة واحدة.
+    """
+    path = Path(filepath)
+    ext = path.suffix.lower()
+    if ext in TEXT_FORMATS:
+        yield from pd.read_csv(path, sep=TEXT_FORMATS[ext], chunksize=chunk_size)
+    elif ext == ".parquet" and pq is not None:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        logger.warning(f"⚠️ الصيغة {ext} لا تدعم القراءة على دفعات، سيتم تحميل الملف كاملًا.")
+        yield load_data(str(path))
+
+
+def load_sample(filepath: Union[str, Path], n_rows: int,
+                estimate: Optional[MemoryEstimate] = None, random_state: int = 42) -> pd.DataFrame:
+    """
+    تحميل عينة عشوائية بحجم تقريبي n_rows دون تحميل الملف كاملًا (CSV/TSV/Parquet).
+    """
+    path = Path(filepath)
+    ext = path.suffix.lower()
+    estimate = estimate or estimate_memory_footprint(path)
+    total_rows = estimate.estimated_rows if estimate else None
+    rng = np.random.default_rng(random_state)
+
+    if not total_rows or total_rows <= n_rows:
+        df = load_data(str(path))
+        return df if len(df) <= n_rows else df.sample(n=n_rows, random_state=random_state)
+
+    fraction = n_rows / total_rows
+    if ext in TEXT_FORMATS or (ext == ".parquet" and pq is not None):
+        # اختيار متجه لكل دفعة بدل استدعاء دالة بايثون ومولد عشوائي لكل صف (skiprows)
+        parts = [chunk[rng.random(len(chunk)) < fraction]
+                 for chunk in iter_chunks(path, max(MIN_CHUNK_ROWS * 10, n_rows))]
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    else:
+        df = load_data(str(path))
+        df = df.sample(n=min(n_rows, len(df)), random_state=random_state)
+
+    logger.info(f"🎯 تم تحميل عينة من {path.name}: {len(df)} صف من حوالي {total_rows}")
+    return df.reset_index(drop=True)
+
+
+def load_with_plan(filepath: Union[str, Path],
+                   supported_modes: Sequence[str] = (IN_MEMORY, SAMPLED),
+                   budget_mb: Optional[float] = None) -> Tuple[pd.DataFrame, ExecutionPlan]:
+    """
+    تحميل الملف حسب الخطة: كاملًا أو عينة. لا يدعم chunked لأنه يعيد DataFrame واحدًا.
+    """
+    modes = tuple(m for m in supported_modes if m != CHUNKED)
+    plan = plan_execution(filepath, supported_modes=modes, budget_mb=budget_mb)
+    if plan.mode == SAMPLED:
+        return load_sample(filepath, plan.sample_rows, estimate=plan.estimate), plan
+    return load_data(str(filepath)), plan
@@ -0,0 +1,67 @@
+"""
+utils/parallel.py
+
+مجموعات عمليات متوازية بطريقة بدء صريحة (performance.mp_start_method) بدل fork الافتراضي:
+fork من عملية فيها خيوط أخرى (عمال وضع المراقبة، عمال خطة التحليل) قد ينسخ أقفالًا محجوزة
+فيتجمد العامل. forkserver/spawn يبدآن العامل من عملية نظيفة، لذلك يجب أن تكون الدوال المرسلة
+ومعاملاتها قابلة للتسلسل (pickle).
+
+التوازي المتداخل: عامل يشغّل تحليلًا يفتح مجموعاته الخاصة (MI، مسح k، n_jobs=-1 في sklearn) قد يصل
+المجموع إلى (عدد الأنوية)² عملية أو خيطًا؛ limit_nested_parallelism كمُهيئ للعامل تحدد حصته، وكل
+مواضع تحديد عدد العمال تمر عبر resolve_workers فتلتزم بها.
+
+الاستخدام:
+    from data_intelligence_system.utils.parallel import process_pool
+
+    with process_pool(4) as executor:
+        results = list(executor.map(func, items))
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from data_intelligence_system.config.performance_config import MP_START_METHOD
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+_nested_limit: Optional[int] = None
+
+
+def get_mp_context(method: Optional[str] = None):
+    """سياق multiprocessing بالطريقة المطلوبة، أو spawn إذا لم تكن متاحة على النظام."""
+    method = method or MP_START_METHOD
+    if method not in multiprocessing.get_all_start_methods():
+        method = "spawn"
+    return multiprocessing.get_context(method)
+
+
+def process_pool(max_workers: int, method: Optional[str] = None, **kwargs) -> ProcessPoolExecutor:
+    """ProcessPoolExecutor بسياق بدء صريح (انظر get_mp_context)."""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=get_mp_context(method), **kwargs)
+
+
+def limit_nested_parallelism(n_workers: int) -> None:
+    """
+    مُهيئ عامل: حد العمليات/الخيوط للتحليلات المتداخلة في هذه العملية (resolve_workers)،
+    وخيوط BLAS/OpenMP بنفس الحد حتى لا تتنافس العمليات على الأنوية نفسها.
+    """
+    global _nested_limit
+    _nested_limit = max(1, int(n_workers))
+    if threadpool_limits is not None:
+        threadpool_limits(limits=_nested_limit)
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """
+    العدد الفعلي للعمال/الخيوط: None = 1 (كما في n_jobs بـ sklearn)، 0 أو سالب = عدد الأنوية؛
+    بحد limit_nested_parallelism داخل العمال.
+    """
+    if workers is None:
+        return 1
+    n = workers if workers > 0 else (os.cpu_count() or 1)
+    return min(n, _nested_limit) if _nested_limit else n
@@ -0,0 +1,226 @@
+"""
+utils/result_cache.py
+
+ذاكرة مؤقتة لنتائج التحليل بمفتاح (بصمة محتوى البيانات، اسم التحليل، المعلمات):
+    - بصمة الملف = تجزئة blake2b لمحتواه، تُحسب مرة لكل (حجم، وقت تعديل) وتتغير بتغير الملف
+    - طبقة ذاكرة LRU محدودة بالحجم (النتائج محفوظة مُسلسلة، فكل استرجاع نسخة مستقلة)
+    - طبقة قرص (ملف لكل نتيجة) محدودة بالحجم، الأقدم استخدامًا يُحذف أولًا
+    - invalidate(fingerprint) يحذف كل نتائج نسخة بيانات قديمة من الطبقتين
+
+الاستخدام:
+    from data_intelligence_system.utils.result_cache import file_fingerprint, get_result_cache
+
+    cache = get_result_cache()
+    result = cache.get_or_compute(file_fingerprint(path), "correlation", {"method": "pearson"},
+                                  lambda: run_correlation_analysis(df, method="pearson"))
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+from data_intelligence_system.config.paths_config import ANALYSIS_CACHE_DIR
+from data_intelligence_system.config.performance_config import (
+    ANALYSIS_CACHE_DISK_MB,
+    ANALYSIS_CACHE_ENABLED,
+    ANALYSIS_CACHE_MEMORY_MB,
+)
+from data_intelligence_system.utils.logger import get_logger
+
+logger = get_logger("ResultCache")
+
+HASH_BLOCK_BYTES = 1 << 20
+MISSING = object()
+
+_fingerprints: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_fingerprints_lock = threading.Lock()
+
+
+def file_fingerprint(path: Union[str, Path]) -> str:
+    """بصمة محتوى الملف؛ تُعاد المحفوظة ما دام حجم الملف ووقت تعديله لم يتغيرا."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _fingerprints_lock:
+        saved = _fingerprints.get(str(path))
+    if saved and saved[0] == signature:
+        return saved[1]
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    fingerprint = digest.hexdigest()
+    with _fingerprints_lock:
+        _fingerprints[str(path)] = (signature, fingerprint)
+    return fingerprint
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """بصمة محتوى DataFrame في الذاكرة (القيم والفهرس وأسماء الأعمدة وأنواعها)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    ذاكرة نتائج بطبقتين. المفاتيح (fingerprint, name, params) والقيم أي كائن قابل للتسلسل بـ pickle.
+    max_memory_mb / max_disk_mb حدود الحجم؛ cache_dir=None يعطّل طبقة القرص.
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = ANALYSIS_CACHE_DIR,
+                 max_memory_mb: float = ANALYSIS_CACHE_MEMORY_MB, max_disk_mb: float = ANALYSIS_CACHE_DISK_MB,
+                 enabled: bool = ANALYSIS_CACHE_ENABLED):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_bytes = int(max_memory_mb * 1024 ** 2)
+        self.max_disk_bytes = int(max_disk_mb * 1024 ** 2)
+        self.enabled = enabled
+        self._memory: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(fingerprint: str, name: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+        """(البصمة، تجزئة اسم التحليل ومعلماته مرتبة)."""
+        payload = json.dumps([name, params or {}], sort_keys=True, default=str)
+        return fingerprint, hashlib.blake2b(payload.encode(), digest_size=12).hexdigest()
+
+    def _disk_path(self, key: Tuple[str, str]) -> Path:
+        return self.cache_dir / f"{key[0]}_{key[1]}.pkl"
+
+    # ---------- القراءة والكتابة ----------
+    def get(self, key: Tuple[str, str]) -> Any:
+        """النتيجة المحفوظة أو MISSING."""
+        if not self.enabled:
+            return MISSING
+        with self._lock:
+            blob = self._memory.get(key)
+            if blob is not None:
+                self._memory.move_to_end(key)
+        if blob is None and self.cache_dir is not None:
+            path = self._disk_path(key)
+            try:
+                blob = path.read_bytes()
+                os.utime(path)  # وقت التعديل = آخر استخدام (لترتيب الحذف)
+            except OSError:
+                return MISSING
+            self._remember(key, blob)
+        if blob is None:
+            return MISSING
+        try:
+            return pickle.loads(blob)
+        except Exception as e:
+            logger.warning(f"⚠️ نتيجة محفوظة تالفة وسيتم تجاهلها: {e}")
+            self._discard(key)
+            return MISSING
+
+    def set(self, key: Tuple[str, str], value: Any, persist: bool = True) -> None:
+        """حفظ النتيجة في الذاكرة، وعلى القرص إذا persist. النتائج غير القابلة للتسلسل لا تُحفظ."""
+        if not self.enabled:
+            return
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"⚠️ تعذر حفظ النتيجة في الذاكرة المؤقتة: {e}")
+            return
+        self._remember(key, blob)
+        if persist and self.cache_dir is not None and len(blob) <= self.max_disk_bytes:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                path = self._disk_path(key)
+                tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(blob)
+                os.replace(tmp, path)
+                self._evict_disk()
+            except OSError as e:
+                logger.warning(f"⚠️ تعذر كتابة النتيجة على القرص: {e}")
+
+    def get_or_compute(self, fingerprint: str, name: str, params: Optional[Dict[str, Any]],
+                       compute: Callable[[], Any], persist: bool = True) -> Any:
+        """النتيجة المحفوظة إن وُجدت، وإلا compute() ثم حفظها."""
+        key = self.make_key(fingerprint, name, params)
+        value = self.get(key)
+        if value is not MISSING:
+            logger.info(f"⚡ نتيجة {name} من الذاكرة المؤقتة")
+            return value
+        value = compute()
+        self.set(key, value, persist=persist)
+        return value
+
+    # ---------- الإخلاء ----------
+    def _remember(self, key: Tuple[str, str], blob: bytes) -> None:
+        if len(blob) > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            self._memory_bytes -= len(old) if old is not None else 0
+            self._memory[key] = blob
+            self._memory_bytes += len(blob)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _discard(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            blob = self._memory.pop(key, None)
+            self._memory_bytes -= len(blob) if blob is not None else 0
+        if self.cache_dir is not None:
+            self._disk_path(key).unlink(missing_ok=True)
+
+    def _disk_entries(self, pattern: str = "*.pkl") -> list:
+        if self.cache_dir is None or not self.cache_dir.exists():
+            return []
+        entries = []
+        for path in self.cache_dir.glob(pattern):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        return entries
+
+    def _evict_disk(self) -> None:
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def invalidate(self, fingerprint: str) -> None:
+        """حذف كل النتائج المحفوظة لنسخة بيانات معينة."""
+        with self._lock:
+            for key in [key for key in self._memory if key[0] == fingerprint]:
+                self._memory_bytes -= len(self._memory.pop(key))
+        for _, _, path in self._disk_entries(f"{fingerprint}_*.pkl"):
+            path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for _, _, path in self._disk_entries():
+            path.unlink(missing_ok=True)
+
+
+_default_cache: Optional[ResultCache] = None
+_default_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """الذاكرة المؤقتة المشتركة لكل خدمات التحليل في العملية."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
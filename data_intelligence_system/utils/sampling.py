@@ -0,0 +1,216 @@
+"""
+utils/sampling.py
+
+عينات ممثِّلة بحجم محدود للمعاينات والتحليلات المكلفة (الرسوم، Silhouette) بدل head() أو كل الصفوف:
+    - DataFrame في الذاكرة: اختيار مواقع الصفوف مباشرة (rng.choice أو stratified_indices) ثم iloc
+    - reservoir: عينة عشوائية منتظمة من قارئ متدفق (أصغر k مفتاحًا عشوائيًا = bottom-k، قابلة للدمج)
+    - stratified: نفس الفكرة لكل طبقة (فئة / هدف / فترة زمنية / شرائح كمية للأعمدة الرقمية المستمرة)
+      ثم حصة كل طبقة بنسبة حجمها مع حد أدنى، فلا تختفي الفئات النادرة من العينة
+    - عينات الملفات محفوظة في ذاكرة النتائج بمفتاح بصمة الملف، فتتجدد تلقائيًا مع كل نسخة بيانات
+    - كل تحليل يعلن ميزانية عينته بالاسم (sample_budget) من الإعدادات
+
+الاستخدام:
+    from data_intelligence_system.utils.sampling import get_sample, sample_for
+
+    preview = get_sample("data/processed/sales.csv", 1000, by="region")
+    plot_df = sample_for(df, "target_plot", by="target")
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.config.performance_config import (
+    MIN_CHUNK_ROWS,
+    SAMPLE_BUDGETS,
+    SAMPLING_MAX_STRATA,
+)
+from data_intelligence_system.utils.logger import get_logger
+from data_intelligence_system.utils.memory_planner import iter_chunks
+from data_intelligence_system.utils.result_cache import ResultCache, file_fingerprint, get_result_cache
+
+logger = get_logger("Sampling")
+
+STRATA_BINS = 10
+_NA_STRATUM = "<NA>"
+_KEY, _POS, _STRATUM = "__sample_key__", "__sample_pos__", "__sample_stratum__"
+
+
+def sample_budget(analysis: str, default: Optional[int] = None) -> int:
+    """ميزانية عينة التحليل بالصفوف (performance.sample_budgets)."""
+    if analysis in SAMPLE_BUDGETS:
+        return int(SAMPLE_BUDGETS[analysis])
+    if default is None:
+        raise KeyError(f"❌ لا توجد ميزانية عينة للتحليل: {analysis}")
+    return int(default)
+
+
+def stratified_indices(strata: np.ndarray, n: int, min_per_stratum: int = 1,
+                       random_state: int = 42) -> np.ndarray:
+    """
+    مواقع عينة طبقية مرتبة: حصة كل طبقة بنسبة حجمها (بحد أدنى min_per_stratum وبحد أقصى حجمها).
+    المصفوفات الأصغر من n تُعاد كاملة.
+    """
+    strata = np.asarray(strata)
+    if len(strata) <= n:
+        return np.arange(len(strata))
+    rng = np.random.default_rng(random_state)
+    _, inverse, counts = np.unique(strata, return_inverse=True, return_counts=True)
+    quotas = np.minimum(counts, np.maximum(min_per_stratum, np.round(counts * n / len(strata)).astype(int)))
+    order = np.argsort(inverse, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    selected = [rng.choice(order[start:start + count], size=quota, replace=False)
+                for start, count, quota in zip(starts, counts, quotas)]
+    return np.sort(np.concatenate(selected))
+
+
+class StreamingSampler:
+    """
+    عينة (طبقية اختياريًا) من دفعات متتالية بذاكرة محدودة: لكل طبقة تُحفظ الصفوف ذات أصغر n مفتاح
+    عشوائي (عينة منتظمة بلا إرجاع داخل الطبقة) مع عدّ صفوفها، وتُوزَّع الحصص في النهاية.
+
+    by: عمود التقسيم (None = reservoir بلا طبقات). الأعمدة الزمنية تُقسَّم بفترات time_freq،
+    والرقمية بأكثر من SAMPLING_MAX_STRATA قيمة بشرائح كمية من الدفعة الأولى؛ والنصية بهذا العدد
+    من الفئات تُعاين بلا طبقات.
+    """
+
+    def __init__(self, n: int, by: Optional[str] = None, time_freq: str = "M", min_per_stratum: int = 1,
+                 random_state: int = 42):
+        self.n = int(n)
+        self.by = by
+        self.time_freq = time_freq
+        self.min_per_stratum = min_per_stratum
+        self.random_state = random_state
+        self._rng = np.random.default_rng(random_state)
+        self._edges: Optional[np.ndarray] = None
+        self._kept: Optional[pd.DataFrame] = None
+        self._counts = pd.Series(dtype="int64")
+        self._rows = 0
+
+    def _strata(self, chunk: pd.DataFrame) -> np.ndarray:
+        if self.by is None:
+            return np.zeros(len(chunk), dtype=np.int64)
+        series = chunk[self.by]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            if getattr(series.dt, "tz", None) is not None:
+                series = series.dt.tz_localize(None)
+            return series.dt.to_period(self.time_freq).astype(str).fillna(_NA_STRATUM).to_numpy()
+        if self._rows == 0 and series.nunique() > SAMPLING_MAX_STRATA:
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                values = series.to_numpy(dtype=float)
+                self._edges = np.unique(np.nanquantile(values, np.linspace(0, 1, STRATA_BINS + 1)[1:-1]))
+            else:
+                logger.warning(f"⚠️ العمود '{self.by}' كثير الفئات للتقسيم الطبقي، سيتم أخذ عينة عشوائية.")
+                self.by = None
+                return np.zeros(len(chunk), dtype=np.int64)
+        if self._edges is not None:
+            values = series.to_numpy(dtype=float)
+            return np.where(np.isnan(values), -1, np.searchsorted(self._edges, values, side="right"))
+        return series.astype(str).where(series.notna(), _NA_STRATUM).to_numpy()
+
+    def update(self, chunk: pd.DataFrame) -> "StreamingSampler":
+        if chunk is None or chunk.empty:
+            return self
+        strata = self._strata(chunk)
+        part = chunk.assign(**{_KEY: self._rng.random(len(chunk)),
+                               _POS: np.arange(self._rows, self._rows + len(chunk)),
+                               _STRATUM: strata})
+        self._rows += len(chunk)
+        self._counts = self._counts.add(pd.Series(strata).value_counts(), fill_value=0).astype("int64")
+        kept = part if self._kept is None else pd.concat([self._kept, part])
+        # أصغر n مفتاحًا لكل طبقة تكفي لأي حصة نهائية
+        kept = kept.sort_values([_STRATUM, _KEY], kind="stable")
+        self._kept = kept[kept.groupby(_STRATUM, sort=False).cumcount().to_numpy() < self.n]
+        return self
+
+    def result(self) -> pd.DataFrame:
+        """العينة بترتيب ظهور الصفوف في المصدر."""
+        if self._kept is None:
+            return pd.DataFrame()
+        kept = self._kept
+        if self._rows > self.n:
+            counts = self._counts.reindex(kept[_STRATUM].unique())
+            quotas = np.minimum(counts, np.maximum(self.min_per_stratum,
+                                                   np.round(counts * self.n / self._rows).astype(int)))
+            # kept مرتبة بالمفتاح داخل كل طبقة: أول quota صفوف = عينة منتظمة من الطبقة
+            rank = kept.groupby(_STRATUM, sort=False).cumcount().to_numpy()
+            kept = kept[rank < kept[_STRATUM].map(quotas).to_numpy()]
+        return kept.sort_values(_POS).drop(columns=[_KEY, _POS, _STRATUM])
+
+
+def _frame_strata(df: pd.DataFrame, by: str, time_freq: str) -> Optional[np.ndarray]:
+    """رموز الطبقات لـ DataFrame كامل بنفس قواعد StreamingSampler (None = بلا طبقات)."""
+    series = df[by]
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if getattr(series.dt, "tz", None) is not None:
+            series = series.dt.tz_localize(None)
+        return pd.factorize(series.dt.to_period(time_freq))[0]
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        # القرار وحدود الشرائح من أول دفعة كما في المسار المتدفق (دون nunique على كل الصفوف)
+        head = series.iloc[:MIN_CHUNK_ROWS * 10]
+        if head.nunique() > SAMPLING_MAX_STRATA:
+            edges = np.unique(np.nanquantile(head.to_numpy(dtype=float), np.linspace(0, 1, STRATA_BINS + 1)[1:-1]))
+            values = series.to_numpy(dtype=float)
+            return np.where(np.isnan(values), -1, np.searchsorted(edges, values, side="right"))
+    codes, uniques = pd.factorize(series)
+    if len(uniques) > SAMPLING_MAX_STRATA:
+        logger.warning(f"⚠️ العمود '{by}' كثير الفئات للتقسيم الطبقي، سيتم أخذ عينة عشوائية.")
+        return None
+    return codes
+
+
+def sample_frame(df: pd.DataFrame, n: int, by: Optional[str] = None, time_freq: str = "M",
+                 min_per_stratum: int = 1, random_state: int = 42) -> pd.DataFrame:
+    """
+    عينة DataFrame في الذاكرة باختيار المواقع مباشرة (iloc) دون نسخ الإطار أو ترتيبه؛
+    الترتيب والفهرس الأصليان محفوظان.
+    """
+    if len(df) <= n:
+        return df
+    strata = _frame_strata(df, by, time_freq) if by is not None else None
+    if strata is None:
+        rng = np.random.default_rng(random_state)
+        positions = np.sort(rng.choice(len(df), size=n, replace=False))
+    else:
+        positions = stratified_indices(strata, n, min_per_stratum, random_state)
+    return df.iloc[positions]
+
+
+def sample_chunks(chunks: Iterable[pd.DataFrame], n: int, by: Optional[str] = None, time_freq: str = "M",
+                  min_per_stratum: int = 1, random_state: int = 42) -> pd.DataFrame:
+    """عينة بحجم n تقريبًا من قارئ متدفق (reservoir، أو طبقية إذا حُدد by)."""
+    sampler = StreamingSampler(n, by=by, time_freq=time_freq, min_per_stratum=min_per_stratum,
+                               random_state=random_state)
+    for chunk in chunks:
+        sampler.update(chunk)
+    return sampler.result()
+
+
+def get_sample(source: Union[pd.DataFrame, str, Path], n: int, by: Optional[str] = None, time_freq: str = "M",
+               min_per_stratum: int = 1, random_state: int = 42, chunk_size: int = MIN_CHUNK_ROWS * 10,
+               cache: Optional[ResultCache] = None) -> pd.DataFrame:
+    """
+    عينة من DataFrame (فهرسه الأصلي محفوظ) أو من ملف يُقرأ على دفعات.
+    عينات الملفات تُحفظ بمفتاح بصمة الملف ومعلمات العينة (cache=None يعني الذاكرة المشتركة).
+    """
+    if isinstance(source, pd.DataFrame):
+        return sample_frame(source, n, by, time_freq, min_per_stratum, random_state)
+
+    path = Path(source)
+    params: Dict[str, Any] = {"n": n, "by": by, "time_freq": time_freq,
+                              "min_per_stratum": min_per_stratum, "random_state": random_state}
+
+    def compute() -> pd.DataFrame:
+        sample = sample_chunks(iter_chunks(path, chunk_size), n, by, time_freq, min_per_stratum, random_state)
+        logger.info(f"🎯 عينة {'طبقية حسب ' + by if by else 'عشوائية'} من {path.name}: {len(sample)} صف")
+        return sample.reset_index(drop=True)
+
+    cache = cache or get_result_cache()
+    return cache.get_or_compute(file_fingerprint(path), "sample", params, compute)
+
+
+def sample_for(df: pd.DataFrame, analysis: str, by: Optional[str] = None, **kwargs) -> pd.DataFrame:
+    """عينة df بميزانية التحليل المعلنة (البيانات الأصغر تُعاد كما هي)."""
+    return get_sample(df, sample_budget(analysis), by=by, **kwargs)
@@ -0,0 +1,163 @@
+"""
+utils/type_sniffing.py
+
+التعرف على أعمدة التواريخ من عينة صغيرة بدل تحويل العمود كاملًا لكل عمود نصي:
+    - تُجرَّب مجموعة ثابتة من الصيغ على عينة من القيم غير المفقودة
+    - يُعتمد العمود تاريخًا إذا نجحت صيغة واحدة على نسبة كافية من العينة
+    - القرارات تُحفظ في ذاكرة مؤقتة حسب مخطط البيانات (أسماء الأعمدة وأنواعها)
+    - التحويل الكامل يتم للأعمدة المؤكدة فقط وبصيغة صريحة
+
+الاستخدام:
+    from data_intelligence_system.utils.type_sniffing import sniff_datetime_columns, convert_datetime_columns
+
+    formats = sniff_datetime_columns(df)          # {"order_date": "%d/%m/%Y", ...}
+    df = convert_datetime_columns(df, formats)
+"""
+
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_intelligence_system.config.performance_config import (
+    DATETIME_SNIFF_SAMPLE_ROWS,
+    DATETIME_SNIFF_MIN_RATIO,
+    DATETIME_SNIFF_CACHE_SIZE,
+)
+from data_intelligence_system.utils.logger import get_logger
+
+logger = get_logger(name="TypeSniffing")
+
+# الترتيب مهم عند التعادل (مثل 01/02/2024): الصيغة الأسبق تُعتمد
+CANDIDATE_DATE_FORMATS: Tuple[str, ...] = (
+    "ISO8601",              # 2024-01-31 / 2024-01-31 10:00:00 / 2024-01-31T10:00:00Z
+    "%d/%m/%Y",
+    "%m/%d/%Y",
+    "%Y/%m/%d",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%Y/%m/%d %H:%M:%S",
+    "%d %b %Y",
+    "%b %d, %Y",
+)
+
+SchemaKey = Tuple[Tuple[str, str], ...]
+
+_cache: "OrderedDict[Tuple[SchemaKey, Tuple[str, ...]], Dict[str, Optional[str]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def schema_key(df: pd.DataFrame) -> SchemaKey:
+    """مفتاح مخطط البيانات: أسماء الأعمدة وأنواعها بالترتيب."""
+    return tuple((str(col), str(dtype)) for col, dtype in df.dtypes.items())
+
+
+def clear_sniff_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _sample_values(series: pd.Series, sample_size: int) -> pd.Series:
+    """عينة حتمية من القيم غير المفقودة: موزعة على طول العمود وليست من أوله فقط."""
+    if len(series) > sample_size:
+        positions = np.linspace(0, len(series) - 1, sample_size).astype(np.int64)
+        values = series.iloc[positions].dropna()
+        if len(values) < sample_size // 2:
+            # عمود معظمه مفقود: العينة من القيم الموجودة فقط
+            values = series.dropna()
+            values = values.iloc[np.linspace(0, len(values) - 1, min(sample_size, len(values))).astype(np.int64)]
+    else:
+        values = series.dropna()
+    return values.astype(str).str.strip()
+
+
+def sniff_datetime_format(series: pd.Series, formats: Sequence[str] = CANDIDATE_DATE_FORMATS,
+                          sample_size: int = DATETIME_SNIFF_SAMPLE_ROWS,
+                          min_ratio: float = DATETIME_SNIFF_MIN_RATIO) -> Optional[str]:
+    """
+    صيغة التاريخ الأنسب للعمود من عينة، أو None إذا لم يكن عمود تاريخ.
+    القيم الرقمية الخالصة (مثل 2024 أو 17) لا تُعد تواريخ.
+    """
+    sample = _sample_values(series, sample_size)
+    if sample.empty:
+        return None
+    # رفض سريع قبل تجربة الصيغ: كل الصيغ تحتاج أرقامًا، والأرقام الخالصة (مثل 2024 أو 17) ليست تواريخ
+    if sample.str.contains(r"\d", regex=True).mean() < min_ratio or sample.str.fullmatch(r"[+-]?\d+(\.\d+)?").all():
+        return None
+
+    best_format, best_ratio = None, 0.0
+    for fmt in formats:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                parsed = pd.to_datetime(sample, format=fmt, errors="coerce")
+        except (ValueError, TypeError):
+            continue
+        ratio = float(parsed.notna().mean())
+        if ratio > best_ratio:
+            best_format, best_ratio = fmt, ratio
+        if ratio == 1.0:
+            break
+    return best_format if best_ratio >= min_ratio else None
+
+
+def sniff_datetime_columns(df: pd.DataFrame, formats: Sequence[str] = CANDIDATE_DATE_FORMATS,
+                           sample_size: int = DATETIME_SNIFF_SAMPLE_ROWS,
+                           min_ratio: float = DATETIME_SNIFF_MIN_RATIO,
+                           use_cache: bool = True) -> Dict[str, str]:
+    """
+    أعمدة التواريخ المؤكدة في الأعمدة النصية مع صيغة كل منها {عمود: صيغة}.
+    مع use_cache تُعاد القرارات المحفوظة لنفس مخطط البيانات ونفس الصيغ دون فحص جديد.
+    """
+    key = (schema_key(df), tuple(formats))
+    # من dtypes مباشرة: select_dtypes ينسخ بيانات الأعمدة
+    object_cols = [col for col, dtype in zip(df.columns, df.dtypes) if dtype == object]
+    if not object_cols:
+        return {}
+
+    if use_cache:
+        with _cache_lock:
+            decisions = _cache.get(key)
+            if decisions is not None:
+                _cache.move_to_end(key)
+                return {col: fmt for col, fmt in decisions.items() if fmt}
+
+    decisions = {col: sniff_datetime_format(df[col], formats, sample_size, min_ratio) for col in object_cols}
+    detected = {col: fmt for col, fmt in decisions.items() if fmt}
+    if detected:
+        logger.info(f"🗓️ أعمدة تواريخ مكتشفة من العينة: {detected}")
+
+    if use_cache:
+        with _cache_lock:
+            _cache[key] = decisions
+            while len(_cache) > DATETIME_SNIFF_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return detected
+
+
+def convert_datetime_columns(df: pd.DataFrame, formats: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    تحويل الأعمدة المؤكدة فقط بصيغها الصريحة (في نفس الـ DataFrame).
+    العمود الذي ينتج تحويله قيمًا مفقودة بالكامل يبقى كما هو.
+    """
+    formats = sniff_datetime_columns(df) if formats is None else formats
+    for col, fmt in formats.items():
+        if col not in df.columns:
+            continue
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                converted = pd.to_datetime(df[col], format=fmt, errors="coerce")
+        except (ValueError, TypeError) as e:
+            logger.warning(f"⚠️ فشل تحويل العمود '{col}' بالصيغة {fmt}: {e}")
+            continue
+        if not converted.isnull().all():
+            df[col] = converted
+    return df